@@ -0,0 +1,139 @@
+# core/conditional.py
+
+import hashlib
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.http import http_date
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from rest_framework.response import Response
+
+from core import metrics, profilage
+
+CACHE_TAILLE_PREFIX = "conditional-get:taille:"
+CACHE_TAILLE_TIMEOUT = 60 * 60
+
+
+class ConditionalGetMixin:
+    """
+    GET conditionnel (ETag / Last-Modified) pour list & retrieve.
+
+    Validateur calculé en UNE requête d'agrégat sur le queryset filtré :
+    MAX(validator_field) + COUNT(*).
+    Si le client possède déjà la version → 304 avant toute sérialisation.
+
+    - validator_field = "updated_at" pour les modèles modifiables
+    - validator_field = "id" pour les journaux append-only
+    """
+
+    validator_field = "updated_at"
+
+    # ==========================================================
+    # VALIDATEURS
+    # ==========================================================
+    def _calculer_etag(self, request, dernier, total):
+        brut = "|".join([
+            request.get_full_path(),
+            str(getattr(request.user, "pk", "")),
+            str(dernier),
+            str(total),
+        ])
+        return '"%s"' % hashlib.md5(brut.encode()).hexdigest()
+
+    def _last_modified(self, dernier):
+        if isinstance(dernier, datetime):
+            return int(dernier.timestamp())
+        return None
+
+    def _reponse_conditionnelle(self, request, etag, last_modified):
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+        vue = self.__class__.__name__
+        metrics.incrementer("conditional_get_requests_total", view=vue)
+
+        if response is None:
+            return None
+
+        # 📉 Bande passante économisée (taille du dernier 200 pour cet ETag).
+        # Ce mémo sert seulement à chiffrer les octets économisés ; ce n'est
+        # pas un cache de données (le taux de revalidation est donné par
+        # conditional_get_not_modified_total / conditional_get_requests_total).
+        economise = cache.get(CACHE_TAILLE_PREFIX + etag)
+        metrics.incrementer(
+            "conditional_get_taille_memo_total",
+            resultat="miss" if economise is None else "hit",
+        )
+        economise = economise or 0
+        metrics.incrementer("conditional_get_not_modified_total", view=vue)
+        metrics.incrementer("conditional_get_bytes_saved_total", economise, view=vue)
+
+        return self._ajouter_validateurs(response, etag, last_modified)
+
+    def _ajouter_validateurs(self, response, etag, last_modified):
+        response["ETag"] = etag
+
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+
+        if isinstance(response, Response):
+            def memoriser_taille(rendered):
+                cache.set(
+                    CACHE_TAILLE_PREFIX + etag,
+                    len(rendered.content),
+                    CACHE_TAILLE_TIMEOUT,
+                )
+            response.add_post_render_callback(memoriser_taille)
+
+        return response
+
+    # ==========================================================
+    # LIST
+    # ==========================================================
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        agregat = queryset.order_by().aggregate(
+            dernier=Max(self.validator_field),
+            total=Count("pk"),
+        )
+
+        etag = self._calculer_etag(request, agregat["dernier"], agregat["total"])
+        last_modified = self._last_modified(agregat["dernier"])
+
+        response = self._reponse_conditionnelle(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        response = super().list(request, *args, **kwargs)
+        return self._ajouter_validateurs(response, etag, last_modified)
+
+    # ==========================================================
+    # RETRIEVE
+    # ==========================================================
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        dernier = getattr(instance, self.validator_field, None)
+        etag = self._calculer_etag(request, dernier, instance.pk)
+        last_modified = self._last_modified(dernier)
+
+        response = self._reponse_conditionnelle(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        with profilage.segment("serialisation"):
+            serializer = self.get_serializer(instance)
+            response = Response(serializer.data)
+        return self._ajouter_validateurs(response, etag, last_modified)
@@ -0,0 +1,308 @@
+# core/db_router.py
+"""
+Routage multi-bases.
+
+1. ReplicaRouter : lectures lourdes (dashboards, rapports, exports)
+   vers l'alias "replica".
+
+Seules les vues désignées lisent sur le replica :
+- @lecture_replica sur une méthode de vue DRF (get, list...) ;
+- LectureReplicaMixin sur un ViewSet (méthodes sûres uniquement).
+
+Restent sur le primaire :
+- toute écriture, et toute lecture qui suit une écriture
+  dans la même requête ou dans une transaction ouverte ;
+- un utilisateur qui vient d'écrire, pendant REPLICA_LAG_TOLERANCE
+  secondes (épinglage posé par ReplicaMiddleware, via le cache :
+  partagé entre workers, REDIS_URL ; vérifié au démarrage par
+  verifier_cache_epinglage()).
+
+Sans alias "replica" dans DATABASES, le routeur est neutre.
+
+2. TenantRouter : base dédiée pour les très gros tenants
+   (TENANT_DATABASES = {tenant_id: alias}). Les modèles des apps
+   APPS_TENANT suivent la base du tenant courant, posée par
+   TenantDatabaseMiddleware (claim JWT tenant_id) ou par
+   utiliser_tenant() / utiliser_base() hors requête (workers).
+   Tables partagées (core_tenant, utilisateurs) : base "default",
+   recopiées sur la base du tenant comme cibles de clés étrangères
+   (core.referentiel).
+
+   Hors routeur, les transactions et le SQL brut visent "default" :
+   les services utilisent atomic_tenant() et connexion_tenant().
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+ALIAS_REPLICA = "replica"
+CACHE_EPINGLE_PREFIX = "replica:epingle:"
+
+# Caches propres à chaque processus : un worker ne voit pas l'épinglage
+# posé par un autre
+CACHES_LOCAUX = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+_lecture = ContextVar("lecture_replica", default=None)
+
+
+class _Lecture:
+    """État de la vue en cours : écriture déjà faite ? utilisateur épinglé ?"""
+
+    __slots__ = ("ecrit", "epingle")
+
+    def __init__(self, epingle):
+        self.ecrit = False
+        self.epingle = epingle
+
+
+def replica_disponible():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+# ============================================================
+# ÉPINGLAGE APRÈS ÉCRITURE
+# ============================================================
+
+def _cle_epingle(user):
+    return f"{CACHE_EPINGLE_PREFIX}{user.pk}"
+
+
+def epingler(user):
+    tolerance = getattr(settings, "REPLICA_LAG_TOLERANCE", 5)
+    if tolerance > 0:
+        cache.set(_cle_epingle(user), True, tolerance)
+
+
+def est_epingle(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return bool(cache.get(_cle_epingle(user)))
+
+
+def verifier_cache_epinglage():
+    """
+    Replica + épinglage sur un cache local au processus : la lecture
+    après écriture n'est pas garantie entre workers.
+    Refus au démarrage hors DEBUG, avertissement sinon.
+    """
+    if not replica_disponible() or getattr(settings, "REPLICA_LAG_TOLERANCE", 5) <= 0:
+        return
+
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend not in CACHES_LOCAUX:
+        return
+
+    message = (
+        f"Replica configuré avec un cache local au processus ({backend}) : "
+        "l'épinglage après écriture ne suit pas l'utilisateur d'un worker "
+        "à l'autre. Définir REDIS_URL (cache partagé) ou REPLICA_LAG_TOLERANCE=0."
+    )
+    if not settings.DEBUG:
+        raise ImproperlyConfigured(message)
+    logger.warning(message)
+
+
+# ============================================================
+# DÉSIGNATION DES VUES
+# ============================================================
+
+@contextmanager
+def utiliser_replica(user=None):
+    """
+    Lectures du bloc sur le replica (sauf épinglage / écriture).
+    """
+    if not replica_disponible():
+        yield
+        return
+
+    jeton = _lecture.set(_Lecture(epingle=est_epingle(user)))
+    try:
+        yield
+    finally:
+        _lecture.reset(jeton)
+
+
+def lecture_replica(methode):
+    """
+    Décorateur de méthode de vue DRF (authentification déjà faite).
+    """
+    @wraps(methode)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return methode(self, request, *args, **kwargs)
+
+        with utiliser_replica(request.user):
+            return methode(self, request, *args, **kwargs)
+
+    return wrapper
+
+
+class LectureReplicaMixin:
+    """
+    ViewSet / APIView : méthodes sûres servies par le replica,
+    une fois l'utilisateur authentifié (initial) et jusqu'à la
+    réponse finale.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if request.method in SAFE_METHODS:
+            self._replica = utiliser_replica(request.user)
+            self._replica.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica = getattr(self, "_replica", None)
+        if replica is not None:
+            self._replica = None
+            replica.__exit__(None, None, None)
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+# ============================================================
+# ROUTEUR
+# ============================================================
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        lecture = _lecture.get()
+
+        if lecture is None or lecture.ecrit or lecture.epingle:
+            return None
+
+        # Lecture dans une transaction du primaire : read-after-write
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+
+        return ALIAS_REPLICA
+
+    def db_for_write(self, model, **hints):
+        lecture = _lecture.get()
+        if lecture is not None:
+            lecture.ecrit = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaire et replica portent les mêmes données
+        alias = {DEFAULT_DB_ALIAS, ALIAS_REPLICA}
+        if obj1._state.db in alias and obj2._state.db in alias:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == ALIAS_REPLICA:
+            return False
+        return None
+
+
+# ============================================================
+# BASE PAR TENANT
+# ============================================================
+
+# Apps dont les modèles appartiennent à un tenant
+APPS_TENANT = {"stations", "finances_station", "core"}
+
+_base_tenant = ContextVar("base_tenant", default=None)
+
+
+def alias_du_tenant(tenant_id):
+    """Alias dédié du tenant, None s'il est sur la base partagée."""
+    if tenant_id is None:
+        return None
+    return getattr(settings, "TENANT_DATABASES", {}).get(str(tenant_id))
+
+
+def aliases_tenants():
+    return sorted(set(getattr(settings, "TENANT_DATABASES", {}).values()))
+
+
+def bases_tenants():
+    """Toutes les bases portant des données tenant (workers, commandes)."""
+    return [DEFAULT_DB_ALIAS, *aliases_tenants()]
+
+
+def alias_courant():
+    return _base_tenant.get() or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def utiliser_base(alias):
+    jeton = _base_tenant.set(None if alias == DEFAULT_DB_ALIAS else alias)
+    try:
+        yield
+    finally:
+        _base_tenant.reset(jeton)
+
+
+def utiliser_tenant(tenant_id):
+    return utiliser_base(alias_du_tenant(tenant_id) or DEFAULT_DB_ALIAS)
+
+
+def connexion_tenant():
+    return connections[alias_courant()]
+
+
+def atomic_tenant(fonction=None, **kwargs):
+    """
+    transaction.atomic sur la base du tenant courant, résolue à
+    l'exécution (et non à l'import, comme @transaction.atomic).
+
+        @atomic_tenant
+        def service(...): ...
+
+        with atomic_tenant():
+            ...
+    """
+    if fonction is None:
+        return transaction.atomic(using=alias_courant(), **kwargs)
+
+    @wraps(fonction)
+    def wrapper(*args, **kw):
+        with transaction.atomic(using=alias_courant(), **kwargs):
+            return fonction(*args, **kw)
+
+    return wrapper
+
+
+class TenantRouter:
+    """
+    Placé avant ReplicaRouter : un tenant isolé ne lit pas sur le
+    replica (qui ne porte que la base partagée).
+    """
+
+    def _alias(self, model):
+        alias = _base_tenant.get()
+        if alias is not None and model._meta.app_label in APPS_TENANT:
+            return alias
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._alias(model)
+
+    def db_for_write(self, model, **hints):
+        return self._alias(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Référentiel partagé recopié sur chaque base de tenant
+        if obj1._state.db in settings.DATABASES and obj2._state.db in settings.DATABASES:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Schéma complet sur chaque base de tenant (cibles de FK comprises)
+        return None
@@ -0,0 +1,159 @@
+# core/export.py
+"""
+Export CSV / XLSX en flux des listes de ViewSet : ?format=csv|xlsx.
+
+Le queryset est celui de la liste (get_queryset + filter_queryset :
+mêmes filtres, même périmètre tenant / station), lu par
+.iterator(chunk_size) — curseur serveur sous PostgreSQL.
+
+CSV : écrit ligne à ligne dans une StreamingHttpResponse, mémoire
+constante quel que soit le volume (seul format garanti en flux).
+
+XLSX : openpyxl optionnel (mode write_only). Le classeur est assemblé
+dans un fichier temporaire avant le premier octet envoyé : ce n'est
+pas un flux, d'où le plafond EXPORT_XLSX_MAX_LIGNES (400 au-delà).
+
+Colonnes : export_champs = ((entête, chemin ORM), ...) sur le ViewSet.
+Les textes commençant par =, +, -, @, tabulation ou retour chariot
+sont préfixés d'une apostrophe (injection de formules dans le tableur).
+"""
+
+import csv
+import tempfile
+from datetime import datetime
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import NotAcceptable, ValidationError
+
+from core import metrics
+
+FORMATS_EXPORT = ("csv", "xlsx")
+
+TAILLE_LOT = 2000
+TAILLE_BLOC = 64 * 1024
+
+TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Premiers caractères interprétés comme formule par Excel / LibreOffice
+DEBUTS_FORMULE = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _Tampon:
+    """Cible de csv.writer : retourne la ligne au lieu de l'écrire."""
+
+    def write(self, valeur):
+        return valeur
+
+
+def _valeur(valeur):
+    if isinstance(valeur, datetime) and timezone.is_aware(valeur):
+        return timezone.localtime(valeur).replace(tzinfo=None)
+    if isinstance(valeur, str) and valeur.startswith(DEBUTS_FORMULE):
+        return "'" + valeur
+    return valeur
+
+
+def lignes_csv(entetes, lignes):
+    writer = csv.writer(_Tampon(), delimiter=";")
+    # BOM : accents lisibles à l'ouverture dans Excel
+    yield "\ufeff" + writer.writerow(entetes)
+    for ligne in lignes:
+        yield writer.writerow([
+            "" if valeur is None else _valeur(valeur)
+            for valeur in ligne
+        ])
+
+
+def blocs_xlsx(entetes, lignes, titre="Export"):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise NotAcceptable("Export XLSX indisponible (openpyxl non installé).")
+
+    def generer():
+        classeur = Workbook(write_only=True)
+        feuille = classeur.create_sheet(titre[:31])
+        feuille.append(list(entetes))
+        for ligne in lignes:
+            feuille.append([_valeur(valeur) for valeur in ligne])
+
+        with tempfile.TemporaryFile() as fichier:
+            classeur.save(fichier)
+            fichier.seek(0)
+            while bloc := fichier.read(TAILLE_BLOC):
+                yield bloc
+
+    return generer()
+
+
+class ExportMixin:
+    """
+    À placer AVANT ConditionalGetMixin : l'export n'est ni paginé
+    ni soumis au GET conditionnel.
+    """
+
+    export_champs = ()
+    export_nom = None
+
+    def _format_export(self, request):
+        if getattr(self, "action", None) != "list" or not self.export_champs:
+            return None
+        format_export = request.query_params.get("format")
+        return format_export if format_export in FORMATS_EXPORT else None
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format=csv n'a pas de renderer DRF : erreurs éventuelles en JSON
+        if self._format_export(request):
+            renderer = self.get_renderers()[0]
+            return renderer, renderer.media_type
+        return super().perform_content_negotiation(request, force)
+
+    def list(self, request, *args, **kwargs):
+        format_export = self._format_export(request)
+        if format_export is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # Base résolue maintenant : le flux est lu après la vue,
+        # hors du contexte tenant / replica de la requête
+        queryset = queryset.using(queryset.db).prefetch_related(None)
+
+        entetes = [entete for entete, _ in self.export_champs]
+        lignes = queryset.values_list(
+            *(chemin for _, chemin in self.export_champs)
+        ).iterator(chunk_size=TAILLE_LOT)
+
+        nom = self.export_nom or queryset.model._meta.model_name
+        nom = f"{nom}-{timezone.localdate():%Y%m%d}"
+
+        if format_export == "xlsx":
+            # Classeur construit en entier avant l'envoi : volume borné
+            total = queryset.count()
+            if total > settings.EXPORT_XLSX_MAX_LIGNES:
+                raise ValidationError({
+                    "format": (
+                        f"Export XLSX limité à {settings.EXPORT_XLSX_MAX_LIGNES} lignes "
+                        f"({total} demandées) : utiliser ?format=csv."
+                    )
+                })
+
+        if format_export == "csv":
+            response = StreamingHttpResponse(
+                lignes_csv(entetes, lignes),
+                content_type="text/csv; charset=utf-8",
+            )
+        else:
+            response = StreamingHttpResponse(
+                blocs_xlsx(entetes, lignes, nom),
+                content_type=TYPE_XLSX,
+            )
+
+        response["Content-Disposition"] = f'attachment; filename="{nom}.{format_export}"'
+        metrics.incrementer(
+            "exports_total",
+            view=self.__class__.__name__,
+            format=format_export,
+        )
+        return response
@@ -0,0 +1,46 @@
+# core/management/commands/export_tenant.py
+"""
+Export d'un tenant (NDJSON gzip, cf. core.transfert).
+
+    python manage.py export_tenant <tenant_id> --sortie tenant.ndjson.gz
+    python manage.py export_tenant <tenant_id> --sortie - | ssh noeud2 ...
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.transfert import TAILLE_LOT, TransfertError, exporter
+
+
+class Command(BaseCommand):
+    help = "Exporte toutes les données d'un tenant en NDJSON compressé"
+
+    def add_arguments(self, parser):
+        parser.add_argument("tenant_id")
+        parser.add_argument(
+            "--sortie",
+            help="Fichier de sortie (défaut : tenant-<id>.ndjson.gz ; - = stdout)",
+        )
+        parser.add_argument("--taille-lot", type=int, default=TAILLE_LOT)
+
+    def handle(self, *args, **options):
+        tenant_id = options["tenant_id"]
+        sortie = options["sortie"] or f"tenant-{tenant_id}.ndjson.gz"
+
+        # Sur stdout, le rapport passe sur stderr
+        rapport = self.stderr if sortie == "-" else self.stdout
+
+        try:
+            if sortie == "-":
+                comptes = exporter(tenant_id, sys.stdout.buffer, options["taille_lot"])
+            else:
+                with open(sortie, "wb") as fichier:
+                    comptes = exporter(tenant_id, fichier, options["taille_lot"])
+        except TransfertError as exc:
+            raise CommandError(str(exc))
+
+        for label, nombre in comptes.items():
+            rapport.write(f"  {label:45} {nombre:>10}")
+
+        rapport.write(f"Tenant {tenant_id} exporté : {sum(comptes.values())} objets")
@@ -0,0 +1,52 @@
+# core/management/commands/import_tenant.py
+"""
+Import d'un export_tenant sur ce nœud (cf. core.transfert).
+
+Base cible : celle du tenant dans TENANT_DATABASES, sinon "default"
+(déclarer le tenant avant l'import pour l'isoler).
+
+    python manage.py import_tenant tenant.ndjson.gz
+    python manage.py import_tenant tenant.ndjson.gz --essai
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.transfert import TAILLE_LOT, TransfertError, importer
+
+
+class Command(BaseCommand):
+    help = "Importe un tenant exporté par export_tenant (PK remappées, contrôles)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("fichier", help="Export NDJSON gzip (- = stdin)")
+        parser.add_argument("--taille-lot", type=int, default=TAILLE_LOT)
+        parser.add_argument(
+            "--essai",
+            action="store_true",
+            help="Import complet et contrôles, puis annulation",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options["fichier"] == "-":
+                rapport = importer(sys.stdin.buffer, options["taille_lot"], options["essai"])
+            else:
+                with open(options["fichier"], "rb") as fichier:
+                    rapport = importer(fichier, options["taille_lot"], options["essai"])
+        except TransfertError as exc:
+            raise CommandError(str(exc))
+
+        for label, nombre in rapport["comptes"].items():
+            self.stdout.write(f"  {label:45} {nombre:>10}")
+
+        if rapport["orphelins"]:
+            self.stdout.write(self.style.WARNING(
+                f"{rapport['orphelins']} références source_id sans source exportée (conservées)"
+            ))
+
+        etat = "vérifié (essai, rien n'est conservé)" if options["essai"] else "importé"
+        self.stdout.write(self.style.SUCCESS(
+            f"Tenant {rapport['tenant']} {etat} sur la base {rapport['base']}"
+        ))
@@ -0,0 +1,76 @@
+# core/management/commands/migrate_tenants.py
+"""
+Migrations de toutes les bases : "default" puis chaque base de
+tenant isolé (TENANT_DATABASES), puis recopie du référentiel
+partagé (tenant, stations, utilisateurs ; cf. core.referentiel).
+
+    python manage.py migrate_tenants
+    python manage.py migrate_tenants --alias tenant_distrib --sans-default
+"""
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core.db_router import aliases_tenants
+from core.referentiel import synchroniser_referentiel
+
+
+class Command(BaseCommand):
+    help = "Applique les migrations sur la base partagée et sur chaque base de tenant"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--alias",
+            action="append",
+            dest="aliases",
+            help="Limiter à ces bases de tenant (répétable)",
+        )
+        parser.add_argument(
+            "--sans-default",
+            action="store_true",
+            help="Ne pas migrer la base partagée",
+        )
+        parser.add_argument(
+            "--sans-referentiel",
+            action="store_true",
+            help="Ne pas recopier tenant / stations / utilisateurs",
+        )
+
+    def handle(self, *args, **options):
+        aliases = options["aliases"] or aliases_tenants()
+
+        inconnus = set(aliases) - set(aliases_tenants())
+        if inconnus:
+            raise CommandError(
+                f"Alias absents de TENANT_DATABASES : {', '.join(sorted(inconnus))}"
+            )
+
+        verbosite = options["verbosity"]
+
+        if not options["sans_default"]:
+            self._migrer(DEFAULT_DB_ALIAS, verbosite)
+
+        for alias in aliases:
+            self._migrer(alias, verbosite)
+
+        if options["sans_referentiel"]:
+            return
+
+        for tenant_id, alias in settings.TENANT_DATABASES.items():
+            if alias not in aliases:
+                continue
+
+            lignes = synchroniser_referentiel(tenant_id)
+            self.stdout.write(f"  Référentiel {tenant_id} → {alias} : {lignes} lignes")
+
+    def _migrer(self, alias, verbosite):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Base {alias}"))
+        call_command(
+            "migrate",
+            database=alias,
+            interactive=False,
+            verbosity=verbosite,
+            stdout=self.stdout,
+        )
@@ -0,0 +1,298 @@
+# core/metrics.py
+"""
+Métriques applicatives : compteurs et histogrammes en mémoire,
+exposés au format texte Prometheus (core.views_metrics).
+
+Usage :
+    from core import metrics
+    metrics.incrementer("conditional_get_not_modified_total", view="relais")
+    metrics.observer("http_request_duration_seconds", 0.042, route="...", method="GET")
+
+Multi-processus (workers gunicorn) : si METRICS_MULTIPROC_DIR est
+défini, chaque processus recopie son état dans <dir>/<pid>.json
+(au plus une fois par METRICS_INTERVALLE_ECRITURE secondes, et à
+la sortie) ; l'exposition additionne tous les fichiers.
+Le répertoire est vidé au démarrage du master (gunicorn.conf.py).
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from core.db_router import alias_courant
+
+_lock = threading.Lock()
+_compteurs = defaultdict(float)
+_histogrammes = {}
+_dernier_ecrit = 0.0
+
+# Secondes
+BORNES_DEFAUT = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _cle(nom, labels):
+    return nom, tuple(sorted(labels.items()))
+
+
+def _repertoire():
+    return getattr(settings, "METRICS_MULTIPROC_DIR", None)
+
+
+# ============================================================
+# COMPTEURS
+# ============================================================
+
+def incrementer(nom, valeur=1, **labels):
+    with _lock:
+        _compteurs[_cle(nom, labels)] += valeur
+    _ecrire_si_du()
+
+
+def incrementer_au_commit(nom, valeur=1, **labels):
+    """
+    Compté à la validation de la transaction courante (base du
+    tenant courant ; immédiatement hors transaction, jamais en cas
+    de rollback).
+    """
+    transaction.on_commit(
+        partial(incrementer, nom, valeur, **labels),
+        using=alias_courant(),
+    )
+
+
+def valeur(nom, **labels):
+    """Valeur locale au processus (tests, bench)."""
+    with _lock:
+        return _compteurs.get(_cle(nom, labels), 0)
+
+
+def snapshot():
+    """
+    Copie des compteurs : {(nom, ((label, valeur), ...)): total}
+    """
+    with _lock:
+        return dict(_compteurs)
+
+
+def reinitialiser():
+    with _lock:
+        _compteurs.clear()
+        _histogrammes.clear()
+
+
+# ============================================================
+# HISTOGRAMMES
+# ============================================================
+
+def observer(nom, valeur, bornes=BORNES_DEFAUT, **labels):
+    """
+    Ajoute une observation (ex. une durée en secondes).
+    Les bornes sont fixées à la première observation de la série.
+    """
+    cle = _cle(nom, labels)
+
+    with _lock:
+        serie = _histogrammes.get(cle)
+        if serie is None:
+            serie = _histogrammes[cle] = {
+                "bornes": list(bornes),
+                "buckets": [0] * len(bornes),
+                "somme": 0.0,
+                "total": 0,
+            }
+
+        for index, borne in enumerate(serie["bornes"]):
+            if valeur <= borne:
+                serie["buckets"][index] += 1
+                break
+
+        serie["somme"] += valeur
+        serie["total"] += 1
+
+    _ecrire_si_du()
+
+
+def histogramme(nom, **labels):
+    with _lock:
+        serie = _histogrammes.get(_cle(nom, labels))
+        return dict(serie, buckets=list(serie["buckets"])) if serie else None
+
+
+# ============================================================
+# PERSISTANCE MULTI-PROCESSUS
+# ============================================================
+
+def _etat():
+    with _lock:
+        return {
+            "compteurs": [
+                [nom, list(labels), total]
+                for (nom, labels), total in _compteurs.items()
+            ],
+            "histogrammes": [
+                [nom, list(labels), dict(serie, buckets=list(serie["buckets"]))]
+                for (nom, labels), serie in _histogrammes.items()
+            ],
+        }
+
+
+def ecrire():
+    """
+    Recopie l'état du processus (écriture atomique : tmp + rename).
+    """
+    global _dernier_ecrit
+
+    repertoire = _repertoire()
+    if not repertoire:
+        return
+
+    _dernier_ecrit = time.monotonic()
+    chemin = os.path.join(repertoire, f"{os.getpid()}.json")
+    temporaire = f"{chemin}.{threading.get_ident()}.tmp"
+
+    os.makedirs(repertoire, exist_ok=True)
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(_etat(), f)
+    os.replace(temporaire, chemin)
+
+
+def _ecrire_si_du():
+    intervalle = getattr(settings, "METRICS_INTERVALLE_ECRITURE", 1.0)
+    if _repertoire() and time.monotonic() - _dernier_ecrit >= intervalle:
+        try:
+            ecrire()
+        except OSError:
+            # La mesure ne doit jamais casser la requête
+            pass
+
+
+def _etats_processus():
+    """
+    État courant du processus + fichiers des autres processus
+    (y compris arrêtés : leurs compteurs restent acquis).
+    """
+    etats = [_etat()]
+
+    repertoire = _repertoire()
+    if not repertoire or not os.path.isdir(repertoire):
+        return etats
+
+    propre = f"{os.getpid()}.json"
+    for fichier in os.listdir(repertoire):
+        if not fichier.endswith(".json") or fichier == propre:
+            continue
+        try:
+            with open(os.path.join(repertoire, fichier), encoding="utf-8") as f:
+                etats.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+
+    return etats
+
+
+def agreger():
+    compteurs = defaultdict(float)
+    histogrammes = {}
+
+    for etat in _etats_processus():
+        for nom, labels, total in etat["compteurs"]:
+            compteurs[_cle(nom, dict(labels))] += total
+
+        for nom, labels, serie in etat["histogrammes"]:
+            cle = _cle(nom, dict(labels))
+            cumul = histogrammes.get(cle)
+
+            if cumul is None:
+                histogrammes[cle] = dict(serie, buckets=list(serie["buckets"]))
+                continue
+
+            # Bornes différentes entre versions du code : série ignorée
+            if cumul["bornes"] != serie["bornes"]:
+                continue
+
+            cumul["buckets"] = [a + b for a, b in zip(cumul["buckets"], serie["buckets"])]
+            cumul["somme"] += serie["somme"]
+            cumul["total"] += serie["total"]
+
+    return compteurs, histogrammes
+
+
+def _apres_fork():
+    # Un worker ne rapporte que ses propres mesures
+    global _lock, _dernier_ecrit
+    _lock = threading.Lock()
+    _compteurs.clear()
+    _histogrammes.clear()
+    _dernier_ecrit = 0.0
+
+
+def _ecrire_a_la_sortie():
+    try:
+        ecrire()
+    except Exception:  # noqa: BLE001 - settings absents, disque plein...
+        pass
+
+
+os.register_at_fork(after_in_child=_apres_fork)
+atexit.register(_ecrire_a_la_sortie)
+
+
+# ============================================================
+# EXPOSITION (format texte Prometheus 0.0.4)
+# ============================================================
+
+def _echapper(valeur):
+    return str(valeur).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    paires = list(labels) + list(extra)
+    if not paires:
+        return ""
+    return "{" + ",".join(f'{k}="{_echapper(v)}"' for k, v in paires) + "}"
+
+
+def _nombre(valeur):
+    if valeur == float("inf"):
+        return "+Inf"
+    return repr(float(valeur)) if isinstance(valeur, float) else str(valeur)
+
+
+def exposition():
+    compteurs, histogrammes = agreger()
+    lignes = []
+
+    par_nom = defaultdict(list)
+    for (nom, labels), total in compteurs.items():
+        par_nom[nom].append((labels, total))
+
+    for nom in sorted(par_nom):
+        lignes.append(f"# TYPE {nom} counter")
+        for labels, total in sorted(par_nom[nom]):
+            lignes.append(f"{nom}{_labels(labels)} {_nombre(total)}")
+
+    par_nom = defaultdict(list)
+    for (nom, labels), serie in histogrammes.items():
+        par_nom[nom].append((labels, serie))
+
+    for nom in sorted(par_nom):
+        lignes.append(f"# TYPE {nom} histogram")
+        for labels, serie in sorted(par_nom[nom], key=lambda x: x[0]):
+            cumul = 0
+            for borne, compte in zip(serie["bornes"], serie["buckets"]):
+                cumul += compte
+                lignes.append(
+                    f"{nom}_bucket{_labels(labels, [('le', _nombre(float(borne)))])} {cumul}"
+                )
+            lignes.append(f'{nom}_bucket{_labels(labels, [("le", "+Inf")])} {serie["total"]}')
+            lignes.append(f"{nom}_sum{_labels(labels)} {_nombre(float(serie['somme']))}")
+            lignes.append(f"{nom}_count{_labels(labels)} {serie['total']}")
+
+    return "\n".join(lignes) + "\n"
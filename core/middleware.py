@@ -1,3 +1,19 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.constants import UserRole
+from core import db_router, metrics, profilage
+
+
 class TenantMiddleware:
     """
     Assigne request.tenant = request.user.tenant si user authentifié.
@@ -12,3 +28,207 @@ class TenantMiddleware:
         if user and user.is_authenticated:
             request.tenant = getattr(user, "tenant", None)
         return self.get_response(request)
+
+
+class ProfilageMiddleware:
+    """
+    Profilage des requêtes : SQL (nombre, temps, plus lentes),
+    rendu, temps applicatif, segments (core.profilage.segment).
+
+    Activé :
+    - par échantillonnage (PROFILAGE_ECHANTILLON, 0 = jamais) ;
+    - ou par l'en-tête X-Profilage, pour un SuperAdmin seul : le jeton
+      JWT est vérifié ici, avant d'engager le coût du profilage.
+
+    Les requêtes profilées au-delà de PROFILAGE_SEUIL_LENT_MS sont
+    gardées dans un tampon circulaire (cf. core.views_profilage).
+    Hors profilage : un test d'en-tête et un random() par requête.
+    """
+
+    ENTETE = "HTTP_X_PROFILAGE"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.echantillon = getattr(settings, "PROFILAGE_ECHANTILLON", 0.0)
+        self.seuil = getattr(settings, "PROFILAGE_SEUIL_LENT_MS", 500) / 1000
+        self.top = getattr(settings, "PROFILAGE_TOP_REQUETES", 5)
+
+    def __call__(self, request):
+        demande = self.ENTETE in request.META and _superadmin_jwt(request)
+        echantillonne = self.echantillon > 0 and random.random() < self.echantillon
+
+        if not (demande or echantillonne):
+            return self.get_response(request)
+
+        profil = profilage.Profil(top=self.top)
+        jeton = profilage.activer(profil)
+
+        try:
+            with ExitStack() as pile:
+                for connexion in connections.all():
+                    pile.enter_context(connexion.execute_wrapper(profil))
+                response = self.get_response(request)
+        finally:
+            profilage.desactiver(jeton)
+
+        profil.terminer()
+        response["Server-Timing"] = profil.server_timing()
+
+        if profil.total >= self.seuil:
+            metrics.incrementer("profilage_requetes_lentes_total")
+            profilage.enregistrer(profil.resume(request, response))
+
+        return response
+
+    def process_template_response(self, request, response):
+        # La vue est terminée ; le rendu (sérialisation JSON) suit
+        profil = profilage.courant()
+        if profil is not None:
+            profil.marquer_rendu()
+        return response
+
+
+def _est_superadmin(user):
+    return bool(
+        user
+        and user.is_authenticated
+        and (user.is_superuser or user.role == UserRole.SUPERADMIN)
+    )
+
+
+def _superadmin_jwt(request):
+    # Une requête utilisateur, seulement si l'en-tête est présent
+    try:
+        authentification = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return authentification is not None and _est_superadmin(authentification[0])
+
+
+class MetriquesMiddleware:
+    """
+    Métriques HTTP par route et méthode (core.metrics) :
+    - http_request_duration_seconds (histogramme)
+    - http_requests_total (par classe de statut)
+    - db_queries_total / db_query_seconds_total
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sql = _CompteurSQL()
+        debut = time.perf_counter()
+
+        with ExitStack() as pile:
+            for connexion in connections.all():
+                pile.enter_context(connexion.execute_wrapper(sql))
+            response = self.get_response(request)
+
+        duree = time.perf_counter() - debut
+
+        # Motif d'URL (cardinalité bornée), jamais le chemin brut
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "non_resolue"
+        methode = request.method
+
+        metrics.observer(
+            "http_request_duration_seconds", duree, route=route, method=methode
+        )
+        metrics.incrementer(
+            "http_requests_total",
+            route=route,
+            method=methode,
+            status=f"{response.status_code // 100}xx",
+        )
+        metrics.incrementer("db_queries_total", sql.nombre, route=route)
+        metrics.incrementer("db_query_seconds_total", sql.temps, route=route)
+
+        return response
+
+
+class _CompteurSQL:
+
+    def __init__(self):
+        self.nombre = 0
+        self.temps = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.nombre += 1
+            self.temps += time.perf_counter() - debut
+
+
+class ReplicaMiddleware:
+    """
+    Après une écriture réussie (méthode non sûre, statut < 400),
+    l'utilisateur lit sur le primaire pendant REPLICA_LAG_TOLERANCE
+    secondes : il revoit immédiatement ce qu'il vient d'écrire.
+    """
+
+    METHODES_SURES = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (
+            db_router.replica_disponible()
+            and request.method not in self.METHODES_SURES
+            and response.status_code < 400
+        ):
+            # Utilisateur JWT posé sur la requête Django par DRF
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                db_router.epingler(user)
+
+        return response
+
+
+class TenantDatabaseMiddleware:
+    """
+    Tenant isolé sur sa propre base (TENANT_DATABASES) : la base est
+    résolue depuis le claim JWT tenant_id, avant l'authentification
+    DRF, et posée pour toute la requête (contenu streamé compris).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        alias = db_router.alias_du_tenant(self._tenant_id(request))
+
+        if alias is None:
+            return self.get_response(request)
+
+        with db_router.utiliser_base(alias):
+            response = self.get_response(request)
+
+        if response.streaming:
+            response.streaming_content = _dans_base(alias, response.streaming_content)
+
+        return response
+
+    def _tenant_id(self, request):
+        if not getattr(settings, "TENANT_DATABASES", None):
+            return None
+
+        type_jeton, _, brut = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+        if type_jeton not in jwt_settings.AUTH_HEADER_TYPES or not brut:
+            return None
+
+        try:
+            return AccessToken(brut).get("tenant_id")
+        except TokenError:
+            # Jeton invalide : DRF répondra 401
+            return None
+
+
+def _dans_base(alias, contenu):
+    with db_router.utiliser_base(alias):
+        yield from contenu
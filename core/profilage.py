@@ -0,0 +1,175 @@
+# core/profilage.py
+"""
+Profilage par requête : temps SQL, requêtes les plus lentes,
+rendu, segments applicatifs.
+
+Le profil courant vit dans une ContextVar posée par
+core.middleware.ProfilageMiddleware ; hors requête profilée,
+segment() ne coûte qu'un get().
+
+Usage dans une vue :
+    from core import profilage
+
+    with profilage.segment("agregation"):
+        ...
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_profil = ContextVar("profil", default=None)
+
+_lock = threading.Lock()
+_lentes = deque(maxlen=getattr(settings, "PROFILAGE_TAILLE_BUFFER", 200))
+
+
+# ============================================================
+# PROFIL D'UNE REQUÊTE
+# ============================================================
+
+class Profil:
+
+    def __init__(self, top=5):
+        self.debut = time.perf_counter()
+        self.top = top
+        self.db_nb = 0
+        self.db_temps = 0.0
+        self.segments = {}
+        self.rendu_debut = None
+        self.rendu = 0.0
+        self.total = None
+        self._plus_lentes = []
+        self._sequence = itertools.count()
+
+    # --- SQL (execute_wrapper) ---
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duree = time.perf_counter() - debut
+            self.db_nb += 1
+            self.db_temps += duree
+
+            # Tas borné : seules les `top` plus lentes sont conservées
+            entree = (duree, next(self._sequence), sql)
+            if len(self._plus_lentes) < self.top:
+                heapq.heappush(self._plus_lentes, entree)
+            elif duree > self._plus_lentes[0][0]:
+                heapq.heapreplace(self._plus_lentes, entree)
+
+    # --- Phases ---
+
+    def marquer_rendu(self):
+        self.rendu_debut = time.perf_counter()
+
+    def terminer(self):
+        fin = time.perf_counter()
+        self.total = fin - self.debut
+        if self.rendu_debut is not None:
+            self.rendu = fin - self.rendu_debut
+
+    @property
+    def app(self):
+        """Temps Python hors SQL et hors rendu."""
+        return max(0.0, self.total - self.db_temps - self.rendu)
+
+    def plus_lentes(self):
+        return [
+            {"sql": sql[:1000], "ms": round(duree * 1000, 2)}
+            for duree, _, sql in sorted(self._plus_lentes, reverse=True)
+        ]
+
+    def server_timing(self):
+        """
+        Valeur de l'en-tête Server-Timing (durées en ms).
+        """
+        mesures = [
+            f'db;dur={self.db_temps * 1000:.1f};desc="{self.db_nb} requetes"',
+            f"app;dur={self.app * 1000:.1f}",
+            f"rendu;dur={self.rendu * 1000:.1f}",
+        ]
+        mesures.extend(
+            f"{nom};dur={duree * 1000:.1f}"
+            for nom, duree in self.segments.items()
+        )
+        mesures.append(f"total;dur={self.total * 1000:.1f}")
+        return ", ".join(mesures)
+
+    def resume(self, request, response):
+        return {
+            "methode": request.method,
+            "chemin": request.path,
+            "statut": response.status_code,
+            "utilisateur": getattr(getattr(request, "user", None), "pk", None),
+            "date": time.time(),
+            "total_ms": round(self.total * 1000, 2),
+            "db_ms": round(self.db_temps * 1000, 2),
+            "db_requetes": self.db_nb,
+            "app_ms": round(self.app * 1000, 2),
+            "rendu_ms": round(self.rendu * 1000, 2),
+            "segments_ms": {
+                nom: round(duree * 1000, 2)
+                for nom, duree in self.segments.items()
+            },
+            "plus_lentes": self.plus_lentes(),
+        }
+
+
+def courant():
+    return _profil.get()
+
+
+def activer(profil):
+    return _profil.set(profil)
+
+
+def desactiver(jeton):
+    _profil.reset(jeton)
+
+
+@contextmanager
+def segment(nom):
+    """
+    Chronomètre un bloc dans la requête profilée (no-op sinon).
+    """
+    profil = _profil.get()
+    if profil is None:
+        yield
+        return
+
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        profil.segments[nom] = (
+            profil.segments.get(nom, 0.0) + time.perf_counter() - debut
+        )
+
+
+# ============================================================
+# REQUÊTES LENTES (tampon circulaire, par processus)
+# ============================================================
+
+def enregistrer(resume):
+    with _lock:
+        _lentes.append(resume)
+
+
+def requetes_lentes():
+    """Plus récentes d'abord."""
+    with _lock:
+        return list(reversed(_lentes))
+
+
+def vider():
+    with _lock:
+        _lentes.clear()
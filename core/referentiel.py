@@ -0,0 +1,89 @@
+# core/referentiel.py
+"""
+Référentiel partagé et bases de tenant (cf. core.db_router).
+
+La base "default" fait foi pour le tenant et les utilisateurs ;
+une base de tenant en porte une copie, cible des clés étrangères
+(tenant, created_by, valide_par...).
+Sens inverse : les stations d'un tenant isolé sont recopiées sur
+"default", cible de Utilisateur.station ; leurs identifiants sont
+pris dans la séquence de "default" (allouer_ids_station) pour que
+la copie n'écrase jamais la station d'un autre tenant.
+
+Les copies sont tenues à jour par core.signals ; un tenant qui
+vient d'être isolé est rattrapé par synchroniser_referentiel()
+(commande migrate_tenants).
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+
+from core.db_router import alias_du_tenant
+from stations.models import Station
+from tenants.models import Tenant
+
+
+def copier(instance, alias):
+    """
+    Recopie la ligne (champs concrets, hors M2M) sur `alias`.
+    """
+    modele = type(instance)
+    valeurs = {
+        champ.attname: getattr(instance, champ.attname)
+        for champ in modele._meta.concrete_fields
+        if not champ.primary_key
+    }
+    modele._base_manager.using(alias).update_or_create(
+        pk=instance.pk,
+        defaults=valeurs,
+    )
+
+
+def allouer_ids_station(nombre):
+    """
+    Identifiants de Station tirés de la séquence de "default".
+    """
+    if nombre <= 0:
+        return []
+
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+            "FROM generate_series(1, %s)",
+            [Station._meta.db_table, nombre],
+        )
+        return [ligne[0] for ligne in cursor.fetchall()]
+
+
+def utilisateurs_a_copier(tenant_id):
+    """Utilisateurs du tenant + comptes sans tenant (SuperAdmin)."""
+    return get_user_model()._base_manager.using(DEFAULT_DB_ALIAS).filter(
+        Q(tenant_id=tenant_id) | Q(tenant__isnull=True)
+    )
+
+
+def synchroniser_referentiel(tenant_id):
+    """
+    Recopie tenant, stations et utilisateurs entre "default"
+    et la base du tenant. Retourne le nombre de lignes recopiées.
+    """
+    alias = alias_du_tenant(tenant_id)
+    if alias is None:
+        return 0
+
+    tenant = Tenant.objects.using(DEFAULT_DB_ALIAS).get(pk=tenant_id)
+    stations = list(Station.objects.using(alias).filter(tenant_id=tenant_id))
+    utilisateurs = list(utilisateurs_a_copier(tenant_id))
+
+    # FK différées (PostgreSQL) : vérifiées au commit de chaque base
+    with transaction.atomic(using=alias), transaction.atomic(using=DEFAULT_DB_ALIAS):
+        copier(tenant, alias)
+
+        for station in stations:
+            copier(station, DEFAULT_DB_ALIAS)
+
+        for utilisateur in utilisateurs:
+            copier(utilisateur, alias)
+
+    return 1 + len(stations) + len(utilisateurs)
@@ -0,0 +1,55 @@
+# core/signals.py
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from core.db_router import alias_du_tenant, aliases_tenants
+from core.referentiel import allouer_ids_station, copier
+from stations.models import Station
+from tenants.models import Tenant
+
+
+# ============================================================
+# RÉFÉRENTIEL PARTAGÉ → BASES DE TENANT
+# ============================================================
+
+@receiver(post_save, sender=Tenant)
+def tenant_enregistre(sender, instance, using, raw=False, **kwargs):
+    alias = alias_du_tenant(instance.pk)
+    if alias and using == DEFAULT_DB_ALIAS and not raw:
+        copier(instance, alias)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def utilisateur_enregistre(sender, instance, using, raw=False, **kwargs):
+    if using != DEFAULT_DB_ALIAS or raw:
+        return
+
+    # Sans tenant (SuperAdmin) : présent sur toutes les bases
+    if instance.tenant_id is None:
+        aliases = aliases_tenants()
+    else:
+        alias = alias_du_tenant(instance.tenant_id)
+        aliases = [alias] if alias else []
+
+    for alias in aliases:
+        copier(instance, alias)
+
+
+# ============================================================
+# STATIONS D'UN TENANT ISOLÉ → DEFAULT
+# ============================================================
+
+@receiver(pre_save, sender=Station)
+def station_creee(sender, instance, using, raw=False, **kwargs):
+    # Identifiant unique sur "default" : la copie n'écrase rien
+    if instance.pk is None and using in aliases_tenants() and not raw:
+        instance.pk = allouer_ids_station(1)[0]
+
+
+@receiver(post_save, sender=Station)
+def station_enregistree(sender, instance, using, raw=False, **kwargs):
+    if using != DEFAULT_DB_ALIAS and using in aliases_tenants() and not raw:
+        copier(instance, DEFAULT_DB_ALIAS)
@@ -0,0 +1,181 @@
+# core/testing.py
+"""
+Outils de test : budget de requêtes SQL par vue.
+
+Chaque vue déclare son budget :
+    class CuveViewSet(ModelViewSet):
+        query_budget = {"list": 2, "retrieve": 1}
+
+Le budget compte les requêtes émises par la vue elle-même
+(client authentifié par force_authenticate : chargement de
+l'utilisateur exclu).
+
+Usage :
+    class MonTest(BudgetRequetesMixin, TestCase):
+        def test_liste(self):
+            self.assertRequetesConstantes("/api/v1/station/cuves/", self.creer_cuves)
+"""
+
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.urls import resolve
+
+RACINE = str(Path(settings.BASE_DIR))
+
+# Frames d'origine rapportées par requête
+PROFONDEUR_ORIGINE = 3
+
+
+# ============================================================
+# CAPTURE
+# ============================================================
+
+def _origine():
+    """
+    Frames du projet (hors dépendances et hors ce module)
+    ayant déclenché la requête, de la plus profonde à la plus haute.
+    """
+    frames = []
+
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        fichier = frame.filename
+        if (
+            not fichier.startswith(RACINE)
+            or "site-packages" in fichier
+            or fichier == __file__
+        ):
+            continue
+
+        frames.append(
+            f"{Path(fichier).relative_to(RACINE)}:{frame.lineno} {frame.name}"
+        )
+        if len(frames) == PROFONDEUR_ORIGINE:
+            break
+
+    return frames
+
+
+class RequetesCapturees:
+    """
+    Capture le SQL exécuté (avec son origine dans le code),
+    indépendamment de DEBUG.
+    """
+
+    def __init__(self, using=connection):
+        self.connexion = using
+        self.requetes = []
+        self._pile = ExitStack()
+
+    def __enter__(self):
+        self._pile.enter_context(self.connexion.execute_wrapper(self._capturer))
+        return self
+
+    def __exit__(self, *exc):
+        return self._pile.__exit__(*exc)
+
+    def __len__(self):
+        return len(self.requetes)
+
+    def _capturer(self, execute, sql, params, many, context):
+        self.requetes.append((sql, _origine()))
+        return execute(sql, params, many, context)
+
+    def par_sql(self):
+        return Counter(sql for sql, _ in self.requetes)
+
+    def rapport(self, seulement=None):
+        lignes = []
+        for index, (sql, origine) in enumerate(self.requetes, start=1):
+            if seulement is not None and sql not in seulement:
+                continue
+            lignes.append(f"  {index}. {sql[:500]}")
+            lignes.extend(f"       ← {frame}" for frame in origine)
+        return "\n".join(lignes)
+
+
+# ============================================================
+# ASSERTIONS
+# ============================================================
+
+def budget_vue(url, methode="get"):
+    """
+    Budget déclaré (`query_budget`) par la vue servant `url`
+    pour l'action correspondante. None si non déclaré.
+    """
+    vue = resolve(url.split("?", 1)[0]).func
+    action = getattr(vue, "actions", {}).get(methode, methode)
+    budget = getattr(vue.cls, "query_budget", None)
+
+    if isinstance(budget, dict):
+        return budget.get(action)
+
+    return budget
+
+
+class BudgetRequetesMixin:
+    """
+    Mixin TestCase. Attend un `self.client` authentifié.
+    """
+
+    def executer(self, url, methode="get", **extra):
+        with RequetesCapturees() as capture:
+            response = getattr(self.client, methode)(url, **extra)
+
+        self.assertLess(
+            response.status_code,
+            400,
+            f"{methode.upper()} {url} → {response.status_code}",
+        )
+        return response, capture
+
+    def assertBudgetRequetes(self, url, budget=None, methode="get", **extra):
+        if budget is None:
+            budget = budget_vue(url, methode)
+
+        if budget is None:
+            self.fail(f"Aucun query_budget déclaré pour {url} ({methode}).")
+
+        response, capture = self.executer(url, methode, **extra)
+
+        if len(capture) > budget:
+            self.fail(
+                f"{methode.upper()} {url} : {len(capture)} requêtes "
+                f"(budget {budget})\n{capture.rapport()}"
+            )
+
+        return response
+
+    def assertRequetesConstantes(self, url, creer, petit=1, grand=50, **extra):
+        """
+        Mesure `url` avec `petit` puis `grand` objets créés par
+        `creer(n)` : le nombre de requêtes ne doit pas croître
+        (N+1), et reste dans le budget déclaré.
+        """
+        creer(petit)
+        _, reference = self.executer(url, **extra)
+
+        creer(grand - petit)
+        response, capture = self.executer(url, **extra)
+
+        if len(capture) > len(reference):
+            # Seules les requêtes répétées en plus sont rapportées
+            surplus = capture.par_sql() - reference.par_sql()
+            self.fail(
+                f"GET {url} : {len(reference)} requêtes pour {petit} objet(s), "
+                f"{len(capture)} pour {grand} (N+1)\n"
+                f"{capture.rapport(seulement=set(surplus))}"
+            )
+
+        budget = budget_vue(url)
+        if budget is not None and len(capture) > budget:
+            self.fail(
+                f"GET {url} : {len(capture)} requêtes (budget {budget})\n"
+                f"{capture.rapport()}"
+            )
+
+        return response
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from core import metrics
+from finances_station.models import TransactionStation
+from stations.models import RelaisEquipe, RelaisProduit, Station
+from stations.models_produit import ProduitCarburant
+from tenants.models import Tenant
+
+URL = "/api/v1/finances/transactions/"
+
+
+class ConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        metrics.reinitialiser()
+        self.client = APIClient()
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.transaction = TransactionStation.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            type="RECETTE",
+            source_type="RelaisEquipe",
+            source_id=1,
+            montant=1000,
+            date=timezone.now(),
+        )
+
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.GERANT,
+        )
+        self.client.force_authenticate(self.gerant)
+
+    def test_liste_emet_validateurs(self):
+        response = self.client.get(URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_liste_inchangee_renvoie_304(self):
+        etag = self.client.get(URL)["ETag"]
+
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            metrics.valeur(
+                "conditional_get_not_modified_total",
+                view="TransactionStationViewSet",
+            ),
+            1,
+        )
+
+    def test_modification_invalide_etag(self):
+        etag = self.client.get(URL)["ETag"]
+
+        self.client.post(f"{URL}{self.transaction.id}/confirmer/")
+
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_inchange_renvoie_304(self):
+        detail = f"{URL}{self.transaction.id}/"
+        etag = self.client.get(detail)["ETag"]
+
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_ligne_de_relais_invalide_etag_du_relais(self):
+        relais = RelaisEquipe.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            debut_relais=timezone.now() - timedelta(hours=2),
+            fin_relais=timezone.now() - timedelta(hours=1),
+            equipe_sortante="A",
+            equipe_entrante="B",
+            created_by=self.gerant,
+        )
+        ligne = RelaisProduit.objects.create(
+            relais=relais,
+            produit=ProduitCarburant.objects.create(
+                tenant=self.tenant, nom="Gasoil", code="GASOIL"
+            ),
+            index_debut=Decimal("0"),
+            index_fin=Decimal("100"),
+        )
+        detail = f"/api/v1/station/relais-equipes/{relais.id}/"
+        etag = self.client.get(detail)["ETag"]
+
+        ligne.index_fin = Decimal("150")
+        ligne.save()
+
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
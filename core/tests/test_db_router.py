@@ -0,0 +1,200 @@
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from core.db_router import (
+    ALIAS_REPLICA,
+    ReplicaRouter,
+    TenantRouter,
+    alias_courant,
+    bases_tenants,
+    epingler,
+    est_epingle,
+    utiliser_replica,
+    utiliser_tenant,
+    verifier_cache_epinglage,
+)
+from core.middleware import TenantDatabaseMiddleware
+from finances_station.models import TransactionStation
+from stations.models import Station
+from tenants.models import Tenant
+
+TENANT_ISOLE = "0b8f7c3e-0000-4000-8000-000000000001"
+
+
+@mock.patch("core.db_router.replica_disponible", return_value=True)
+@mock.patch("core.db_router.est_epingle", return_value=False)
+class ReplicaRouterTestCase(SimpleTestCase):
+    """
+    Décisions du routeur, sans base replica réelle.
+    """
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.atomic = mock.patch.object(
+            connections["default"], "in_atomic_block", False
+        )
+        self.atomic.start()
+        self.addCleanup(self.atomic.stop)
+
+    def test_hors_vue_designee_primaire(self, *_):
+        self.assertIsNone(self.router.db_for_read(Station))
+
+    def test_vue_designee_lit_sur_replica(self, *_):
+        with utiliser_replica():
+            self.assertEqual(self.router.db_for_read(Station), ALIAS_REPLICA)
+
+        self.assertIsNone(self.router.db_for_read(Station))
+
+    def test_lecture_apres_ecriture_sur_primaire(self, *_):
+        with utiliser_replica():
+            self.assertIsNone(self.router.db_for_write(Station))
+            self.assertIsNone(self.router.db_for_read(Station))
+
+    def test_transaction_ouverte_sur_primaire(self, *_):
+        connections["default"].in_atomic_block = True
+
+        with utiliser_replica():
+            self.assertIsNone(self.router.db_for_read(Station))
+
+    def test_utilisateur_epingle_sur_primaire(self, _est_epingle, _dispo):
+        _est_epingle.return_value = True
+
+        with utiliser_replica(user=mock.Mock()):
+            self.assertIsNone(self.router.db_for_read(Station))
+
+    def test_pas_de_migration_sur_replica(self, *_):
+        self.assertFalse(self.router.allow_migrate(ALIAS_REPLICA, "stations"))
+        self.assertIsNone(self.router.allow_migrate("default", "stations"))
+
+
+class EpinglageTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            role=UserRole.GERANT,
+        )
+
+    def test_epingler(self):
+        self.assertFalse(est_epingle(self.user))
+        epingler(self.user)
+        self.assertTrue(est_epingle(self.user))
+
+    def test_tolerance_nulle(self):
+        with self.settings(REPLICA_LAG_TOLERANCE=0):
+            epingler(self.user)
+        self.assertFalse(est_epingle(self.user))
+
+    @mock.patch("core.db_router.replica_disponible", return_value=True)
+    def test_cache_local_refuse_hors_debug(self, _dispo):
+        local = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        partage = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+
+        with self.settings(DEBUG=False, CACHES=local):
+            with self.assertRaises(ImproperlyConfigured):
+                verifier_cache_epinglage()
+
+        with self.settings(DEBUG=False, CACHES=partage):
+            verifier_cache_epinglage()
+
+        with self.settings(DEBUG=True, CACHES=local):
+            with self.assertLogs("core.db_router", "WARNING"):
+                verifier_cache_epinglage()
+
+
+@skipUnless(ALIAS_REPLICA in settings.DATABASES, "DB_REPLICA_HOST non configuré")
+class ReplicaIntegrationTestCase(TestCase):
+    """
+    Alias replica miroir du primaire (TEST.MIRROR) : les vues
+    désignées répondent ; une requête rejetée n'épingle pas.
+    """
+
+    databases = {"default", ALIAS_REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.GERANT,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.gerant)
+
+    def test_vues_designees(self):
+        for url in (
+            "/api/v1/finances/transactions/",
+            "/api/v1/station/mouvements-stock/",
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+    def test_rejet_sans_epinglage(self):
+        self.client.post("/api/v1/station/cuves/", {}, format="json")
+        # Requête rejetée (4xx) : pas d'écriture, pas d'épinglage
+        self.assertFalse(est_epingle(self.gerant))
+
+
+@override_settings(TENANT_DATABASES={TENANT_ISOLE: "tenant_a"})
+class TenantRouterTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.router = TenantRouter()
+
+    def test_modeles_tenant_sur_base_dediee(self):
+        with utiliser_tenant(TENANT_ISOLE):
+            self.assertEqual(alias_courant(), "tenant_a")
+            self.assertEqual(self.router.db_for_read(Station), "tenant_a")
+            self.assertEqual(self.router.db_for_write(TransactionStation), "tenant_a")
+
+        self.assertEqual(alias_courant(), "default")
+        self.assertIsNone(self.router.db_for_read(Station))
+
+    def test_tables_partagees_sur_default(self):
+        with utiliser_tenant(TENANT_ISOLE):
+            self.assertIsNone(self.router.db_for_read(Tenant))
+            self.assertIsNone(self.router.db_for_write(Utilisateur))
+
+    def test_tenant_non_isole(self):
+        with utiliser_tenant("autre"):
+            self.assertIsNone(self.router.db_for_read(Station))
+
+    def test_bases_des_workers(self):
+        self.assertEqual(bases_tenants(), ["default", "tenant_a"])
+
+    def test_middleware_lit_le_claim_jwt(self):
+        vu = []
+
+        def vue(request):
+            vu.append(alias_courant())
+            return HttpResponse()
+
+        jeton = AccessToken()
+        jeton["tenant_id"] = TENANT_ISOLE
+        middleware = TenantDatabaseMiddleware(vue)
+
+        middleware(RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {jeton}"))
+        middleware(RequestFactory().get("/", HTTP_AUTHORIZATION="Bearer invalide"))
+        middleware(RequestFactory().get("/"))
+
+        self.assertEqual(vu, ["tenant_a", "default", "default"])
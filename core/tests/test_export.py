@@ -0,0 +1,94 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from core.export import lignes_csv
+from finances_station.models import TransactionStation
+from stations.models import Station
+from tenants.models import Tenant
+
+URL = "/api/v1/finances/transactions/"
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(tenant=self.tenant, nom="Station A", adresse="Dakar")
+        self.autre = Station.objects.create(tenant=self.tenant, nom="Station B", adresse="Thiès")
+
+        for source_id, (station, montant) in enumerate(
+            ((self.station, 1000), (self.station, 2500), (self.autre, 700)), start=1
+        ):
+            TransactionStation.objects.create(
+                tenant=self.tenant,
+                station=station,
+                type="RECETTE",
+                source_type="RelaisEquipe",
+                source_id=source_id,
+                montant=montant,
+                date=timezone.now(),
+            )
+
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.GERANT,
+        )
+        self.client.force_authenticate(self.gerant)
+
+    def _lignes(self, response):
+        contenu = b"".join(response.streaming_content).decode("utf-8-sig")
+        return contenu.splitlines()
+
+    def test_export_csv_respecte_le_perimetre(self):
+        response = self.client.get(URL, {"format": "csv"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("attachment;", response["Content-Disposition"])
+
+        lignes = self._lignes(response)
+        self.assertEqual(lignes[0].split(";")[:3], ["id", "date", "station"])
+        # Station du gérant seulement, sans pagination
+        self.assertEqual(len(lignes), 3)
+        self.assertTrue(all(";Station A;" in ligne for ligne in lignes[1:]))
+
+    def test_format_inconnu(self):
+        self.assertEqual(self.client.get(URL, {"format": "pdf"}).status_code, 404)
+
+    def test_liste_json_inchangee(self):
+        response = self.client.get(URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_formules_neutralisees(self):
+        lignes = list(lignes_csv(
+            ["a", "b", "c", "d"],
+            [("=1+1", "+1", "@SUM(A1)", -5)],
+        ))
+
+        self.assertEqual(lignes[1], "'=1+1;'+1;'@SUM(A1);-5\r\n")
+
+    def test_formule_dans_le_nom_de_station(self):
+        self.station.nom = "-2+3"
+        self.station.save()
+
+        lignes = self._lignes(self.client.get(URL, {"format": "csv"}))
+
+        self.assertTrue(all(";'-2+3;" in ligne for ligne in lignes[1:]))
+
+    @override_settings(EXPORT_XLSX_MAX_LIGNES=1)
+    def test_xlsx_plafonne(self):
+        response = self.client.get(URL, {"format": "xlsx"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("format", response.json())
@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from core import metrics
+from stations.models import Station
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.services.stock import compter_mouvements
+from tenants.models import Tenant
+
+
+class ExpositionTestCase(TestCase):
+
+    def setUp(self):
+        metrics.reinitialiser()
+
+    def test_compteur_et_histogramme(self):
+        metrics.incrementer("relais_transitions_total", de="SOUMIS", vers="VALIDE")
+        metrics.observer("http_request_duration_seconds", 0.03, route="r", method="GET")
+        metrics.observer("http_request_duration_seconds", 20, route="r", method="GET")
+
+        texte = metrics.exposition()
+
+        self.assertIn("# TYPE relais_transitions_total counter", texte)
+        self.assertIn('relais_transitions_total{de="SOUMIS",vers="VALIDE"} 1', texte)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", texte)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{method="GET",route="r",le="0.05"} 1',
+            texte,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{method="GET",route="r",le="+Inf"} 2',
+            texte,
+        )
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="r"} 2', texte)
+
+    def test_agregation_multi_processus(self):
+        with tempfile.TemporaryDirectory() as repertoire:
+            # État d'un autre worker
+            with open(os.path.join(repertoire, "999999.json"), "w") as f:
+                json.dump({
+                    "compteurs": [["depotage_transferts_total", [], 2]],
+                    "histogrammes": [],
+                }, f)
+
+            with override_settings(METRICS_MULTIPROC_DIR=repertoire):
+                metrics.incrementer("depotage_transferts_total")
+                metrics.ecrire()
+
+                self.assertIn(f"{os.getpid()}.json", os.listdir(repertoire))
+                self.assertIn("depotage_transferts_total 3.0", metrics.exposition())
+
+    def test_compte_au_commit_seulement(self):
+        mouvement = MouvementStock(
+            type_mouvement=MouvementStock.MOUVEMENT_SORTIE,
+            quantite=Decimal("12.5"),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            compter_mouvements([mouvement, mouvement])
+
+        self.assertEqual(metrics.valeur("stock_mouvements_total", type="SORTIE"), 2)
+        self.assertEqual(metrics.valeur("stock_mouvements_litres_total", type="SORTIE"), 25.0)
+
+        # Transaction annulée : callbacks jamais exécutés
+        with self.captureOnCommitCallbacks(execute=False):
+            compter_mouvements([mouvement])
+
+        self.assertEqual(metrics.valeur("stock_mouvements_total", type="SORTIE"), 2)
+
+
+class MetricsEndpointTestCase(TestCase):
+
+    def setUp(self):
+        metrics.reinitialiser()
+
+        tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        station = Station.objects.create(tenant=tenant, nom="Station A", adresse="Dakar")
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=tenant,
+            station=station,
+            role=UserRole.GERANT,
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_latence_et_sql_par_route(self):
+        client = APIClient()
+        client.force_authenticate(self.gerant)
+        client.get("/api/v1/finances/transactions/")
+
+        texte = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").content.decode()
+
+        self.assertIn("http_request_duration_seconds_bucket", texte)
+        self.assertIn('method="GET"', texte)
+        self.assertIn("transactions", texte)
+        self.assertIn("db_queries_total", texte)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_jeton(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(
+            self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code,
+            200,
+        )
+
+    @override_settings(METRICS_TOKEN="")
+    def test_sans_jeton_hors_debug(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
@@ -0,0 +1,86 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from core import profilage
+from stations.models import Station
+from tenants.models import Tenant
+
+URL = "/api/v1/finances/transactions/"
+URL_LENTES = "/api/v1/profilage/requetes-lentes/"
+
+
+class ProfilageMiddlewareTestCase(TestCase):
+
+    def setUp(self):
+        profilage.vider()
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.GERANT,
+        )
+        self.superadmin = Utilisateur.objects.create_user(
+            username="root",
+            password="test1234",
+            role=UserRole.SUPERADMIN,
+            is_superuser=True,
+        )
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def _client_jwt(self, user):
+        # X-Profilage : jeton vérifié par le middleware, avant DRF
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    def test_inactif_par_defaut(self):
+        response = self._client(self.gerant).get(URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_entete_superadmin(self):
+        response = self._client_jwt(self.superadmin).get(URL_LENTES, HTTP_X_PROFILAGE="1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    def test_entete_ignore_hors_superadmin(self):
+        response = self._client_jwt(self.gerant).get(URL, HTTP_X_PROFILAGE="1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_echantillon_alimente_le_tampon(self):
+        with self.settings(PROFILAGE_ECHANTILLON=1.0, PROFILAGE_SEUIL_LENT_MS=0):
+            response = self._client(self.gerant).get(URL)
+
+        self.assertIn("Server-Timing", response)
+
+        lentes = self._client(self.superadmin).get(URL_LENTES).json()
+
+        self.assertEqual(lentes["count"], 1)
+        self.assertEqual(lentes["results"][0]["chemin"], URL)
+        self.assertGreater(lentes["results"][0]["db_requetes"], 0)
+        self.assertTrue(lentes["results"][0]["plus_lentes"])
+
+    def test_tampon_reserve_superadmin(self):
+        response = self._client(self.gerant).get(URL_LENTES)
+
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,170 @@
+import gzip
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from core.transfert import (
+    MODELES,
+    TransfertError,
+    _filtre,
+    _modele,
+    exporter,
+    importer,
+    modeles_non_couverts,
+)
+from finances_station.models import TransactionStation
+from stations.models import RelaisEquipe, Station
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import ProduitCarburant
+from tenants.models import Tenant
+
+
+class TransfertTenantTestCase(TestCase):
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(nom="Distributeur", type_structure="SA")
+        self.autre = Tenant.objects.create(nom="Autre", type_structure="SA")
+
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.GERANT,
+        )
+        produit = ProduitCarburant.objects.create(
+            tenant=self.tenant,
+            nom="Gasoil",
+            code="GASOIL"
+        )
+        cuve = Cuve.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            produit=produit,
+            reference="CUV-GASOIL-01",
+            capacite_max=Decimal("20000"),
+            stock_actuel=Decimal("9000"),
+            statut=CuveStatus.ACTIVE,
+        )
+
+        maintenant = timezone.now()
+        relais = RelaisEquipe.objects.bulk_create([
+            RelaisEquipe(
+                tenant=self.tenant,
+                station=self.station,
+                debut_relais=maintenant + timedelta(hours=2 * k),
+                fin_relais=maintenant + timedelta(hours=2 * k + 1),
+                equipe_sortante="A",
+                equipe_entrante="B",
+                created_by=self.gerant,
+            )
+            for k in range(3)
+        ])
+        self.dernier_relais = relais[-1]
+
+        MouvementStock.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            cuve=cuve,
+            type_mouvement=MouvementStock.MOUVEMENT_SORTIE,
+            quantite=Decimal("1000"),
+            source_type="RelaisEquipe",
+            source_id=self.dernier_relais.id,
+            date_mouvement=maintenant,
+        )
+        TransactionStation.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            type="RECETTE",
+            source_type="RelaisEquipe",
+            source_id=self.dernier_relais.id,
+            montant=650000,
+            date=maintenant,
+        )
+
+        # Données d'un autre tenant : jamais exportées
+        Station.objects.create(tenant=self.autre, nom="Station B", adresse="Thiès")
+
+    def _exporter(self):
+        fichier = io.BytesIO()
+        comptes = exporter(self.tenant.id, fichier)
+        fichier.seek(0)
+        return fichier, comptes
+
+    def _purger(self):
+        # Le nœud source disparaît : suppression dans l'ordre inverse des
+        # dépendances (tenant.delete() bloqué par les FK PROTECT)
+        for label, filtre in reversed(MODELES):
+            _modele(label)._base_manager.filter(
+                _filtre(filtre, self.tenant.id)
+            ).delete()
+
+    def test_tous_les_modeles_tenant_sont_exportes(self):
+        self.assertEqual(modeles_non_couverts(), [])
+
+    def test_aller_retour(self):
+        fichier, comptes = self._exporter()
+
+        self.assertEqual(comptes["stations.Station"], 1)
+        self.assertEqual(comptes["stations.RelaisEquipe"], 3)
+
+        # Le nœud source disparaît, le tenant est rechargé
+        self._purger()
+        rapport = importer(fichier)
+
+        self.assertEqual(rapport["orphelins"], 0)
+        self.assertEqual(Station.objects.filter(tenant=self.tenant).count(), 1)
+
+        station = Station.objects.get(tenant=self.tenant)
+        self.assertNotEqual(station.id, self.station.id)
+        self.assertEqual(Utilisateur.objects.get(username="gerant").station, station)
+
+        # Références génériques remappées sur les nouveaux relais
+        relais = RelaisEquipe.objects.filter(tenant=self.tenant).order_by("debut_relais").last()
+        self.assertEqual(MouvementStock.objects.get(tenant=self.tenant).source_id, relais.id)
+        self.assertEqual(TransactionStation.objects.get(tenant=self.tenant).source_id, relais.id)
+        self.assertEqual(relais.created_by.username, "gerant")
+
+    def test_comptes_sans_tenant_non_exportes(self):
+        Utilisateur.objects.create_user(
+            username="superadmin",
+            password="test1234",
+            role=UserRole.SUPERADMIN,
+        )
+
+        _, comptes = self._exporter()
+
+        self.assertEqual(comptes["accounts.Utilisateur"], 1)
+
+    def test_essai_ne_conserve_rien(self):
+        fichier, _ = self._exporter()
+        self._purger()
+
+        importer(fichier, essai=True)
+
+        self.assertFalse(Station.objects.filter(tenant_id=self.tenant.id).exists())
+
+    def test_tenant_deja_present(self):
+        fichier, _ = self._exporter()
+
+        with self.assertRaises(TransfertError):
+            importer(fichier)
+
+    def test_export_tronque(self):
+        fichier, _ = self._exporter()
+        lignes = gzip.decompress(fichier.read()).splitlines(keepends=True)[:-1]
+        self._purger()
+
+        with self.assertRaises(TransfertError):
+            importer(io.BytesIO(gzip.compress(b"".join(lignes))))
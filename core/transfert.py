@@ -0,0 +1,580 @@
+# core/transfert.py
+"""
+Déplacement d'un tenant entre nœuds PostgreSQL
+(commandes export_tenant / import_tenant).
+
+Format : NDJSON compressé (gzip), une ligne JSON par enregistrement :
+    {"entete": {"format": 1, "tenant": "...", ...}}      première ligne
+    {"m": "stations.cuve", "d": {<attname>: valeur}}     objets, modèle
+                                                         par modèle dans
+                                                         l'ordre de MODELES
+    {"fin": {"comptes": {...}, "controles": {...}}}      dernière ligne
+
+Export : .iterator() (curseur serveur) dans une transaction
+REPEATABLE READ, instantané cohérent et mémoire bornée.
+
+Import : clés primaires entières réattribuées par la cible,
+clés étrangères et références génériques (source_type, source_id)
+remappées, bulk_create par lots, puis contrôle des comptes et des
+sommes de stock / finance avant validation. Seuls les identifiants
+des modèles référencés restent en mémoire.
+
+Destination : base du tenant (TENANT_DATABASES) ou "default" ;
+tenant et utilisateurs toujours sur "default". Un tenant ou un
+utilisateur déjà présent sur la cible (même tenant) est réutilisé :
+un tenant peut ainsi passer de "default" à sa base dédiée. La
+purge de la source reste manuelle, après vérification.
+Les comptes sans tenant (SuperAdmin) ne sont jamais exportés : leurs
+références sont conservées s'ils existent sur la cible, vidées sinon.
+"""
+
+import datetime
+import gzip
+import json
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from core.db_router import APPS_TENANT, alias_du_tenant
+from core.referentiel import allouer_ids_station, synchroniser_referentiel
+
+FORMAT = 1
+TAILLE_LOT = 1000
+
+# Ordre de dépendance : (modèle, filtre sur le tenant)
+MODELES = (
+    ("tenants.Tenant", "pk"),
+    ("stations.Station", "tenant_id"),
+    ("accounts.Utilisateur", "tenant_id"),
+    ("accounts.Utilisateur_stations_administrees", "station__tenant_id"),
+    ("stations.ProduitCarburant", "tenant_id"),
+    ("stations.Cuve", "tenant_id"),
+    ("stations.Pompe", "station__tenant_id"),
+    ("stations.IndexPompe", "pompe__station__tenant_id"),
+    ("stations.PrixCarburant", "tenant_id"),
+    ("stations.RelaisEquipe", "tenant_id"),
+    ("stations.RelaisProduit", "relais__tenant_id"),
+    ("stations.RelaisAudit", "tenant_id"),
+    ("stations.Depotage", "tenant_id"),
+    ("stations.MouvementStock", "tenant_id"),
+    ("finances_station.EvenementFinance", "tenant_id"),
+    ("finances_station.TransactionStation", "tenant_id"),
+    ("stations.ClotureJournaliere", "tenant_id"),
+    ("stations.BilanMensuel", "tenant_id"),
+    ("core.Membre", "tenant_id"),
+    ("core.Projet", "tenant_id"),
+    ("core.Transaction", "tenant_id"),
+    ("core.Cotisation", "tenant_id"),
+    ("core.FileUpload", "tenant_id"),
+)
+
+# Références génériques (source_type, source_id)
+SOURCES = {
+    "RelaisEquipe": "stations.RelaisEquipe",
+    "RELAIS": "stations.RelaisEquipe",
+    "RELAIS_EQUIPE": "stations.RelaisEquipe",
+    "DEPOTAGE": "stations.Depotage",
+    "Depotage": "stations.Depotage",
+}
+
+
+class TransfertError(Exception):
+    pass
+
+
+class _Encodeur(DjangoJSONEncoder):
+    """Dates à la microseconde (DjangoJSONEncoder tronque à la milliseconde)."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _modele(label):
+    return apps.get_model(label)
+
+
+def _label(modele):
+    return modele._meta.label
+
+
+def _base_du_modele(modele, base_tenant):
+    if modele._meta.app_label in APPS_TENANT:
+        return base_tenant
+    return DEFAULT_DB_ALIAS
+
+
+def _filtre(filtre, tenant_id):
+    return Q(**{filtre: tenant_id})
+
+
+def modeles_non_couverts():
+    """Modèles des apps tenant absents de MODELES (oubli à l'ajout d'un modèle)."""
+    couverts = {_modele(label) for label, _ in MODELES}
+    return sorted(
+        _label(modele)
+        for modele in apps.get_models()
+        if modele._meta.app_label in APPS_TENANT and modele not in couverts
+    )
+
+
+def _references():
+    """Modèles dont les identifiants doivent être remappés."""
+    labels = {label for label, _ in MODELES}
+    references = set(SOURCES.values())
+
+    for label in labels:
+        for champ in _modele(label)._meta.concrete_fields:
+            if champ.is_relation and _label(champ.related_model) in labels:
+                references.add(_label(champ.related_model))
+
+    return references
+
+
+# ============================================================
+# CONTRÔLES
+# ============================================================
+
+def _totaux(qs, cle, champ):
+    return {
+        ligne[cle]: str(ligne["total"])
+        for ligne in qs.values(cle).annotate(total=Sum(champ)).order_by(cle)
+    }
+
+
+def calculer_controles(tenant_id, base):
+    """
+    Sommes de stock et de finance du tenant (comparées après import).
+    """
+    Cuve = _modele("stations.Cuve")
+    MouvementStock = _modele("stations.MouvementStock")
+    TransactionStation = _modele("finances_station.TransactionStation")
+    Transaction = _modele("core.Transaction")
+
+    stock = Cuve.objects.using(base).filter(tenant_id=tenant_id).aggregate(
+        total=Sum("stock_actuel")
+    )["total"]
+
+    return {
+        "stock_cuves": str(stock),
+        "mouvements_stock": _totaux(
+            MouvementStock.objects.using(base).filter(tenant_id=tenant_id),
+            "type_mouvement",
+            "quantite",
+        ),
+        "transactions_station": _totaux(
+            TransactionStation.objects.using(base).filter(tenant_id=tenant_id),
+            "type",
+            "montant",
+        ),
+        "transactions": _totaux(
+            Transaction.objects.using(base).filter(tenant_id=tenant_id),
+            "type",
+            "montant",
+        ),
+    }
+
+
+# ============================================================
+# EXPORT
+# ============================================================
+
+@contextmanager
+def _instantane(alias):
+    """
+    Transaction REPEATABLE READ (sauf transaction englobante :
+    le niveau ne se règle qu'en début de transaction).
+    """
+    connexion = connections[alias]
+    englobante = connexion.in_atomic_block
+
+    with transaction.atomic(using=alias):
+        if connexion.vendor == "postgresql" and not englobante:
+            with connexion.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield
+
+
+def exporter(tenant_id, sortie, taille_lot=TAILLE_LOT):
+    """
+    Écrit le tenant dans `sortie` (fichier binaire ouvert).
+    Retourne {modèle: nombre d'objets}.
+    """
+    tenant_id = str(tenant_id)
+    base = alias_du_tenant(tenant_id) or DEFAULT_DB_ALIAS
+
+    if not _modele("tenants.Tenant").objects.filter(pk=tenant_id).exists():
+        raise TransfertError(f"Tenant {tenant_id} introuvable.")
+
+    comptes = {}
+
+    with ExitStack() as pile:
+        for alias in dict.fromkeys([DEFAULT_DB_ALIAS, base]):
+            pile.enter_context(_instantane(alias))
+
+        flux = pile.enter_context(gzip.open(sortie, "wt", encoding="utf-8"))
+
+        def ecrire(objet):
+            flux.write(json.dumps(objet, cls=_Encodeur, separators=(",", ":")))
+            flux.write("\n")
+
+        ecrire({"entete": {
+            "format": FORMAT,
+            "tenant": tenant_id,
+            "date": timezone.now(),
+            "modeles": [label for label, _ in MODELES],
+        }})
+
+        for label, filtre in MODELES:
+            modele = _modele(label)
+            champs = [champ.attname for champ in modele._meta.concrete_fields]
+
+            lignes = (
+                modele._base_manager
+                .using(_base_du_modele(modele, base))
+                .filter(_filtre(filtre, tenant_id))
+                .order_by("pk")
+                .values_list(*champs)
+                .iterator(chunk_size=taille_lot)
+            )
+
+            comptes[label] = 0
+            for ligne in lignes:
+                ecrire({"m": label, "d": dict(zip(champs, ligne))})
+                comptes[label] += 1
+
+        ecrire({"fin": {
+            "comptes": comptes,
+            "controles": calculer_controles(tenant_id, base),
+        }})
+
+    return comptes
+
+
+# ============================================================
+# IMPORT
+# ============================================================
+
+@contextmanager
+def _dates_conservees(modele):
+    """auto_now / auto_now_add désactivés : dates d'origine conservées."""
+    champs = [
+        champ for champ in modele._meta.concrete_fields
+        if getattr(champ, "auto_now", False) or getattr(champ, "auto_now_add", False)
+    ]
+    etats = [(champ, champ.auto_now, champ.auto_now_add) for champ in champs]
+
+    for champ in champs:
+        champ.auto_now = champ.auto_now_add = False
+    try:
+        yield
+    finally:
+        for champ, auto_now, auto_now_add in etats:
+            champ.auto_now, champ.auto_now_add = auto_now, auto_now_add
+
+
+class _Importeur:
+
+    def __init__(self, tenant_id, base, taille_lot):
+        self.tenant_id = tenant_id
+        self.base = base
+        self.taille_lot = taille_lot
+
+        self.references = _references()
+        self.ids = defaultdict(dict)
+        self.comptes = defaultdict(int)
+        self.orphelins = 0
+
+        # Utilisateurs déjà présents : {pk cible: ancienne station}
+        self.stations_a_remapper = {}
+        # Comptes sans tenant (SuperAdmin) : jamais exportés, repris
+        # s'ils existent sur la cible. {pk: présent}
+        self.comptes_globaux = {}
+        self.createur_tenant = None
+
+        self.label = None
+        self.lot = []
+
+    # --- Flux ---
+
+    def ajouter(self, label, donnees):
+        if label != self.label:
+            self.vider()
+            self.label = label
+
+        self.lot.append(donnees)
+        self.comptes[label] += 1
+
+        if len(self.lot) >= self.taille_lot:
+            self.vider()
+
+    def vider(self):
+        if not self.lot:
+            return
+
+        modele = _modele(self.label)
+        lot, self.lot = self.lot, []
+
+        if self.label == "tenants.Tenant":
+            self._tenant(modele, lot)
+        elif modele is get_user_model():
+            self._utilisateurs(modele, lot)
+        else:
+            self._creer(modele, lot)
+
+    # --- Conversion ---
+
+    def _valeurs(self, modele, donnees):
+        valeurs = {}
+
+        for champ in modele._meta.concrete_fields:
+            valeur = donnees.get(champ.attname)
+
+            if champ.primary_key and isinstance(champ, models.AutoField):
+                continue
+
+            if champ.is_relation and valeur is not None:
+                valeur = self._remapper(champ, valeur)
+            elif valeur is not None:
+                valeur = champ.to_python(valeur)
+
+            valeurs[champ.attname] = valeur
+
+        source = SOURCES.get(valeurs.get("source_type"))
+        if source is not None:
+            nouveau = self.ids[source].get(valeurs["source_id"])
+            if nouveau is None:
+                self.orphelins += 1
+            else:
+                valeurs["source_id"] = nouveau
+
+        return valeurs
+
+    def _remapper(self, champ, valeur):
+        cible = _label(champ.related_model)
+
+        if cible not in self.references:
+            return champ.target_field.to_python(valeur)
+
+        valeur = champ.target_field.to_python(valeur)
+        nouveau = self.ids[cible].get(valeur)
+
+        if nouveau is None and champ.related_model is get_user_model():
+            nouveau = self._compte_global(champ.related_model, valeur)
+
+        if nouveau is None:
+            if champ.null:
+                return None
+            raise TransfertError(
+                f"{champ.model._meta.label}.{champ.name} : {cible} #{valeur} absent de l'export."
+            )
+
+        return nouveau
+
+    def _compte_global(self, modele, pk):
+        if pk not in self.comptes_globaux:
+            self.comptes_globaux[pk] = (
+                modele.objects.using(DEFAULT_DB_ALIAS)
+                .filter(pk=pk, tenant__isnull=True)
+                .exists()
+            )
+        return pk if self.comptes_globaux[pk] else None
+
+    def _memoriser(self, modele, anciens, objets):
+        label = _label(modele)
+        if label in self.references:
+            self.ids[label].update(zip(anciens, (objet.pk for objet in objets)))
+
+    # --- Modèles ---
+
+    def _tenant(self, modele, lot):
+        for donnees in lot:
+            valeurs = self._valeurs(modele, donnees)
+            pk = valeurs.pop("id")
+
+            if not modele.objects.using(DEFAULT_DB_ALIAS).filter(pk=pk).exists():
+                with _dates_conservees(modele):
+                    modele.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+                        [modele(pk=pk, **valeurs)]
+                    )
+                # Auteur importé après le tenant : rattaché en fin d'import
+                self.createur_tenant = (pk, donnees["created_by_id"])
+
+            self.ids["tenants.Tenant"][pk] = pk
+
+    def _utilisateurs(self, modele, lot):
+        existants = {
+            username: (pk, tenant_id)
+            for username, pk, tenant_id in modele.objects.using(DEFAULT_DB_ALIAS)
+            .filter(username__in=[d["username"] for d in lot])
+            .values_list("username", "pk", "tenant_id")
+        }
+
+        anciens, objets = [], []
+
+        for donnees in lot:
+            existant = existants.get(donnees["username"])
+
+            if existant is None:
+                anciens.append(donnees["id"])
+                objets.append(modele(**self._valeurs(modele, donnees)))
+                continue
+
+            pk, tenant_id = existant
+            if str(tenant_id) != str(donnees["tenant_id"]):
+                raise TransfertError(
+                    f"Utilisateur {donnees['username']} déjà pris par un autre tenant sur la cible."
+                )
+
+            self.ids[_label(modele)][donnees["id"]] = pk
+            if donnees["station_id"] is not None:
+                self.stations_a_remapper[pk] = donnees["station_id"]
+
+        with _dates_conservees(modele):
+            modele.objects.using(DEFAULT_DB_ALIAS).bulk_create(objets)
+
+        self._memoriser(modele, anciens, objets)
+
+    def _creer(self, modele, lot):
+        alias = _base_du_modele(modele, self.base)
+        anciens = [donnees[modele._meta.pk.attname] for donnees in lot]
+        objets = [modele(**self._valeurs(modele, donnees)) for donnees in lot]
+
+        options = {}
+        if modele._meta.auto_created:
+            # Table M2M : paires déjà présentes (utilisateurs réutilisés)
+            options["ignore_conflicts"] = True
+
+        # Stations d'une base dédiée : identifiants pris sur "default"
+        # (recopie sans collision, cf. core.referentiel)
+        if _label(modele) == "stations.Station" and alias != DEFAULT_DB_ALIAS:
+            for objet, pk in zip(objets, allouer_ids_station(len(objets))):
+                objet.pk = pk
+
+        with _dates_conservees(modele):
+            modele._base_manager.using(alias).bulk_create(
+                objets,
+                batch_size=self.taille_lot,
+                **options,
+            )
+
+        self._memoriser(modele, anciens, objets)
+
+    # --- Fin ---
+
+    def finaliser(self):
+        self.vider()
+
+        Utilisateur = get_user_model()
+        stations = self.ids["stations.Station"]
+
+        for pk, station_id in self.stations_a_remapper.items():
+            Utilisateur.objects.using(DEFAULT_DB_ALIAS).filter(pk=pk).update(
+                station_id=stations.get(station_id)
+            )
+
+        if self.createur_tenant is not None:
+            pk, createur = self.createur_tenant
+            if createur is not None:
+                createur = (
+                    self.ids[_label(Utilisateur)].get(createur)
+                    or self._compte_global(Utilisateur, createur)
+                )
+            _modele("tenants.Tenant").objects.using(DEFAULT_DB_ALIAS).filter(pk=pk).update(
+                created_by_id=createur
+            )
+
+        if self.base != DEFAULT_DB_ALIAS:
+            synchroniser_referentiel(self.tenant_id)
+
+
+def _verifier(importeur, pied):
+    ecarts = []
+
+    for label, attendu in pied["comptes"].items():
+        lu = importeur.comptes.get(label, 0)
+        if lu != attendu:
+            ecarts.append(f"{label} : {lu} lus, {attendu} exportés")
+            continue
+
+        modele = _modele(label)
+        if modele._meta.app_label not in APPS_TENANT:
+            continue
+
+        filtre = dict(MODELES)[label]
+        en_base = (
+            modele._base_manager
+            .using(importeur.base)
+            .filter(_filtre(filtre, importeur.tenant_id))
+            .count()
+        )
+        if en_base != attendu:
+            ecarts.append(f"{label} : {en_base} en base, {attendu} exportés")
+
+    controles = calculer_controles(importeur.tenant_id, importeur.base)
+    for cle, attendu in pied["controles"].items():
+        if controles.get(cle) != attendu:
+            ecarts.append(f"contrôle {cle} : {controles.get(cle)} ≠ {attendu}")
+
+    if ecarts:
+        raise TransfertError("Import incohérent :\n  " + "\n  ".join(ecarts))
+
+
+def importer(entree, taille_lot=TAILLE_LOT, essai=False):
+    """
+    Charge un export (fichier binaire ouvert) dans une transaction
+    par base ; rien n'est validé si un contrôle échoue.
+    `essai` : import complet puis annulation.
+    Retourne {"tenant", "base", "comptes", "orphelins"}.
+    """
+    with gzip.open(entree, "rt", encoding="utf-8") as flux:
+        entete = json.loads(next(flux)).get("entete") or {}
+
+        if entete.get("format") != FORMAT:
+            raise TransfertError(f"Format d'export non supporté : {entete.get('format')}")
+
+        tenant_id = entete["tenant"]
+        base = alias_du_tenant(tenant_id) or DEFAULT_DB_ALIAS
+
+        Station = _modele("stations.Station")
+        if Station._base_manager.using(base).filter(tenant_id=tenant_id).exists():
+            raise TransfertError(f"Le tenant {tenant_id} a déjà des données sur la base {base}.")
+
+        importeur = _Importeur(tenant_id, base, taille_lot)
+        pied = None
+
+        with ExitStack() as pile:
+            aliases = list(dict.fromkeys([DEFAULT_DB_ALIAS, base]))
+            for alias in aliases:
+                pile.enter_context(transaction.atomic(using=alias))
+
+            for ligne in flux:
+                objet = json.loads(ligne)
+                if "fin" in objet:
+                    pied = objet["fin"]
+                    break
+                importeur.ajouter(objet["m"], objet["d"])
+
+            if pied is None:
+                raise TransfertError("Export tronqué : ligne de fin absente.")
+
+            importeur.finaliser()
+            _verifier(importeur, pied)
+
+            if essai:
+                for alias in aliases:
+                    transaction.set_rollback(True, using=alias)
+
+    return {
+        "tenant": tenant_id,
+        "base": base,
+        "comptes": dict(importeur.comptes),
+        "orphelins": importeur.orphelins,
+    }
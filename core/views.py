@@ -7,7 +7,6 @@ from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db import transaction
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -29,6 +28,8 @@ from . import models
 
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models.functions import TruncMonth, Concat, Coalesce
+from core.db_router import atomic_tenant
+from core.export import ExportMixin
 from core.pagination import StandardResultsSetPagination
 from accounts.constants import UserRole
 
@@ -201,7 +202,7 @@ class CotisationViewSet(viewsets.ModelViewSet):
         return qs
         
 
-    @transaction.atomic
+    @atomic_tenant
     def perform_create(self, serializer):
         user = self.request.user
         membre = serializer.validated_data.get("membre")
@@ -223,7 +224,7 @@ class CotisationViewSet(viewsets.ModelViewSet):
 class SyncView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
+    @atomic_tenant
     def post(self, request):
         user = request.user
         tenant = getattr(user, 'tenant', None)
@@ -601,7 +602,7 @@ class StaffViewSet(TenantViewSet, viewsets.ModelViewSet):
         ).order_by("role", "username")
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(ExportMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
@@ -617,6 +618,17 @@ class TransactionViewSet(viewsets.ModelViewSet):
     ordering_fields = ["date", "montant"]
     ordering = ["-date"]
 
+    export_champs = (
+        ("id", "id"),
+        ("date", "date"),
+        ("type", "type"),
+        ("montant", "montant"),
+        ("categorie", "categorie"),
+        ("mode_paiement", "mode_paiement"),
+        ("reference", "reference"),
+        ("projet", "projet__nom"),
+    )
+
     def get_queryset(self):
         user = self.request.user
         tenant = getattr(user, "tenant", None)
@@ -0,0 +1,28 @@
+# core/views_metrics.py
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from core import metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics_view(request):
+    """
+    Exposition Prometheus (tous les workers additionnés).
+    Hors DRF : le scraper n'a pas de JWT ; jeton Bearer (METRICS_TOKEN).
+    Sans jeton configuré : accès libre en DEBUG seulement, refus sinon.
+    """
+    jeton = settings.METRICS_TOKEN
+
+    if not jeton:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    else:
+        fourni = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(fourni.encode(), jeton.encode()):
+            return HttpResponseForbidden()
+
+    return HttpResponse(metrics.exposition(), content_type=CONTENT_TYPE)
@@ -0,0 +1,31 @@
+# core/views_profilage.py
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import profilage
+from core.permissions import IsSuperAdminOnly
+
+
+class RequetesLentesView(APIView):
+    """
+    Requêtes lentes échantillonnées par ProfilageMiddleware
+    (tampon circulaire du processus qui répond).
+    """
+    permission_classes = [IsSuperAdminOnly]
+
+    def get(self, request):
+        lentes = profilage.requetes_lentes()
+
+        chemin = request.query_params.get("chemin")
+        if chemin:
+            lentes = [r for r in lentes if r["chemin"].startswith(chemin)]
+
+        return Response({
+            "count": len(lentes),
+            "results": lentes,
+        })
+
+    def delete(self, request):
+        profilage.vider()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -5,22 +5,23 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.conf import settings
+from django.utils import timezone
+from core.db_router import lecture_replica
 from core.models import Transaction, Projet, Membre, Cotisation
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 
 from stations.models import Station
-from finances_station.models import TransactionStation
+from stations.services.cloture import historique
 from .permissions import IsAdminTenantFinance, IsAdminTenantStation
 from .utils.periods import get_period_dates
 
-from dashboard.utils.aggregations import sum_montant
-
 Utilisateur = get_user_model()
 
 class DashboardView(APIView):
     permission_classes = [IsAuthenticated, IsAdminTenantFinance]
 
+    @lecture_replica
     def get(self, request):
         user = request.user
         tenant = user.tenant
@@ -86,6 +87,7 @@ class DashboardView(APIView):
 class AdminTenantStationDashboardView(APIView):
     permission_classes = [IsAuthenticated, IsAdminTenantStation]
 
+    @lecture_replica
     def get(self, request):
         station_id = request.query_params.get("station_id")
         period = request.query_params.get("period", "month")
@@ -104,14 +106,15 @@ class AdminTenantStationDashboardView(APIView):
 
         start_date, end_date = get_period_dates(period)
 
-        transactions = TransactionStation.objects.filter(
-            tenant_id=request.user.tenant_id,
-            station_id=station.id,
-            date__range=(start_date, end_date)
-        )
+        # Clôtures journalières, agrégats bruts pour le jour en cours
+        jours = historique(
+            [station.id],
+            timezone.localdate(start_date),
+            timezone.localdate(end_date),
+        ).values()
 
-        recettes = transactions.filter(type="RECETTE")
-        depenses = transactions.filter(type="DEPENSE")
+        recettes = sum(jour["recettes"] for jour in jours)
+        depenses = sum(jour["depenses"] for jour in jours)
 
         return Response({
             "station": {
@@ -126,9 +129,9 @@ class AdminTenantStationDashboardView(APIView):
                 "type": period,
             },
             "synthese": {
-                "recettes": sum_montant(recettes),
-                "depenses": sum_montant(depenses),
-                "solde": sum_montant(recettes) - sum_montant(depenses),
-                "transactions": transactions.count(),
+                "recettes": recettes,
+                "depenses": depenses,
+                "solde": recettes - depenses,
+                "transactions": sum(jour["transactions"] for jour in jours),
             },
         })
\ No newline at end of file
@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
 
 from core.permissions import IsSuperAdminOnly
+from core.db_router import lecture_replica
 from core.models import Tenant
 from accounts.constants import UserRole
 
@@ -17,6 +18,7 @@ class AdminDashboardView(APIView):
     """
     permission_classes = [IsAuthenticated, IsSuperAdminOnly]
 
+    @lecture_replica
     def get(self, request):
         tenants = Tenant.objects.all().order_by("-date_creation")[:5]
 
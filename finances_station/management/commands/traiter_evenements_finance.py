@@ -0,0 +1,62 @@
+# finances_station/management/commands/traiter_evenements_finance.py
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.db_router import bases_tenants, utiliser_base
+from finances_station.services.outbox import traiter_evenements
+
+
+class Command(BaseCommand):
+    help = "Worker outbox : transforme les événements finance en TransactionStation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=1.0,
+            help="Attente (s) quand la file est vide",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Draine la file puis s'arrête",
+        )
+
+    def handle(self, *args, **options):
+        self.arret = False
+        signal.signal(signal.SIGTERM, self._arreter)
+        signal.signal(signal.SIGINT, self._arreter)
+
+        total = 0
+
+        while not self.arret:
+            close_old_connections()
+            traites = 0
+
+            # Base partagée puis bases des tenants isolés
+            for alias in bases_tenants():
+                with utiliser_base(alias):
+                    traites += traiter_evenements(batch_size=options["batch_size"])
+
+            total += traites
+
+            # Seulement des événements en attente de relance : pause
+            if traites:
+                continue
+
+            if options["once"]:
+                break
+
+            time.sleep(options["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Événements traités : {total}")
+        )
+
+    def _arreter(self, *args):
+        self.arret = True
@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-18 11:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances_station', '0002_transactionstation_updated_at'),
+        ('stations', '0006_relaisequipe_updated_at'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvenementFinance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(max_length=50)),
+                ('source_id', models.PositiveIntegerField()),
+                ('type', models.CharField(choices=[('RECETTE', 'Recette'), ('DEPENSE', 'Dépense')], max_length=10)),
+                ('montant', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('date', models.DateTimeField()),
+                ('finance_status', models.CharField(choices=[('PROVISOIRE', 'Provisoire'), ('CONFIRMEE', 'Confirmée')], default='PROVISOIRE', max_length=15)),
+                ('statut', models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('TRAITE', 'Traité'), ('ERREUR', 'Erreur')], default='EN_ATTENTE', max_length=15)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('derniere_erreur', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('traite_le', models.DateTimeField(blank=True, null=True)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='stations.station')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenants.tenant')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['statut', 'id'], name='idx_evenement_finance_statut')],
+                'unique_together': {('source_type', 'source_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 15:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances_station', '0003_evenementfinance'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='transactionstation',
+            unique_together={('source_type', 'source_id', 'date')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances_station', '0004_alter_transactionstation_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evenementfinance',
+            name='prochaine_tentative',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0 on 2026-10-19 09:40
+
+from django.db import migrations
+
+# Unicité par source de TransactionStation hors de la table partitionnée
+# (la clé de partition `date` y entre dans toute contrainte unique).
+# Tenue par trigger : tout écrivain est couvert (outbox, import, SQL).
+# ledgers.deplacement = 'on' : ligne déplacée d'une partition à une
+# autre (stations/services/partitions.py), clé inchangée.
+SQL = """
+CREATE TABLE finances_station_cle_source (
+    source_type varchar(50) NOT NULL,
+    source_id integer NOT NULL,
+    PRIMARY KEY (source_type, source_id)
+);
+
+INSERT INTO finances_station_cle_source (source_type, source_id)
+SELECT DISTINCT source_type, source_id FROM finances_station_transactionstation;
+
+CREATE FUNCTION finances_station_cle_source_maj() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('ledgers.deplacement', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO finances_station_cle_source (source_type, source_id)
+        VALUES (NEW.source_type, NEW.source_id);
+    ELSE
+        DELETE FROM finances_station_cle_source
+        WHERE source_type = OLD.source_type AND source_id = OLD.source_id;
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER finances_station_cle_source
+AFTER INSERT OR DELETE ON finances_station_transactionstation
+FOR EACH ROW EXECUTE FUNCTION finances_station_cle_source_maj();
+"""
+
+SQL_INVERSE = """
+DROP TRIGGER IF EXISTS finances_station_cle_source ON finances_station_transactionstation;
+DROP FUNCTION IF EXISTS finances_station_cle_source_maj();
+DROP TABLE IF EXISTS finances_station_cle_source;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances_station', '0005_evenementfinance_prochaine_tentative'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL, SQL_INVERSE),
+    ]
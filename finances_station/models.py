@@ -33,10 +33,78 @@ class TransactionStation(models.Model):
     date = models.DateTimeField()
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ("source_type", "source_id")
+        # Table partitionnée par mois sur `date` (stations/services/partitions.py) :
+        # toute contrainte unique doit contenir la clé de partition.
+        # Unicité par (source_type, source_id) : table finances_station_cle_source
+        # tenue par trigger (migration 0006), pour tout écrivain.
+        unique_together = ("source_type", "source_id", "date")
         ordering = ["-date"]
 
     def __str__(self):
         return f"{self.type} - {self.montant} ({self.station})"
+
+
+
+class EvenementFinance(models.Model):
+    """
+    Outbox STATION → FINANCES.
+
+    Écrit dans la même transaction que le workflow station,
+    puis transformé en TransactionStation par le worker
+    (commande traiter_evenements_finance).
+    """
+
+    STATUT_EN_ATTENTE = "EN_ATTENTE"
+    STATUT_TRAITE = "TRAITE"
+    STATUT_ERREUR = "ERREUR"
+
+    STATUT_CHOICES = (
+        (STATUT_EN_ATTENTE, "En attente"),
+        (STATUT_TRAITE, "Traité"),
+        (STATUT_ERREUR, "Erreur"),
+    )
+
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE)
+    station = models.ForeignKey(Station, on_delete=models.CASCADE)
+
+    # Clé d'idempotence (identique à TransactionStation)
+    source_type = models.CharField(max_length=50)
+    source_id = models.PositiveIntegerField()
+
+    type = models.CharField(max_length=10, choices=TransactionStation.TYPE_CHOICES)
+    montant = models.DecimalField(max_digits=12, decimal_places=2)
+    date = models.DateTimeField()
+    finance_status = models.CharField(
+        max_length=15,
+        choices=TransactionStation.FINANCE_STATUS,
+        default="PROVISOIRE"
+    )
+
+    statut = models.CharField(
+        max_length=15,
+        choices=STATUT_CHOICES,
+        default=STATUT_EN_ATTENTE
+    )
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    derniere_erreur = models.TextField(blank=True, default="")
+    # Relance après échec, délai exponentiel (services/outbox.py)
+    prochaine_tentative = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    traite_le = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("source_type", "source_id")
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["statut", "id"],
+                name="idx_evenement_finance_statut"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source_type}#{self.source_id} ({self.statut})"
@@ -0,0 +1,184 @@
+# finances_station/services/outbox.py
+
+import logging
+from datetime import timedelta
+
+from django.db import DatabaseError
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.db_router import atomic_tenant
+
+from finances_station.models import EvenementFinance, TransactionStation
+
+logger = logging.getLogger(__name__)
+
+MAX_TENTATIVES = 5
+
+# Relance après échec : 30 s, 1 min, 2 min, 4 min puis ERREUR
+DELAI_RELANCE = timedelta(seconds=30)
+
+CHAMPS_TRANSACTION = (
+    "tenant_id",
+    "station_id",
+    "source_type",
+    "source_id",
+    "type",
+    "montant",
+    "date",
+    "finance_status",
+)
+
+
+# ============================================================
+# PUBLICATION (côté workflow station)
+# ============================================================
+
+def publier_evenement(**champs):
+    """
+    Enregistre un événement finance dans la transaction courante.
+    Idempotent sur (source_type, source_id).
+    """
+    evenement, _ = EvenementFinance.objects.get_or_create(
+        source_type=champs.pop("source_type"),
+        source_id=champs.pop("source_id"),
+        defaults=champs,
+    )
+    return evenement
+
+
+def publier_evenements(evenements):
+    """
+    Version groupée : liste d'EvenementFinance non sauvegardés.
+    """
+    return EvenementFinance.objects.bulk_create(
+        evenements,
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+# ============================================================
+# TRAITEMENT (worker)
+# ============================================================
+
+def _transaction_depuis(evenement):
+    return TransactionStation(
+        **{champ: getattr(evenement, champ) for champ in CHAMPS_TRANSACTION}
+    )
+
+
+def _sources_existantes(evenements):
+    """(source_type, source_id) déjà comptabilisés parmi ceux du lot."""
+    return set(
+        TransactionStation.objects
+        .filter(
+            source_type__in={e.source_type for e in evenements},
+            source_id__in={e.source_id for e in evenements},
+        )
+        .values_list("source_type", "source_id")
+    )
+
+
+def traiter_evenements(batch_size=200):
+    """
+    Draine un lot d'événements en attente.
+
+    SELECT ... FOR UPDATE SKIP LOCKED : plusieurs workers
+    peuvent tourner en parallèle sans se marcher dessus.
+    Les événements en échec attendent leur prochaine_tentative.
+    Retourne le nombre d'événements comptabilisés.
+    """
+    maintenant = timezone.now()
+
+    with atomic_tenant():
+        evenements = list(
+            EvenementFinance.objects
+            .select_for_update(skip_locked=True)
+            .filter(statut=EvenementFinance.STATUT_EN_ATTENTE)
+            .filter(
+                Q(prochaine_tentative__isnull=True)
+                | Q(prochaine_tentative__lte=maintenant)
+            )
+            .order_by("id")[:batch_size]
+        )
+
+        if not evenements:
+            return 0
+
+        try:
+            with atomic_tenant():
+                # Sources déjà comptabilisées écartées : la clé par source
+                # (finances_station_cle_source) rejetterait tout le lot.
+                # Événements verrouillés et uniques par source : pas de
+                # concurrence entre le filtre et l'insertion.
+                existantes = _sources_existantes(evenements)
+                TransactionStation.objects.bulk_create(
+                    [
+                        _transaction_depuis(e)
+                        for e in evenements
+                        if (e.source_type, e.source_id) not in existantes
+                    ],
+                    ignore_conflicts=True,
+                )
+        except DatabaseError:
+            logger.exception("Lot outbox en échec, traitement unitaire.")
+            return _traiter_unitairement(evenements)
+
+        EvenementFinance.objects.filter(
+            id__in=[e.id for e in evenements]
+        ).update(
+            statut=EvenementFinance.STATUT_TRAITE,
+            tentatives=F("tentatives") + 1,
+            traite_le=maintenant,
+        )
+
+    return len(evenements)
+
+
+def _traiter_unitairement(evenements):
+    """
+    Isole les événements en erreur (savepoint par événement).
+    Échec : relance différée (DELAI_RELANCE doublé à chaque tentative) ;
+    au-delà de MAX_TENTATIVES : statut ERREUR, plus de relance.
+    Retourne le nombre d'événements comptabilisés.
+    """
+    comptabilises = 0
+
+    for evenement in evenements:
+        try:
+            with atomic_tenant():
+                TransactionStation.objects.get_or_create(
+                    source_type=evenement.source_type,
+                    source_id=evenement.source_id,
+                    defaults={
+                        champ: getattr(evenement, champ)
+                        for champ in CHAMPS_TRANSACTION
+                        if champ not in ("source_type", "source_id")
+                    },
+                )
+        except DatabaseError as e:
+            evenement.tentatives += 1
+            evenement.derniere_erreur = str(e)[:2000]
+            evenement.prochaine_tentative = timezone.now() + (
+                DELAI_RELANCE * 2 ** (evenement.tentatives - 1)
+            )
+            if evenement.tentatives >= MAX_TENTATIVES:
+                evenement.statut = EvenementFinance.STATUT_ERREUR
+            evenement.save(
+                update_fields=[
+                    "tentatives",
+                    "derniere_erreur",
+                    "prochaine_tentative",
+                    "statut",
+                ]
+            )
+            continue
+
+        evenement.tentatives += 1
+        evenement.statut = EvenementFinance.STATUT_TRAITE
+        evenement.traite_le = timezone.now()
+        evenement.save(update_fields=["tentatives", "statut", "traite_le"])
+        comptabilises += 1
+
+    return comptabilises
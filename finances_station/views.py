@@ -4,12 +4,15 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from accounts.constants import UserRole
+from core.conditional import ConditionalGetMixin
+from core.export import ExportMixin
+from core.db_router import LectureReplicaMixin
 
 from finances_station.models import TransactionStation
 from finances_station.serializers import TransactionStationSerializer
 
 
-class TransactionStationViewSet(ReadOnlyModelViewSet):
+class TransactionStationViewSet(LectureReplicaMixin, ExportMixin, ConditionalGetMixin, ReadOnlyModelViewSet):
     """
     Lecture seule des transactions financières de station.
     Les créations se font exclusivement via les flux STATION → FINANCES.
@@ -17,6 +20,19 @@ class TransactionStationViewSet(ReadOnlyModelViewSet):
     serializer_class = TransactionStationSerializer
     permission_classes = [IsAuthenticated]
 
+    query_budget = {"list": 3, "retrieve": 1}
+
+    export_champs = (
+        ("id", "id"),
+        ("date", "date"),
+        ("station", "station__nom"),
+        ("type", "type"),
+        ("montant", "montant"),
+        ("statut", "finance_status"),
+        ("source", "source_type"),
+        ("source_id", "source_id"),
+    )
+
     def get_queryset(self):
         user = self.request.user
 
@@ -50,7 +66,7 @@ class TransactionStationViewSet(ReadOnlyModelViewSet):
 
         # ✅ Confirmation financière
         transaction.finance_status = "CONFIRMEE"
-        transaction.save(update_fields=["finance_status"])
+        transaction.save(update_fields=["finance_status", "updated_at"])
 
         return Response({
             "status": "confirmée",
@@ -0,0 +1,14 @@
+# gunicorn.conf.py (chargé automatiquement depuis le répertoire courant)
+import glob
+import os
+
+
+def on_starting(server):
+    # Métriques multi-processus : chaque démarrage du master repart de zéro
+    repertoire = os.getenv("METRICS_MULTIPROC_DIR")
+    if not repertoire:
+        return
+
+    os.makedirs(repertoire, exist_ok=True)
+    for fichier in glob.glob(os.path.join(repertoire, "*.json")):
+        os.remove(fichier)
@@ -5,6 +5,7 @@ Django settings for saas_finance project.
 Adapted for Windows + Docker Postgres (Django 5.x).
 """
 
+import json
 import os
 from pathlib import Path
 from datetime import timedelta
@@ -51,10 +52,15 @@ INSTALLED_APPS = [
     'dashboard',
     'finances_station',
     'stations.apps.StationsConfig',
+    'taches',
 ]
 
 
 MIDDLEWARE = [
+    'core.middleware.ProfilageMiddleware',
+    'core.middleware.MetriquesMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'core.middleware.TenantDatabaseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -91,17 +97,116 @@ ASGI_APPLICATION = 'saas_finance.asgi.application'
 # -----------------------
 # DATABASE CONFIGURATION
 # -----------------------
+# Identifiants : variables d'environnement uniquement (aucun secret versionné).
+#
+# Connexions (une connexion neuve = TCP + TLS + auth à chaque requête) :
+# - défaut : connexions persistantes DB_CONN_MAX_AGE secondes,
+#   vérifiées avant réutilisation (CONN_HEALTH_CHECKS) ;
+# - DB_POOL=1 : pool natif psycopg 3 par processus (paquet psycopg[pool]),
+#   exclusif avec CONN_MAX_AGE.
+# Mesure : python manage.py bench_connexions
+DB_POOL = os.getenv('DB_POOL', '0') == '1'
+
+DB_OPTIONS = {
+    'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+    # Requête annulée par PostgreSQL au-delà (0 = illimité : migrations, seed_scale)
+    'options': '-c statement_timeout=%d' % int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000')),
+}
+
+if os.getenv('DB_SSLMODE'):
+    DB_OPTIONS['sslmode'] = os.getenv('DB_SSLMODE')
+
+if DB_POOL:
+    # Le pool natif de Django exige psycopg 3 ; requirements.txt ne fournit
+    # que psycopg2-binary.
+    try:
+        import psycopg  # noqa: F401
+        from psycopg_pool import ConnectionPool
+    except ImportError as exc:
+        from django.core.exceptions import ImproperlyConfigured
+
+        raise ImproperlyConfigured(
+            "DB_POOL=1 requiert psycopg 3 et son pool : "
+            "pip install 'psycopg[binary,pool]' (ou DB_POOL=0)."
+        ) from exc
+
+    DB_OPTIONS['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX', '10')),
+        # Attente max d'une connexion libre avant erreur (s)
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        # Connexion inactive rendue au serveur après (s)
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        # Vérifiée à chaque emprunt (équivalent CONN_HEALTH_CHECKS)
+        'check': ConnectionPool.check_connection,
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'saas_finance_db',       # nom de la base en ASCII
-        'USER': 'olga',                  # utilisateur en ASCII
-        'PASSWORD': 'Olga2974',          # mot de passe en ASCII
-        'HOST': '127.0.0.1',             # localhost ou IP en ASCII
-        'PORT': '5432',                   # port PostgreSQL
+        'NAME': os.getenv('DB_NAME', 'saas_finance_db'),
+        'USER': os.getenv('DB_USER', 'saas_finance'),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', '127.0.0.1'),
+        'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': not DB_POOL,
+        'OPTIONS': DB_OPTIONS,
     }
 }
 
+# Replica en lecture (core.db_router) : dashboards, rapports, exports.
+# Absent si DB_REPLICA_HOST n'est pas défini (routeur neutre).
+# En local : DB_REPLICA_HOST=127.0.0.1 → même base, deux alias.
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DB_OPTIONS),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Base dédiée par gros tenant (core.db_router.TenantRouter).
+# TENANT_DATABASES (JSON) : {"<tenant_id>": {"ALIAS": "tenant_xxx", "HOST": "...", ...}}
+# clés absentes reprises de la base par défaut.
+# Schéma et référentiel : python manage.py migrate_tenants
+TENANT_DATABASES = {}
+
+for tenant_id, base in json.loads(os.getenv('TENANT_DATABASES', '{}')).items():
+    base = dict(base)
+    alias = base.pop('ALIAS')
+    DATABASES[alias] = {**DATABASES['default'], **base, 'OPTIONS': dict(DB_OPTIONS)}
+    TENANT_DATABASES[str(tenant_id)] = alias
+
+DATABASE_ROUTERS = [
+    'core.db_router.TenantRouter',
+    'core.db_router.ReplicaRouter',
+]
+
+# Secondes de lecture sur le primaire après une écriture (retard du replica)
+REPLICA_LAG_TOLERANCE = int(os.getenv('REPLICA_LAG_TOLERANCE', '5'))
+
+# Cache partagé entre workers : épinglage replica, mémo du GET conditionnel.
+# REDIS_URL absent : cache mémoire propre à chaque processus, valable en
+# développement seulement ; avec un replica, refusé hors DEBUG (core.apps).
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Custom user
 AUTH_USER_MODEL = "accounts.Utilisateur"
 
@@ -202,6 +307,46 @@ LOGGING = {
     'root': {'handlers': ['console'], 'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO')},
 }
 
+# File de tâches de fond (taches, commande run_worker)
+TACHES_CONCURRENCE_TENANT = int(os.getenv('TACHES_CONCURRENCE_TENANT', '2'))  # 0 = illimité
+TACHES_BACKOFF_BASE = int(os.getenv('TACHES_BACKOFF_BASE', '30'))
+TACHES_BACKOFF_MAX = int(os.getenv('TACHES_BACKOFF_MAX', '3600'))
+# Tâche EN_COURS sans signe de vie depuis N s : worker tué, remise en file
+TACHES_DELAI_ORPHELINE = int(os.getenv('TACHES_DELAI_ORPHELINE', '300'))
+
+# Archivage à froid des périodes closes (stations/services/archives.py)
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', BASE_DIR / 'archives')
+ARCHIVE_RETENTION_MOIS = int(os.getenv('ARCHIVE_RETENTION_MOIS', '24'))
+
+# Dossiers de fin de mois (stations/services/bilans.py) : stockage partagé par les workers
+BILAN_DIR = os.getenv('BILAN_DIR', BASE_DIR / 'bilans')
+
+# Analytique Parquet + DuckDB (stations/services/analytique.py), pyarrow / duckdb optionnels
+ANALYTIQUE_DIR = os.getenv('ANALYTIQUE_DIR', BASE_DIR / 'analytique')
+ANALYTIQUE_DUCKDB_THREADS = int(os.getenv('ANALYTIQUE_DUCKDB_THREADS', '2'))
+
+# Export de listes (core.export) : le CSV est en flux, le XLSX est
+# construit en entier avant l'envoi et donc plafonné
+EXPORT_XLSX_MAX_LIGNES = int(os.getenv('EXPORT_XLSX_MAX_LIGNES', '100000'))
+
+# Stock : "ROW" (UPDATE de la cuve) ou "LEDGER" (mouvements append-only + compaction)
+STOCK_MODE = os.getenv('STOCK_MODE', 'ROW')
+
+# Profilage des requêtes (core.middleware.ProfilageMiddleware)
+# Échantillon 0..1 (0 = seulement via l'en-tête X-Profilage, SuperAdmin)
+PROFILAGE_ECHANTILLON = float(os.getenv('PROFILAGE_ECHANTILLON', '0'))
+PROFILAGE_SEUIL_LENT_MS = int(os.getenv('PROFILAGE_SEUIL_LENT_MS', '500'))
+PROFILAGE_TOP_REQUETES = 5
+PROFILAGE_TAILLE_BUFFER = 200
+
+# Métriques Prometheus (/metrics)
+# Plusieurs workers gunicorn : répertoire partagé, vidé au démarrage (gunicorn.conf.py)
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR') or None
+METRICS_INTERVALLE_ECRITURE = float(os.getenv('METRICS_INTERVALLE_ECRITURE', '1'))
+# Jeton Bearer exigé par /metrics. Vide : accès libre en DEBUG,
+# /metrics refusé (403) sinon : à définir en production.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 # Defaults
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@example.com')
 
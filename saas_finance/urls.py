@@ -20,6 +20,8 @@ from core.views import (
 )
 
 from core.views_tenant import TenantViewSet
+from core.views_metrics import metrics_view
+from core.views_profilage import RequetesLentesView
 
 app_name = "saas_finance"
 
@@ -39,6 +41,7 @@ urlpatterns = [
     
     path("api/v1/station/", include("stations.urls")),
     path("api/v1/finances/", include("finances_station.urls")),
+    path("api/v1/taches/", include("taches.urls")),
 
     path("api/v1/", include(router.urls)),
     path("api/v1/", include("tenants.urls")),
@@ -46,6 +49,9 @@ urlpatterns = [
 
     path("api/v1/me/", MeView.as_view()),
     path("api/v1/sync/", SyncView.as_view()),
+    path("api/v1/profilage/requetes-lentes/", RequetesLentesView.as_view()),
+
+    path("metrics", metrics_view),
 
     path("api/v1/auth/login/", MyTokenObtainPairView.as_view()),
     path("api/v1/auth/refresh/", TokenRefreshView.as_view()),
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class StationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "stations"
+
+    def ready(self):
+        from stations import signals  # noqa: F401
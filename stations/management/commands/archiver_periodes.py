@@ -0,0 +1,78 @@
+# stations/management/commands/archiver_periodes.py
+"""
+Archivage à froid des périodes closes (stations/services/archives.py),
+sur chaque base de tenant.
+
+    python manage.py archiver_periodes                 # rétention ARCHIVE_RETENTION_MOIS
+    python manage.py archiver_periodes --retention 12 --lot 5000
+    python manage.py archiver_periodes --verifier      # empreintes des fichiers
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db_router import bases_tenants
+from stations.services.archives import (
+    TAILLE_LOT,
+    ArchiveError,
+    archiver_base,
+    limite_retention,
+    verifier,
+)
+from tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = "Archive les périodes closes (relais, mouvements, transactions) puis les supprime"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention",
+            type=int,
+            help="Mois conservés en base (défaut : ARCHIVE_RETENTION_MOIS)",
+        )
+        parser.add_argument("--lot", type=int, default=TAILLE_LOT)
+        parser.add_argument(
+            "--sans-detacher",
+            action="store_true",
+            help="Tables partitionnées : suppression par lots, partitions conservées",
+        )
+        parser.add_argument(
+            "--verifier",
+            action="store_true",
+            help="Contrôler les fichiers archivés sans rien archiver",
+        )
+
+    def handle(self, *args, **options):
+        if options["verifier"]:
+            return self._verifier()
+
+        limite = limite_retention(options["retention"])
+        self.stdout.write(f"Archivage des mois antérieurs à {limite:%Y-%m}")
+
+        for alias in bases_tenants():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Base {alias}"))
+
+            rapport = archiver_base(
+                alias,
+                limite,
+                options["lot"],
+                detacher=not options["sans_detacher"],
+            )
+            if not rapport:
+                self.stdout.write("  rien à archiver")
+
+            for ligne in rapport:
+                mode = "partition détachée" if ligne["detachee"] else "supprimées"
+                self.stdout.write(
+                    f"  {ligne['archive']} {ligne['mois']} : "
+                    f"{ligne['archivees']} archivées, {ligne['supprimees']} {mode}"
+                )
+
+    def _verifier(self):
+        for tenant_id in Tenant.objects.values_list("id", flat=True):
+            try:
+                nombre = verifier(tenant_id)
+            except ArchiveError as exc:
+                raise CommandError(f"Tenant {tenant_id} : {exc}")
+            if nombre:
+                self.stdout.write(f"  tenant {tenant_id} : {nombre} parties intègres")
@@ -0,0 +1,134 @@
+# stations/management/commands/bench_connexions.py
+"""
+Surcoût de connexion PostgreSQL par requête HTTP.
+
+Deux scénarios, même requête SQL :
+- "neuve" : une connexion ouverte puis fermée par requête
+  (comportement CONN_MAX_AGE=0, sans pool) ;
+- "configuree" : cycle requête Django réel (request_started /
+  request_finished) avec la configuration courante
+  (connexions persistantes + health check, ou pool DB_POOL=1).
+
+    python manage.py bench_connexions --iterations 500
+    DB_POOL=1 python manage.py bench_connexions --json pool.json
+"""
+
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+REQUETE = "SELECT pg_backend_pid()"
+
+
+def _percentile(valeurs, p):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(len(valeurs) * p))]
+
+
+def _resume(durees, backends):
+    ms = [d * 1000 for d in durees]
+    return {
+        "iterations": len(ms),
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(_percentile(ms, 0.95), 3),
+        "p99_ms": round(_percentile(ms, 0.99), 3),
+        "moyenne_ms": round(statistics.fmean(ms), 3),
+        # Connexions physiques ouvertes côté serveur
+        "connexions_ouvertes": len(backends),
+    }
+
+
+def _params_directs():
+    params = connection.get_connection_params()
+    # Connexion directe : jamais via le pool éventuel
+    params.pop("pool", None)
+    return params
+
+
+def scenario_neuve(iterations):
+    params = _params_directs()
+    durees = []
+    backends = set()
+
+    for _ in range(iterations):
+        debut = time.perf_counter()
+        brute = connection.Database.connect(**params)
+        try:
+            with brute.cursor() as curseur:
+                curseur.execute(REQUETE)
+                backends.add(curseur.fetchone()[0])
+        finally:
+            brute.close()
+        durees.append(time.perf_counter() - debut)
+
+    return _resume(durees, backends)
+
+
+def scenario_configuree(iterations):
+    durees = []
+    backends = set()
+
+    connection.close()
+
+    for _ in range(iterations):
+        debut = time.perf_counter()
+        # Mêmes signaux que le handler WSGI : close_old_connections()
+        request_started.send(sender=__name__)
+        try:
+            with connection.cursor() as curseur:
+                curseur.execute(REQUETE)
+                backends.add(curseur.fetchone()[0])
+        finally:
+            request_finished.send(sender=__name__)
+        durees.append(time.perf_counter() - debut)
+
+    connection.close()
+    return _resume(durees, backends)
+
+
+class Command(BaseCommand):
+    help = "Mesure le surcoût de connexion par requête (neuve vs persistante / pool)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--json", dest="sortie_json", help="Fichier résultat")
+
+    def handle(self, *args, **options):
+        reglages = connection.settings_dict
+        iterations = options["iterations"]
+
+        # Chauffe (résolution DNS, caches TLS)
+        scenario_neuve(min(5, iterations))
+
+        rapport = {
+            "configuration": {
+                "conn_max_age": reglages["CONN_MAX_AGE"],
+                "conn_health_checks": reglages["CONN_HEALTH_CHECKS"],
+                "pool": reglages["OPTIONS"].get("pool") is not None,
+                "hote": reglages["HOST"],
+                "sslmode": reglages["OPTIONS"].get("sslmode"),
+            },
+            "neuve": scenario_neuve(iterations),
+            "configuree": scenario_configuree(iterations),
+        }
+        rapport["surcout_par_requete_ms"] = round(
+            rapport["neuve"]["p50_ms"] - rapport["configuree"]["p50_ms"], 3
+        )
+
+        for nom in ("neuve", "configuree"):
+            r = rapport[nom]
+            self.stdout.write(
+                f"  {nom:<11} p50={r['p50_ms']:>8}ms  p95={r['p95_ms']:>8}ms  "
+                f"p99={r['p99_ms']:>8}ms  connexions={r['connexions_ouvertes']}"
+            )
+        self.stdout.write(
+            f"  Surcoût évité par requête (p50) : {rapport['surcout_par_requete_ms']} ms"
+        )
+
+        if options["sortie_json"]:
+            with open(options["sortie_json"], "w", encoding="utf-8") as f:
+                json.dump(rapport, f, indent=2, default=str)
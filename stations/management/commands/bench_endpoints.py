@@ -0,0 +1,371 @@
+# stations/management/commands/bench_endpoints.py
+"""
+Latence et nombre de requêtes SQL des endpoints chauds.
+
+Sur un jeu seed_scale :
+    python manage.py seed_scale --tenants 1 --stations 3 --annees 2
+    python manage.py bench_endpoints --prefixe SCALE --sauver-baseline
+    ... refactor ...
+    python manage.py bench_endpoints --prefixe SCALE   # échoue si régression
+
+Tout s'exécute dans une transaction annulée : le jeu de données
+n'est jamais modifié (utilisateurs de bench, transitions comprises).
+"""
+
+import json
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from stations.constants import DepotageStatus
+from stations.models import FaitStatus, RelaisEquipe, RelaisProduit, Station
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.depotage import Depotage
+from stations.models_produit import ProduitCarburant
+
+BASELINE_DEFAUT = Path(settings.BASE_DIR) / "benchmarks" / "endpoints_baseline.json"
+
+NB_TRANSITIONS = 20
+
+
+# ============================================================
+# PRÉPARATION DES TRANSITIONS (hors chronométrage)
+# ============================================================
+
+def _relais_brouillons(ctx):
+    produit = ctx["produit"]
+    maintenant = timezone.now()
+    ids = []
+
+    for n in range(NB_TRANSITIONS):
+        fin = maintenant + timedelta(days=365, hours=n)
+        relais = RelaisEquipe.objects.create(
+            tenant_id=ctx["station"].tenant_id,
+            station=ctx["station"],
+            debut_relais=fin - timedelta(hours=1),
+            fin_relais=fin,
+            equipe_sortante="A",
+            equipe_entrante="B",
+            status=FaitStatus.BROUILLON,
+        )
+        RelaisProduit.objects.create(
+            relais=relais,
+            produit=produit,
+            index_debut=Decimal("0"),
+            index_fin=Decimal("10"),
+        )
+        ids.append(relais.id)
+
+    return {"ids": ids, "statut": FaitStatus.SOUMIS}
+
+
+def _depotages_brouillons(ctx):
+    cuve = ctx["cuve"]
+    ids = []
+
+    for _ in range(NB_TRANSITIONS):
+        ids.append(Depotage.objects.create(
+            tenant_id=cuve.tenant_id,
+            station_id=cuve.station_id,
+            cuve=cuve,
+            fournisseur="bench",
+            date_depotage=timezone.now(),
+            quantite_livree=Decimal("1000"),
+            quantite_acceptee=Decimal("1000"),
+            jauge_avant=Decimal("0"),
+            jauge_apres=Decimal("1000"),
+            variation_cuve=Decimal("1000"),
+            prix_unitaire=Decimal("650"),
+            montant_total=Decimal("650000"),
+            statut=DepotageStatus.BROUILLON,
+        ).id)
+
+    return {"ids": ids, "statut": DepotageStatus.SOUMIS}
+
+
+# ============================================================
+# ENDPOINTS MESURÉS
+# ============================================================
+# vue : chemin d'URL (résolu) ou chemin pointé de la classe APIView
+# (certaines vues ne sont pas routées).
+
+ENDPOINTS = [
+    {"nom": "station-dashboard", "vue": "/api/v1/station/dashboard/", "role": "gerant"},
+    {
+        "nom": "station-dashboard-operationnel",
+        "vue": "stations.views_dashboard.StationOperationalDashboardAPIView",
+        "role": "gerant",
+    },
+    {
+        "nom": "dashboard-admin-tenant",
+        "vue": "/api/v1/station/dashboard/admin-tenant/",
+        "role": "admin",
+    },
+    {
+        "nom": "stock-global-produit",
+        "vue": "stations.views.StockGlobalProduitAPIView",
+        "role": "gerant",
+    },
+    {"nom": "stock-global-station", "vue": "/api/v1/station/stock/global/", "role": "gerant"},
+    {"nom": "index-pompes-actifs", "vue": "/api/v1/station/index-pompes/actifs/", "role": "gerant"},
+    {"nom": "configuration", "vue": "/api/v1/station/configuration/", "role": "gerant"},
+    {"nom": "cuves-liste", "vue": "/api/v1/station/cuves/", "role": "gerant"},
+    {"nom": "relais-liste", "vue": "/api/v1/station/relais-equipes/", "role": "gerant"},
+    {"nom": "depotages-liste", "vue": "/api/v1/station/depotages/", "role": "gerant"},
+    {"nom": "mouvements-stock-liste", "vue": "/api/v1/station/mouvements-stock/", "role": "gerant"},
+    {"nom": "transactions-station-liste", "vue": "/api/v1/finances/transactions/", "role": "gerant"},
+    {
+        "nom": "relais-transitions",
+        "vue": "/api/v1/station/relais-equipes/transitions/",
+        "methode": "post",
+        "role": "superviseur",
+        "preparer": _relais_brouillons,
+    },
+    {
+        "nom": "depotages-transitions",
+        "vue": "/api/v1/station/depotages/transitions/",
+        "methode": "post",
+        "role": "gerant",
+        "preparer": _depotages_brouillons,
+    },
+]
+
+
+def _vue(cible):
+    if cible.startswith("/"):
+        return resolve(cible).func
+    return import_string(cible).as_view()
+
+
+def _contexte(station):
+    cuve = (
+        Cuve.objects
+        .filter(station=station, statut=CuveStatus.ACTIVE)
+        .order_by("id")
+        .first()
+    )
+
+    utilisateurs = {}
+    for role, code in (
+        ("gerant", UserRole.GERANT),
+        ("superviseur", UserRole.SUPERVISEUR),
+        ("admin", UserRole.ADMIN_TENANT_STATION),
+    ):
+        utilisateur = Utilisateur(
+            username=f"bench-{role}-{station.id}",
+            tenant_id=station.tenant_id,
+            station=station,
+            role=code,
+        )
+        utilisateur.set_unusable_password()
+        utilisateur.save()
+        utilisateurs[role] = utilisateur
+
+    utilisateurs["admin"].stations_administrees.add(station)
+
+    return {
+        "station": station,
+        "cuve": cuve,
+        "produit": cuve.produit if cuve else ProduitCarburant.objects.filter(
+            tenant_id=station.tenant_id
+        ).first(),
+        "utilisateurs": utilisateurs,
+    }
+
+
+def _mesurer(endpoint, ctx, repetitions):
+    factory = APIRequestFactory()
+    vue = _vue(endpoint["vue"])
+    methode = endpoint.get("methode", "get")
+    chemin = endpoint["vue"] if endpoint["vue"].startswith("/") else "/bench/"
+    utilisateur = ctx["utilisateurs"][endpoint["role"]]
+
+    durees = []
+    requetes = []
+    statut = None
+
+    # 1 tour de chauffe (caches, imports paresseux) non compté
+    for tour in range(repetitions + 1):
+        with transaction.atomic():
+            donnees = endpoint["preparer"](ctx) if "preparer" in endpoint else None
+            if methode == "get":
+                requete = factory.get(chemin)
+            else:
+                requete = factory.post(chemin, donnees, format="json")
+            force_authenticate(requete, user=utilisateur)
+
+            with CaptureQueriesContext(connection) as capture:
+                debut = time.perf_counter()
+                reponse = vue(requete)
+                if hasattr(reponse, "render"):
+                    reponse.render()
+                duree = time.perf_counter() - debut
+
+            transaction.set_rollback(True)
+
+        statut = reponse.status_code
+        if tour:
+            durees.append(duree * 1000)
+            requetes.append(len(capture))
+
+    durees.sort()
+    return {
+        "statut": statut,
+        "requetes": max(requetes),
+        "p50_ms": round(statistics.median(durees), 2),
+        "p95_ms": round(durees[min(len(durees) - 1, int(len(durees) * 0.95))], 2),
+    }
+
+
+def _comparer(resultats, baseline, tolerance, marge_ms):
+    regressions = []
+
+    for nom, base in baseline.get("endpoints", {}).items():
+        actuel = resultats.get(nom)
+
+        if actuel is None or "erreur" in actuel:
+            if "erreur" not in base:
+                regressions.append(f"{nom} : indisponible ({(actuel or {}).get('erreur')})")
+            continue
+
+        if "erreur" in base:
+            continue
+
+        if actuel["requetes"] > base["requetes"]:
+            regressions.append(
+                f"{nom} : {base['requetes']} → {actuel['requetes']} requêtes"
+            )
+
+        limite = base["p50_ms"] * (1 + tolerance) + marge_ms
+        if actuel["p50_ms"] > limite:
+            regressions.append(
+                f"{nom} : p50 {base['p50_ms']}ms → {actuel['p50_ms']}ms "
+                f"(limite {limite:.1f}ms)"
+            )
+
+    return regressions
+
+
+class Command(BaseCommand):
+    help = "Benchmark des endpoints chauds (latence + requêtes SQL) avec seuils de régression"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--station", type=int, help="Station mesurée")
+        parser.add_argument(
+            "--prefixe",
+            default="SCALE",
+            help="Sinon : première station d'un tenant seed_scale",
+        )
+        parser.add_argument("--repetitions", type=int, default=10)
+        parser.add_argument("--endpoint", action="append", dest="endpoints")
+        parser.add_argument("--baseline", default=str(BASELINE_DEFAUT))
+        parser.add_argument(
+            "--sauver-baseline",
+            action="store_true",
+            help="Écrit les résultats comme nouvelle baseline",
+        )
+        parser.add_argument("--tolerance", type=float, default=0.25, help="Sur p50 (0.25 = +25 %%)")
+        parser.add_argument("--marge-ms", type=float, default=5.0, help="Bruit absolu toléré")
+        parser.add_argument("--json", dest="sortie_json", help="Fichier résultat")
+
+    def handle(self, *args, **options):
+        station = self._station(options)
+        endpoints = [
+            e for e in ENDPOINTS
+            if not options["endpoints"] or e["nom"] in options["endpoints"]
+        ]
+
+        resultats = {}
+
+        with transaction.atomic():
+            ctx = _contexte(station)
+
+            for endpoint in endpoints:
+                try:
+                    resultats[endpoint["nom"]] = _mesurer(endpoint, ctx, options["repetitions"])
+                except Exception as exc:  # noqa: BLE001 - reporté dans le rapport
+                    resultats[endpoint["nom"]] = {"erreur": f"{type(exc).__name__}: {exc}"}
+
+            transaction.set_rollback(True)
+
+        rapport = {
+            "station": station.id,
+            "repetitions": options["repetitions"],
+            "base": connection.vendor,
+            "date": timezone.now().isoformat(),
+            "endpoints": resultats,
+        }
+
+        self._afficher(resultats)
+
+        if options["sortie_json"]:
+            Path(options["sortie_json"]).write_text(
+                json.dumps(rapport, indent=2, ensure_ascii=False), encoding="utf-8"
+            )
+
+        chemin = Path(options["baseline"])
+
+        if options["sauver_baseline"]:
+            chemin.parent.mkdir(parents=True, exist_ok=True)
+            chemin.write_text(json.dumps(rapport, indent=2, ensure_ascii=False), encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Baseline écrite : {chemin}"))
+            return
+
+        if not chemin.exists():
+            self.stdout.write(self.style.WARNING(
+                f"Pas de baseline ({chemin}) : lancer avec --sauver-baseline."
+            ))
+            return
+
+        regressions = _comparer(
+            resultats,
+            json.loads(chemin.read_text(encoding="utf-8")),
+            options["tolerance"],
+            options["marge_ms"],
+        )
+
+        if regressions:
+            for ligne in regressions:
+                self.stdout.write(self.style.ERROR(f"  ✗ {ligne}"))
+            raise CommandError(f"{len(regressions)} régression(s) par rapport à {chemin}")
+
+        self.stdout.write(self.style.SUCCESS("Aucune régression."))
+
+    def _station(self, options):
+        if options["station"]:
+            station = Station.objects.filter(pk=options["station"]).first()
+        else:
+            station = (
+                Station.objects
+                .filter(tenant__nom__startswith=f"{options['prefixe']}-")
+                .order_by("id")
+                .first()
+            )
+
+        if not station:
+            raise CommandError("Aucune station : lancer seed_scale ou passer --station.")
+
+        return station
+
+    def _afficher(self, resultats):
+        for nom, r in resultats.items():
+            if "erreur" in r:
+                self.stdout.write(self.style.WARNING(f"  {nom:<32} ERREUR {r['erreur']}"))
+                continue
+            self.stdout.write(
+                f"  {nom:<32} {r['statut']}  {r['requetes']:>4} req  "
+                f"p50={r['p50_ms']:>8}ms  p95={r['p95_ms']:>8}ms"
+            )
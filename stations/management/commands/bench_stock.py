@@ -0,0 +1,431 @@
+# stations/management/commands/bench_stock.py
+"""
+Banc de charge du moteur de stock.
+
+Exemple (PostgreSQL du docker-compose) :
+    docker compose -f docker-compose.postgres.yml up -d
+    python manage.py migrate
+    python manage.py bench_stock --workers 16 --duree 30 --mix 70,25,5
+    STOCK_MODE=LEDGER python manage.py bench_stock --workers 16 --processus
+"""
+
+import json
+import multiprocessing
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core import metrics
+from stations.constants import DepotageStatus
+from stations.models import FaitStatus, RelaisEquipe, RelaisProduit, Station
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.depotage import Depotage
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import ProduitCarburant
+from stations.services.cuve import changer_statut_cuve
+from stations.services.stock import appliquer_stock_depotage, appliquer_stock_relais
+from stations.services.stock_ledger import delta_signe, mode_ledger, solde_cuve
+from stations.services.verrous import executer_avec_reprise
+from tenants.models import Tenant
+
+OPERATIONS = ("relais", "depotage", "statut")
+
+STOCK_INITIAL = Decimal("40000")
+CAPACITE = Decimal("60000")
+
+METRIQUES_VERROU = (
+    "stock_lock_acquisitions_total",
+    "stock_lock_wait_seconds_total",
+    "stock_lock_slow_total",
+    "stock_lock_retries_total",
+)
+
+
+# ============================================================
+# JEU DE DONNÉES
+# ============================================================
+
+def _preparer(nb_produits, cuves_par_produit):
+    """
+    Un tenant / une station dédiés au bench.
+    Par produit : une cuve ACTIVE, les autres en STANDBY.
+    """
+    tenant = Tenant.objects.create(
+        nom=f"BENCH-{uuid.uuid4().hex[:8]}",
+        type_structure="BENCH",
+    )
+    station = Station.objects.create(
+        tenant=tenant,
+        nom="Station bench",
+        adresse="bench",
+    )
+
+    for p in range(nb_produits):
+        produit = ProduitCarburant.objects.create(
+            tenant=tenant,
+            nom=f"Produit {p}",
+            code=f"P{p}",
+            seuil_critique_percent=1,
+        )
+        for c in range(cuves_par_produit):
+            Cuve.objects.create(
+                tenant=tenant,
+                station=station,
+                produit=produit,
+                reference=f"CUV-P{p}-{c + 1:02d}",
+                capacite_max=CAPACITE,
+                stock_actuel=STOCK_INITIAL,
+                statut=CuveStatus.ACTIVE if c == 0 else CuveStatus.STANDBY,
+            )
+
+    return station
+
+
+# ============================================================
+# OPÉRATIONS
+# ============================================================
+
+def _op_relais(station, produits, rnd):
+    fin = timezone.now() - timedelta(minutes=rnd.randint(1, 600))
+    relais = RelaisEquipe.objects.create(
+        tenant_id=station.tenant_id,
+        station=station,
+        debut_relais=fin - timedelta(hours=8),
+        fin_relais=fin,
+        equipe_sortante="A",
+        equipe_entrante="B",
+        encaisse_liquide=Decimal("0"),
+        status=FaitStatus.VALIDE,
+    )
+    RelaisProduit.objects.bulk_create([
+        RelaisProduit(
+            relais=relais,
+            produit_id=produit_id,
+            index_debut=Decimal("0"),
+            index_fin=Decimal(rnd.randint(20, 80)),
+        )
+        for produit_id in rnd.sample(produits, k=rnd.randint(1, len(produits)))
+    ])
+
+    def transferer():
+        appliquer_stock_relais(RelaisEquipe.objects.get(pk=relais.pk))
+
+    return transferer
+
+
+def _op_depotage(station, cuves, rnd):
+    cuve_id = rnd.choice(cuves)
+    volume = Decimal(rnd.randint(500, 2000))
+    depotage = Depotage.objects.create(
+        tenant_id=station.tenant_id,
+        station=station,
+        cuve_id=cuve_id,
+        fournisseur="bench",
+        date_depotage=timezone.now(),
+        quantite_livree=volume,
+        quantite_acceptee=volume,
+        jauge_avant=Decimal("0"),
+        jauge_apres=volume,
+        variation_cuve=volume,
+        prix_unitaire=Decimal("700"),
+        montant_total=volume * 700,
+        statut=DepotageStatus.CONFIRME,
+    )
+
+    def transferer():
+        appliquer_stock_depotage(Depotage.objects.get(pk=depotage.pk), None)
+
+    return transferer
+
+
+def _op_statut(station, rnd):
+    """
+    Bascule de cuve active : une STANDBY passe ACTIVE,
+    l'ancienne ACTIVE du produit repasse STANDBY.
+    """
+    def basculer():
+        standby = list(
+            Cuve.objects
+            .filter(station=station, statut=CuveStatus.STANDBY)
+            .values_list("id", flat=True)
+        )
+        if not standby:
+            return
+        cuve = Cuve.objects.get(pk=rnd.choice(standby))
+        changer_statut_cuve(cuve, CuveStatus.ACTIVE)
+
+    return basculer
+
+
+def _travailleur(config):
+    """
+    Exécuté dans un thread ou un processus.
+    Seule l'opération mesurée est chronométrée (préparation exclue).
+    """
+    rnd = random.Random(config["seed"])
+    station = Station.objects.get(pk=config["station_id"])
+    produits = list(
+        ProduitCarburant.objects
+        .filter(tenant_id=station.tenant_id)
+        .values_list("id", flat=True)
+    )
+    cuves = list(
+        Cuve.objects.filter(station=station).values_list("id", flat=True)
+    )
+
+    avant = metrics.snapshot()
+    latences = defaultdict(list)
+    issues = Counter()
+    fin = time.monotonic() + config["duree"]
+
+    try:
+        while time.monotonic() < fin:
+            nature = rnd.choices(OPERATIONS, weights=config["mix"])[0]
+
+            if nature == "relais":
+                operation = _op_relais(station, produits, rnd)
+            elif nature == "depotage":
+                operation = _op_depotage(station, cuves, rnd)
+            else:
+                operation = _op_statut(station, rnd)
+
+            debut = time.perf_counter()
+            try:
+                executer_avec_reprise(operation)
+                issues[f"{nature}:ok"] += 1
+            except (ValidationError, DjangoValidationError):
+                # Refus métier (stock critique, cuve vide...) : attendu
+                issues[f"{nature}:refus"] += 1
+            except DatabaseError:
+                issues[f"{nature}:erreur_db"] += 1
+            latences[nature].append(time.perf_counter() - debut)
+    finally:
+        connections.close_all()
+
+    return {
+        "latences": dict(latences),
+        "issues": dict(issues),
+        "metriques": _delta_metriques(avant, metrics.snapshot()),
+    }
+
+
+# ============================================================
+# MESURES
+# ============================================================
+
+def _delta_metriques(avant, apres):
+    delta = Counter()
+    for (nom, labels), total in apres.items():
+        if nom in METRIQUES_VERROU:
+            cle = nom + "".join(f"{{{k}={v}}}" for k, v in labels)
+            delta[cle] += total - avant.get((nom, labels), 0)
+    return delta
+
+
+def _centile(valeurs, p):
+    if not valeurs:
+        return None
+    valeurs = sorted(valeurs)
+    rang = min(len(valeurs) - 1, max(0, round(p / 100 * len(valeurs)) - 1))
+    return round(valeurs[rang] * 1000, 2)
+
+
+def _coherence(station, stocks_initiaux):
+    """
+    Pour chaque cuve : checkpoint + deltas en attente
+    == stock initial + somme signée des MouvementStock.
+    """
+    mouvements = {
+        ligne["cuve_id"]: ligne["total"]
+        for ligne in (
+            MouvementStock.objects
+            .filter(station=station)
+            .order_by()
+            .values("cuve_id")
+            .annotate(total=Sum(delta_signe()))
+        )
+    }
+
+    ecarts = []
+    for cuve in Cuve.objects.filter(station=station).order_by("id"):
+        attendu = stocks_initiaux[cuve.id] + (mouvements.get(cuve.id) or 0)
+        reel = solde_cuve(cuve)
+        if reel != attendu or reel < 0:
+            ecarts.append({
+                "cuve": cuve.reference,
+                "attendu": str(attendu),
+                "reel": str(reel),
+            })
+
+    return ecarts
+
+
+class Command(BaseCommand):
+    help = "Banc de charge : transferts relais / dépotage / statut cuve concurrents"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--duree", type=float, default=20, help="Secondes")
+        parser.add_argument(
+            "--mix",
+            default="70,25,5",
+            help="Poids relais,depotage,statut",
+        )
+        parser.add_argument("--produits", type=int, default=2)
+        parser.add_argument("--cuves-par-produit", type=int, default=2)
+        parser.add_argument(
+            "--processus",
+            action="store_true",
+            help="Processus au lieu de threads (contourne le GIL)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="sortie_json", help="Fichier résultat")
+        parser.add_argument(
+            "--nettoyer",
+            action="store_true",
+            help="Supprime le tenant de bench à la fin",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stderr.write(
+                self.style.WARNING(
+                    "Base non PostgreSQL : résultats non représentatifs."
+                )
+            )
+
+        try:
+            mix = [float(x) for x in options["mix"].split(",")]
+        except ValueError:
+            raise CommandError("--mix attend trois poids : relais,depotage,statut")
+
+        if len(mix) != len(OPERATIONS) or sum(mix) <= 0:
+            raise CommandError("--mix attend trois poids : relais,depotage,statut")
+
+        station = _preparer(options["produits"], options["cuves_par_produit"])
+        stocks_initiaux = dict(
+            Cuve.objects.filter(station=station).values_list("id", "stock_actuel")
+        )
+
+        configs = [
+            {
+                "station_id": station.id,
+                "duree": options["duree"],
+                "mix": mix,
+                "seed": options["seed"] + i,
+            }
+            for i in range(options["workers"])
+        ]
+
+        # Pas de connexion partagée avec les processus fils
+        connections.close_all()
+
+        if options["processus"]:
+            # fork : les fils héritent de la configuration Django
+            pool = ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=options["workers"])
+
+        avant = metrics.snapshot()
+        debut = time.monotonic()
+        with pool:
+            resultats = list(pool.map(_travailleur, configs))
+        duree = time.monotonic() - debut
+
+        if options["processus"]:
+            # Compteurs propres à chaque processus : on additionne
+            metriques = Counter()
+            for resultat in resultats:
+                metriques.update(resultat["metriques"])
+        else:
+            # Threads : compteurs partagés du processus courant
+            metriques = _delta_metriques(avant, metrics.snapshot())
+
+        rapport = self._rapport(resultats, duree, options)
+        rapport["verrous"] = dict(sorted(metriques.items()))
+        rapport["coherence"] = _coherence(station, stocks_initiaux)
+
+        self._afficher(rapport)
+
+        if options["sortie_json"]:
+            with open(options["sortie_json"], "w", encoding="utf-8") as f:
+                json.dump(rapport, f, indent=2, ensure_ascii=False)
+
+        if options["nettoyer"]:
+            station.tenant.delete()
+
+        if rapport["coherence"]:
+            raise CommandError("Incohérence stock / mouvements détectée.")
+
+    def _rapport(self, resultats, duree, options):
+        latences = defaultdict(list)
+        issues = Counter()
+
+        for resultat in resultats:
+            for nature, valeurs in resultat["latences"].items():
+                latences[nature].extend(valeurs)
+            issues.update(resultat["issues"])
+
+        toutes = [v for valeurs in latences.values() for v in valeurs]
+
+        return {
+            "mode_stock": "LEDGER" if mode_ledger() else "ROW",
+            "workers": options["workers"],
+            "execution": "processus" if options["processus"] else "threads",
+            "duree_s": round(duree, 2),
+            "operations": len(toutes),
+            "debit_ops_s": round(len(toutes) / duree, 1) if duree else None,
+            "latence_ms": {
+                nature: {
+                    "n": len(valeurs),
+                    "p50": _centile(valeurs, 50),
+                    "p95": _centile(valeurs, 95),
+                    "p99": _centile(valeurs, 99),
+                }
+                for nature, valeurs in sorted(latences.items())
+            },
+            "issues": dict(sorted(issues.items())),
+        }
+
+    def _afficher(self, rapport):
+        self.stdout.write(
+            f"Stock {rapport['mode_stock']} — {rapport['workers']} "
+            f"{rapport['execution']} — {rapport['duree_s']}s"
+        )
+        self.stdout.write(
+            f"Débit : {rapport['debit_ops_s']} ops/s "
+            f"({rapport['operations']} opérations)"
+        )
+
+        for nature, stats in rapport["latence_ms"].items():
+            self.stdout.write(
+                f"  {nature:<9} n={stats['n']:<6} p50={stats['p50']}ms "
+                f"p95={stats['p95']}ms p99={stats['p99']}ms"
+            )
+
+        for cle, total in rapport["issues"].items():
+            self.stdout.write(f"  {cle:<20} {total}")
+
+        for cle, total in rapport["verrous"].items():
+            self.stdout.write(f"  {cle:<45} {round(total, 4)}")
+
+        if rapport["coherence"]:
+            self.stdout.write(self.style.ERROR(
+                f"{len(rapport['coherence'])} cuve(s) incohérente(s)"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("Stock cohérent avec MouvementStock."))
@@ -0,0 +1,56 @@
+# stations/management/commands/cloturer_journees.py
+"""
+Clôture journalière des stations actives (stations/services/cloture.py),
+sur chaque base de tenant. Idempotente : relancer recalcule.
+
+    python manage.py cloturer_journees                        # hier
+    python manage.py cloturer_journees --jour 2026-03-14
+    python manage.py cloturer_journees --depuis 2026-03-01    # corrections tardives
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.db_router import bases_tenants, utiliser_base
+from stations.services.cloture import ClotureError, cloturer_journee
+
+
+def _date(valeur):
+    jour = parse_date(valeur)
+    if jour is None:
+        raise CommandError(f"Date invalide : {valeur} (AAAA-MM-JJ).")
+    return jour
+
+
+class Command(BaseCommand):
+    help = "Fige la clôture journalière de chaque station active"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jour", type=_date, help="Jour à clôturer (défaut : hier)")
+        parser.add_argument(
+            "--depuis",
+            type=_date,
+            help="Recalcule chaque jour de --depuis à --jour inclus",
+        )
+
+    def handle(self, *args, **options):
+        fin = options["jour"] or timezone.localdate() - timedelta(days=1)
+        debut = options["depuis"] or fin
+
+        if debut > fin:
+            raise CommandError("--depuis doit précéder --jour.")
+
+        for alias in bases_tenants():
+            jour = debut
+            while jour <= fin:
+                try:
+                    with utiliser_base(alias):
+                        nombre = cloturer_journee(jour)
+                except ClotureError as exc:
+                    raise CommandError(f"{alias} : {exc}")
+
+                self.stdout.write(f"{alias} {jour} : {nombre} stations clôturées")
+                jour += timedelta(days=1)
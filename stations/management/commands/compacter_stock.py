@@ -0,0 +1,55 @@
+# stations/management/commands/compacter_stock.py
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.db_router import bases_tenants, utiliser_base
+from stations.services.stock_ledger import compacter
+
+
+class Command(BaseCommand):
+    help = "Mode LEDGER : reporte les mouvements de stock en attente dans Cuve.stock_actuel"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cuve", type=int, action="append", dest="cuves")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--intervalle",
+            type=float,
+            default=0,
+            help="Boucle toutes les N secondes (0 = un seul passage)",
+        )
+
+    def handle(self, *args, **options):
+        self.arret = False
+        signal.signal(signal.SIGTERM, self._arreter)
+        signal.signal(signal.SIGINT, self._arreter)
+
+        while not self.arret:
+            close_old_connections()
+            mouvements = cuves = 0
+
+            # Base partagée puis bases des tenants isolés
+            for alias in bases_tenants():
+                with utiliser_base(alias):
+                    rapport = compacter(
+                        cuve_ids=options["cuves"],
+                        batch_size=options["batch_size"],
+                    )
+                mouvements += sum(rapport.values())
+                cuves += len(rapport)
+
+            self.stdout.write(
+                f"{mouvements} mouvements compactés sur {cuves} cuves"
+            )
+
+            if not options["intervalle"]:
+                break
+
+            time.sleep(options["intervalle"])
+
+    def _arreter(self, *args):
+        self.arret = True
@@ -0,0 +1,38 @@
+# stations/management/commands/exporter_analytique.py
+"""
+Export Parquet des faits des stations (stations/services/analytique.py),
+toutes bases de tenant.
+
+    python manage.py exporter_analytique                     # mois précédent et courant
+    python manage.py exporter_analytique --depuis 2025-01    # reconstruction
+    python manage.py exporter_analytique --fait transactions
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stations.services.analytique import FAITS, AnalytiqueError, exporter
+from stations.services.bilans import BilanError, mois_demande
+
+
+class Command(BaseCommand):
+    help = "Exporte les faits des stations en Parquet (analytique hors OLTP)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--depuis", help="Premier mois réécrit (AAAA-MM)")
+        parser.add_argument(
+            "--fait",
+            action="append",
+            dest="faits",
+            choices=sorted(FAITS),
+            help="Limiter aux faits nommés (répétable)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            depuis = mois_demande(options["depuis"]) if options["depuis"] else None
+            comptes = exporter(depuis, options["faits"])
+        except (AnalytiqueError, BilanError) as exc:
+            raise CommandError(str(exc))
+
+        for fait, lignes in comptes.items():
+            self.stdout.write(f"  {fait} : {lignes} lignes")
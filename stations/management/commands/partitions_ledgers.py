@@ -0,0 +1,110 @@
+# stations/management/commands/partitions_ledgers.py
+"""
+Partitionnement mensuel de TransactionStation et MouvementStock
+(stations/services/partitions.py), sur chaque base de tenant.
+
+    python manage.py partitions_ledgers etat
+    python manage.py partitions_ledgers convertir        # fenêtre de maintenance
+    python manage.py partitions_ledgers creer --avance 3 # tâche planifiée
+    python manage.py partitions_ledgers detacher --annee 2024 [--supprimer]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.db_router import bases_tenants
+from stations.services.partitions import (
+    LEDGERS,
+    MOIS_AVANCE,
+    PartitionError,
+    convertir,
+    creer_partitions,
+    detacher_annee,
+    est_partitionnee,
+    partitions,
+)
+
+
+class Command(BaseCommand):
+    help = "Partitions mensuelles des registres (transactions station, mouvements de stock)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["etat", "convertir", "creer", "detacher"])
+        parser.add_argument(
+            "--avance",
+            type=int,
+            default=MOIS_AVANCE,
+            help="Mois futurs à créer d'avance",
+        )
+        parser.add_argument("--annee", type=int, help="detacher : année close")
+        parser.add_argument(
+            "--supprimer",
+            action="store_true",
+            help="detacher : supprimer les tables détachées (déjà archivées)",
+        )
+        parser.add_argument(
+            "--conserver-ancienne",
+            action="store_true",
+            help="convertir : garder <table>_avant_partition",
+        )
+
+    def handle(self, *args, **options):
+        action = options["action"]
+
+        if action == "detacher" and not options["annee"]:
+            raise CommandError("--annee est requis pour detacher.")
+
+        for alias in bases_tenants():
+            connexion = connections[alias]
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Base {alias}"))
+
+            try:
+                if action == "etat":
+                    self._etat(connexion)
+
+                elif action == "convertir":
+                    for table, lignes in convertir(
+                        options["avance"],
+                        options["conserver_ancienne"],
+                        connexion,
+                    ).items():
+                        etat = "déjà partitionnée" if lignes is None else f"{lignes} lignes copiées"
+                        self.stdout.write(f"  {table} : {etat}")
+
+                elif action == "creer":
+                    creees = creer_partitions(options["avance"], connexion)
+                    self.stdout.write(f"  {len(creees)} partitions créées")
+                    for nom in creees:
+                        self.stdout.write(f"    + {nom}")
+
+                else:
+                    detachees = detacher_annee(options["annee"], options["supprimer"], connexion)
+                    self.stdout.write(f"  {len(detachees)} partitions détachées")
+                    for nom in detachees:
+                        self.stdout.write(f"    - {nom}")
+
+            except PartitionError as exc:
+                raise CommandError(f"{alias} : {exc}")
+
+    def _etat(self, connexion):
+        if connexion.vendor != "postgresql":
+            self.stdout.write("  PostgreSQL requis")
+            return
+
+        with connexion.cursor() as cursor:
+            for modele, champ in LEDGERS:
+                table = modele._meta.db_table
+
+                if not est_partitionnee(cursor, table):
+                    self.stdout.write(f"  {table} : non partitionnée")
+                    continue
+
+                mois = sorted(partitions(cursor, table))
+                if not mois:
+                    self.stdout.write(f"  {table} : aucune partition mensuelle")
+                    continue
+
+                self.stdout.write(
+                    f"  {table} ({champ}) : {len(mois)} partitions, "
+                    f"{mois[0]:%Y-%m} → {mois[-1]:%Y-%m}"
+                )
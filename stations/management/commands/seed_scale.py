@@ -0,0 +1,678 @@
+# stations/management/commands/seed_scale.py
+"""
+Jeu de données volumineux et cohérent pour les tests de performance.
+
+Exemple (~50M lignes : 20 tenants × 25 stations × 5 ans) :
+    python manage.py seed_scale --tenants 20 --stations 25 --annees 5 \\
+        --relais-par-jour 4 --copy --chunk 50000
+
+Cohérence garantie :
+- une seule cuve ACTIVE par (station, produit), stock final
+  = stock initial + somme signée des MouvementStock ;
+- relais contigus sans chevauchement, index produit croissants ;
+- un prix actif par (station, produit), historique sans trou ;
+- une TransactionStation par relais / dépotage transféré.
+"""
+
+import csv
+import io
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from core.models import Cotisation, Membre, Projet, Transaction
+from finances_station.models import TransactionStation
+from stations.constants import DepotageStatus
+from stations.models import (
+    FaitStatus,
+    IndexPompe,
+    Pompe,
+    RelaisEquipe,
+    RelaisProduit,
+    Station,
+)
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.depotage import Depotage
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import PrixCarburant, ProduitCarburant
+from tenants.models import Tenant
+
+CENTIME = Decimal("0.01")
+
+# code, nom, prix de vente initial, part des ventes
+PRODUITS = [
+    ("GASOIL", "Gasoil", Decimal("755"), 0.55),
+    ("SUPER", "Super", Decimal("990"), 0.35),
+    ("PETROLE", "Pétrole lampant", Decimal("655"), 0.10),
+]
+
+CAPACITE_CUVE = Decimal("30000")
+SEUIL_REAPPRO = Decimal("0.30")
+NIVEAU_REAPPRO = Decimal("0.90")
+
+REGIONS = ["Dakar", "Thiès", "Diourbel", "Kaolack", "Saint-Louis"]
+
+
+def _arrondi(valeur):
+    return Decimal(valeur).quantize(CENTIME, rounding=ROUND_HALF_UP)
+
+
+# ============================================================
+# ÉCRITURE EN MASSE (bulk_create ou COPY)
+# ============================================================
+
+class Ecrivain:
+    """
+    bulk_create par lots, ou COPY FROM STDIN sur PostgreSQL :
+    ``cursor.copy`` avec psycopg 3, ``copy_expert`` (CSV) avec psycopg2.
+    En mode COPY les ids sont réservés sur la séquence avant l'écriture,
+    pour que les lignes filles puissent les référencer.
+    """
+
+    NULL_CSV = r"\N"
+
+    def __init__(self, chunk, copy=False):
+        self.chunk = chunk
+        # None (bulk_create), "psycopg" ou "psycopg2"
+        self.pilote_copy = self._pilote_copy() if copy else None
+        self.copy = self.pilote_copy is not None
+        self.compteurs = Counter()
+
+    @staticmethod
+    def _pilote_copy():
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            brut = cursor.cursor
+            if hasattr(brut, "copy"):
+                return "psycopg"
+            if hasattr(brut, "copy_expert"):
+                return "psycopg2"
+        return None
+
+    @property
+    def mode(self):
+        if self.pilote_copy:
+            return f"COPY ({self.pilote_copy})"
+        return "bulk_create"
+
+    def ecrire(self, objets):
+        if not objets:
+            return objets
+
+        modele = type(objets[0])
+
+        for debut in range(0, len(objets), self.chunk):
+            lot = objets[debut:debut + self.chunk]
+            if self.copy:
+                self._copier(modele, lot)
+            else:
+                modele.objects.bulk_create(lot, batch_size=self.chunk)
+
+        self.compteurs[modele._meta.label] += len(objets)
+        return objets
+
+    def _copier(self, modele, lot):
+        meta = modele._meta
+        champs = list(meta.concrete_fields)
+
+        if meta.pk.get_internal_type() in ("AutoField", "BigAutoField"):
+            ids = self._reserver_ids(meta.db_table, len(lot))
+            for objet, pk in zip(lot, ids):
+                objet.pk = pk
+
+        colonnes = ", ".join(connection.ops.quote_name(f.column) for f in champs)
+        table = connection.ops.quote_name(meta.db_table)
+        lignes = (
+            [f.get_db_prep_save(f.pre_save(objet, True), connection) for f in champs]
+            for objet in lot
+        )
+
+        with connection.cursor() as cursor:
+            if self.pilote_copy == "psycopg":
+                with cursor.cursor.copy(f"COPY {table} ({colonnes}) FROM STDIN") as copy:
+                    for ligne in lignes:
+                        copy.write_row(ligne)
+                return
+
+            # psycopg2 : le lot est sérialisé en CSV puis envoyé d'un bloc
+            tampon = io.StringIO()
+            ecrivain = csv.writer(tampon, lineterminator="\n")
+            for ligne in lignes:
+                ecrivain.writerow([self._valeur_csv(v) for v in ligne])
+            tampon.seek(0)
+            cursor.cursor.copy_expert(
+                f"COPY {table} ({colonnes}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '{self.NULL_CSV}')",
+                tampon,
+            )
+
+    @classmethod
+    def _valeur_csv(cls, valeur):
+        if valeur is None:
+            return cls.NULL_CSV
+        if isinstance(valeur, bool):
+            return "t" if valeur else "f"
+        return valeur
+
+    @staticmethod
+    def _reserver_ids(table, nombre):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [table, nombre],
+            )
+            return [ligne[0] for ligne in cursor.fetchall()]
+
+
+# ============================================================
+# GÉNÉRATEUR STATION
+# ============================================================
+
+class GenerateurStation:
+    """
+    Simule une station jour par jour : relais contigus, ventes,
+    réapprovisionnement de la cuve active sous 30 % de capacité,
+    changement de prix mensuel.
+    """
+
+    def __init__(self, ecrivain, options, rnd, admin, produits, debut, fin):
+        self.ecrivain = ecrivain
+        self.options = options
+        self.rnd = rnd
+        self.admin = admin
+        self.produits = produits
+        self.debut = debut
+        self.fin = fin
+
+    # ----------------------------------------------------------
+    # PARAMÉTRAGE
+    # ----------------------------------------------------------
+
+    def _parametrer(self, station):
+        o = self.options
+
+        pompes = self.ecrivain.ecrire([
+            Pompe(station=station, reference=f"P{n + 1:02d}")
+            for n in range(o["pompes"])
+        ])
+
+        self.index = self.ecrivain.ecrire([
+            IndexPompe(
+                pompe=pompe,
+                produit=produit,
+                face=face,
+                index_initial=Decimal("0"),
+                index_courant=Decimal("0"),
+            )
+            for pompe in pompes
+            for produit in self.produits
+            for face in ("A", "B")
+        ])
+
+        self.cuves = {}
+        cuves = []
+        for produit in self.produits:
+            for n in range(o["cuves_par_produit"]):
+                cuve = Cuve(
+                    tenant_id=station.tenant_id,
+                    station=station,
+                    produit=produit,
+                    reference=f"CUV-{produit.code}-{n + 1:02d}",
+                    capacite_max=CAPACITE_CUVE,
+                    stock_actuel=_arrondi(CAPACITE_CUVE * NIVEAU_REAPPRO),
+                    seuil_alerte=_arrondi(CAPACITE_CUVE * SEUIL_REAPPRO),
+                    statut=CuveStatus.ACTIVE if n == 0 else CuveStatus.STANDBY,
+                )
+                cuves.append(cuve)
+                if n == 0:
+                    self.cuves[produit.id] = cuve
+
+        self.ecrivain.ecrire(cuves)
+
+    def _historique_prix(self, station):
+        """
+        Un prix par mois et par produit ; le dernier est actif.
+        Retourne {produit_id: [(date_debut, prix), ...]}.
+        """
+        prix = []
+        grille = {}
+
+        for produit, (_, _, base, _) in zip(self.produits, PRODUITS):
+            courant = base
+            date = self.debut
+            grille[produit.id] = []
+
+            while date < self.fin:
+                suivant = min(date + timedelta(days=30), self.fin)
+                grille[produit.id].append((date, courant))
+                prix.append(PrixCarburant(
+                    tenant_id=station.tenant_id,
+                    station=station,
+                    produit=produit,
+                    prix_unitaire=courant,
+                    date_debut=date,
+                    date_fin=None if suivant >= self.fin else suivant,
+                    actif=suivant >= self.fin,
+                    created_by=self.admin,
+                ))
+                courant = _arrondi(courant * Decimal(1 + self.rnd.uniform(-0.02, 0.025)))
+                date = suivant
+
+        self.ecrivain.ecrire(prix)
+        return grille
+
+    # ----------------------------------------------------------
+    # ACTIVITÉ
+    # ----------------------------------------------------------
+
+    def generer(self, station):
+        self._parametrer(station)
+        grille = self._historique_prix(station)
+
+        o = self.options
+        duree_relais = timedelta(hours=24 / o["relais_par_jour"])
+        limite_provisoire = self.fin - timedelta(days=30)
+
+        stock = {pid: cuve.stock_actuel for pid, cuve in self.cuves.items()}
+        index = {p.id: Decimal("0") for p in self.produits}
+        rang_prix = {p.id: 0 for p in self.produits}
+
+        relais_plans = []
+        depotages = []
+        mouvements_depot = []
+
+        instant = self.debut
+        while instant + duree_relais <= self.fin:
+            fin_relais = instant + duree_relais
+            lignes = []
+
+            for produit, (_, _, _, part) in zip(self.produits, PRODUITS):
+                pid = produit.id
+                historique = grille[pid]
+                while (
+                    rang_prix[pid] + 1 < len(historique)
+                    and historique[rang_prix[pid] + 1][0] <= instant
+                ):
+                    rang_prix[pid] += 1
+                prix = historique[rang_prix[pid]][1]
+
+                volume = _arrondi(max(
+                    0,
+                    self.rnd.gauss(o["volume_relais"] * part, o["volume_relais"] * part * 0.25),
+                ))
+                volume = min(volume, stock[pid])
+
+                lignes.append((produit, index[pid], index[pid] + volume, prix))
+                index[pid] += volume
+                stock[pid] -= volume
+
+                # Réapprovisionnement de la cuve active
+                if stock[pid] < CAPACITE_CUVE * SEUIL_REAPPRO:
+                    depotage, mouvement = self._depotage(
+                        station, produit, prix, stock[pid],
+                        fin_relais + timedelta(minutes=self.rnd.randint(30, 90)),
+                    )
+                    stock[pid] += depotage.quantite_acceptee
+                    depotages.append(depotage)
+                    mouvements_depot.append(mouvement)
+
+            relais_plans.append((instant, fin_relais, lignes))
+            instant = fin_relais
+
+            if len(relais_plans) >= self.ecrivain.chunk:
+                self._ecrire_relais(station, relais_plans, limite_provisoire)
+                relais_plans = []
+
+        self._ecrire_relais(station, relais_plans, limite_provisoire)
+        self._ecrire_depotages(depotages, mouvements_depot)
+
+        # Stock final = initial + mouvements
+        for pid, cuve in self.cuves.items():
+            cuve.stock_actuel = stock[pid]
+        Cuve.objects.bulk_update(list(self.cuves.values()), ["stock_actuel"])
+
+        # Index pompes : volume cumulé réparti sur les index du produit
+        for produit in self.produits:
+            du_produit = [i for i in self.index if i.produit_id == produit.id]
+            part = _arrondi(index[produit.id] / len(du_produit))
+            for i in du_produit:
+                i.index_courant = part
+            # L'arrondi est porté par le dernier index
+            du_produit[-1].index_courant = index[produit.id] - part * (len(du_produit) - 1)
+        IndexPompe.objects.bulk_update(self.index, ["index_courant"], batch_size=1000)
+
+    def _depotage(self, station, produit, prix_vente, stock_avant, date):
+        cuve = self.cuves[produit.id]
+        quantite = _arrondi(CAPACITE_CUVE * NIVEAU_REAPPRO - stock_avant)
+        livree = _arrondi(quantite * Decimal(1 + self.rnd.uniform(0, 0.004)))
+        prix_achat = _arrondi(prix_vente * Decimal("0.86"))
+
+        depotage = Depotage(
+            tenant_id=station.tenant_id,
+            station=station,
+            cuve=cuve,
+            fournisseur=self.rnd.choice(["TotalEnergies", "Vivo", "Oryx", "SAR"]),
+            date_depotage=date,
+            quantite_commandee=quantite,
+            quantite_livree=livree,
+            quantite_acceptee=quantite,
+            jauge_avant=stock_avant,
+            jauge_apres=stock_avant + quantite,
+            variation_cuve=quantite,
+            prix_unitaire=prix_achat,
+            montant_total=_arrondi(quantite * prix_achat),
+            stock_applique=True,
+            statut=DepotageStatus.TRANSFERE,
+            created_by=self.admin,
+            validated_by=self.admin,
+        )
+        mouvement = MouvementStock(
+            tenant_id=station.tenant_id,
+            station=station,
+            cuve=cuve,
+            type_mouvement=MouvementStock.MOUVEMENT_ENTREE,
+            quantite=quantite,
+            source_type="DEPOTAGE",
+            source_id=0,
+            date_mouvement=date,
+        )
+        return depotage, mouvement
+
+    def _ecrire_relais(self, station, plans, limite_provisoire):
+        if not plans:
+            return
+
+        relais_list = []
+        for debut, fin, lignes in plans:
+            theorique = sum((volume_fin - volume_debut) * prix for _, volume_debut, volume_fin, prix in lignes)
+            encaisse = _arrondi(theorique * Decimal(1 + self.rnd.gauss(0, 0.002)))
+            carte = _arrondi(encaisse * Decimal("0.25"))
+            ticket = _arrondi(encaisse * Decimal("0.05"))
+
+            relais_list.append(RelaisEquipe(
+                tenant_id=station.tenant_id,
+                station=station,
+                debut_relais=debut,
+                fin_relais=fin,
+                equipe_sortante=f"Équipe {self.rnd.randint(1, 4)}",
+                equipe_entrante=f"Équipe {self.rnd.randint(1, 4)}",
+                encaisse_liquide=encaisse - carte - ticket,
+                encaisse_carte=carte,
+                encaisse_ticket=ticket,
+                status=FaitStatus.TRANSFERE,
+                stock_applique=True,
+                created_by=self.admin,
+                soumis_par=self.admin,
+                valide_par=self.admin,
+                soumis_le=fin,
+                valide_le=fin + timedelta(minutes=15),
+            ))
+
+        self.ecrivain.ecrire(relais_list)
+
+        produits_relais = []
+        mouvements = []
+        transactions = []
+
+        for relais, (_, fin, lignes) in zip(relais_list, plans):
+            for produit, index_debut, index_fin, prix in lignes:
+                volume = index_fin - index_debut
+                produits_relais.append(RelaisProduit(
+                    relais=relais,
+                    produit=produit,
+                    index_debut=index_debut,
+                    index_fin=index_fin,
+                    prix_unitaire=prix,
+                    montant_theorique=_arrondi(volume * prix),
+                ))
+                if volume > 0:
+                    mouvements.append(MouvementStock(
+                        tenant_id=station.tenant_id,
+                        station=station,
+                        cuve=self.cuves[produit.id],
+                        type_mouvement=MouvementStock.MOUVEMENT_SORTIE,
+                        quantite=volume,
+                        source_type="RELAIS",
+                        source_id=relais.id,
+                        date_mouvement=fin,
+                    ))
+
+            transactions.append(TransactionStation(
+                tenant_id=station.tenant_id,
+                station=station,
+                type="RECETTE",
+                source_type="RelaisEquipe",
+                source_id=relais.id,
+                montant=relais.total_encaisse,
+                date=fin,
+                finance_status="PROVISOIRE" if fin >= limite_provisoire else "CONFIRMEE",
+            ))
+
+        self.ecrivain.ecrire(produits_relais)
+        self.ecrivain.ecrire(mouvements)
+        self.ecrivain.ecrire(transactions)
+
+    def _ecrire_depotages(self, depotages, mouvements):
+        self.ecrivain.ecrire(depotages)
+
+        for depotage, mouvement in zip(depotages, mouvements):
+            mouvement.source_id = depotage.id
+
+        self.ecrivain.ecrire(mouvements)
+        self.ecrivain.ecrire([
+            TransactionStation(
+                tenant_id=d.tenant_id,
+                station_id=d.station_id,
+                type="DEPENSE",
+                source_type="DEPOTAGE",
+                source_id=d.id,
+                montant=d.montant_total,
+                date=d.date_depotage,
+                finance_status="CONFIRMEE",
+            )
+            for d in depotages
+        ])
+
+
+# ============================================================
+# MODULE FINANCE (core)
+# ============================================================
+
+def _generer_finance(ecrivain, tenant, admin, options, rnd, debut, fin):
+    membres = ecrivain.ecrire([
+        Membre(
+            tenant=tenant,
+            nom_membre=f"Membre {n + 1}",
+            contact=f"77{rnd.randint(1000000, 9999999)}",
+        )
+        for n in range(options["membres"])
+    ])
+
+    projets = ecrivain.ecrire([
+        Projet(tenant=tenant, nom=f"Projet {n + 1}", budget=Decimal(rnd.randint(1, 50)) * 1000000)
+        for n in range(5)
+    ])
+
+    mois = []
+    curseur = debut.date().replace(day=1)
+    while curseur <= fin.date():
+        mois.append(curseur)
+        curseur = (curseur + timedelta(days=32)).replace(day=1)
+
+    cotisations = []
+    transactions = []
+
+    for premier in mois:
+        periode = premier.strftime("%Y-%m")
+
+        for membre in membres:
+            cotisations.append(Cotisation(
+                membre=membre,
+                tenant=tenant,
+                montant=Decimal("5000"),
+                date_paiement=premier + timedelta(days=rnd.randint(0, 27)),
+                periode=periode,
+            ))
+
+        for _ in range(options["transactions_par_mois"]):
+            date = premier + timedelta(days=rnd.randint(0, 27))
+            transactions.append(Transaction(
+                tenant=tenant,
+                projet=rnd.choice(projets),
+                type=rnd.choice(["Recette", "Depense"]),
+                montant=_arrondi(rnd.uniform(1000, 500000)),
+                date=date,
+                categorie=rnd.choice(["Vente", "Carburant", "Salaire", "Entretien", "Divers"]),
+                mode_paiement=rnd.choice(["Espèces", "Wave", "Orange Money", "Virement"]),
+                created_by=admin,
+                # bulk_create ne passe pas par save()
+                mois=date.strftime("%Y-%m"),
+            ))
+
+        if len(cotisations) + len(transactions) >= ecrivain.chunk:
+            ecrivain.ecrire(cotisations)
+            ecrivain.ecrire(transactions)
+            cotisations, transactions = [], []
+
+    ecrivain.ecrire(cotisations)
+    ecrivain.ecrire(transactions)
+
+
+# ============================================================
+# COMMANDE
+# ============================================================
+
+class Command(BaseCommand):
+    help = "Génère un jeu de données volumineux et cohérent (perf)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenants", type=int, default=1)
+        parser.add_argument("--stations", type=int, default=3, help="Par tenant")
+        parser.add_argument("--pompes", type=int, default=4, help="Par station")
+        parser.add_argument("--produits", type=int, default=2, choices=[1, 2, 3])
+        parser.add_argument("--cuves-par-produit", type=int, default=2)
+        parser.add_argument("--annees", type=float, default=1)
+        parser.add_argument("--relais-par-jour", type=int, default=3)
+        parser.add_argument(
+            "--volume-relais",
+            type=float,
+            default=3000,
+            help="Litres vendus par relais (tous produits)",
+        )
+        parser.add_argument("--membres", type=int, default=100, help="Par tenant")
+        parser.add_argument("--transactions-par-mois", type=int, default=200, help="Par tenant")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--chunk", type=int, default=10000)
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="COPY FROM STDIN (PostgreSQL, psycopg 3 ou psycopg2) au lieu de bulk_create",
+        )
+        parser.add_argument("--prefixe", default="SCALE")
+        parser.add_argument(
+            "--purger",
+            action="store_true",
+            help="Supprime d'abord les tenants portant le préfixe",
+        )
+
+    def handle(self, *args, **options):
+        prefixe = options["prefixe"]
+
+        if options["relais_par_jour"] < 1:
+            raise CommandError("--relais-par-jour doit être ≥ 1")
+
+        if options["purger"]:
+            supprimes, _ = Tenant.objects.filter(nom__startswith=f"{prefixe}-").delete()
+            self.stdout.write(f"Purge : {supprimes} lignes supprimées")
+            Utilisateur.objects.filter(username__startswith=f"{prefixe.lower()}-").delete()
+
+        if Tenant.objects.filter(nom__startswith=f"{prefixe}-{options['seed']}-").exists():
+            raise CommandError(
+                f"Des tenants {prefixe}-{options['seed']}-* existent déjà (utiliser --purger)."
+            )
+
+        ecrivain = Ecrivain(options["chunk"], copy=options["copy"])
+        if options["copy"] and not ecrivain.copy:
+            self.stdout.write(self.style.WARNING(
+                "COPY indisponible (base non PostgreSQL ou pilote inconnu) : bulk_create utilisé."
+            ))
+        fin = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        debut = fin - timedelta(days=round(365 * options["annees"]))
+
+        self.stdout.write(
+            f"Écriture : {ecrivain.mode} "
+            f"par lots de {options['chunk']} — {debut.date()} → {fin.date()}"
+        )
+        depart = time.monotonic()
+
+        for t in range(options["tenants"]):
+            rnd = random.Random(f"{options['seed']}-{t}")
+
+            with transaction.atomic():
+                tenant, admin, produits = self._tenant(prefixe, options, t)
+
+                _generer_finance(ecrivain, tenant, admin, options, rnd, debut, fin)
+
+                for s in range(options["stations"]):
+                    station = Station.objects.create(
+                        tenant=tenant,
+                        nom=f"Station {t + 1}-{s + 1}",
+                        region=REGIONS[s % len(REGIONS)],
+                        adresse=f"Adresse {s + 1}",
+                    )
+                    GenerateurStation(
+                        ecrivain,
+                        options,
+                        random.Random(f"{options['seed']}-{t}-{s}"),
+                        admin,
+                        produits,
+                        debut,
+                        fin,
+                    ).generer(station)
+
+            total = sum(ecrivain.compteurs.values())
+            ecoule = time.monotonic() - depart
+            self.stdout.write(
+                f"Tenant {t + 1}/{options['tenants']} : {total} lignes "
+                f"({total / ecoule:,.0f} lignes/s)"
+            )
+
+        for label, nombre in sorted(ecrivain.compteurs.items()):
+            self.stdout.write(f"  {label:<35} {nombre:>12,}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(ecrivain.compteurs.values()):,} lignes en "
+            f"{time.monotonic() - depart:.1f}s"
+        ))
+
+    def _tenant(self, prefixe, options, rang):
+        tenant = Tenant.objects.create(
+            nom=f"{prefixe}-{options['seed']}-{rang + 1}",
+            type_structure="SA",
+        )
+
+        admin = Utilisateur(
+            username=f"{prefixe.lower()}-{options['seed']}-{rang + 1}-admin",
+            tenant=tenant,
+            role=UserRole.ADMIN_TENANT_STATION,
+        )
+        # Pas de hachage Argon2 pour un compte de bench
+        admin.set_unusable_password()
+        admin.save()
+
+        produits = [
+            ProduitCarburant.objects.create(tenant=tenant, code=code, nom=nom)
+            for code, nom, _, _ in PRODUITS[:options["produits"]]
+        ]
+
+        return tenant, admin, produits
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stations', '0004_remove_pompe_type_pompe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='station',
+            name='config_version',
+            field=models.PositiveIntegerField(default=1, help_text='Incrémentée à chaque modification du paramétrage (pompes, index, produits, prix, cuves)'),
+        ),
+    ]
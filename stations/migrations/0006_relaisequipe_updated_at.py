@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 10:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stations', '0005_station_config_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relaisequipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
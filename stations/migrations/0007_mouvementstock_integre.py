@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stations', '0006_relaisequipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mouvementstock',
+            name='integre',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name='mouvementstock',
+            index=models.Index(condition=models.Q(('integre', False)), fields=['cuve'], name='idx_mvt_stock_en_attente'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stations', '0007_mouvementstock_integre'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClotureJournaliere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('recettes', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('depenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('nb_transactions', models.PositiveIntegerField(default=0)),
+                ('finances', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('nb_relais', models.PositiveIntegerField(default=0)),
+                ('encaisse_liquide', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('encaisse_carte', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('encaisse_ticket', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('volumes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('depotages', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('stocks', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('calculee_le', models.DateTimeField(auto_now=True)),
+                ('calculee_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='clotures_calculees', to=settings.AUTH_USER_MODEL)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clotures', to='stations.station')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clotures', to='tenants.tenant')),
+            ],
+            options={
+                'ordering': ['-jour'],
+                'indexes': [models.Index(fields=['tenant', 'jour'], name='stations_cl_tenant__f2a700_idx')],
+                'unique_together': {('station', 'jour')},
+            },
+        ),
+    ]
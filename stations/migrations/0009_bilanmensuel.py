@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stations', '0008_cloturejournaliere'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BilanMensuel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois', models.DateField()),
+                ('statut', models.CharField(choices=[('EN_COURS', 'En cours'), ('PRET', 'Prêt'), ('ECHOUE', 'Échoué')], default='EN_COURS', max_length=10)),
+                ('tache_id', models.BigIntegerField(blank=True, null=True)),
+                ('nb_stations', models.PositiveIntegerField(default=0)),
+                ('stations_faites', models.JSONField(default=list)),
+                ('fichier', models.CharField(blank=True, default='', max_length=255)),
+                ('taille', models.PositiveBigIntegerField(default=0)),
+                ('erreur', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('termine_le', models.DateTimeField(blank=True, null=True)),
+                ('demande_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bilans_demandes', to=settings.AUTH_USER_MODEL)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bilans', to='tenants.tenant')),
+            ],
+            options={
+                'ordering': ['-mois'],
+                'unique_together': {('tenant', 'mois')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stations', '0009_bilanmensuel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='depotage',
+            name='validated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -4,7 +4,11 @@ from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+
+from core import metrics
 from stations.models_produit import PrixCarburant
+from stations.models_cloture import ClotureJournaliere  # noqa: F401
+from stations.models_bilan import BilanMensuel  # noqa: F401
 from tenants.models import Tenant
 from .constants import REGION_CHOICES
 from stations.services.stock import appliquer_stock_relais
@@ -21,6 +25,14 @@ class FaitStatus(models.TextChoices):
     TRANSFERE = "TRANSFERE", "Transféré"
 
 
+RELAIS_TRANSITIONS = {
+    FaitStatus.BROUILLON: [FaitStatus.SOUMIS],
+    FaitStatus.SOUMIS: [FaitStatus.VALIDE],
+    FaitStatus.VALIDE: [FaitStatus.TRANSFERE],
+    FaitStatus.TRANSFERE: [],
+}
+
+
 # ============================================================
 # STATION
 # ============================================================
@@ -52,6 +64,11 @@ class Station(models.Model):
     active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    config_version = models.PositiveIntegerField(
+        default=1,
+        help_text="Incrémentée à chaque modification du paramétrage (pompes, index, produits, prix, cuves)"
+    )
+
     class Meta:
         ordering = ["nom"]
 
@@ -251,6 +268,7 @@ class RelaisEquipe(models.Model):
     valide_le = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
@@ -268,14 +286,7 @@ class RelaisEquipe(models.Model):
 
     def changer_statut(self, nouveau_statut, user):
 
-        transitions = {
-            FaitStatus.BROUILLON: [FaitStatus.SOUMIS],
-            FaitStatus.SOUMIS: [FaitStatus.VALIDE],
-            FaitStatus.VALIDE: [FaitStatus.TRANSFERE],
-            FaitStatus.TRANSFERE: [],
-        }
-
-        if nouveau_statut not in transitions[self.status]:
+        if nouveau_statut not in RELAIS_TRANSITIONS[self.status]:
             raise ValidationError("Transition invalide.")
 
         ancien_statut = self.status
@@ -314,22 +325,21 @@ class RelaisEquipe(models.Model):
                     update_fields=["prix_unitaire", "montant_theorique"],
                     bypass_lock=True
                 )
-        from finances_station.models import TransactionStation
+        from finances_station.services.outbox import publier_evenement
         if nouveau_statut == FaitStatus.TRANSFERE:
 
             appliquer_stock_relais(self)
 
-            TransactionStation.objects.get_or_create(
+            # 📤 Outbox : la TransactionStation est créée par le worker
+            publier_evenement(
                 source_type="RelaisEquipe",
                 source_id=self.id,
-                defaults={
-                    "tenant": self.tenant,
-                    "station": self.station,
-                    "type": "RECETTE",
-                    "montant": self.total_encaisse,
-                    "date": self.fin_relais,
-                    "finance_status": "PROVISOIRE",
-                }
+                tenant_id=self.tenant_id,
+                station_id=self.station_id,
+                type="RECETTE",
+                montant=self.total_encaisse,
+                date=self.fin_relais,
+                finance_status="PROVISOIRE",
             )
 
             self.stock_applique = True
@@ -341,7 +351,8 @@ class RelaisEquipe(models.Model):
             "soumis_le",
             "valide_par",
             "valide_le",
-            "stock_applique"
+            "stock_applique",
+            "updated_at",
         ])
 
         RelaisAudit.objects.create(
@@ -353,6 +364,10 @@ class RelaisEquipe(models.Model):
             effectue_par=user
         )
 
+        metrics.incrementer_au_commit(
+            "relais_transitions_total", de=ancien_statut, vers=nouveau_statut
+        )
+
     @property
     def total_volume_vendu(self):
         return sum(p.volume_vendu for p in self.produits.all())
@@ -362,7 +377,7 @@ class RelaisEquipe(models.Model):
         return (
             self.encaisse_liquide
             + self.encaisse_carte
-            + sum(p.encaisse_ticket for p in self.produits.all())
+            + self.encaisse_ticket
         )
     
     @property
@@ -457,6 +472,19 @@ class RelaisProduit(models.Model):
 
         self.full_clean()
         super().save(*args, **kwargs)
+        self._toucher_relais()
+
+    def delete(self, *args, **kwargs):
+        resultat = super().delete(*args, **kwargs)
+        self._toucher_relais()
+        return resultat
+
+    def _toucher_relais(self):
+        # Les lignes n'ont pas de date propre : le GET conditionnel du
+        # relais (core.conditional, MAX(updated_at)) doit voir la modification
+        RelaisEquipe.objects.filter(pk=self.relais_id).update(
+            updated_at=timezone.now()
+        )
 
     @property
     def volume_vendu(self):
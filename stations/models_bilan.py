@@ -0,0 +1,77 @@
+# stations/models_bilan.py
+
+from django.conf import settings
+from django.db import models
+
+
+class BilanMensuel(models.Model):
+    """
+    Dossier de fin de mois d'un tenant : une archive tar.gz (CSV /
+    JSON par station), produite en tâche de fond par
+    stations/services/bilans.py.
+
+    - Une tâche par station (workers en parallèle), la dernière
+      assemble l'archive
+    - Progression : stations_faites / nb_stations
+    """
+
+    STATUT_EN_COURS = "EN_COURS"
+    STATUT_PRET = "PRET"
+    STATUT_ECHOUE = "ECHOUE"
+
+    STATUT_CHOICES = (
+        (STATUT_EN_COURS, "En cours"),
+        (STATUT_PRET, "Prêt"),
+        (STATUT_ECHOUE, "Échoué"),
+    )
+
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        related_name="bilans"
+    )
+
+    # Premier jour du mois
+    mois = models.DateField()
+
+    statut = models.CharField(
+        max_length=10,
+        choices=STATUT_CHOICES,
+        default=STATUT_EN_COURS
+    )
+
+    # Tâche de lancement (taches.Tache, base "default")
+    tache_id = models.BigIntegerField(null=True, blank=True)
+
+    nb_stations = models.PositiveIntegerField(default=0)
+    # Identifiants des stations générées (relances idempotentes)
+    stations_faites = models.JSONField(default=list)
+
+    fichier = models.CharField(max_length=255, blank=True, default="")
+    taille = models.PositiveBigIntegerField(default=0)
+    erreur = models.TextField(blank=True, default="")
+
+    demande_par = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="bilans_demandes"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    termine_le = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("tenant", "mois")
+        ordering = ["-mois"]
+
+    def __str__(self):
+        return f"Bilan {self.mois:%Y-%m} ({self.statut})"
+
+    @property
+    def progression(self):
+        if self.statut == self.STATUT_PRET:
+            return 100
+        if not self.nb_stations:
+            return 0
+        return 100 * len(self.stations_faites) // self.nb_stations
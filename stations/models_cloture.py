@@ -0,0 +1,82 @@
+# stations/models_cloture.py
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class ClotureJournaliere(models.Model):
+    """
+    Clôture journalière figée d'une station (une ligne par jour).
+
+    - Calculée par stations/services/cloture.py (tâche de nuit
+      ou déclenchement par le gérant), recalculable à volonté
+    - Source des historiques : un graphe sur plusieurs années
+      lit une ligne par jour au lieu des relais et transactions
+    """
+
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        related_name="clotures"
+    )
+
+    station = models.ForeignKey(
+        "stations.Station",
+        on_delete=models.CASCADE,
+        related_name="clotures"
+    )
+
+    jour = models.DateField()
+
+    # =========================
+    # FINANCES
+    # =========================
+    recettes = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    depenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    nb_transactions = models.PositiveIntegerField(default=0)
+
+    # {"RECETTE": {source_type: montant}, "DEPENSE": {...}}
+    finances = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    # =========================
+    # CAISSE (relais clos du jour)
+    # =========================
+    nb_relais = models.PositiveIntegerField(default=0)
+    encaisse_liquide = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    encaisse_carte = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    encaisse_ticket = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # =========================
+    # CARBURANT
+    # =========================
+    # {code produit: litres vendus}
+    volumes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    # {code produit: {"nombre", "livre", "accepte", "variation", "ecart"}}
+    depotages = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    # {cuve_id: {"reference", "produit", "ouverture", "cloture"}}
+    stocks = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    # =========================
+    # TRAÇABILITÉ
+    # =========================
+    calculee_par = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="clotures_calculees"
+    )
+    calculee_le = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("station", "jour")
+        ordering = ["-jour"]
+        indexes = [
+            models.Index(fields=["tenant", "jour"]),
+        ]
+
+    def __str__(self):
+        return f"Clôture {self.station_id} – {self.jour}"
@@ -1,8 +1,11 @@
 # station/models_depotage.cuve.py
 
-from django.db import models, transaction
+from django.db import models
 from django.db.models import Q
 from django.core.exceptions import ValidationError
+
+from core import metrics
+from core.db_router import atomic_tenant
 from stations.models_produit import ProduitCarburant
 
 class CuveStatus(models.TextChoices):
@@ -95,7 +98,9 @@ class Cuve(models.Model):
         # ==========================================================
         if nouveau_statut == CuveStatus.ACTIVE:
 
-            if self.stock_actuel <= 0:
+            from stations.services.stock_ledger import solde_cuve
+
+            if solde_cuve(self) <= 0:
                 raise ValidationError(
                     "Impossible d'activer une cuve vide."
                 )
@@ -112,18 +117,30 @@ class Cuve(models.Model):
             # Assure unicité cuve ACTIVE
             self._activer_cuve_unique()
 
+        ancien_statut = self.statut
         self.statut = nouveau_statut
         self.save(update_fields=["statut", "updated_at"])
 
+        metrics.incrementer_au_commit(
+            "cuve_transitions_total", de=ancien_statut, vers=nouveau_statut
+        )
+
 
     def _activer_cuve_unique(self):
 
-        from stations.models_depotage.cuve import Cuve
+        from stations.services.verrous import verrouiller_cuves
+
+        with atomic_tenant():
+            # 🔐 Toutes les cuves du couple (station, produit), ordre global :
+            # même protocole que les écritures de stock
+            verrouiller_cuves(
+                paires=[(self.station_id, self.produit_id)],
+                statuts=None,
+            )
 
-        with transaction.atomic():
             Cuve.objects.filter(
-                station=self.station,
-                produit=self.produit,
+                station_id=self.station_id,
+                produit_id=self.produit_id,
                 statut=CuveStatus.ACTIVE,
             ).exclude(id=self.id).update(
                 statut=CuveStatus.STANDBY
@@ -144,7 +161,7 @@ class Cuve(models.Model):
 
         prefix = f"CUV-{self.produit.code}-"
 
-        with transaction.atomic():
+        with atomic_tenant():
 
             last = (
                 Cuve.objects
@@ -174,10 +191,18 @@ class Cuve(models.Model):
             self.reference = self._generate_reference()
 
         super().save(*args, **kwargs)
-            
-@property
-def en_alerte(self):
-    """
-    Indique si la cuve est sous seuil d’alerte.
-    """
-    return self.stock_actuel <= self.seuil_alerte
+
+    @property
+    def en_alerte(self):
+        """
+        Indique si la cuve est sous seuil d’alerte.
+        Mode LEDGER : deltas non compactés inclus (stock_reel annoté
+        de préférence, sinon une requête).
+        """
+        from stations.services.stock_ledger import mode_ledger, solde_cuve
+
+        stock = getattr(self, "stock_reel", None)
+        if stock is None:
+            stock = solde_cuve(self) if mode_ledger() else self.stock_actuel
+
+        return stock <= self.seuil_alerte
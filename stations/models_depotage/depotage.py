@@ -132,6 +132,8 @@ class Depotage(models.Model):
         related_name="depotages_valides"
     )
 
+    validated_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1,6 +1,7 @@
 # stations.models_depotage/mouvement_stock.py
 
 from django.db import models
+from django.db.models import Q
 
 class MouvementStock(models.Model):
     MOUVEMENT_ENTREE = "ENTREE"
@@ -37,6 +38,17 @@ class MouvementStock(models.Model):
     date_mouvement = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Mode LEDGER : False tant que la compaction n'a pas
+    # reporté le mouvement dans Cuve.stock_actuel
+    integre = models.BooleanField(default=True)
+
     class Meta:
         ordering = ["-date_mouvement"]
+        indexes = [
+            models.Index(
+                fields=["cuve"],
+                condition=Q(integre=False),
+                name="idx_mvt_stock_en_attente",
+            ),
+        ]
 
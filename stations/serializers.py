@@ -1,9 +1,9 @@
 from rest_framework import serializers
-from django.db import transaction
 from django.db.models import Q
 from django.core.exceptions import ValidationError as DjangoValidationError
 
 from accounts.models import Utilisateur
+from core.db_router import atomic_tenant
 from .constants import REGIONS_DEPARTEMENTS
 from .models import (
     Station,
@@ -13,8 +13,11 @@ from .models import (
     RelaisProduit,
     FaitStatus,
 )
+from stations.models_bilan import BilanMensuel
+from stations.models_cloture import ClotureJournaliere
 from stations.models_depotage.cuve import Cuve, CuveStatus
 from stations.models_produit import PrixCarburant, ProduitCarburant
+from stations.services.analytique import FAITS
 
 # ============================================================
 # GERANT – Serializer interne (création uniquement)
@@ -54,7 +57,7 @@ class StationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Station
         fields = "__all__"
-        read_only_fields = ("tenant", "created_at")
+        read_only_fields = ("tenant", "created_at", "config_version")
 
     def validate(self, attrs):
         """
@@ -133,6 +136,18 @@ class CuveSerializer(serializers.ModelSerializer):
             "updated_at",
         )
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+
+        # Annoté en mode LEDGER (voir annoter_stock_reel)
+        stock_reel = getattr(instance, "stock_reel", None)
+        if stock_reel is not None:
+            data["stock_actuel"] = self.fields["stock_actuel"].to_representation(
+                stock_reel
+            )
+
+        return data
+
     # ==========================================================
     # VALIDATION GLOBALE
     # ==========================================================
@@ -588,7 +603,7 @@ class RelaisEquipeSerializer(serializers.ModelSerializer):
 
         user = self.context["request"].user
 
-        with transaction.atomic():
+        with atomic_tenant():
 
             relais = RelaisEquipe.objects.create(
                 **validated_data,
@@ -677,4 +692,174 @@ class PrixCarburantSerializer(serializers.ModelSerializer):
             "date_debut",
             "date_fin",
             "actif",
-        ]
\ No newline at end of file
+        ]
+
+
+class PrixLigneSerializer(serializers.Serializer):
+    produit = serializers.PrimaryKeyRelatedField(
+        queryset=ProduitCarburant.objects.all()
+    )
+    prix_unitaire = serializers.DecimalField(
+        max_digits=12,
+        decimal_places=2
+    )
+
+    def validate_prix_unitaire(self, value):
+        if value <= 0:
+            raise serializers.ValidationError(
+                "Le prix doit être > 0."
+            )
+        return value
+
+
+class PrixCarburantBulkSerializer(serializers.Serializer):
+    """
+    Changement de prix national :
+    une liste de produits appliquée à toutes les stations du tenant
+    ou à une sélection.
+    """
+
+    prix = PrixLigneSerializer(many=True)
+
+    stations = serializers.PrimaryKeyRelatedField(
+        queryset=Station.objects.all(),
+        many=True,
+        required=False
+    )
+
+    def validate(self, data):
+        user = self.context["request"].user
+
+        lignes = data["prix"]
+
+        if not lignes:
+            raise serializers.ValidationError(
+                {"prix": "Au moins un produit est requis."}
+            )
+
+        produit_ids = [ligne["produit"].id for ligne in lignes]
+        if len(produit_ids) != len(set(produit_ids)):
+            raise serializers.ValidationError(
+                {"prix": "Un produit ne peut apparaître qu'une seule fois."}
+            )
+
+        # 🔒 Produits & stations du tenant uniquement
+        if any(ligne["produit"].tenant_id != user.tenant_id for ligne in lignes):
+            raise serializers.ValidationError(
+                {"prix": "Produit invalide pour ce tenant."}
+            )
+
+        station_ids = [s.id for s in data.get("stations", [])]
+        if len(station_ids) != len(set(station_ids)):
+            raise serializers.ValidationError(
+                {"stations": "Une station ne peut apparaître qu'une seule fois."}
+            )
+
+        if any(s.tenant_id != user.tenant_id for s in data.get("stations", [])):
+            raise serializers.ValidationError(
+                {"stations": "Station invalide pour ce tenant."}
+            )
+
+        return data
+
+
+
+class TransitionMasseSerializer(serializers.Serializer):
+    """
+    Transition groupée : plusieurs ids, un statut cible.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500
+    )
+    statut = serializers.CharField()
+
+    def validate_statut(self, value):
+        statuts = self.context.get("statuts", [])
+        if value not in statuts:
+            raise serializers.ValidationError(
+                f"Statut invalide. Valeurs possibles : {', '.join(statuts)}"
+            )
+        return value
+
+
+class ClotureJournaliereSerializer(serializers.ModelSerializer):
+    station_nom = serializers.CharField(source="station.nom", read_only=True)
+
+    class Meta:
+        model = ClotureJournaliere
+        exclude = ["tenant"]
+
+
+class CloturerSerializer(serializers.Serializer):
+    """
+    Déclenchement manuel : jour (défaut : aujourd'hui),
+    station obligatoire pour l'AdminTenantStation.
+    """
+
+    jour = serializers.DateField(required=False)
+    station = serializers.PrimaryKeyRelatedField(
+        queryset=Station.objects.all(),
+        required=False
+    )
+
+    def validate(self, data):
+        user = self.context["request"].user
+        station = data.get("station") or user.station
+
+        if station is None:
+            raise serializers.ValidationError(
+                {"station": "Station requise."}
+            )
+        if station.tenant_id != user.tenant_id:
+            raise serializers.ValidationError(
+                {"station": "Station invalide pour ce tenant."}
+            )
+        if user.station_id and station.id != user.station_id:
+            raise serializers.ValidationError(
+                {"station": "Clôture limitée à votre station."}
+            )
+
+        data["station"] = station
+        return data
+
+
+class BilanMensuelSerializer(serializers.ModelSerializer):
+    mois = serializers.DateField(format="%Y-%m", read_only=True)
+    progression = serializers.IntegerField(read_only=True)
+    nb_stations_faites = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BilanMensuel
+        fields = [
+            "id",
+            "mois",
+            "statut",
+            "progression",
+            "nb_stations",
+            "nb_stations_faites",
+            "taille",
+            "erreur",
+            "tache_id",
+            "created_at",
+            "termine_le",
+        ]
+
+    def get_nb_stations_faites(self, obj):
+        return len(obj.stations_faites)
+
+
+class DemanderBilanSerializer(serializers.Serializer):
+    mois = serializers.RegexField(r"^\d{4}-\d{2}$")
+
+
+class RequeteAnalytiqueSerializer(serializers.Serializer):
+    fait = serializers.ChoiceField(choices=sorted(FAITS))
+    mesures = serializers.ListField(child=serializers.CharField(), min_length=1)
+    dimensions = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    filtres = serializers.DictField(required=False, default=dict)
+    debut = serializers.RegexField(r"^\d{4}-\d{2}$", required=False)
+    fin = serializers.RegexField(r"^\d{4}-\d{2}$", required=False)
+    limite = serializers.IntegerField(min_value=1, required=False, default=1000)
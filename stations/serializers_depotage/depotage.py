@@ -18,6 +18,7 @@ class DepotageSerializer(serializers.ModelSerializer):
             "stock_applique",
             "created_by",
             "validated_by",
+            "validated_at",
             "created_at",
             "updated_at",
         )
@@ -0,0 +1,495 @@
+# stations/services/analytique.py
+"""
+Analytique hors OLTP : faits des stations exportés en Parquet,
+interrogés en processus par DuckDB.
+
+Export (tâche nocturne stations.exporter_analytique, commande
+exporter_analytique) : un jeu de fichiers par fait, partitionné à
+la manière Hive sous ANALYTIQUE_DIR :
+
+    <fait>/tenant_id=<id>/mois=<AAAA-MM>/part-0.parquet
+
+Chaque ligne porte la station et sa région / son département
+(stations.constants : région déduite du département si absente).
+Seuls les mois depuis `depuis` (défaut : mois précédent, pour les
+corrections tardives) sont réécrits ; les mois plus anciens restent
+tels quels, y compris après archivage des lignes en base.
+Lecture par .iterator() (replica si disponible), écriture par lots
+(ParquetWriter) : mémoire bornée.
+
+Requêtes : agrégats paramétrés (fait, mesures, dimensions, filtres
+d'égalité, plage de mois) compilés depuis des listes blanches,
+jamais de SQL client ; seuls les fichiers du tenant sont lus.
+
+pyarrow et duckdb sont optionnels (import à l'usage).
+"""
+
+import json
+import os
+import shutil
+from collections import namedtuple
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.db_router import bases_tenants, utiliser_base, utiliser_replica
+from finances_station.models import TransactionStation
+from stations.constants import REGIONS_DEPARTEMENTS
+from stations.models import RelaisEquipe, RelaisProduit, Station
+from stations.models_depotage.depotage import Depotage
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.services.archives import RELAIS_CLOS, limite_retention
+from stations.services.cloture import DEPOTAGES_CONFIRMES, bornes_jour
+
+TAILLE_LOT = 5000
+LIMITE_LIGNES = 10000
+
+# Colonne : (nom, chemin ORM, type) ; types : texte, entier, reel, date
+Colonne = namedtuple("Colonne", "nom chemin type")
+
+Fait = namedtuple("Fait", "nom modele tenant station date filtre annotations colonnes mesures")
+
+
+class AnalytiqueError(Exception):
+    pass
+
+
+# ============================================================
+# FAITS
+# ============================================================
+
+FAITS = {
+    fait.nom: fait
+    for fait in (
+        Fait(
+            nom="relais",
+            modele=RelaisProduit,
+            tenant="relais__tenant_id",
+            station="relais__station_id",
+            date="relais__fin_relais",
+            filtre=Q(relais__status__in=RELAIS_CLOS),
+            annotations={"volume": F("index_fin") - F("index_debut")},
+            colonnes=(
+                Colonne("produit", "produit__code", "texte"),
+                Colonne("volume", "volume", "reel"),
+                Colonne("prix_unitaire", "prix_unitaire", "reel"),
+                Colonne("montant", "montant_theorique", "reel"),
+            ),
+            mesures={
+                "nombre": "COUNT(*)",
+                "volume": "SUM(volume)",
+                "montant": "SUM(montant)",
+                "prix_moyen": "SUM(montant) / NULLIF(SUM(volume), 0)",
+            },
+        ),
+        Fait(
+            nom="caisse",
+            modele=RelaisEquipe,
+            tenant="tenant_id",
+            station="station_id",
+            date="fin_relais",
+            filtre=Q(status__in=RELAIS_CLOS),
+            annotations={},
+            colonnes=(
+                Colonne("liquide", "encaisse_liquide", "reel"),
+                Colonne("carte", "encaisse_carte", "reel"),
+                Colonne("ticket", "encaisse_ticket", "reel"),
+            ),
+            mesures={
+                "nombre": "COUNT(*)",
+                "liquide": "SUM(liquide)",
+                "carte": "SUM(carte)",
+                "ticket": "SUM(ticket)",
+                "total": "SUM(liquide + carte + ticket)",
+                "part_liquide": "SUM(liquide) / NULLIF(SUM(liquide + carte + ticket), 0)",
+            },
+        ),
+        Fait(
+            nom="mouvements",
+            modele=MouvementStock,
+            tenant="tenant_id",
+            station="station_id",
+            date="date_mouvement",
+            filtre=Q(),
+            annotations={},
+            colonnes=(
+                Colonne("produit", "cuve__produit__code", "texte"),
+                Colonne("cuve", "cuve__reference", "texte"),
+                Colonne("type_mouvement", "type_mouvement", "texte"),
+                Colonne("source_type", "source_type", "texte"),
+                Colonne("quantite", "quantite", "reel"),
+            ),
+            mesures={
+                "nombre": "COUNT(*)",
+                "quantite": "SUM(quantite)",
+                "entrees": "SUM(quantite) FILTER (WHERE type_mouvement = 'ENTREE')",
+                "sorties": "SUM(quantite) FILTER (WHERE type_mouvement = 'SORTIE')",
+            },
+        ),
+        Fait(
+            nom="transactions",
+            modele=TransactionStation,
+            tenant="tenant_id",
+            station="station_id",
+            date="date",
+            filtre=Q(),
+            annotations={},
+            colonnes=(
+                Colonne("type", "type", "texte"),
+                Colonne("source_type", "source_type", "texte"),
+                Colonne("finance_status", "finance_status", "texte"),
+                Colonne("montant", "montant", "reel"),
+            ),
+            mesures={
+                "nombre": "COUNT(*)",
+                "montant": "SUM(montant)",
+                "recettes": "SUM(montant) FILTER (WHERE type = 'RECETTE')",
+                "depenses": "SUM(montant) FILTER (WHERE type = 'DEPENSE')",
+            },
+        ),
+        Fait(
+            nom="depotages",
+            modele=Depotage,
+            tenant="tenant_id",
+            station="station_id",
+            date="date_depotage",
+            filtre=Q(statut__in=DEPOTAGES_CONFIRMES),
+            annotations={},
+            colonnes=(
+                Colonne("produit", "cuve__produit__code", "texte"),
+                Colonne("fournisseur", "fournisseur", "texte"),
+                Colonne("livre", "quantite_livree", "reel"),
+                Colonne("accepte", "quantite_acceptee", "reel"),
+                Colonne("variation", "variation_cuve", "reel"),
+                Colonne("prix_unitaire", "prix_unitaire", "reel"),
+                Colonne("montant", "montant_total", "reel"),
+            ),
+            mesures={
+                "nombre": "COUNT(*)",
+                "livre": "SUM(livre)",
+                "accepte": "SUM(accepte)",
+                "ecart": "SUM(livre - variation)",
+                "montant": "SUM(montant)",
+                "prix_moyen": "SUM(montant) / NULLIF(SUM(livre), 0)",
+            },
+        ),
+    )
+}
+
+# Colonnes communes à tous les faits (mois : partition)
+COLONNES_STATION = (
+    Colonne("station_id", None, "entier"),
+    Colonne("station", None, "texte"),
+    Colonne("region", None, "texte"),
+    Colonne("departement", None, "texte"),
+    Colonne("jour", None, "date"),
+)
+
+
+def colonnes(fait):
+    return (*COLONNES_STATION, *fait.colonnes)
+
+
+def dimensions(fait):
+    """Colonnes de regroupement / filtre : non numériques, plus le mois."""
+    return {
+        "mois": "texte",
+        **{c.nom: c.type for c in colonnes(fait) if c.type != "reel"},
+    }
+
+
+# ============================================================
+# OUTILS
+# ============================================================
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise AnalytiqueError("Export analytique indisponible (pyarrow non installé).")
+    return pyarrow
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise AnalytiqueError("Requêtes analytiques indisponibles (duckdb non installé).")
+    return duckdb
+
+
+def _racine():
+    return Path(settings.ANALYTIQUE_DIR)
+
+
+def _dossier_tenant(fait, tenant_id):
+    # Tenant.pk : UUID, partition « tenant_id=<uuid> »
+    return _racine() / fait / f"tenant_id={tenant_id}"
+
+
+def _partition(fait, tenant_id, mois):
+    return _dossier_tenant(fait, tenant_id) / f"mois={mois}"
+
+
+def _mois(valeur):
+    return f"{valeur:%Y-%m}"
+
+
+def etat():
+    try:
+        with open(_racine() / "etat.json", encoding="utf-8") as fichier:
+            return json.load(fichier)
+    except FileNotFoundError:
+        return {}
+
+
+def _regions():
+    """{département: région} d'après stations.constants."""
+    return {
+        departement: region
+        for region, departements in REGIONS_DEPARTEMENTS.items()
+        for departement in departements
+    }
+
+
+def _stations():
+    """{station_id: (nom, région, département)} de la base courante."""
+    regions = _regions()
+    return {
+        pk: (nom, region or regions.get(departement), departement)
+        for pk, nom, region, departement in Station.objects.values_list(
+            "pk", "nom", "region", "departement"
+        ).iterator()
+    }
+
+
+# ============================================================
+# EXPORT
+# ============================================================
+
+class _Partition:
+    """Écriture d'une partition par lots, publiée par renommage."""
+
+    def __init__(self, pa, schema, fait, tenant_id, mois):
+        self.pa = pa
+        self.schema = schema
+        self.dossier = _partition(fait, tenant_id, mois)
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        self.temporaire = self.dossier / "part-0.parquet.tmp"
+        self.writer = pa.parquet.ParquetWriter(self.temporaire, schema, compression="zstd")
+        self.lot = []
+        self.lignes = 0
+
+    def ajouter(self, ligne):
+        self.lot.append(ligne)
+        if len(self.lot) >= TAILLE_LOT:
+            self._vider()
+
+    def _vider(self):
+        if self.lot:
+            colonnes_lot = list(zip(*self.lot))
+            self.writer.write_table(
+                self.pa.Table.from_arrays(
+                    [
+                        self.pa.array(valeurs, type=champ.type)
+                        for valeurs, champ in zip(colonnes_lot, self.schema)
+                    ],
+                    schema=self.schema,
+                )
+            )
+            self.lignes += len(self.lot)
+            self.lot = []
+
+    def fermer(self):
+        self._vider()
+        self.writer.close()
+        os.replace(self.temporaire, self.dossier / "part-0.parquet")
+
+
+def _schema(pa, fait):
+    types = {
+        "texte": pa.string(),
+        "entier": pa.int64(),
+        "reel": pa.float64(),
+        "date": pa.date32(),
+    }
+    return pa.schema([(c.nom, types[c.type]) for c in colonnes(fait)])
+
+
+def _exporter_fait(pa, fait, depuis, ecrites):
+    """Réécrit les partitions du fait pour la base courante, mois >= depuis."""
+    stations = _stations()
+    schema = _schema(pa, fait)
+    debut = bornes_jour(depuis)[0]
+
+    lignes = (
+        fait.modele.objects
+        .filter(fait.filtre, **{f"{fait.date}__gte": debut})
+        .annotate(**fait.annotations)
+        .order_by(fait.tenant, fait.date)
+        .values_list(fait.tenant, fait.station, fait.date, *(c.chemin for c in fait.colonnes))
+        .iterator(chunk_size=TAILLE_LOT)
+    )
+
+    partition, cle = None, None
+    total = 0
+    try:
+        for tenant_id, station_id, horodatage, *valeurs in lignes:
+            local = timezone.localtime(horodatage)
+            if cle != (str(tenant_id), _mois(local)):
+                if partition is not None:
+                    partition.fermer()
+                cle = (str(tenant_id), _mois(local))
+                partition = _Partition(pa, schema, fait.nom, *cle)
+                ecrites.add((fait.nom, *cle))
+
+            nom, region, departement = stations.get(station_id, (None, None, None))
+            partition.ajouter([
+                station_id, nom, region, departement, local.date(),
+                *(
+                    float(valeur) if colonne.type == "reel" and valeur is not None else valeur
+                    for valeur, colonne in zip(valeurs, fait.colonnes)
+                ),
+            ])
+            total += 1
+    finally:
+        if partition is not None:
+            partition.fermer()
+
+    return total
+
+
+def _balayer(depuis, ecrites):
+    """Supprime les partitions >= depuis qui n'ont plus de lignes en base."""
+    supprimees = 0
+    for fait in FAITS:
+        for dossier in (_racine() / fait).glob("tenant_id=*/mois=*"):
+            tenant_id = dossier.parent.name.split("=", 1)[1]
+            mois = dossier.name.split("=", 1)[1]
+            if mois >= _mois(depuis) and (fait, tenant_id, mois) not in ecrites:
+                shutil.rmtree(dossier)
+                supprimees += 1
+    return supprimees
+
+
+def exporter(depuis=None, faits=None):
+    """
+    Réécrit les partitions des mois >= `depuis` (toutes bases).
+    Retourne {fait: lignes exportées}.
+    """
+    pa = _pyarrow()
+
+    aujourdhui = timezone.localdate()
+    if depuis is None:
+        depuis = (aujourdhui.replace(day=1) - timedelta(days=1)).replace(day=1)
+    # Mois archivés : plus en base, partitions conservées
+    retention = timezone.localtime(limite_retention()).date().replace(day=1)
+    depuis = max(depuis.replace(day=1), retention)
+
+    ecrites = set()
+    comptes = dict.fromkeys(faits or FAITS, 0)
+    for alias in bases_tenants():
+        with utiliser_base(alias), utiliser_replica():
+            for nom in comptes:
+                comptes[nom] += _exporter_fait(pa, FAITS[nom], depuis, ecrites)
+
+    if faits is None:
+        _balayer(depuis, ecrites)
+
+    _racine().mkdir(parents=True, exist_ok=True)
+    temporaire = _racine() / "etat.json.tmp"
+    with open(temporaire, "w", encoding="utf-8") as fichier:
+        json.dump(
+            {"exporte_le": timezone.now().isoformat(), "depuis": _mois(depuis), "lignes": comptes},
+            fichier,
+        )
+    os.replace(temporaire, _racine() / "etat.json")
+
+    return comptes
+
+
+# ============================================================
+# REQUÊTES
+# ============================================================
+
+def _valeur_filtre(type_, valeur):
+    if type_ == "entier":
+        try:
+            return int(valeur)
+        except (TypeError, ValueError):
+            raise AnalytiqueError(f"Entier attendu : « {valeur} ».")
+    if type_ == "date":
+        try:
+            return date.fromisoformat(str(valeur))
+        except ValueError:
+            raise AnalytiqueError(f"Date attendue (AAAA-MM-JJ) : « {valeur} ».")
+    return str(valeur)
+
+
+def compiler(tenant_id, fait, mesures, dimensions_demandees=(), filtres=None,
+             debut=None, fin=None, limite=1000):
+    """(sql, paramètres) d'un agrégat ; lève AnalytiqueError si hors liste blanche."""
+    definition = FAITS.get(fait)
+    if definition is None:
+        raise AnalytiqueError(f"Fait inconnu : {fait}.")
+
+    autorisees = dimensions(definition)
+    inconnues = [m for m in mesures if m not in definition.mesures]
+    inconnues += [d for d in (*dimensions_demandees, *(filtres or {})) if d not in autorisees]
+    if not mesures:
+        raise AnalytiqueError("Au moins une mesure.")
+    if inconnues:
+        raise AnalytiqueError(f"Inconnu pour « {fait} » : {', '.join(inconnues)}.")
+
+    fichiers = str(_dossier_tenant(fait, tenant_id) / "*" / "*.parquet")
+    conditions, parametres = ["TRUE"], []
+    if debut:
+        conditions.append("mois >= ?")
+        parametres.append(debut)
+    if fin:
+        conditions.append("mois <= ?")
+        parametres.append(fin)
+    for nom, valeur in (filtres or {}).items():
+        conditions.append(f'"{nom}" = ?')
+        parametres.append(_valeur_filtre(autorisees[nom], valeur))
+
+    selection = [f'"{d}"' for d in dimensions_demandees]
+    selection += [f'{definition.mesures[m]} AS "{m}"' for m in mesures]
+
+    sql = (
+        f"SELECT {', '.join(selection)} "
+        "FROM read_parquet('{}', hive_partitioning = true, "
+        "hive_types = {{'tenant_id': VARCHAR, 'mois': VARCHAR}}) ".format(fichiers.replace("'", "''"))
+        + f"WHERE {' AND '.join(conditions)}"
+    )
+    if dimensions_demandees:
+        groupes = ", ".join(f'"{d}"' for d in dimensions_demandees)
+        sql += f" GROUP BY {groupes} ORDER BY {groupes}"
+    sql += f" LIMIT {max(1, min(int(limite), LIMITE_LIGNES))}"
+
+    return sql, parametres
+
+
+def requeter(tenant_id, fait, mesures, dimensions_demandees=(), filtres=None,
+             debut=None, fin=None, limite=1000):
+    """{"colonnes": [...], "lignes": [[...], ...]} ; aucune lecture OLTP."""
+    sql, parametres = compiler(
+        tenant_id, fait, mesures, dimensions_demandees, filtres, debut, fin, limite
+    )
+    colonnes_resultat = [*dimensions_demandees, *mesures]
+
+    if not any(_dossier_tenant(fait, tenant_id).glob("*/*.parquet")):
+        return {"colonnes": colonnes_resultat, "lignes": []}
+
+    duckdb = _duckdb()
+    connexion = duckdb.connect(config={"threads": settings.ANALYTIQUE_DUCKDB_THREADS})
+    try:
+        lignes = connexion.execute(sql, parametres).fetchall()
+    finally:
+        connexion.close()
+
+    return {"colonnes": colonnes_resultat, "lignes": [list(ligne) for ligne in lignes]}
@@ -0,0 +1,383 @@
+# stations/services/archives.py
+"""
+Archivage à froid des périodes closes.
+
+Sortent des tables chaudes, mois par mois, les lignes antérieures
+à la fenêtre de rétention (ARCHIVE_RETENTION_MOIS) :
+- relais transférés (stock et finance appliqués), avec leurs
+  produits et audits ; un relais VALIDE reste en base : sa sortie
+  de stock et son écriture finance sont encore à venir ;
+- mouvements de stock intégrés (mode LEDGER : déjà compactés) ;
+- transactions station.
+
+Fichiers : NDJSON compressé (gzip), une ligne JSON par
+enregistrement (<attname>: valeur), sous ARCHIVE_DIR :
+    <tenant_id>/<archive>/<AAAA-MM>.<n>.ndjson.gz
+    <tenant_id>/manifeste.json   parties : lignes, sha256, pk_max
+
+Une période est écrite (fichier temporaire, fsync, renommage) et
+inscrite au manifeste AVANT toute suppression. Suppression par lots
+(une transaction par lot) jusqu'à pk_max ; table partitionnée
+(stations/services/partitions.py) : la partition du mois est
+détachée puis supprimée quand toutes ses lignes sont archivées.
+Relance après interruption : les lignes déjà archivées sont
+supprimées sans nouvelle copie, les suivantes forment la partie n+1.
+
+Lecture : lire() parcourt les parties à la demande (empreinte
+vérifiée), cf. stations/views_archives.py.
+
+Commande : python manage.py archiver_periodes
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.transfert import _Encodeur
+from finances_station.models import TransactionStation
+from stations.models import FaitStatus, RelaisAudit, RelaisEquipe, RelaisProduit
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.services.partitions import (
+    _mois,
+    _mois_suivant,
+    _q,
+    est_partitionnee,
+    partitions,
+)
+
+TAILLE_LOT = 1000
+MANIFESTE = "manifeste.json"
+
+# Relais comptés dans les clôtures et l'analytique
+RELAIS_CLOS = (FaitStatus.VALIDE, FaitStatus.TRANSFERE)
+
+Archive = namedtuple("Archive", "nom modele champ tenant filtre")
+
+# Ordre de suppression : enfants des relais avant les relais.
+# Relais archivés une fois transférés seulement (stock + finance appliqués)
+ARCHIVES = (
+    Archive(
+        "relais-audits", RelaisAudit, "relais__fin_relais", "tenant_id",
+        Q(relais__status=FaitStatus.TRANSFERE, relais__stock_applique=True),
+    ),
+    Archive(
+        "relais-produits", RelaisProduit, "relais__fin_relais", "relais__tenant_id",
+        Q(relais__status=FaitStatus.TRANSFERE, relais__stock_applique=True),
+    ),
+    Archive(
+        "relais", RelaisEquipe, "fin_relais", "tenant_id",
+        Q(status=FaitStatus.TRANSFERE, stock_applique=True),
+    ),
+    Archive(
+        "mouvements-stock", MouvementStock, "date_mouvement", "tenant_id",
+        Q(integre=True),
+    ),
+    Archive(
+        "transactions", TransactionStation, "date", "tenant_id",
+        Q(),
+    ),
+)
+
+ARCHIVES_PAR_NOM = {archive.nom: archive for archive in ARCHIVES}
+
+
+class ArchiveError(Exception):
+    pass
+
+
+# ============================================================
+# OUTILS
+# ============================================================
+
+def _debut(mois):
+    return datetime(mois.year, mois.month, 1, tzinfo=dt_timezone.utc)
+
+
+def limite_retention(retention=None):
+    """Premier mois conservé en base (UTC) : les mois antérieurs sont clos."""
+    if retention is None:
+        retention = settings.ARCHIVE_RETENTION_MOIS
+
+    mois = _mois(timezone.now().astimezone(dt_timezone.utc))
+    index = mois.year * 12 + mois.month - 1 - retention
+    return _debut(mois.replace(year=index // 12, month=index % 12 + 1))
+
+
+def _dossier(tenant_id):
+    return Path(settings.ARCHIVE_DIR) / str(tenant_id)
+
+
+def _sha256(chemin):
+    empreinte = hashlib.sha256()
+    with open(chemin, "rb") as fichier:
+        for bloc in iter(lambda: fichier.read(1 << 20), b""):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def _ecrire_atomique(chemin, ecrire):
+    """Écrit via un fichier temporaire synchronisé puis renommé."""
+    temporaire = chemin.with_name(chemin.name + ".tmp")
+    with open(temporaire, "wb") as fichier:
+        ecrire(fichier)
+        fichier.flush()
+        os.fsync(fichier.fileno())
+    os.replace(temporaire, chemin)
+
+
+# ============================================================
+# MANIFESTE
+# ============================================================
+
+def manifeste(tenant_id):
+    """Parties archivées du tenant, dans l'ordre d'écriture."""
+    chemin = _dossier(tenant_id) / MANIFESTE
+    if not chemin.exists():
+        return []
+    with open(chemin, encoding="utf-8") as fichier:
+        return json.load(fichier)["parties"]
+
+
+def _inscrire(tenant_id, partie):
+    parties = manifeste(tenant_id) + [partie]
+    contenu = json.dumps({"parties": parties}, indent=1).encode()
+    _ecrire_atomique(_dossier(tenant_id) / MANIFESTE, lambda f: f.write(contenu))
+
+
+def parties(tenant_id, nom=None, debut=None, fin=None):
+    """Parties filtrées par archive et par mois ("AAAA-MM", bornes incluses)."""
+    return [
+        partie
+        for partie in manifeste(tenant_id)
+        if (nom is None or partie["archive"] == nom)
+        and (debut is None or partie["mois"] >= debut)
+        and (fin is None or partie["mois"] <= fin)
+    ]
+
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+
+def _exporter_partie(qs, archive, tenant_id, mois, numero, lot):
+    """Écrit une partie ; None si aucune ligne."""
+    champs = [champ.attname for champ in archive.modele._meta.concrete_fields]
+    cle = archive.modele._meta.pk.attname
+
+    relatif = f"{archive.nom}/{mois:%Y-%m}.{numero}.ndjson.gz"
+    chemin = _dossier(tenant_id) / relatif
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+
+    compte = {"lignes": 0, "pk_max": None}
+
+    def ecrire(fichier):
+        with gzip.GzipFile(fileobj=fichier, mode="wb", mtime=0) as flux:
+            for valeurs in qs.order_by("pk").values_list(*champs).iterator(chunk_size=lot):
+                ligne = dict(zip(champs, valeurs))
+                flux.write(json.dumps(ligne, cls=_Encodeur).encode() + b"\n")
+                compte["lignes"] += 1
+                compte["pk_max"] = ligne[cle]
+
+    _ecrire_atomique(chemin, ecrire)
+
+    if not compte["lignes"]:
+        chemin.unlink()
+        return None
+
+    partie = {
+        "archive": archive.nom,
+        "mois": f"{mois:%Y-%m}",
+        "fichier": relatif,
+        "lignes": compte["lignes"],
+        "pk_max": compte["pk_max"],
+        "sha256": _sha256(chemin),
+        "archive_le": timezone.now().isoformat(),
+    }
+    _inscrire(tenant_id, partie)
+    return partie
+
+
+def _archiver_tenant(qs, archive, tenant_id, mois, lot):
+    """
+    Archive les lignes du tenant pour le mois.
+    Retourne (pk_max archivé, lignes écrites).
+    """
+    deja = parties(tenant_id, archive.nom, f"{mois:%Y-%m}", f"{mois:%Y-%m}")
+    pk_max = max((partie["pk_max"] for partie in deja), default=None)
+
+    nouvelles = qs if pk_max is None else qs.filter(pk__gt=pk_max)
+    partie = _exporter_partie(nouvelles, archive, tenant_id, mois, len(deja) + 1, lot)
+
+    if partie is None:
+        return pk_max, 0
+    return partie["pk_max"], partie["lignes"]
+
+
+# ============================================================
+# SUPPRESSION
+# ============================================================
+
+def _supprimer(qs, pk_max, lot):
+    """Supprime par lots les lignes archivées (pk <= pk_max)."""
+    modele = qs.model
+    supprimees = 0
+
+    while True:
+        ids = list(
+            qs.filter(pk__lte=pk_max).order_by("pk").values_list("pk", flat=True)[:lot]
+        )
+        if not ids:
+            return supprimees
+
+        with transaction.atomic(using=qs.db):
+            _, detail = modele._base_manager.using(qs.db).filter(pk__in=ids).delete()
+        supprimees += detail.get(modele._meta.label, 0)
+
+
+def _detacher_mois(du_mois, archive, mois, bornes):
+    """
+    Table partitionnée : détache et supprime la partition du mois
+    si chacune de ses lignes est archivée. Retourne le nombre de
+    lignes sorties, None si la partition est conservée.
+    """
+    connexion = connections[du_mois.db]
+    if connexion.vendor != "postgresql":
+        return None
+
+    table = archive.modele._meta.db_table
+
+    with transaction.atomic(using=du_mois.db), connexion.cursor() as cursor:
+        if not est_partitionnee(cursor, table):
+            return None
+
+        nom = partitions(cursor, table).get(mois)
+        if nom is None:
+            return None
+
+        # Plus d'écriture dans la partition pendant le contrôle
+        cursor.execute(f"LOCK TABLE {_q(connexion, nom)} IN SHARE MODE")
+        cursor.execute(f"SELECT count(*) FROM {_q(connexion, nom)}")
+        (total,) = cursor.fetchone()
+
+        couvertes = sum(
+            du_mois.filter(**{archive.tenant: tenant_id}, pk__lte=pk_max).count()
+            for tenant_id, pk_max in bornes.items()
+            if pk_max is not None
+        )
+        if couvertes != total:
+            return None
+
+        cursor.execute(
+            f"ALTER TABLE {_q(connexion, table)} DETACH PARTITION {_q(connexion, nom)}"
+        )
+        cursor.execute(f"DROP TABLE {_q(connexion, nom)}")
+
+    return total
+
+
+# ============================================================
+# ARCHIVAGE D'UNE BASE
+# ============================================================
+
+def archiver_base(alias, limite=None, lot=TAILLE_LOT, detacher=True):
+    """
+    Archive puis supprime les mois clos (antérieurs à `limite`)
+    de la base `alias`. Retourne [{archive, mois, archivees,
+    supprimees, detachee}].
+    """
+    limite = limite or limite_retention()
+    rapport = []
+
+    for archive in ARCHIVES:
+        qs = archive.modele._base_manager.using(alias).filter(archive.filtre)
+        anciennes = qs.filter(**{f"{archive.champ}__lt": limite})
+
+        for debut in anciennes.datetimes(archive.champ, "month", tzinfo=dt_timezone.utc):
+            mois = debut.date()
+            du_mois = qs.filter(**{
+                f"{archive.champ}__gte": _debut(mois),
+                f"{archive.champ}__lt": _debut(_mois_suivant(mois)),
+            })
+
+            tenants = du_mois.order_by().values_list(archive.tenant, flat=True).distinct()
+            bornes = {}
+            archivees = 0
+            for tenant_id in tenants:
+                bornes[tenant_id], lignes = _archiver_tenant(
+                    du_mois.filter(**{archive.tenant: tenant_id}),
+                    archive, tenant_id, mois, lot,
+                )
+                archivees += lignes
+
+            supprimees = None
+            if detacher:
+                supprimees = _detacher_mois(du_mois, archive, mois, bornes)
+            detachee = supprimees is not None
+
+            if not detachee:
+                supprimees = sum(
+                    _supprimer(du_mois.filter(**{archive.tenant: tenant_id}), pk_max, lot)
+                    for tenant_id, pk_max in bornes.items()
+                    if pk_max is not None
+                )
+
+            rapport.append({
+                "archive": archive.nom,
+                "mois": f"{mois:%Y-%m}",
+                "archivees": archivees,
+                "supprimees": supprimees,
+                "detachee": detachee,
+            })
+
+    return rapport
+
+
+# ============================================================
+# LECTURE
+# ============================================================
+
+def _verifier(tenant_id, partie):
+    chemin = _dossier(tenant_id) / partie["fichier"]
+    if not chemin.exists():
+        raise ArchiveError(f"{partie['fichier']} : fichier absent.")
+    if _sha256(chemin) != partie["sha256"]:
+        raise ArchiveError(f"{partie['fichier']} : empreinte invalide.")
+    return chemin
+
+
+def verifier(tenant_id):
+    """Contrôle toutes les parties du tenant ; retourne leur nombre."""
+    toutes = manifeste(tenant_id)
+    for partie in toutes:
+        _verifier(tenant_id, partie)
+    return len(toutes)
+
+
+def lire(tenant_id, nom, debut=None, fin=None, filtres=None):
+    """
+    Lignes archivées (dict), mois croissants, une partie à la fois.
+    `filtres` : {attname: valeur}, comparaison sur la forme texte.
+    """
+    if nom not in ARCHIVES_PAR_NOM:
+        raise ArchiveError(f"Archive inconnue : {nom}.")
+
+    filtres = filtres or {}
+    # Tri stable : parties d'un même mois dans l'ordre d'écriture
+    selection = sorted(parties(tenant_id, nom, debut, fin), key=lambda partie: partie["mois"])
+
+    for partie in selection:
+        chemin = _verifier(tenant_id, partie)
+        with gzip.open(chemin, "rt", encoding="utf-8") as flux:
+            for texte in flux:
+                ligne = json.loads(texte)
+                if all(str(ligne.get(champ)) == str(valeur) for champ, valeur in filtres.items()):
+                    yield ligne
@@ -0,0 +1,407 @@
+# stations/services/bilans.py
+"""
+Dossier de fin de mois (stations.models_bilan.BilanMensuel).
+
+Une archive BILAN_DIR/<tenant>/bilan-<AAAA-MM>.tar.gz, un dossier
+par station :
+
+    journalier.csv    recettes, dépenses, caisse des relais et écart
+                      avec les recettes comptabilisées, par jour
+    pnl.csv           recettes / dépenses du mois par source
+    stocks.csv        ouverture, entrées, sorties, clôture par cuve
+    depotages.csv     dépotages confirmés et écarts livré / jaugé
+    synthese.json     totaux du mois
+
+Lecture des clôtures journalières (stations/services/cloture.py) :
+seuls les jours non clôturés sont calculés (et figés au passage).
+Restent lus en base : mouvements de stock du mois (un agrégat par
+cuve) et détail des dépotages.
+
+Déroulement (tâches stations.bilan_mensuel / stations.bilan_station) :
+demander() → lancer() planifie une tâche par station, exécutées en
+parallèle par les workers (TACHES_CONCURRENCE_TENANT par tenant) ;
+la dernière station terminée assemble l'archive.
+"""
+
+import json
+import shutil
+import tarfile
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from core.db_router import atomic_tenant
+from core.export import lignes_csv
+from stations.models import Station
+from stations.models_bilan import BilanMensuel
+from stations.models_cloture import ClotureJournaliere
+from stations.models_depotage.depotage import Depotage
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.services.archives import limite_retention
+from stations.services.cloture import DEPOTAGES_CONFIRMES, ZERO, bornes_jour, cloturer
+from taches.services.file import planifier
+
+
+class BilanError(Exception):
+    pass
+
+
+# ============================================================
+# OUTILS
+# ============================================================
+
+def mois_demande(valeur):
+    """« AAAA-MM » → date du premier jour."""
+    try:
+        annee, mois = map(int, valeur.split("-"))
+        return date(annee, mois, 1)
+    except (AttributeError, ValueError):
+        raise BilanError("Mois attendu au format AAAA-MM.")
+
+
+def bornes_mois(mois):
+    """(premier jour, dernier jour) du mois de `mois`."""
+    debut = mois.replace(day=1)
+    suivant = (debut + timedelta(days=32)).replace(day=1)
+    return debut, suivant - timedelta(days=1)
+
+
+def _dossier(tenant_id):
+    return Path(settings.BILAN_DIR) / str(tenant_id)
+
+
+def _travail(bilan):
+    return _dossier(bilan.tenant_id) / f"{bilan.mois:%Y-%m}.travail"
+
+
+def chemin(bilan):
+    """Archive d'un bilan prêt."""
+    return _dossier(bilan.tenant_id) / bilan.fichier
+
+
+def _decimal(valeur):
+    # JSON des clôtures : décimaux sérialisés en chaînes
+    return Decimal(str(valeur or 0))
+
+
+def _ecrire_csv(dossier, nom, entetes, lignes):
+    with open(dossier / nom, "w", encoding="utf-8", newline="") as fichier:
+        fichier.writelines(lignes_csv(entetes, lignes))
+
+
+# ============================================================
+# DEMANDE
+# ============================================================
+
+def demander(tenant_id, mois, utilisateur=None):
+    """(Re)génère le bilan du mois `mois` (date du mois) ; retourne le bilan."""
+    debut, fin = bornes_mois(mois)
+
+    if fin >= timezone.localdate():
+        raise BilanError(f"{debut:%Y-%m} : mois non terminé.")
+    if bornes_jour(debut)[0] < limite_retention():
+        raise BilanError(f"{debut:%Y-%m} : période archivée.")
+
+    with atomic_tenant():
+        bilan, _ = BilanMensuel.objects.select_for_update().get_or_create(
+            tenant_id=tenant_id,
+            mois=debut,
+        )
+        if bilan.statut == BilanMensuel.STATUT_EN_COURS and bilan.tache_id:
+            raise BilanError(f"{debut:%Y-%m} : génération déjà en cours.")
+
+        bilan.statut = BilanMensuel.STATUT_EN_COURS
+        bilan.nb_stations = 0
+        bilan.stations_faites = []
+        bilan.erreur = ""
+        bilan.termine_le = None
+        bilan.demande_par = utilisateur
+        bilan.save()
+
+    tache = planifier(
+        "stations.bilan_mensuel",
+        {"bilan_id": bilan.pk},
+        tenant_id=tenant_id,
+        utilisateur=utilisateur,
+    )
+    BilanMensuel.objects.filter(pk=bilan.pk).update(tache_id=tache.pk)
+    bilan.tache_id = tache.pk
+    return bilan
+
+
+def lancer(bilan):
+    """Planifie une tâche par station du tenant (tâche stations.bilan_mensuel)."""
+    stations = list(
+        Station.objects
+        .filter(tenant_id=bilan.tenant_id, active=True)
+        .values_list("pk", flat=True)
+    )
+
+    travail = _travail(bilan)
+    shutil.rmtree(travail, ignore_errors=True)
+    travail.mkdir(parents=True)
+
+    BilanMensuel.objects.filter(pk=bilan.pk).update(
+        nb_stations=len(stations),
+        stations_faites=[],
+    )
+
+    if not stations:
+        bilan.refresh_from_db()
+        assembler(bilan)
+        return 0
+
+    for station_id in stations:
+        planifier(
+            "stations.bilan_station",
+            {"bilan_id": bilan.pk, "station_id": station_id},
+            tenant_id=bilan.tenant_id,
+        )
+    return len(stations)
+
+
+# ============================================================
+# GÉNÉRATION PAR STATION
+# ============================================================
+
+def _clotures(station, debut, fin):
+    """Clôtures du mois, en figeant les jours manquants. Retourne (clôtures, calculés)."""
+    existants = set(
+        ClotureJournaliere.objects
+        .filter(station=station, jour__gte=debut, jour__lte=fin)
+        .values_list("jour", flat=True)
+    )
+
+    calcules = 0
+    jour = debut
+    while jour <= fin:
+        if jour not in existants:
+            cloturer(station, jour)
+            calcules += 1
+        jour += timedelta(days=1)
+
+    clotures = list(
+        ClotureJournaliere.objects
+        .filter(station=station, jour__gte=debut, jour__lte=fin)
+        .order_by("jour")
+    )
+    return clotures, calcules
+
+
+def _journalier(dossier, clotures):
+    lignes = []
+    for cloture in clotures:
+        encaisse = cloture.encaisse_liquide + cloture.encaisse_carte + cloture.encaisse_ticket
+        comptabilise = _decimal(cloture.finances.get("RECETTE", {}).get("RelaisEquipe"))
+        lignes.append([
+            cloture.jour,
+            cloture.recettes,
+            cloture.depenses,
+            cloture.recettes - cloture.depenses,
+            cloture.nb_transactions,
+            cloture.nb_relais,
+            cloture.encaisse_liquide,
+            cloture.encaisse_carte,
+            cloture.encaisse_ticket,
+            encaisse,
+            comptabilise,
+            encaisse - comptabilise,
+        ])
+
+    _ecrire_csv(dossier, "journalier.csv", [
+        "jour", "recettes", "depenses", "solde", "transactions", "relais",
+        "encaisse_liquide", "encaisse_carte", "encaisse_ticket", "encaisse_total",
+        "recettes_relais", "ecart_caisse",
+    ], lignes)
+
+
+def _pnl(dossier, clotures):
+    sources = {}
+    for cloture in clotures:
+        for type_, montants in cloture.finances.items():
+            for source, montant in montants.items():
+                sources[(type_, source)] = sources.get((type_, source), ZERO) + _decimal(montant)
+
+    _ecrire_csv(dossier, "pnl.csv", ["type", "source", "montant"], [
+        [type_, source, montant]
+        for (type_, source), montant in sorted(sources.items())
+    ])
+    return sources
+
+
+def _stocks(dossier, station, clotures, debut, fin):
+    """Ouverture : 1er jour ; clôture : dernier jour ; flux : journal du mois."""
+    flux = {
+        ligne["cuve_id"]: ligne
+        for ligne in (
+            MouvementStock.objects
+            .filter(
+                station=station,
+                date_mouvement__gte=bornes_jour(debut)[0],
+                date_mouvement__lt=bornes_jour(fin)[1],
+            )
+            .values("cuve_id")
+            .annotate(
+                entrees=Sum("quantite", filter=Q(type_mouvement=MouvementStock.MOUVEMENT_ENTREE)),
+                sorties=Sum("quantite", filter=Q(type_mouvement=MouvementStock.MOUVEMENT_SORTIE)),
+            )
+            .order_by()
+        )
+    }
+
+    premier = clotures[0].stocks if clotures else {}
+    dernier = clotures[-1].stocks if clotures else {}
+
+    lignes = []
+    for cuve_id, stock in sorted(dernier.items(), key=lambda item: int(item[0])):
+        ligne = flux.get(int(cuve_id), {})
+        lignes.append([
+            cuve_id,
+            stock["reference"],
+            stock["produit"],
+            _decimal(premier.get(cuve_id, {}).get("ouverture")),
+            ligne.get("entrees") or ZERO,
+            ligne.get("sorties") or ZERO,
+            _decimal(stock["cloture"]),
+        ])
+
+    _ecrire_csv(dossier, "stocks.csv", [
+        "cuve_id", "reference", "produit", "ouverture", "entrees", "sorties", "cloture",
+    ], lignes)
+
+
+def _depotages(dossier, station, debut, fin):
+    depotages = (
+        Depotage.objects
+        .filter(
+            station=station,
+            statut__in=DEPOTAGES_CONFIRMES,
+            date_depotage__gte=bornes_jour(debut)[0],
+            date_depotage__lt=bornes_jour(fin)[1],
+        )
+        .order_by("date_depotage")
+        .values_list(
+            "id", "date_depotage", "cuve__reference", "cuve__produit__code",
+            "fournisseur", "bon_livraison_numero", "quantite_livree",
+            "quantite_acceptee", "variation_cuve", "statut",
+        )
+    )
+
+    lignes = []
+    for ligne in depotages.iterator():
+        livree, variation = ligne[6], ligne[8]
+        ecart = None if livree is None or variation is None else livree - variation
+        lignes.append([*ligne[:9], ecart, ligne[9]])
+
+    _ecrire_csv(dossier, "depotages.csv", [
+        "id", "date", "cuve", "produit", "fournisseur", "bon_livraison",
+        "livree", "acceptee", "variation", "ecart", "statut",
+    ], lignes)
+
+
+def _synthese(dossier, station, bilan, clotures, sources, calcules):
+    volumes, depotages = {}, {}
+    for cloture in clotures:
+        for produit, volume in cloture.volumes.items():
+            volumes[produit] = volumes.get(produit, ZERO) + _decimal(volume)
+        for produit, valeurs in cloture.depotages.items():
+            cumul = depotages.setdefault(produit, {"nombre": 0, "livre": ZERO, "ecart": ZERO})
+            cumul["nombre"] += valeurs["nombre"]
+            cumul["livre"] += _decimal(valeurs["livre"])
+            cumul["ecart"] += _decimal(valeurs["ecart"])
+
+    recettes = sum((cloture.recettes for cloture in clotures), ZERO)
+    depenses = sum((cloture.depenses for cloture in clotures), ZERO)
+    encaisse = sum(
+        (c.encaisse_liquide + c.encaisse_carte + c.encaisse_ticket for c in clotures),
+        ZERO,
+    )
+
+    synthese = {
+        "station": {"id": station.pk, "nom": station.nom},
+        "mois": f"{bilan.mois:%Y-%m}",
+        "recettes": recettes,
+        "depenses": depenses,
+        "solde": recettes - depenses,
+        "transactions": sum(cloture.nb_transactions for cloture in clotures),
+        "relais": sum(cloture.nb_relais for cloture in clotures),
+        "encaisse": encaisse,
+        "ecart_caisse": encaisse - sources.get(("RECETTE", "RelaisEquipe"), ZERO),
+        "volumes": volumes,
+        "depotages": depotages,
+        "jours_clotures_reutilises": len(clotures) - calcules,
+        "jours_calcules": calcules,
+    }
+
+    with open(dossier / "synthese.json", "w", encoding="utf-8") as fichier:
+        json.dump(synthese, fichier, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)
+
+
+def generer_station(bilan, station):
+    """Écrit le dossier de `station` (idempotent : dossier réécrit)."""
+    debut, fin = bornes_mois(bilan.mois)
+
+    dossier = _travail(bilan) / f"station-{station.pk}"
+    shutil.rmtree(dossier, ignore_errors=True)
+    dossier.mkdir(parents=True)
+
+    clotures, calcules = _clotures(station, debut, fin)
+
+    _journalier(dossier, clotures)
+    sources = _pnl(dossier, clotures)
+    _stocks(dossier, station, clotures, debut, fin)
+    _depotages(dossier, station, debut, fin)
+    _synthese(dossier, station, bilan, clotures, sources, calcules)
+
+    return calcules
+
+
+def terminer_station(bilan_id, station_id):
+    """Inscrit la station ; retourne le bilan si c'était la dernière, sinon None."""
+    with atomic_tenant():
+        bilan = BilanMensuel.objects.select_for_update().get(pk=bilan_id)
+        if station_id not in bilan.stations_faites:
+            bilan.stations_faites.append(station_id)
+            bilan.save(update_fields=["stations_faites"])
+
+    if len(bilan.stations_faites) < bilan.nb_stations:
+        return None
+    return bilan
+
+
+# ============================================================
+# ASSEMBLAGE
+# ============================================================
+
+def assembler(bilan):
+    """Archive tar.gz des dossiers de stations ; le bilan passe à PRET."""
+    travail = _travail(bilan)
+    nom = f"bilan-{bilan.mois:%Y-%m}.tar.gz"
+    archive = _dossier(bilan.tenant_id) / nom
+    temporaire = archive.with_name(nom + ".tmp")
+
+    with tarfile.open(temporaire, "w:gz") as tar:
+        for dossier in sorted(travail.iterdir()):
+            tar.add(dossier, arcname=f"{bilan.mois:%Y-%m}/{dossier.name}")
+    temporaire.replace(archive)
+    shutil.rmtree(travail, ignore_errors=True)
+
+    BilanMensuel.objects.filter(pk=bilan.pk).update(
+        statut=BilanMensuel.STATUT_PRET,
+        fichier=nom,
+        taille=archive.stat().st_size,
+        termine_le=timezone.now(),
+    )
+
+
+def echouer(bilan_id, erreur):
+    BilanMensuel.objects.filter(pk=bilan_id).update(
+        statut=BilanMensuel.STATUT_ECHOUE,
+        erreur=erreur[:2000],
+        termine_le=timezone.now(),
+    )
@@ -0,0 +1,296 @@
+# stations/services/cloture.py
+"""
+Clôture journalière des stations (stations.models_cloture).
+
+Une ligne par (station, jour), jours du fuseau TIME_ZONE :
+- recettes / dépenses par source (TransactionStation) ;
+- relais clos du jour (fin_relais) : caisse et volumes par produit ;
+- dépotages confirmés : volumes et écarts par produit ;
+- stock d'ouverture / de clôture par cuve, reconstitué depuis le
+  stock réel courant et les mouvements postérieurs.
+
+Idempotente : un nouveau calcul remplace la ligne (corrections
+tardives). Les jours antérieurs à la rétention (archivés, cf.
+stations/services/archives.py) ne sont plus recalculables.
+
+historique() sert les tableaux de bord : lignes figées pour les
+jours clôturés, agrégats bruts pour les autres (jour en cours).
+
+Commande : python manage.py cloturer_journees
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.db_router import atomic_tenant
+from finances_station.models import TransactionStation
+from stations.constants import DepotageStatus
+from stations.models import RelaisEquipe, RelaisProduit, Station
+from stations.models_cloture import ClotureJournaliere
+from stations.models_depotage.cuve import Cuve
+from stations.models_depotage.depotage import Depotage
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.services.archives import RELAIS_CLOS, limite_retention
+from stations.services.stock_ledger import annoter_stock_reel, delta_signe
+
+ZERO = Decimal("0.00")
+
+DEPOTAGES_CONFIRMES = (DepotageStatus.CONFIRME, DepotageStatus.TRANSFERE)
+
+
+class ClotureError(Exception):
+    pass
+
+
+def bornes_jour(jour):
+    """[début, fin[ du jour dans le fuseau courant."""
+    debut = timezone.make_aware(datetime.combine(jour, time.min))
+    return debut, debut + timedelta(days=1)
+
+
+# ============================================================
+# CALCUL
+# ============================================================
+
+def _finances(station, debut, fin):
+    lignes = (
+        TransactionStation.objects
+        .filter(station=station, date__gte=debut, date__lt=fin)
+        .values("type", "source_type")
+        .annotate(total=Sum("montant"), nombre=Count("id"))
+        .order_by()
+    )
+
+    finances = defaultdict(dict)
+    totaux = defaultdict(lambda: ZERO)
+    nombre = 0
+    for ligne in lignes:
+        finances[ligne["type"]][ligne["source_type"]] = ligne["total"]
+        totaux[ligne["type"]] += ligne["total"]
+        nombre += ligne["nombre"]
+
+    return {
+        "recettes": totaux["RECETTE"],
+        "depenses": totaux["DEPENSE"],
+        "nb_transactions": nombre,
+        "finances": dict(finances),
+    }
+
+
+def _relais(station, debut, fin):
+    relais = RelaisEquipe.objects.filter(
+        station=station,
+        status__in=RELAIS_CLOS,
+        fin_relais__gte=debut,
+        fin_relais__lt=fin,
+    )
+
+    caisse = relais.aggregate(
+        nombre=Count("id"),
+        liquide=Sum("encaisse_liquide"),
+        carte=Sum("encaisse_carte"),
+        ticket=Sum("encaisse_ticket"),
+    )
+
+    volumes = (
+        RelaisProduit.objects
+        .filter(relais__in=relais)
+        .values("produit__code")
+        .annotate(volume=Sum(F("index_fin") - F("index_debut")))
+        .order_by()
+    )
+
+    return {
+        "nb_relais": caisse["nombre"],
+        "encaisse_liquide": caisse["liquide"] or ZERO,
+        "encaisse_carte": caisse["carte"] or ZERO,
+        "encaisse_ticket": caisse["ticket"] or ZERO,
+        "volumes": {ligne["produit__code"]: ligne["volume"] for ligne in volumes},
+    }
+
+
+def _depotages(station, debut, fin):
+    lignes = (
+        Depotage.objects
+        .filter(
+            station=station,
+            statut__in=DEPOTAGES_CONFIRMES,
+            date_depotage__gte=debut,
+            date_depotage__lt=fin,
+        )
+        .values("cuve__produit__code")
+        .annotate(
+            nombre=Count("id"),
+            livre=Sum("quantite_livree"),
+            accepte=Sum("quantite_acceptee"),
+            variation=Sum("variation_cuve"),
+        )
+        .order_by()
+    )
+
+    return {
+        ligne["cuve__produit__code"]: {
+            "nombre": ligne["nombre"],
+            "livre": ligne["livre"],
+            "accepte": ligne["accepte"],
+            "variation": ligne["variation"],
+            # Livré non retrouvé en cuve (jauges)
+            "ecart": ligne["livre"] - ligne["variation"],
+        }
+        for ligne in lignes
+    }
+
+
+def _stocks(station, debut, fin):
+    """
+    Clôture = stock réel courant - mouvements postérieurs au jour ;
+    ouverture = clôture - mouvements du jour.
+    """
+    mouvements = {
+        ligne["cuve_id"]: ligne
+        for ligne in (
+            MouvementStock.objects
+            .filter(station=station, date_mouvement__gte=debut)
+            .values("cuve_id")
+            .annotate(
+                apres=Sum(delta_signe(), filter=Q(date_mouvement__gte=fin)),
+                jour=Sum(delta_signe(), filter=Q(date_mouvement__lt=fin)),
+            )
+            .order_by()
+        )
+    }
+
+    stocks = {}
+    cuves = annoter_stock_reel(
+        Cuve.objects.filter(station=station).select_related("produit")
+    )
+    for cuve in cuves:
+        ligne = mouvements.get(cuve.id, {})
+        cloture = cuve.stock_reel - (ligne.get("apres") or ZERO)
+        stocks[str(cuve.id)] = {
+            "reference": cuve.reference,
+            "produit": cuve.produit.code,
+            "ouverture": cloture - (ligne.get("jour") or ZERO),
+            "cloture": cloture,
+        }
+
+    return stocks
+
+
+def calculer_cloture(station, jour):
+    """Valeurs de la clôture de `station` pour `jour` (sans écriture)."""
+    debut, fin = bornes_jour(jour)
+
+    if debut < limite_retention():
+        raise ClotureError(f"{jour} : période archivée, clôture figée.")
+
+    return {
+        **_finances(station, debut, fin),
+        **_relais(station, debut, fin),
+        "depotages": _depotages(station, debut, fin),
+        "stocks": _stocks(station, debut, fin),
+    }
+
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+
+def cloturer(station, jour, utilisateur=None):
+    """Calcule et (re)fige la clôture. Retourne (cloture, creee)."""
+    valeurs = calculer_cloture(station, jour)
+
+    with atomic_tenant():
+        return ClotureJournaliere.objects.update_or_create(
+            station=station,
+            jour=jour,
+            defaults={
+                **valeurs,
+                "tenant_id": station.tenant_id,
+                "calculee_par": utilisateur,
+            },
+        )
+
+
+def cloturer_journee(jour, stations=None):
+    """
+    Clôture toutes les stations (base courante) pour `jour`.
+    Retourne le nombre de clôtures écrites.
+    """
+    if stations is None:
+        stations = Station.objects.filter(active=True)
+
+    nombre = 0
+    for station in stations.iterator():
+        cloturer(station, jour)
+        nombre += 1
+    return nombre
+
+
+# ============================================================
+# LECTURE
+# ============================================================
+
+def historique(station_ids, debut, fin):
+    """
+    {jour: {"recettes", "depenses", "transactions"}} de `debut` à
+    `fin` (dates incluses), toutes stations confondues.
+
+    Jours clôturés lus dans ClotureJournaliere (une ligne par
+    station et par jour) ; seuls les jours non clôturés (en
+    pratique le jour en cours) sont agrégés depuis les transactions.
+    """
+    station_ids = list(station_ids)
+    jours = defaultdict(lambda: {"recettes": ZERO, "depenses": ZERO, "transactions": 0})
+    couverts = set()
+
+    clotures = ClotureJournaliere.objects.filter(
+        station_id__in=station_ids,
+        jour__gte=debut,
+        jour__lte=fin,
+    ).values_list("station_id", "jour", "recettes", "depenses", "nb_transactions")
+
+    for station_id, jour, recettes, depenses, nombre in clotures:
+        couverts.add((station_id, jour))
+        jours[jour]["recettes"] += recettes
+        jours[jour]["depenses"] += depenses
+        jours[jour]["transactions"] += nombre
+
+    # Premier jour sans clôture pour au moins une station
+    manquant = next(
+        (
+            jour
+            for jour in (debut + timedelta(days=n) for n in range((fin - debut).days + 1))
+            if any((station_id, jour) not in couverts for station_id in station_ids)
+        ),
+        None,
+    )
+    if manquant is None:
+        return dict(jours)
+
+    brut = (
+        TransactionStation.objects
+        .filter(
+            station_id__in=station_ids,
+            date__gte=bornes_jour(manquant)[0],
+            date__lt=bornes_jour(fin)[1],
+        )
+        .annotate(jour=TruncDate("date"))
+        .values("station_id", "jour", "type")
+        .annotate(total=Sum("montant"), nombre=Count("id"))
+        .order_by()
+    )
+
+    for ligne in brut:
+        if (ligne["station_id"], ligne["jour"]) in couverts:
+            continue
+        cle = "recettes" if ligne["type"] == "RECETTE" else "depenses"
+        jours[ligne["jour"]][cle] += ligne["total"]
+        jours[ligne["jour"]]["transactions"] += ligne["nombre"]
+
+    return dict(jours)
@@ -0,0 +1,146 @@
+# stations/services/configuration.py
+
+from django.db.models import F, Prefetch
+
+from stations.models_depotage.cuve import Cuve
+from stations.models_produit import PrixCarburant, ProduitCarburant
+
+
+# ============================================================
+# VERSION DE CONFIGURATION
+# ============================================================
+
+def incrementer_version_config(station_ids):
+    """
+    Incrémente la version de configuration des stations données.
+    Une seule requête UPDATE, sans recharger les stations.
+    """
+    from stations.models import Station
+
+    station_ids = list(station_ids)
+
+    if not station_ids:
+        return 0
+
+    return Station.objects.filter(id__in=station_ids).update(
+        config_version=F("config_version") + 1
+    )
+
+
+def incrementer_version_config_tenant(tenant_id):
+    """
+    Produits carburant = paramétrage tenant :
+    toutes les stations du tenant sont impactées.
+    """
+    from stations.models import Station
+
+    return Station.objects.filter(tenant_id=tenant_id).update(
+        config_version=F("config_version") + 1
+    )
+
+
+def etag_configuration(station):
+    return f'W/"config-{station.id}-{station.config_version}"'
+
+
+# ============================================================
+# SNAPSHOT CONFIGURATION STATION
+# ============================================================
+
+def get_configuration_station(station):
+    """
+    Configuration complète d'une station en un seul payload :
+    pompes + index actifs, produits + prix actifs, cuves.
+
+    Nombre de requêtes constant (pompes, index, produits, prix, cuves).
+    Le stock des cuves est volontairement exclu : il change à chaque
+    relais / dépotage et n'appartient pas au paramétrage.
+    """
+    from stations.models import IndexPompe, Pompe
+
+    pompes = (
+        Pompe.objects
+        .filter(station=station, actif=True)
+        .prefetch_related(
+            Prefetch(
+                "index_pompes",
+                queryset=(
+                    IndexPompe.objects
+                    .filter(actif=True)
+                    .select_related("produit")
+                ),
+            )
+        )
+        .order_by("reference")
+    )
+
+    produits = ProduitCarburant.objects.filter(
+        tenant_id=station.tenant_id,
+        actif=True,
+    )
+
+    prix_map = {
+        p.produit_id: p.prix_unitaire
+        for p in PrixCarburant.objects.filter(
+            tenant_id=station.tenant_id,
+            station=station,
+            actif=True,
+        )
+    }
+
+    cuves = (
+        Cuve.objects
+        .filter(station=station)
+        .select_related("produit")
+        .order_by("produit__code", "reference")
+    )
+
+    return {
+        "station": {
+            "id": station.id,
+            "nom": station.nom,
+            "region": station.region,
+            "departement": station.departement,
+        },
+        "version": station.config_version,
+        "produits": [
+            {
+                "id": produit.id,
+                "code": produit.code,
+                "nom": produit.nom,
+                "seuil_critique_percent": produit.seuil_critique_percent,
+                "prix_unitaire": prix_map.get(produit.id),
+            }
+            for produit in produits
+        ],
+        "pompes": [
+            {
+                "id": pompe.id,
+                "reference": pompe.reference,
+                "index": [
+                    {
+                        "id": idx.id,
+                        "produit_id": idx.produit_id,
+                        "produit_code": idx.produit.code,
+                        "face": idx.face,
+                        "index_actuel": idx.index_courant,
+                        "prix_unitaire": prix_map.get(idx.produit_id),
+                    }
+                    for idx in pompe.index_pompes.all()
+                ],
+            }
+            for pompe in pompes
+        ],
+        "cuves": [
+            {
+                "id": cuve.id,
+                "reference": cuve.reference,
+                "produit_id": cuve.produit_id,
+                "produit_code": cuve.produit.code,
+                "capacite_max": cuve.capacite_max,
+                "seuil_alerte": cuve.seuil_alerte,
+                "statut": cuve.statut,
+            }
+            for cuve in cuves
+        ],
+    }
@@ -1,10 +1,10 @@
-from django.db import transaction
 from django.core.exceptions import ValidationError
 
+from core.db_router import atomic_tenant
 from stations.models_depotage.cuve import Cuve, CuveStatus
 
 
-@transaction.atomic
+@atomic_tenant
 def changer_statut_cuve(cuve: Cuve, nouveau_statut: str):
     """
     Service métier sécurisé pour changer le statut d'une cuve.
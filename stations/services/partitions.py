@@ -0,0 +1,416 @@
+# stations/services/partitions.py
+"""
+Partitionnement mensuel (PostgreSQL, RANGE) des registres
+append-mostly : TransactionStation (date), MouvementStock
+(date_mouvement).
+
+- convertir_table : table existante → table partitionnée (nouvelle
+  table, copie, échange des noms) sous verrou exclusif : à lancer
+  en fenêtre de maintenance ;
+- creer_partitions : mois à venir (tâche planifiée) ;
+- detacher_annee : une année close sort de la table par DETACH
+  (plus de DELETE massif) et reste une table autonome à archiver.
+
+Partitions : <table>_pAAAAMM, plus <table>_defaut pour les lignes
+hors plage (vide tant que les partitions sont créées en avance ;
+sinon ses lignes du mois passent dans la partition à sa création).
+Les vues filtrent sur la colonne de partition : seules les
+partitions de la période demandée sont lues (partition pruning).
+
+Commande : python manage.py partitions_ledgers
+"""
+
+import re
+from datetime import date
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.db_router import connexion_tenant
+from finances_station.models import TransactionStation
+from stations.models_depotage.mouvement_stock import MouvementStock
+
+# (modèle, champ de partition)
+LEDGERS = (
+    (TransactionStation, "date"),
+    (MouvementStock, "date_mouvement"),
+)
+
+MOIS_AVANCE = 3
+
+SUFFIXE_ANCIENNE = "_avant_partition"
+_MOIS = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+class PartitionError(Exception):
+    pass
+
+
+# ============================================================
+# OUTILS
+# ============================================================
+
+def _mois(jour):
+    return date(jour.year, jour.month, 1)
+
+
+def _mois_suivant(mois):
+    return date(mois.year + mois.month // 12, mois.month % 12 + 1, 1)
+
+
+def _plage(debut, fin):
+    """Mois de `debut` à `fin` inclus."""
+    mois = _mois(debut)
+    while mois <= fin:
+        yield mois
+        mois = _mois_suivant(mois)
+
+
+def _borne(mois):
+    return f"{mois.isoformat()} 00:00:00+00"
+
+
+def nom_partition(table, mois):
+    return f"{table}_p{mois:%Y%m}"
+
+
+def _q(connexion, nom):
+    return connexion.ops.quote_name(nom)
+
+
+def _colonne(modele, champ):
+    return modele._meta.get_field(champ).column
+
+
+def _connexion(connexion):
+    connexion = connexion or connexion_tenant()
+    if connexion.vendor != "postgresql":
+        raise PartitionError("Partitionnement : PostgreSQL requis.")
+    return connexion
+
+
+def est_partitionnee(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def partitions(cursor, table):
+    """{mois: nom} des partitions mensuelles attachées."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s",
+        [table],
+    )
+    resultat = {}
+    for (nom,) in cursor.fetchall():
+        correspondance = _MOIS.search(nom)
+        if correspondance:
+            annee, mois = map(int, correspondance.groups())
+            resultat[date(annee, mois, 1)] = nom
+    return resultat
+
+
+def _colonne_partition(cursor, table):
+    cursor.execute("SELECT pg_get_partkeydef(%s::regclass)", [table])
+    # « RANGE (date) »
+    return _colonnes(cursor.fetchone()[0])[0]
+
+
+def _creer_partition(connexion, cursor, table, mois):
+    """
+    Partition du mois (idempotent). Lignes du mois déjà tombées dans
+    <table>_defaut : un CREATE ... PARTITION OF échouerait. Elles sont
+    déplacées dans une table neuve, attachée ensuite comme partition.
+    """
+    q = partial(_q, connexion)
+    nom = nom_partition(table, mois)
+    debut, fin = _borne(mois), _borne(_mois_suivant(mois))
+    defaut = f"{table}_defaut"
+
+    cursor.execute("SELECT to_regclass(%s), to_regclass(%s)", [nom, defaut])
+    existante, avec_defaut = cursor.fetchone()
+    if existante:
+        return
+
+    a_deplacer = False
+    if avec_defaut:
+        colonne = q(_colonne_partition(cursor, table))
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {q(defaut)} "
+            f"WHERE {colonne} >= %s AND {colonne} < %s)",
+            [debut, fin],
+        )
+        a_deplacer = cursor.fetchone()[0]
+
+    if not a_deplacer:
+        cursor.execute(
+            f"CREATE TABLE {q(nom)} PARTITION OF {q(table)} "
+            f"FOR VALUES FROM ('{debut}') TO ('{fin}')"
+        )
+        return
+
+    # Simple changement de partition : les triggers des registres
+    # (clé par source, finances_station) ignorent ce déplacement
+    cursor.execute("SET LOCAL ledgers.deplacement = 'on'")
+    cursor.execute(
+        f"CREATE TABLE {q(nom)} (LIKE {q(table)} "
+        f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+    )
+    cursor.execute(
+        f"WITH deplacees AS (DELETE FROM {q(defaut)} "
+        f"WHERE {colonne} >= %s AND {colonne} < %s RETURNING *) "
+        f"INSERT INTO {q(nom)} SELECT * FROM deplacees",
+        [debut, fin],
+    )
+    cursor.execute(
+        f"ALTER TABLE {q(table)} ATTACH PARTITION {q(nom)} "
+        f"FOR VALUES FROM ('{debut}') TO ('{fin}')"
+    )
+    cursor.execute("SET LOCAL ledgers.deplacement = 'off'")
+
+
+# ============================================================
+# PARTITIONS À VENIR
+# ============================================================
+
+def creer_partitions(mois_avance=MOIS_AVANCE, connexion=None):
+    """
+    Crée les partitions du mois courant et des `mois_avance`
+    suivants (idempotent). Retourne les partitions créées.
+    """
+    connexion = _connexion(connexion)
+    courant = _mois(timezone.now())
+    fin = courant
+    for _ in range(mois_avance):
+        fin = _mois_suivant(fin)
+
+    creees = []
+
+    with transaction.atomic(using=connexion.alias), connexion.cursor() as cursor:
+        for modele, _ in LEDGERS:
+            table = modele._meta.db_table
+            if not est_partitionnee(cursor, table):
+                continue
+
+            existantes = partitions(cursor, table)
+            for mois in _plage(courant, fin):
+                if mois not in existantes:
+                    _creer_partition(connexion, cursor, table, mois)
+                    creees.append(nom_partition(table, mois))
+
+    return creees
+
+
+# ============================================================
+# CONVERSION D'UNE TABLE EXISTANTE
+# ============================================================
+
+def _renomme(nom):
+    return f"{nom[:63 - len(SUFFIXE_ANCIENNE)]}{SUFFIXE_ANCIENNE}"
+
+
+def _contraintes(cursor, table):
+    """[(nom, type, définition)] : p, u, f (CHECK recopiées par LIKE)."""
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f') "
+        "ORDER BY contype, conname",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _colonnes(definition):
+    """Colonnes de « UNIQUE (a, b) »."""
+    interieur = definition[definition.index("(") + 1:definition.rindex(")")]
+    return [colonne.strip().strip('"') for colonne in interieur.split(",")]
+
+
+def _triggers(cursor, table):
+    """[(nom, définition)] des triggers posés par les migrations."""
+    cursor.execute(
+        "SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger "
+        "WHERE tgrelid = %s::regclass AND NOT tgisinternal",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _index_libres(cursor, table):
+    """[(nom, définition)] des index hors contraintes."""
+    cursor.execute(
+        "SELECT c.relname, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE i.indrelid = %s::regclass AND NOT EXISTS ("
+        "  SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid"
+        ")",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def convertir_table(modele, champ, mois_avance=MOIS_AVANCE, conserver=False, connexion=None):
+    """
+    Remplace la table de `modele` par une table partitionnée par mois
+    sur `champ`, données comprises. Retourne le nombre de lignes
+    copiées, None si déjà partitionnée.
+
+    Clé primaire (id, champ) : PostgreSQL impose la clé de partition
+    dans toute contrainte unique. L'id reste alloué par séquence.
+    """
+    connexion = _connexion(connexion)
+    table = modele._meta.db_table
+    colonne = _colonne(modele, champ)
+    ancienne = _renomme(table)
+    sequence = f"{table}_pid_seq"[:63]
+
+    q = partial(_q, connexion)
+
+    with transaction.atomic(using=connexion.alias), connexion.cursor() as cursor:
+        if est_partitionnee(cursor, table):
+            return None
+
+        cursor.execute(f"LOCK TABLE {q(table)} IN ACCESS EXCLUSIVE MODE")
+
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE confrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        entrantes = [nom for (nom,) in cursor.fetchall()]
+        if entrantes:
+            raise PartitionError(f"{table} est référencée par {', '.join(entrantes)}.")
+
+        contraintes = _contraintes(cursor, table)
+        index = _index_libres(cursor, table)
+        triggers = _triggers(cursor, table)
+
+        for nom, type_, definition in contraintes:
+            if type_ == "u" and colonne not in _colonnes(definition):
+                raise PartitionError(
+                    f"Contrainte {nom} ({definition}) sans {colonne} : "
+                    f"ajouter la clé de partition au modèle d'abord."
+                )
+
+        # 1. L'ancienne table et ses index libèrent leurs noms
+        cursor.execute(f"ALTER TABLE {q(table)} RENAME TO {q(ancienne)}")
+        for nom, type_, _ in contraintes:
+            if type_ in ("p", "u"):
+                cursor.execute(
+                    f"ALTER TABLE {q(ancienne)} RENAME CONSTRAINT {q(nom)} TO {q(_renomme(nom))}"
+                )
+        for nom, _ in index:
+            cursor.execute(f"ALTER INDEX {q(nom)} RENAME TO {q(_renomme(nom))}")
+        # Ancienne table conservée : elle ne tient plus les clés par source
+        for nom, _ in triggers:
+            cursor.execute(f"DROP TRIGGER {q(nom)} ON {q(ancienne)}")
+
+        # 2. Table partitionnée, même structure
+        cursor.execute(
+            f"CREATE TABLE {q(table)} (LIKE {q(ancienne)} "
+            f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE ({q(colonne)})"
+        )
+        cursor.execute(f"CREATE SEQUENCE {q(sequence)} OWNED BY {q(table)}.id")
+        cursor.execute(
+            f"ALTER TABLE {q(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)",
+            [sequence],
+        )
+
+        cursor.execute(f"SELECT min({q(colonne)}), count(*) FROM {q(ancienne)}")
+        premiere, total = cursor.fetchone()
+
+        fin = _mois(timezone.now())
+        for _ in range(mois_avance):
+            fin = _mois_suivant(fin)
+
+        for mois in _plage(min(premiere or timezone.now(), timezone.now()), fin):
+            _creer_partition(connexion, cursor, table, mois)
+
+        cursor.execute(
+            f"CREATE TABLE {q(table + '_defaut')} PARTITION OF {q(table)} DEFAULT"
+        )
+
+        # 3. Données, puis contraintes et index (chargement plus rapide)
+        cursor.execute(f"INSERT INTO {q(table)} SELECT * FROM {q(ancienne)}")
+        if cursor.rowcount != total:
+            raise PartitionError(f"{table} : {cursor.rowcount} lignes copiées sur {total}.")
+
+        cursor.execute(
+            "SELECT setval(%s::regclass, coalesce((SELECT max(id) FROM "
+            f"{q(ancienne)}), 0) + 1, false)",
+            [sequence],
+        )
+
+        for nom, type_, definition in contraintes:
+            if type_ == "p":
+                definition = f"PRIMARY KEY (id, {q(colonne)})"
+            cursor.execute(f"ALTER TABLE {q(table)} ADD CONSTRAINT {q(nom)} {definition}")
+
+        for _, definition in index:
+            # Définition capturée avant renommage : vise déjà la nouvelle table
+            cursor.execute(definition)
+
+        # Après la copie : clés par source déjà présentes, pas de doublon
+        for _, definition in triggers:
+            cursor.execute(definition)
+
+        if not conserver:
+            cursor.execute(f"DROP TABLE {q(ancienne)}")
+
+    return total
+
+
+def convertir(mois_avance=MOIS_AVANCE, conserver=False, connexion=None):
+    """{table: lignes copiées (None si déjà partitionnée)}."""
+    return {
+        modele._meta.db_table: convertir_table(
+            modele, champ, mois_avance, conserver, connexion
+        )
+        for modele, champ in LEDGERS
+    }
+
+
+# ============================================================
+# ANNÉE CLOSE
+# ============================================================
+
+def detacher_annee(annee, supprimer=False, connexion=None):
+    """
+    Détache les partitions de `annee` (antérieure à l'année en
+    cours) : instantané, sans DELETE. Les tables détachées restent
+    en base pour archivage, sauf `supprimer`.
+    Retourne les partitions détachées.
+    """
+    connexion = _connexion(connexion)
+
+    if annee >= timezone.now().year:
+        raise PartitionError(f"L'année {annee} n'est pas close.")
+
+    detachees = []
+
+    with transaction.atomic(using=connexion.alias), connexion.cursor() as cursor:
+        for modele, _ in LEDGERS:
+            table = modele._meta.db_table
+            if not est_partitionnee(cursor, table):
+                continue
+
+            for mois, nom in sorted(partitions(cursor, table).items()):
+                if mois.year != annee:
+                    continue
+
+                cursor.execute(
+                    f"ALTER TABLE {_q(connexion, table)} DETACH PARTITION {_q(connexion, nom)}"
+                )
+                if supprimer:
+                    cursor.execute(f"DROP TABLE {_q(connexion, nom)}")
+                detachees.append(nom)
+
+    return detachees
@@ -0,0 +1,69 @@
+# stations/services/prix.py
+
+from django.utils import timezone
+
+from core.db_router import atomic_tenant
+
+from stations.models_produit import PrixCarburant
+from stations.services.configuration import incrementer_version_config
+
+
+# ============================================================
+# CHANGEMENT DE PRIX MULTI-STATIONS
+# ============================================================
+
+@atomic_tenant
+def appliquer_prix_multi_stations(tenant, user, lignes, station_ids):
+    """
+    Applique de nouveaux prix à plusieurs stations en une transaction.
+
+    lignes = [{"produit": ProduitCarburant, "prix_unitaire": Decimal}, ...]
+
+    - 1 UPDATE : clôture des prix actifs concernés
+    - 1 bulk_create : nouveaux prix actifs
+    - 1 UPDATE : version de configuration des stations
+    """
+
+    # Doublons : deux prix actifs pour (station, produit) violeraient
+    # unique_prix_actif_par_produit_tenant
+    station_ids = list(dict.fromkeys(station_ids))
+    produit_ids = [ligne["produit"].id for ligne in lignes]
+    maintenant = timezone.now()
+
+    prix_clotures = PrixCarburant.objects.filter(
+        tenant=tenant,
+        station_id__in=station_ids,
+        produit_id__in=produit_ids,
+        actif=True,
+    ).update(
+        actif=False,
+        date_fin=maintenant,
+    )
+
+    nouveaux = PrixCarburant.objects.bulk_create(
+        [
+            PrixCarburant(
+                tenant=tenant,
+                station_id=station_id,
+                produit=ligne["produit"],
+                prix_unitaire=ligne["prix_unitaire"],
+                date_debut=maintenant,
+                actif=True,
+                created_by=user,
+            )
+            for station_id in station_ids
+            for ligne in lignes
+        ],
+        batch_size=1000,
+    )
+
+    # bulk_create / update n'émettent pas de signaux
+    incrementer_version_config(station_ids)
+
+    return {
+        "stations": len(station_ids),
+        "produits": len(produit_ids),
+        "prix_clotures": prix_clotures,
+        "prix_crees": len(nouveaux),
+        "date_debut": maintenant,
+    }
@@ -1,12 +1,57 @@
 # stations/services/stock.py
 
+from collections import Counter, defaultdict
 from decimal import Decimal
-from django.db import transaction
-from django.db.models import F, Sum
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
+from core import metrics
+from core.db_router import atomic_tenant
 from stations.models_depotage.cuve import Cuve, CuveStatus
 from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.services.stock_ledger import (
+    DECIMAL_STOCK,
+    ajouter_mouvements,
+    delta_signe,
+    mode_ledger,
+)
+from stations.services.verrous import verrouiller_cuves
+
+
+# ============================================================
+# MÉTRIQUES
+# ============================================================
+
+def compter_mouvements(mouvements):
+    """
+    Nombre et litres de mouvements par type (ENTREE / SORTIE),
+    comptés au commit : un transfert annulé n'est pas compté.
+    """
+    nombre = Counter()
+    litres = defaultdict(Decimal)
+
+    for mouvement in mouvements:
+        nombre[mouvement.type_mouvement] += 1
+        litres[mouvement.type_mouvement] += mouvement.quantite
+
+    for type_mouvement, total in nombre.items():
+        metrics.incrementer_au_commit(
+            "stock_mouvements_total", total, type=type_mouvement
+        )
+        metrics.incrementer_au_commit(
+            "stock_mouvements_litres_total",
+            float(litres[type_mouvement]),
+            type=type_mouvement,
+        )
+
+
+def compter_rejet(operation, motif):
+    # Compté tout de suite : le rejet annule justement la transaction
+    metrics.incrementer(
+        "stock_transferts_rejetes_total", operation=operation, motif=motif
+    )
 
 
 # ============================================================
@@ -16,24 +61,73 @@ from stations.models_depotage.mouvement_stock import MouvementStock
 def get_stock_global_produit(station, produit):
     """
     Stock global réel exploitable :
-    ACTIVE + STANDBY
+    ACTIVE + STANDBY, deltas non compactés inclus (mode LEDGER)
     """
 
-    total = (
+    cuves = Cuve.objects.filter(
+        station=station,
+        produit=produit,
+        statut__in=[
+            CuveStatus.ACTIVE,
+            CuveStatus.STANDBY,
+        ],
+    )
+
+    total = cuves.aggregate(total=Sum("stock_actuel")).get("total")
+
+    delta = (
+        MouvementStock.objects
+        .filter(cuve__in=cuves, integre=False)
+        .aggregate(delta=Sum(delta_signe()))
+        .get("delta")
+    )
+
+    return (total or Decimal("0.00")) + (delta or Decimal("0.00"))
+
+
+def annoter_stock_global(produits):
+    """
+    Ajoute stock_global à un queryset de produits : cuves ACTIVE +
+    STANDBY de toutes les stations, deltas non compactés inclus
+    (mode LEDGER). Sous-requêtes corrélées, sans jointure multipliante.
+    """
+    statuts = [CuveStatus.ACTIVE, CuveStatus.STANDBY]
+
+    stocks = (
         Cuve.objects
+        .filter(produit_id=OuterRef("pk"), statut__in=statuts)
+        .order_by()
+        .values("produit_id")
+        .annotate(total=Sum("stock_actuel"))
+        .values("total")
+    )
+    deltas = (
+        MouvementStock.objects
         .filter(
-            station=station,
-            produit=produit,
-            statut__in=[
-                CuveStatus.ACTIVE,
-                CuveStatus.STANDBY,
-            ],
+            cuve__produit_id=OuterRef("pk"),
+            cuve__statut__in=statuts,
+            integre=False,
         )
-        .aggregate(total=Sum("stock_actuel"))
-        .get("total")
+        .order_by()
+        .values("cuve__produit_id")
+        .annotate(delta=Sum(delta_signe()))
+        .values("delta")
     )
 
-    return total or Decimal("0.00")
+    return produits.annotate(
+        stock_global=(
+            Coalesce(
+                Subquery(stocks, output_field=DECIMAL_STOCK),
+                Value(Decimal("0.00")),
+                output_field=DECIMAL_STOCK,
+            )
+            + Coalesce(
+                Subquery(deltas, output_field=DECIMAL_STOCK),
+                Value(Decimal("0.00")),
+                output_field=DECIMAL_STOCK,
+            )
+        )
+    )
 
 
 # ============================================================
@@ -106,7 +200,7 @@ def is_stock_critique(station, produit, volume_a_deduire=Decimal("0.00")):
 # RELAIS → SORTIE STOCK
 # ============================================================
 
-@transaction.atomic
+@atomic_tenant
 def appliquer_stock_relais(relais):
     """
     Déduit le volume vendu de la cuve ACTIVE uniquement.
@@ -118,7 +212,23 @@ def appliquer_stock_relais(relais):
             "Le stock de ce relais a déjà été appliqué."
         )
 
-    lignes = relais.produits.select_for_update()
+    ledger = mode_ledger()
+    lignes = list(
+        relais.produits
+        .select_for_update(of=("self",))
+        .select_related("produit")
+        .order_by("produit_id")
+    )
+
+    # 🔐 Cuves de tous les produits du relais : une requête, ordre global
+    cuves_actives = {
+        cuve.produit_id: cuve
+        for cuve in verrouiller_cuves(
+            paires={(relais.station_id, ligne.produit_id) for ligne in lignes}
+        )
+        if cuve.statut == CuveStatus.ACTIVE
+    }
+    mouvements = []
 
     for ligne in lignes:
 
@@ -139,6 +249,7 @@ def appliquer_stock_relais(relais):
         )
 
         if stock_global < volume_total:
+            compter_rejet("relais", "stock_insuffisant")
             raise ValidationError(
                 f"Stock global insuffisant pour "
                 f"{ligne.produit.code}. "
@@ -155,6 +266,7 @@ def appliquer_stock_relais(relais):
             produit=ligne.produit,
             volume_a_deduire=volume_total,
         ):
+            compter_rejet("relais", "stock_critique")
             raise ValidationError(
                 f"Stock critique atteint pour "
                 f"{ligne.produit.code}. "
@@ -165,24 +277,17 @@ def appliquer_stock_relais(relais):
         # 3️⃣ DÉDUCTION UNIQUEMENT CUVE ACTIVE
         # ============================================
 
-        cuve_active = (
-            Cuve.objects
-            .select_for_update()
-            .filter(
-                station=relais.station,
-                produit=ligne.produit,
-                statut=CuveStatus.ACTIVE,
-            )
-            .first()
-        )
+        cuve_active = cuves_actives.get(ligne.produit_id)
 
         if not cuve_active:
+            compter_rejet("relais", "cuve_active_absente")
             raise ValidationError(
                 f"Aucune cuve ACTIVE pour "
                 f"{ligne.produit.code}."
             )
 
         if cuve_active.stock_actuel < volume_total:
+            compter_rejet("relais", "stock_cuve_insuffisant")
             raise ValidationError(
                 f"La cuve active ne contient pas "
                 f"assez de stock pour "
@@ -190,12 +295,9 @@ def appliquer_stock_relais(relais):
                 f"Stock cuve: {cuve_active.stock_actuel}"
             )
 
-        # Déduction atomique
-        cuve_active.stock_actuel = F("stock_actuel") - volume_total
-        cuve_active.save(update_fields=["stock_actuel", "updated_at"])
+        cuve_active.stock_actuel -= volume_total
 
-        # Mouvement stock
-        MouvementStock.objects.create(
+        mouvement = MouvementStock(
             tenant=relais.tenant,
             station=relais.station,
             cuve=cuve_active,
@@ -205,16 +307,37 @@ def appliquer_stock_relais(relais):
             source_id=relais.id,
             date_mouvement=relais.fin_relais,
         )
+        mouvements.append(mouvement)
 
+        if ledger:
+            # Append-only : la ligne Cuve n'est pas touchée
+            ajouter_mouvements([mouvement])
+            continue
+
+        # Déduction atomique
+        Cuve.objects.filter(pk=cuve_active.pk).update(
+            stock_actuel=F("stock_actuel") - volume_total,
+            updated_at=timezone.now(),
+        )
+
+        # Mouvement stock
+        mouvement.save()
+
+    compter_mouvements(mouvements)
+
+    # UPDATE direct : RelaisEquipe.save() refuse tout relais non brouillon
     relais.stock_applique = True
-    relais.save(update_fields=["stock_applique"])
+    type(relais).objects.filter(pk=relais.pk).update(
+        stock_applique=True,
+        updated_at=timezone.now(),
+    )
 
 
 # ============================================================
 # DEPOTAGE → ENTRÉE STOCK
 # ============================================================
 
-@transaction.atomic
+@atomic_tenant
 def appliquer_stock_depotage(depotage, user):
 
     if depotage.stock_applique:
@@ -229,14 +352,20 @@ def appliquer_stock_depotage(depotage, user):
             "avant application du stock."
         )
 
-    cuve = Cuve.objects.select_for_update().get(
-        id=depotage.cuve_id
-    )
+    ledger = mode_ledger()
+
+    cuves = verrouiller_cuves(cuve_ids=[depotage.cuve_id])
+
+    if not cuves:
+        raise ValidationError("Cuve introuvable.")
+
+    cuve = cuves[0]
 
     if cuve.statut not in (
         CuveStatus.STANDBY,
         CuveStatus.ACTIVE,
     ):
+        compter_rejet("depotage", "cuve_indisponible")
         raise ValidationError(
             "La cuve n'est pas disponible "
             "pour dépotage."
@@ -251,7 +380,7 @@ def appliquer_stock_depotage(depotage, user):
 
     volume = Decimal(volume)
 
-    MouvementStock.objects.create(
+    mouvement = MouvementStock(
         tenant=depotage.tenant,
         station=depotage.station,
         cuve=cuve,
@@ -262,8 +391,19 @@ def appliquer_stock_depotage(depotage, user):
         date_mouvement=depotage.date_depotage,
     )
 
-    cuve.stock_actuel = F("stock_actuel") + volume
-    cuve.save(update_fields=["stock_actuel", "updated_at"])
+    if ledger:
+        ajouter_mouvements([mouvement])
+    else:
+        mouvement.save()
+        Cuve.objects.filter(pk=cuve.pk).update(
+            stock_actuel=F("stock_actuel") + volume,
+            updated_at=timezone.now(),
+        )
+
+    cuve.stock_actuel += volume
+
+    compter_mouvements([mouvement])
+    metrics.incrementer_au_commit("depotage_transferts_total")
 
     depotage.stock_applique = True
     depotage.statut = "TRANSFERE"
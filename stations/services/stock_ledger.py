@@ -0,0 +1,236 @@
+# stations/services/stock_ledger.py
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import (
+    Case,
+    DecimalField,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.db_router import atomic_tenant, connexion_tenant
+from stations.models_depotage.cuve import Cuve
+from stations.models_depotage.mouvement_stock import MouvementStock
+
+logger = logging.getLogger(__name__)
+
+MODE_ROW = "ROW"
+MODE_LEDGER = "LEDGER"
+
+# Espace de clés des verrous consultatifs stock : (7301 << 32) + cuve_id
+VERROU_STOCK = 7301
+
+DECIMAL_STOCK = DecimalField(max_digits=14, decimal_places=2)
+
+
+def mode_ledger():
+    """
+    ROW    : chaque écriture verrouille la cuve et met à jour stock_actuel.
+    LEDGER : les écritures ajoutent seulement des MouvementStock
+             (integre=False), la compaction les reporte plus tard.
+    """
+    return getattr(settings, "STOCK_MODE", MODE_ROW) == MODE_LEDGER
+
+
+def delta_signe():
+    return Case(
+        When(
+            type_mouvement=MouvementStock.MOUVEMENT_ENTREE,
+            then=F("quantite"),
+        ),
+        default=-F("quantite"),
+        output_field=DECIMAL_STOCK,
+    )
+
+
+# ============================================================
+# VERROU CONSULTATIF PAR CUVE
+# ============================================================
+
+def verrouiller_cuves_ledger(cuve_ids):
+    """
+    Verrou consultatif transactionnel par cuve, pris en une requête
+    dans l'ordre fourni (ordre global : voir services/verrous.py).
+    Il ne protège que le couple contrôle + insertion :
+    la ligne Cuve n'est jamais verrouillée.
+    """
+    cuve_ids = list(dict.fromkeys(cuve_ids))
+
+    connexion = connexion_tenant()
+    if not cuve_ids or connexion.vendor != "postgresql":
+        return
+
+    with connexion.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock((%s::bigint << 32) + c) "
+            "FROM unnest(%s::bigint[]) AS c",
+            [VERROU_STOCK, cuve_ids],
+        )
+
+
+# ============================================================
+# LECTURE : CHECKPOINT + DELTAS
+# ============================================================
+
+def deltas_en_attente(cuve_ids):
+    """
+    {cuve_id: delta signé} des mouvements non encore compactés.
+    Index partiel idx_mvt_stock_en_attente : lecture bornée
+    par le retard de compaction, pas par l'historique.
+    """
+    cuve_ids = list(cuve_ids)
+
+    if not cuve_ids:
+        return {}
+
+    return {
+        ligne["cuve_id"]: ligne["delta"]
+        for ligne in (
+            MouvementStock.objects
+            .filter(cuve_id__in=cuve_ids, integre=False)
+            .order_by()
+            .values("cuve_id")
+            .annotate(delta=Sum(delta_signe()))
+        )
+    }
+
+
+def ajouter_deltas_en_attente(cuves):
+    """
+    Porte en mémoire les deltas en attente sur stock_actuel.
+    Les instances servent au contrôle uniquement : ne jamais les save().
+    """
+    deltas = deltas_en_attente(c.id for c in cuves)
+
+    for cuve in cuves:
+        cuve.stock_actuel += deltas.get(cuve.id, Decimal("0.00"))
+
+    return cuves
+
+
+def solde_cuve(cuve):
+    delta = deltas_en_attente([cuve.id]).get(cuve.id, Decimal("0.00"))
+    return cuve.stock_actuel + delta
+
+
+def annoter_stock_reel(queryset):
+    """
+    Ajoute stock_reel = checkpoint + deltas en attente
+    (sous-requête corrélée sur l'index partiel).
+    """
+    deltas = (
+        MouvementStock.objects
+        .filter(cuve_id=OuterRef("pk"), integre=False)
+        .order_by()
+        .values("cuve_id")
+        .annotate(delta=Sum(delta_signe()))
+        .values("delta")
+    )
+
+    return queryset.annotate(
+        stock_reel=F("stock_actuel") + Coalesce(
+            Subquery(deltas, output_field=DECIMAL_STOCK),
+            Value(Decimal("0.00")),
+            output_field=DECIMAL_STOCK,
+        )
+    )
+
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+
+def ajouter_mouvements(mouvements):
+    """
+    Mode LEDGER : insertion seule, aucune mise à jour de Cuve.
+    L'appelant doit tenir verrouiller_cuves_ledger() sur les cuves.
+    """
+    for mouvement in mouvements:
+        mouvement.integre = False
+
+    return MouvementStock.objects.bulk_create(mouvements, batch_size=500)
+
+
+# ============================================================
+# COMPACTION
+# ============================================================
+
+def compacter_cuve(cuve_id, batch_size=5000):
+    """
+    Reporte les deltas en attente d'une cuve dans stock_actuel.
+
+    Seuls les mouvements lus sont marqués intégrés : un mouvement
+    validé entre la lecture et l'UPDATE reste en attente pour
+    le passage suivant, jamais compté deux fois ni perdu.
+    """
+    with atomic_tenant():
+        verrouiller_cuves_ledger([cuve_id])
+
+        lignes = list(
+            MouvementStock.objects
+            .filter(cuve_id=cuve_id, integre=False)
+            .order_by("id")
+            .annotate(delta=delta_signe())
+            .values_list("id", "delta")[:batch_size]
+        )
+
+        if not lignes:
+            return 0
+
+        ids = [mouvement_id for mouvement_id, _ in lignes]
+        total = sum((delta for _, delta in lignes), Decimal("0.00"))
+
+        MouvementStock.objects.filter(id__in=ids).update(integre=True)
+        Cuve.objects.filter(id=cuve_id).update(
+            stock_actuel=F("stock_actuel") + total,
+            updated_at=timezone.now(),
+        )
+
+    return len(lignes)
+
+
+def compacter(cuve_ids=None, batch_size=5000):
+    """
+    Compacte toutes les cuves ayant des deltas en attente.
+    Une transaction courte par cuve.
+    Retourne {cuve_id: nb mouvements intégrés}.
+    """
+    en_attente = MouvementStock.objects.filter(integre=False)
+
+    if cuve_ids is not None:
+        en_attente = en_attente.filter(cuve_id__in=cuve_ids)
+
+    rapport = defaultdict(int)
+
+    cuves_a_compacter = list(
+        en_attente
+        .order_by("cuve_id")
+        .values_list("cuve_id", flat=True)
+        .distinct()
+    )
+
+    for cuve_id in cuves_a_compacter:
+        while True:
+            nb = compacter_cuve(cuve_id, batch_size=batch_size)
+            rapport[cuve_id] += nb
+            if nb < batch_size:
+                break
+
+    if rapport:
+        logger.info(
+            "Compaction stock : %s mouvements sur %s cuves.",
+            sum(rapport.values()),
+            len(rapport),
+        )
+
+    return dict(rapport)
@@ -0,0 +1,168 @@
+# stations/services/verrous.py
+"""
+Protocole de verrouillage des écritures de stock.
+
+1. Les lignes métier (relais, dépotage) sont verrouillées d'abord,
+   les cuves toujours en dernier.
+2. Toutes les cuves utiles sont verrouillées en UNE requête,
+   dans l'ordre global (station, produit, id).
+3. Sérialisation (40001) et interblocage (40P01) : la transaction
+   complète est rejouée, backoff exponentiel borné + jitter.
+"""
+
+import logging
+import random
+import time
+from functools import wraps
+
+from django.db import OperationalError
+from django.db.models import Q
+
+from core import metrics
+from core.db_router import atomic_tenant, connexion_tenant
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.services.stock_ledger import (
+    ajouter_deltas_en_attente,
+    mode_ledger,
+    verrouiller_cuves_ledger,
+)
+
+logger = logging.getLogger(__name__)
+
+STATUTS_STOCK = (CuveStatus.ACTIVE, CuveStatus.STANDBY)
+
+SQLSTATES_REJOUABLES = {
+    "40001",  # serialization_failure
+    "40P01",  # deadlock_detected
+}
+
+TENTATIVES_MAX = 5
+BACKOFF_BASE = 0.05
+BACKOFF_PLAFOND = 1.0
+
+# Attente au-delà de laquelle on trace l'acquisition
+ATTENTE_ALERTE = 0.5
+
+
+# ============================================================
+# VERROUILLAGE ORDONNÉ DES CUVES
+# ============================================================
+
+def verrouiller_cuves(cuve_ids=None, paires=None, statuts=STATUTS_STOCK):
+    """
+    Verrouille les cuves désignées par id et / ou par couple
+    (station_id, produit_id) — filtrées sur `statuts` (None = toutes).
+
+    Retourne les cuves dans l'ordre de verrouillage, stock lu
+    = checkpoint + deltas non compactés (ne pas save() ces instances).
+    À appeler dans une transaction.
+    """
+    filtre = Q()
+
+    if cuve_ids:
+        filtre |= Q(id__in=set(cuve_ids))
+
+    for station_id, produit_id in set(paires or ()):
+        critere = Q(station_id=station_id, produit_id=produit_id)
+        if statuts:
+            critere &= Q(statut__in=statuts)
+        filtre |= critere
+
+    if not filtre:
+        return []
+
+    cuves = (
+        Cuve.objects
+        .filter(filtre)
+        .order_by("station_id", "produit_id", "id")
+    )
+
+    ledger = mode_ledger()
+    debut = time.monotonic()
+
+    if ledger:
+        # Verrous consultatifs : les lignes Cuve restent libres
+        verrouiller_cuves_ledger(cuves.values_list("id", flat=True))
+        cuves = list(cuves)
+    else:
+        cuves = list(cuves.select_for_update())
+
+    _mesurer_attente(time.monotonic() - debut, len(cuves), ledger)
+
+    return ajouter_deltas_en_attente(cuves)
+
+
+def _mesurer_attente(attente, nb_cuves, ledger):
+    mode = "ledger" if ledger else "row"
+
+    metrics.incrementer("stock_lock_acquisitions_total", mode=mode)
+    metrics.incrementer("stock_lock_wait_seconds_total", attente, mode=mode)
+    metrics.incrementer("stock_lock_cuves_total", nb_cuves, mode=mode)
+
+    if attente >= ATTENTE_ALERTE:
+        metrics.incrementer("stock_lock_slow_total", mode=mode)
+        logger.warning(
+            "Verrou stock : %.3fs d'attente pour %s cuves (%s).",
+            attente,
+            nb_cuves,
+            mode,
+        )
+
+
+# ============================================================
+# REJEU DES CONFLITS
+# ============================================================
+
+def _sqlstate(exc):
+    cause = exc.__cause__
+    return getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+
+
+def executer_avec_reprise(fonction, *args, tentatives=TENTATIVES_MAX, **kwargs):
+    """
+    Exécute `fonction` dans sa propre transaction et la rejoue
+    sur 40001 / 40P01.
+
+    `fonction` doit relire ses données (pas d'état en mémoire
+    conservé d'une tentative à l'autre).
+    Dans une transaction englobante, aucun rejeu n'est possible :
+    l'erreur est propagée à l'appelant.
+    """
+    if connexion_tenant().in_atomic_block:
+        return fonction(*args, **kwargs)
+
+    for tentative in range(1, tentatives + 1):
+        try:
+            with atomic_tenant():
+                return fonction(*args, **kwargs)
+
+        except OperationalError as exc:
+            sqlstate = _sqlstate(exc)
+
+            if sqlstate not in SQLSTATES_REJOUABLES or tentative == tentatives:
+                raise
+
+            pause = random.uniform(
+                0, min(BACKOFF_PLAFOND, BACKOFF_BASE * 2 ** (tentative - 1))
+            )
+
+            metrics.incrementer("stock_lock_retries_total", sqlstate=sqlstate)
+            logger.warning(
+                "Conflit %s (tentative %s/%s), rejeu dans %.3fs.",
+                sqlstate,
+                tentative,
+                tentatives,
+                pause,
+            )
+            time.sleep(pause)
+
+
+def avec_reprise(fonction):
+    """
+    Décorateur : @avec_reprise équivaut à executer_avec_reprise(fonction, ...).
+    """
+    @wraps(fonction)
+    def wrapper(*args, **kwargs):
+        return executer_avec_reprise(fonction, *args, **kwargs)
+
+    return wrapper
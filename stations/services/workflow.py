@@ -0,0 +1,511 @@
+# stations/services/workflow.py
+
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from core import metrics
+from core.db_router import atomic_tenant
+from finances_station.models import EvenementFinance
+from finances_station.services.outbox import publier_evenements
+from stations.constants import DepotageStatus
+from stations.models import (
+    FaitStatus,
+    RELAIS_TRANSITIONS,
+    RelaisAudit,
+    RelaisEquipe,
+    RelaisProduit,
+)
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.depotage import Depotage
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import PrixCarburant
+from stations.services.stock import compter_mouvements, compter_rejet
+from stations.services.stock_ledger import ajouter_mouvements, mode_ledger
+from stations.services.verrous import verrouiller_cuves
+
+
+DEPOTAGE_TRANSITIONS = {
+    DepotageStatus.BROUILLON: [DepotageStatus.SOUMIS],
+    DepotageStatus.SOUMIS: [DepotageStatus.CONFIRME],
+    DepotageStatus.CONFIRME: [DepotageStatus.TRANSFERE],
+    DepotageStatus.TRANSFERE: [],
+}
+
+
+def _succes(objet_id, statut):
+    return {"id": objet_id, "ok": True, "status": statut}
+
+
+def _echec(objet_id, detail):
+    return {"id": objet_id, "ok": False, "detail": detail}
+
+
+def _rapport(ids, resultats):
+    """
+    Résultats dans l'ordre des ids demandés.
+    """
+    lignes = [resultats[i] for i in ids]
+
+    return {
+        "resultats": lignes,
+        "succes": sum(1 for r in lignes if r["ok"]),
+        "echecs": sum(1 for r in lignes if not r["ok"]),
+    }
+
+
+# ============================================================
+# RELAIS D'ÉQUIPE
+# ============================================================
+
+@atomic_tenant
+def transitionner_relais_en_masse(queryset, ids, nouveau_statut, user):
+    """
+    Applique la machine à états RelaisEquipe à plusieurs relais.
+
+    - Changements de statut purs : un seul UPDATE
+    - VALIDE : prix figés via un bulk_update des lignes produit
+    - TRANSFERE : stock groupé par cuve + événements finance (outbox)
+    - Audit : bulk_create
+    """
+
+    ids = list(dict.fromkeys(ids))
+    maintenant = timezone.now()
+
+    relais_list = list(
+        queryset
+        .filter(id__in=ids)
+        .select_for_update(of=("self",))
+        .order_by("id")
+    )
+    relais_map = {r.id: r for r in relais_list}
+
+    resultats = {
+        i: _echec(i, "Relais introuvable.")
+        for i in ids
+        if i not in relais_map
+    }
+
+    candidats = []
+    for relais in relais_list:
+        if nouveau_statut not in RELAIS_TRANSITIONS[relais.status]:
+            resultats[relais.id] = _echec(relais.id, "Transition invalide.")
+        else:
+            candidats.append(relais)
+
+    if nouveau_statut == FaitStatus.SOUMIS:
+        eligibles = candidats
+        champs = {"soumis_par": user, "soumis_le": maintenant}
+
+    elif nouveau_statut == FaitStatus.VALIDE:
+        eligibles = _valider_relais(candidats, resultats)
+        champs = {"valide_par": user, "valide_le": maintenant}
+
+    elif nouveau_statut == FaitStatus.TRANSFERE:
+        eligibles = _transferer_relais(candidats, resultats)
+        champs = {"stock_applique": True}
+
+    else:
+        eligibles = []
+        champs = {}
+
+    if eligibles:
+        ancien_statut = {r.id: r.status for r in eligibles}
+
+        RelaisEquipe.objects.filter(
+            id__in=[r.id for r in eligibles]
+        ).update(
+            status=nouveau_statut,
+            updated_at=maintenant,
+            **champs,
+        )
+
+        RelaisAudit.objects.bulk_create([
+            RelaisAudit(
+                relais_id=r.id,
+                tenant_id=r.tenant_id,
+                ancien_statut=ancien_statut[r.id],
+                nouveau_statut=nouveau_statut,
+                action="CHANGEMENT_STATUT",
+                effectue_par=user,
+            )
+            for r in eligibles
+        ])
+
+        for r in eligibles:
+            resultats[r.id] = _succes(r.id, nouveau_statut)
+
+        for de, total in Counter(ancien_statut.values()).items():
+            metrics.incrementer_au_commit(
+                "relais_transitions_total", total, de=de, vers=nouveau_statut
+            )
+
+    return _rapport(ids, resultats)
+
+
+def _lignes_par_relais(relais_list):
+    lignes = defaultdict(list)
+
+    for ligne in (
+        RelaisProduit.objects
+        .filter(relais_id__in=[r.id for r in relais_list])
+        .select_related("produit")
+        .order_by("relais_id", "produit_id")
+    ):
+        lignes[ligne.relais_id].append(ligne)
+
+    return lignes
+
+
+def _valider_relais(candidats, resultats):
+    """
+    Fige prix unitaire & montant théorique.
+    Une requête pour les lignes, une pour les prix actifs.
+    """
+    if not candidats:
+        return []
+
+    lignes = _lignes_par_relais(candidats)
+
+    prix_map = {
+        (p.station_id, p.produit_id): p.prix_unitaire
+        for p in PrixCarburant.objects.filter(
+            station_id__in={r.station_id for r in candidats},
+            actif=True,
+        )
+    }
+
+    eligibles = []
+    a_mettre_a_jour = []
+
+    for relais in candidats:
+        lignes_relais = lignes.get(relais.id, [])
+
+        if not lignes_relais:
+            resultats[relais.id] = _echec(
+                relais.id, "Aucun produit dans le relais."
+            )
+            continue
+
+        manquant = next(
+            (
+                ligne for ligne in lignes_relais
+                if (relais.station_id, ligne.produit_id) not in prix_map
+            ),
+            None,
+        )
+
+        if manquant:
+            resultats[relais.id] = _echec(
+                relais.id,
+                f"Aucun prix actif défini pour {manquant.produit.code}",
+            )
+            continue
+
+        for ligne in lignes_relais:
+            prix = prix_map[(relais.station_id, ligne.produit_id)]
+            ligne.prix_unitaire = prix
+            ligne.montant_theorique = ligne.volume_vendu * prix
+            a_mettre_a_jour.append(ligne)
+
+        eligibles.append(relais)
+
+    RelaisProduit.objects.bulk_update(
+        a_mettre_a_jour,
+        ["prix_unitaire", "montant_theorique"],
+        batch_size=500,
+    )
+
+    return eligibles
+
+
+def _transferer_relais(candidats, resultats):
+    """
+    Sorties de stock groupées par cuve ACTIVE.
+
+    Les relais sont traités dans l'ordre chronologique (fin_relais)
+    sur des compteurs en mémoire : un relais qui ferait passer
+    le stock sous le seuil critique est refusé seul, les autres passent.
+    """
+    for relais in candidats:
+        if relais.stock_applique:
+            resultats[relais.id] = _echec(relais.id, "Stock déjà appliqué.")
+
+    candidats = [r for r in candidats if not r.stock_applique]
+
+    if not candidats:
+        return []
+
+    candidats.sort(key=lambda r: (r.fin_relais, r.id))
+    lignes = _lignes_par_relais(candidats)
+
+    paires = {
+        (relais.station_id, ligne.produit_id)
+        for relais in candidats
+        for ligne in lignes.get(relais.id, [])
+    }
+
+    cuves = verrouiller_cuves(paires=paires)
+
+    stock_global = defaultdict(Decimal)
+    capacite = defaultdict(Decimal)
+    cuve_active = {}
+
+    for cuve in cuves:
+        cle = (cuve.station_id, cuve.produit_id)
+        stock_global[cle] += cuve.stock_actuel
+        capacite[cle] += cuve.capacite_max
+        if cuve.statut == CuveStatus.ACTIVE:
+            cuve_active[cle] = cuve
+
+    stock_cuve = {cuve.id: cuve.stock_actuel for cuve in cuves}
+    sorties_par_cuve = defaultdict(Decimal)
+    mouvements = []
+    evenements = []
+    eligibles = []
+
+    for relais in candidats:
+        sorties = []
+        erreur = None
+        motif = None
+
+        for ligne in lignes.get(relais.id, []):
+            volume = Decimal(ligne.volume_vendu or 0)
+
+            if volume <= 0:
+                continue
+
+            cle = (relais.station_id, ligne.produit_id)
+            code = ligne.produit.code
+            disponible = stock_global[cle]
+            seuil = (
+                Decimal(ligne.produit.seuil_critique_percent) / Decimal("100")
+            ) * capacite[cle]
+            cuve = cuve_active.get(cle)
+
+            if disponible < volume:
+                motif = "stock_insuffisant"
+                erreur = (
+                    f"Stock global insuffisant pour {code}. "
+                    f"Disponible: {disponible} | Demandé: {volume}"
+                )
+            elif disponible <= 0 or disponible - volume <= seuil:
+                motif = "stock_critique"
+                erreur = f"Stock critique atteint pour {code}. Relais bloqué."
+            elif cuve is None:
+                motif = "cuve_active_absente"
+                erreur = f"Aucune cuve ACTIVE pour {code}."
+            elif stock_cuve[cuve.id] < volume:
+                motif = "stock_cuve_insuffisant"
+                erreur = (
+                    f"La cuve active ne contient pas assez de stock pour "
+                    f"{code}. Stock cuve: {stock_cuve[cuve.id]}"
+                )
+
+            if erreur:
+                break
+
+            sorties.append((cle, cuve, volume))
+
+        if erreur:
+            compter_rejet("relais", motif)
+            resultats[relais.id] = _echec(relais.id, erreur)
+            continue
+
+        for cle, cuve, volume in sorties:
+            stock_global[cle] -= volume
+            stock_cuve[cuve.id] -= volume
+            sorties_par_cuve[cuve.id] += volume
+
+            mouvements.append(MouvementStock(
+                tenant_id=relais.tenant_id,
+                station_id=relais.station_id,
+                cuve_id=cuve.id,
+                type_mouvement=MouvementStock.MOUVEMENT_SORTIE,
+                quantite=volume,
+                source_type="RELAIS",
+                source_id=relais.id,
+                date_mouvement=relais.fin_relais,
+            ))
+
+        evenements.append(EvenementFinance(
+            tenant_id=relais.tenant_id,
+            station_id=relais.station_id,
+            type="RECETTE",
+            montant=relais.total_encaisse,
+            date=relais.fin_relais,
+            source_type="RelaisEquipe",
+            source_id=relais.id,
+            finance_status="PROVISOIRE",
+        ))
+
+        eligibles.append(relais)
+
+    if mode_ledger():
+        ajouter_mouvements(mouvements)
+    else:
+        maintenant = timezone.now()
+
+        # 1 UPDATE par cuve, quel que soit le nombre de relais
+        for cuve_id, volume in sorties_par_cuve.items():
+            Cuve.objects.filter(id=cuve_id).update(
+                stock_actuel=F("stock_actuel") - volume,
+                updated_at=maintenant,
+            )
+
+        MouvementStock.objects.bulk_create(mouvements, batch_size=500)
+
+    publier_evenements(evenements)
+    compter_mouvements(mouvements)
+
+    return eligibles
+
+
+# ============================================================
+# DÉPOTAGE
+# ============================================================
+
+@atomic_tenant
+def transitionner_depotages_en_masse(queryset, ids, nouveau_statut, user):
+    """
+    Machine à états Depotage appliquée à plusieurs dépotages.
+    TRANSFERE : entrées de stock groupées par cuve.
+    """
+
+    ids = list(dict.fromkeys(ids))
+    maintenant = timezone.now()
+
+    depotages = list(
+        queryset
+        .filter(id__in=ids)
+        .select_for_update(of=("self",))
+        .order_by("id")
+    )
+    depotage_ids = {d.id for d in depotages}
+
+    resultats = {
+        i: _echec(i, "Dépotage introuvable.")
+        for i in ids
+        if i not in depotage_ids
+    }
+
+    candidats = []
+    for depotage in depotages:
+        if nouveau_statut not in DEPOTAGE_TRANSITIONS[depotage.statut]:
+            resultats[depotage.id] = _echec(depotage.id, "Transition invalide.")
+        else:
+            candidats.append(depotage)
+
+    champs = {}
+
+    if nouveau_statut == DepotageStatus.CONFIRME:
+        champs = {"validated_by": user, "validated_at": maintenant}
+
+    if nouveau_statut == DepotageStatus.TRANSFERE:
+        eligibles = _transferer_depotages(candidats, resultats)
+        champs = {"stock_applique": True}
+    else:
+        eligibles = candidats
+
+    if eligibles:
+        Depotage.objects.filter(
+            id__in=[d.id for d in eligibles]
+        ).update(
+            statut=nouveau_statut,
+            updated_at=maintenant,
+            **champs,
+        )
+
+        for d in eligibles:
+            resultats[d.id] = _succes(d.id, nouveau_statut)
+
+    return _rapport(ids, resultats)
+
+
+def _transferer_depotages(candidats, resultats):
+    eligibles = []
+
+    for depotage in candidats:
+        if depotage.stock_applique:
+            resultats[depotage.id] = _echec(depotage.id, "Stock déjà appliqué.")
+        elif depotage.quantite_acceptee is None or depotage.quantite_acceptee <= 0:
+            resultats[depotage.id] = _echec(depotage.id, "Quantité acceptée invalide.")
+        else:
+            eligibles.append(depotage)
+
+    if not eligibles:
+        return []
+
+    ledger = mode_ledger()
+    cuves = {
+        cuve.id: cuve
+        for cuve in verrouiller_cuves(cuve_ids=[d.cuve_id for d in eligibles])
+    }
+
+    entrees_par_cuve = defaultdict(Decimal)
+    mouvements = []
+    evenements = []
+    transferes = []
+    maintenant = timezone.now()
+
+    for depotage in eligibles:
+        cuve = cuves.get(depotage.cuve_id)
+
+        if cuve is None or cuve.statut not in (
+            CuveStatus.STANDBY,
+            CuveStatus.ACTIVE,
+        ):
+            compter_rejet("depotage", "cuve_indisponible")
+            resultats[depotage.id] = _echec(
+                depotage.id,
+                "La cuve n'est pas disponible pour dépotage.",
+            )
+            continue
+
+        volume = Decimal(depotage.quantite_acceptee)
+        entrees_par_cuve[cuve.id] += volume
+
+        mouvements.append(MouvementStock(
+            tenant_id=depotage.tenant_id,
+            station_id=cuve.station_id,
+            cuve_id=cuve.id,
+            type_mouvement=MouvementStock.MOUVEMENT_ENTREE,
+            quantite=volume,
+            source_type="DEPOTAGE",
+            source_id=depotage.id,
+            date_mouvement=maintenant,
+        ))
+
+        evenements.append(EvenementFinance(
+            tenant_id=depotage.tenant_id,
+            station_id=cuve.station_id,
+            type="DEPENSE",
+            montant=depotage.montant_total,
+            date=maintenant,
+            source_type="DEPOTAGE",
+            source_id=depotage.id,
+            finance_status="CONFIRMEE",
+        ))
+
+        transferes.append(depotage)
+
+    if ledger:
+        ajouter_mouvements(mouvements)
+    else:
+        for cuve_id, volume in entrees_par_cuve.items():
+            Cuve.objects.filter(id=cuve_id).update(
+                stock_actuel=F("stock_actuel") + volume,
+                updated_at=maintenant,
+            )
+
+        MouvementStock.objects.bulk_create(mouvements, batch_size=500)
+
+    publier_evenements(evenements)
+    compter_mouvements(mouvements)
+
+    if transferes:
+        metrics.incrementer_au_commit("depotage_transferts_total", len(transferes))
+
+    return transferes
@@ -0,0 +1,61 @@
+# stations/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from stations.models import IndexPompe, Pompe, Station
+from stations.models_depotage.cuve import Cuve
+from stations.models_produit import PrixCarburant, ProduitCarburant
+from stations.services.configuration import (
+    incrementer_version_config,
+    incrementer_version_config_tenant,
+)
+
+
+# Champs de Cuve qui bougent à chaque opération (hors paramétrage)
+CUVE_CHAMPS_OPERATIONNELS = {"stock_actuel", "updated_at"}
+
+
+# ============================================================
+# VERSION CONFIGURATION STATION
+# ============================================================
+
+@receiver([post_save, post_delete], sender=Pompe)
+def pompe_modifiee(sender, instance, **kwargs):
+    incrementer_version_config([instance.station_id])
+
+
+@receiver([post_save, post_delete], sender=IndexPompe)
+def index_pompe_modifie(sender, instance, **kwargs):
+    incrementer_version_config(
+        Pompe.objects.filter(id=instance.pompe_id).values_list(
+            "station_id", flat=True
+        )
+    )
+
+
+@receiver([post_save, post_delete], sender=PrixCarburant)
+def prix_modifie(sender, instance, **kwargs):
+    incrementer_version_config([instance.station_id])
+
+
+@receiver([post_save, post_delete], sender=ProduitCarburant)
+def produit_modifie(sender, instance, **kwargs):
+    incrementer_version_config_tenant(instance.tenant_id)
+
+
+@receiver([post_save, post_delete], sender=Cuve)
+def cuve_modifiee(sender, instance, update_fields=None, **kwargs):
+    # 🔕 Mouvement de stock seul : pas un changement de paramétrage
+    if update_fields and set(update_fields) <= CUVE_CHAMPS_OPERATIONNELS:
+        return
+
+    incrementer_version_config([instance.station_id])
+
+
+@receiver(post_save, sender=Station)
+def station_modifiee(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+
+    incrementer_version_config([instance.id])
@@ -0,0 +1,141 @@
+# stations/taches.py
+"""
+Tâches de fond des stations (taches/registre.py).
+Sans tenant : toutes les bases ; avec tenant : sa base seulement.
+Les tâches périodiques sont déclarées en fin de module.
+"""
+
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.db_router import bases_tenants, utiliser_base
+from stations.models import BilanMensuel, Station
+from stations.services import analytique, bilans
+from stations.services.archives import archiver_base, limite_retention
+from stations.services.cloture import cloturer_journee
+from stations.services.partitions import creer_partitions as creer_partitions_base
+from stations.services.stock_ledger import compacter
+from taches.registre import RATTRAPAGE_TOUTES, periodique, tache
+
+
+def _bases(tache_en_cours):
+    """Bases à traiter : celle du contexte courant si la tâche a un tenant."""
+    if tache_en_cours.tenant_id:
+        return [None]
+    return bases_tenants()
+
+
+def _dans(alias):
+    pile = ExitStack()
+    if alias is not None:
+        pile.enter_context(utiliser_base(alias))
+    return pile
+
+
+@tache("stations.cloturer_journees", max_tentatives=5)
+def cloturer_journees(tache_en_cours, debut, fin=None, station_id=None):
+    debut = parse_date(debut)
+    fin = parse_date(fin) if fin else debut
+    jours = [debut + timedelta(days=n) for n in range((fin - debut).days + 1)]
+
+    total = 0
+    for alias in _bases(tache_en_cours):
+        with _dans(alias):
+            stations = Station.objects.filter(active=True)
+            if tache_en_cours.tenant_id:
+                stations = stations.filter(tenant_id=tache_en_cours.tenant_id)
+            if station_id:
+                stations = stations.filter(pk=station_id)
+
+            for n, jour in enumerate(jours, start=1):
+                total += cloturer_journee(jour, stations)
+                tache_en_cours.progresser(100 * n // len(jours), f"{jour} clôturé")
+
+    return {"clotures": total}
+
+
+@tache("stations.archiver_periodes", max_tentatives=2, priorite=200)
+def archiver_periodes(tache_en_cours, retention=None):
+    limite = limite_retention(retention)
+    bases = bases_tenants()
+    lignes = 0
+    for n, alias in enumerate(bases, start=1):
+        for ligne in archiver_base(alias, limite):
+            lignes += ligne["archivees"]
+        tache_en_cours.progresser(100 * n // len(bases), f"{alias} archivée")
+    return {"limite": limite, "archivees": lignes}
+
+
+@tache("stations.compacter_stock")
+def compacter_stock(tache_en_cours):
+    mouvements = 0
+    for alias in bases_tenants():
+        with utiliser_base(alias):
+            mouvements += sum(compacter().values())
+    return {"mouvements": mouvements}
+
+
+@tache("stations.creer_partitions")
+def creer_partitions(tache_en_cours):
+    creees = []
+    for alias in bases_tenants():
+        connexion = connections[alias]
+        if connexion.vendor == "postgresql":
+            creees += creer_partitions_base(connexion=connexion)
+    return {"creees": creees}
+
+
+@tache("stations.bilan_mensuel", priorite=150)
+def bilan_mensuel(tache_en_cours, bilan_id):
+    bilan = BilanMensuel.objects.get(pk=bilan_id)
+    return {"stations": bilans.lancer(bilan)}
+
+
+@tache("stations.bilan_station", priorite=150)
+def bilan_station(tache_en_cours, bilan_id, station_id):
+    try:
+        bilan = BilanMensuel.objects.get(pk=bilan_id)
+        calcules = bilans.generer_station(bilan, Station.objects.get(pk=station_id))
+
+        complet = bilans.terminer_station(bilan_id, station_id)
+        if complet is not None:
+            bilans.assembler(complet)
+
+    except Exception as exc:
+        # Dernière tentative : le bilan ne sera jamais complet
+        if tache_en_cours.tentatives >= tache_en_cours.max_tentatives:
+            bilans.echouer(bilan_id, f"Station {station_id} : {exc}")
+        raise
+
+    return {"jours_calcules": calcules, "assemble": complet is not None}
+
+
+@tache("stations.exporter_analytique", max_tentatives=2, priorite=200)
+def exporter_analytique(tache_en_cours, depuis=None):
+    return {"lignes": analytique.exporter(parse_date(depuis) if depuis else None)}
+
+
+# ============================================================
+# TÂCHES PÉRIODIQUES
+# ============================================================
+# Prix et autonomie n'ont pas de tâche : les prix s'appliquent
+# selon leur date à la lecture, l'autonomie est calculée à la
+# demande.
+
+def _veille(echeance):
+    return {"debut": (timezone.localdate(echeance) - timedelta(days=1)).isoformat()}
+
+
+periodique(
+    "cloture-nocturne", "30 0 * * *", "stations.cloturer_journees",
+    arguments=_veille,
+    rattrapage=RATTRAPAGE_TOUTES,
+)
+periodique("compaction-stock", "*/10 * * * *", "stations.compacter_stock")
+periodique("partitions-a-venir", "0 4 * * *", "stations.creer_partitions")
+periodique("archivage-mensuel", "0 3 2 * *", "stations.archiver_periodes")
+periodique("analytique-nocturne", "0 2 * * *", "stations.exporter_analytique")
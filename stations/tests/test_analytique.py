@@ -0,0 +1,103 @@
+import importlib.util
+import tempfile
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from finances_station.models import TransactionStation
+from stations.models import Station
+from stations.services.analytique import AnalytiqueError, compiler, exporter, requeter
+from tenants.models import Tenant
+
+URL = "/api/v1/station/analytique/"
+
+DEPENDANCES = all(
+    importlib.util.find_spec(module) for module in ("pyarrow", "duckdb")
+)
+
+
+class AnalytiqueTestCase(TestCase):
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        reglages = override_settings(ANALYTIQUE_DIR=dossier.name)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.autre = Tenant.objects.create(nom="Tenant B", type_structure="SA")
+        self.admin = Utilisateur.objects.create_user(
+            username="admin",
+            password="test1234",
+            tenant=self.tenant,
+            role=UserRole.ADMIN_TENANT_STATION,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        for source_id, (tenant, departement, montant) in enumerate((
+            (self.tenant, "Mbour", "1000"),
+            (self.tenant, "Pikine", "2500"),
+            (self.autre, "Mbour", "700"),
+        ), start=1):
+            station = Station.objects.create(
+                tenant=tenant,
+                nom=f"Station {departement}",
+                adresse="Adresse",
+                departement=departement,
+            )
+            TransactionStation.objects.create(
+                tenant=tenant,
+                station=station,
+                type="RECETTE",
+                source_type="RelaisEquipe",
+                source_id=source_id,
+                montant=Decimal(montant),
+                date=timezone.now(),
+            )
+
+    def test_requete_hors_liste_blanche(self):
+        with self.assertRaises(AnalytiqueError):
+            compiler(self.tenant.id, "transactions", ["montant; DROP TABLE x"])
+        with self.assertRaises(AnalytiqueError):
+            compiler(self.tenant.id, "transactions", ["montant"], ["montant"])
+
+        response = self.client.post(
+            URL,
+            {"fait": "transactions", "mesures": ["montant"], "filtres": {"inconnu": "1"}},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_requete_parametree(self):
+        sql, parametres = compiler(
+            self.tenant.id, "transactions", ["recettes"], ["region"],
+            {"station_id": "3"}, "2026-01",
+        )
+
+        self.assertIn(f"tenant_id={self.tenant.id}", sql)
+        self.assertIn('GROUP BY "region"', sql)
+        self.assertEqual(parametres, ["2026-01", 3])
+
+    def test_catalogue(self):
+        response = self.client.get(URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("region", response.data["faits"]["relais"]["dimensions"])
+
+    @skipUnless(DEPENDANCES, "pyarrow / duckdb non installés")
+    def test_export_puis_requete(self):
+        comptes = exporter()
+        self.assertEqual(comptes["transactions"], 3)
+
+        resultat = requeter(self.tenant.id, "transactions", ["recettes"], ["region"])
+
+        # Région déduite du département (stations.constants), tenant isolé
+        self.assertEqual(resultat["colonnes"], ["region", "recettes"])
+        self.assertEqual(resultat["lignes"], [["Dakar", 2500.0], ["Thiès", 1000.0]])
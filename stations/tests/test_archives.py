@@ -0,0 +1,171 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from finances_station.models import TransactionStation
+from stations.models import FaitStatus, RelaisAudit, RelaisEquipe, RelaisProduit, Station
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import ProduitCarburant
+from stations.services.archives import (
+    ArchiveError,
+    _dossier,
+    archiver_base,
+    limite_retention,
+    lire,
+    manifeste,
+)
+from tenants.models import Tenant
+
+
+class ArchivesPeriodesTestCase(TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dossier)
+        reglages = override_settings(ARCHIVE_DIR=self.dossier, ARCHIVE_RETENTION_MOIS=24)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.admin = Utilisateur.objects.create_user(
+            username="admin",
+            password="test1234",
+            tenant=self.tenant,
+            role=UserRole.ADMIN_TENANT_STATION,
+        )
+        produit = ProduitCarburant.objects.create(
+            tenant=self.tenant,
+            nom="Gasoil",
+            code="GASOIL"
+        )
+        cuve = Cuve.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            produit=produit,
+            reference="CUV-GASOIL-01",
+            capacite_max=Decimal("20000"),
+            statut=CuveStatus.ACTIVE,
+        )
+
+        ancien = timezone.now() - timedelta(days=3 * 365)
+        recent = timezone.now() - timedelta(days=2)
+
+        # VALIDE : stock et finance pas encore appliqués, jamais archivé
+        clos, valide = RelaisEquipe.objects.bulk_create([
+            RelaisEquipe(
+                tenant=self.tenant,
+                station=self.station,
+                debut_relais=ancien - timedelta(hours=8),
+                fin_relais=ancien,
+                equipe_sortante="A",
+                equipe_entrante="B",
+                status=status,
+                stock_applique=status == FaitStatus.TRANSFERE,
+            )
+            for status in (FaitStatus.TRANSFERE, FaitStatus.VALIDE)
+        ])
+        RelaisProduit.objects.bulk_create([
+            RelaisProduit(relais=relais, produit=produit, index_debut=0, index_fin=100)
+            for relais in (clos, valide)
+        ])
+        RelaisAudit.objects.create(
+            relais=clos,
+            tenant=self.tenant,
+            ancien_statut=FaitStatus.SOUMIS,
+            nouveau_statut=FaitStatus.VALIDE,
+            action="VALIDATION",
+        )
+
+        MouvementStock.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            cuve=cuve,
+            type_mouvement=MouvementStock.MOUVEMENT_SORTIE,
+            quantite=Decimal("100"),
+            source_type="RelaisEquipe",
+            source_id=clos.id,
+            date_mouvement=ancien,
+        )
+        # Une transaction par source (finances_station_cle_source)
+        for quand, relais in ((ancien, clos), (recent, valide)):
+            TransactionStation.objects.create(
+                tenant=self.tenant,
+                station=self.station,
+                type="RECETTE",
+                source_type="RelaisEquipe",
+                source_id=relais.id,
+                montant=65000,
+                date=quand,
+            )
+
+        self.clos = clos
+        self.valide = valide
+
+    def test_periodes_closes_sortent_des_tables(self):
+        rapport = archiver_base("default")
+
+        self.assertEqual({ligne["archive"] for ligne in rapport}, {
+            "relais-audits", "relais-produits", "relais", "mouvements-stock", "transactions",
+        })
+        self.assertFalse(RelaisEquipe.objects.filter(pk=self.clos.pk).exists())
+        self.assertFalse(RelaisAudit.objects.exists())
+        self.assertEqual(MouvementStock.objects.count(), 0)
+
+        # Relais non transféré et transaction récente conservés
+        self.assertTrue(RelaisEquipe.objects.filter(pk=self.valide.pk).exists())
+        self.assertEqual(RelaisProduit.objects.count(), 1)
+        self.assertEqual(TransactionStation.objects.count(), 1)
+
+        self.assertEqual(sum(partie["lignes"] for partie in manifeste(self.tenant.id)), 5)
+        relais = list(lire(self.tenant.id, "relais"))
+        self.assertEqual([ligne["id"] for ligne in relais], [self.clos.id])
+
+        # Relance : rien de plus
+        self.assertEqual(archiver_base("default"), [])
+        self.assertEqual(len(manifeste(self.tenant.id)), 5)
+
+    def test_rien_avant_la_retention(self):
+        self.assertEqual(archiver_base("default", limite_retention(120)), [])
+        self.assertEqual(TransactionStation.objects.count(), 2)
+
+    def test_lecture_api(self):
+        archiver_base("default")
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        response = client.get("/api/v1/station/archives/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+
+        response = client.get(
+            "/api/v1/station/archives/transactions/",
+            {"station_id": self.station.id},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["montant"], "65000.00")
+
+        response = client.get("/api/v1/station/archives/transactions/", {"debut": "2020"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_fichier_altere(self):
+        archiver_base("default")
+        partie = manifeste(self.tenant.id)[-1]
+        with open(_dossier(self.tenant.id) / partie["fichier"], "ab") as fichier:
+            fichier.write(b"x")
+
+        with self.assertRaises(ArchiveError):
+            list(lire(self.tenant.id, partie["archive"]))
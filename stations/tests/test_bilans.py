@@ -0,0 +1,110 @@
+import json
+import tarfile
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from finances_station.models import TransactionStation
+from stations.models import Station
+from stations.models_bilan import BilanMensuel
+from stations.models_cloture import ClotureJournaliere
+from stations.services.bilans import chemin
+from stations.services.cloture import bornes_jour
+from taches.services.file import executer, prendre
+from tenants.models import Tenant
+
+URL = "/api/v1/station/bilans/"
+
+
+class BilanMensuelTestCase(TestCase):
+
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        reglages = override_settings(BILAN_DIR=dossier.name)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.stations = [
+            Station.objects.create(tenant=self.tenant, nom=nom, adresse="Dakar")
+            for nom in ("Station A", "Station B")
+        ]
+        self.admin = Utilisateur.objects.create_user(
+            username="admin",
+            password="test1234",
+            tenant=self.tenant,
+            role=UserRole.ADMIN_TENANT_STATION,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        self.mois = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+        TransactionStation.objects.create(
+            tenant=self.tenant,
+            station=self.stations[0],
+            type="RECETTE",
+            source_type="RelaisEquipe",
+            source_id=1,
+            montant=Decimal("1500"),
+            date=bornes_jour(self.mois + timedelta(days=9))[0] + timedelta(hours=12),
+        )
+
+    def _executer_file(self):
+        while (tache := prendre("test")) is not None:
+            executer(tache)
+
+    def test_generation_complete(self):
+        # Jour déjà clôturé : repris tel quel
+        ClotureJournaliere.objects.create(
+            tenant=self.tenant,
+            station=self.stations[0],
+            jour=self.mois,
+            recettes=Decimal("100"),
+        )
+
+        response = self.client.post(URL, {"mois": f"{self.mois:%Y-%m}"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["statut"], BilanMensuel.STATUT_EN_COURS)
+
+        self._executer_file()
+
+        bilan = BilanMensuel.objects.get()
+        self.assertEqual(bilan.statut, BilanMensuel.STATUT_PRET)
+        self.assertEqual(bilan.progression, 100)
+        self.assertEqual(sorted(bilan.stations_faites), [s.pk for s in self.stations])
+
+        with tarfile.open(chemin(bilan)) as tar:
+            noms = tar.getnames()
+            synthese = json.load(tar.extractfile(
+                f"{self.mois:%Y-%m}/station-{self.stations[0].pk}/synthese.json"
+            ))
+
+        self.assertIn(f"{self.mois:%Y-%m}/station-{self.stations[1].pk}/stocks.csv", noms)
+        self.assertEqual(Decimal(synthese["recettes"]), Decimal("1600"))
+        self.assertEqual(synthese["jours_clotures_reutilises"], 1)
+
+        response = self.client.get(f"{URL}{bilan.pk}/telecharger/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment;", response["Content-Disposition"])
+
+    def test_mois_non_termine(self):
+        response = self.client.post(URL, {"mois": f"{timezone.localdate():%Y-%m}"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BilanMensuel.objects.exists())
+
+    def test_generation_deja_en_cours(self):
+        self.client.post(URL, {"mois": f"{self.mois:%Y-%m}"})
+
+        response = self.client.post(URL, {"mois": f"{self.mois:%Y-%m}"})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(f"{URL}{BilanMensuel.objects.get().pk}/telecharger/")
+        self.assertEqual(response.status_code, 409)
@@ -0,0 +1,174 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from finances_station.models import TransactionStation
+from stations.constants import DepotageStatus
+from stations.models import FaitStatus, RelaisEquipe, RelaisProduit, Station
+from stations.models_cloture import ClotureJournaliere
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.depotage import Depotage
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import ProduitCarburant
+from stations.services.cloture import ClotureError, bornes_jour, cloturer, historique
+from tenants.models import Tenant
+
+
+class ClotureJournaliereTestCase(TestCase):
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.GERANT,
+        )
+        produit = ProduitCarburant.objects.create(
+            tenant=self.tenant,
+            nom="Gasoil",
+            code="GASOIL"
+        )
+        self.cuve = Cuve.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            produit=produit,
+            reference="CUV-GASOIL-01",
+            capacite_max=Decimal("20000"),
+            stock_actuel=Decimal("9000"),
+            statut=CuveStatus.ACTIVE,
+        )
+
+        self.aujourdhui = timezone.localdate()
+        self.hier = self.aujourdhui - timedelta(days=1)
+        midi_hier = bornes_jour(self.hier)[0] + timedelta(hours=12)
+        self.midi = bornes_jour(self.aujourdhui)[0] + timedelta(hours=12)
+
+        relais = RelaisEquipe.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            debut_relais=midi_hier - timedelta(hours=8),
+            fin_relais=midi_hier,
+            equipe_sortante="A",
+            equipe_entrante="B",
+            encaisse_liquide=Decimal("400000"),
+            encaisse_carte=Decimal("250000"),
+            status=FaitStatus.VALIDE,
+        )
+        RelaisProduit.objects.create(
+            relais=relais,
+            produit=produit,
+            index_debut=Decimal("0"),
+            index_fin=Decimal("1000"),
+        )
+        Depotage.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            cuve=self.cuve,
+            fournisseur="Fournisseur",
+            date_depotage=midi_hier,
+            quantite_livree=Decimal("5000"),
+            quantite_acceptee=Decimal("5000"),
+            jauge_avant=Decimal("1000"),
+            jauge_apres=Decimal("5900"),
+            variation_cuve=Decimal("4900"),
+            prix_unitaire=Decimal("700"),
+            montant_total=Decimal("3500000"),
+            statut=DepotageStatus.CONFIRME,
+        )
+
+        for type_mouvement, quantite, quand in (
+            (MouvementStock.MOUVEMENT_SORTIE, "1000", midi_hier),
+            (MouvementStock.MOUVEMENT_ENTREE, "500", self.midi),
+        ):
+            MouvementStock.objects.create(
+                tenant=self.tenant,
+                station=self.station,
+                cuve=self.cuve,
+                type_mouvement=type_mouvement,
+                quantite=Decimal(quantite),
+                source_type="RelaisEquipe",
+                source_id=relais.id,
+                date_mouvement=quand,
+            )
+
+        for quand in (midi_hier, self.midi):
+            self._transaction(quand)
+
+    def _transaction(self, quand, montant=650000):
+        return TransactionStation.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            type="RECETTE",
+            source_type="RelaisEquipe",
+            source_id=TransactionStation.objects.count() + 1,
+            montant=montant,
+            date=quand,
+        )
+
+    def test_cloture_figee(self):
+        cloture, creee = cloturer(self.station, self.hier)
+        self.assertTrue(creee)
+
+        cloture.refresh_from_db()
+        self.assertEqual(cloture.recettes, Decimal("650000"))
+        self.assertEqual(cloture.nb_transactions, 1)
+        self.assertEqual(cloture.nb_relais, 1)
+        self.assertEqual(cloture.encaisse_carte, Decimal("250000"))
+        self.assertEqual(Decimal(cloture.volumes["GASOIL"]), Decimal("1000"))
+        self.assertEqual(Decimal(cloture.depotages["GASOIL"]["ecart"]), Decimal("100"))
+
+        # Stock courant 9000, +500 aujourd'hui, -1000 hier
+        stock = cloture.stocks[str(self.cuve.id)]
+        self.assertEqual(Decimal(stock["cloture"]), Decimal("8500"))
+        self.assertEqual(Decimal(stock["ouverture"]), Decimal("9500"))
+
+    def test_recalcul_idempotent(self):
+        cloturer(self.station, self.hier)
+        self._transaction(bornes_jour(self.hier)[0] + timedelta(hours=20), montant=1000)
+
+        cloture, creee = cloturer(self.station, self.hier)
+
+        self.assertFalse(creee)
+        self.assertEqual(ClotureJournaliere.objects.count(), 1)
+        self.assertEqual(cloture.recettes, Decimal("651000"))
+
+    def test_historique_lit_les_clotures(self):
+        cloturer(self.station, self.hier)
+
+        # Correction non encore reclôturée : la clôture fait foi
+        self._transaction(bornes_jour(self.hier)[0] + timedelta(hours=20), montant=1000)
+        jours = historique([self.station.id], self.hier, self.aujourdhui)
+
+        self.assertEqual(jours[self.hier]["recettes"], Decimal("650000"))
+        self.assertEqual(jours[self.aujourdhui]["recettes"], Decimal("650000"))
+
+    def test_periode_archivee(self):
+        with self.assertRaises(ClotureError):
+            cloturer(self.station, self.aujourdhui - timedelta(days=20 * 365))
+
+    def test_declenchement_gerant(self):
+        client = APIClient()
+        client.force_authenticate(self.gerant)
+
+        response = client.post(
+            "/api/v1/station/clotures/cloturer/",
+            {"jour": self.hier.isoformat()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = client.get("/api/v1/station/clotures/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from stations.models import IndexPompe, Pompe, Station
+from stations.models_produit import ProduitCarburant
+from tenants.models import Tenant
+
+URL = "/api/v1/station/configuration/"
+
+
+class StationConfigurationTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.produit = ProduitCarburant.objects.create(
+            tenant=self.tenant,
+            nom="Gasoil",
+            code="GASOIL"
+        )
+        self.pompe = Pompe.objects.create(station=self.station, reference="P1")
+        IndexPompe.objects.create(
+            pompe=self.pompe,
+            produit=self.produit,
+            index_initial=Decimal("0"),
+            index_courant=Decimal("100"),
+        )
+
+        self.user = Utilisateur.objects.create_user(
+            username="superviseur",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.SUPERVISEUR,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_snapshot_complet_avec_etag(self):
+        response = self.client.get(URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        self.assertEqual(len(response.data["pompes"]), 1)
+        self.assertEqual(len(response.data["pompes"][0]["index"]), 1)
+        self.assertEqual(response.data["produits"][0]["code"], "GASOIL")
+
+    def test_if_none_match_renvoie_304(self):
+        etag = self.client.get(URL)["ETag"]
+
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_none_match_forme_forte_et_liste(self):
+        etag = self.client.get(URL)["ETag"]
+        forte = etag.removeprefix("W/")
+
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=f'"autre", {forte}')
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_none_match_sans_correspondance(self):
+        self.station.refresh_from_db()
+        station = self.station
+        suivante = f'"config-{station.id}-{station.config_version + 1}"'
+
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=f'W/{suivante}, "autre"')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match_etoile(self):
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_modification_parametrage_change_etag(self):
+        etag = self.client.get(URL)["ETag"]
+
+        Pompe.objects.create(station=self.station, reference="P2")
+
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["pompes"]), 2)
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from finances_station.models import EvenementFinance, TransactionStation
+from finances_station.services.outbox import (
+    publier_evenement,
+    traiter_evenements,
+)
+from stations.models import Station
+from tenants.models import Tenant
+
+
+class OutboxFinanceTestCase(TestCase):
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+
+    def _publier(self, source_id):
+        return publier_evenement(
+            tenant_id=self.tenant.id,
+            station_id=self.station.id,
+            source_type="DEPOTAGE",
+            source_id=source_id,
+            type="DEPENSE",
+            montant=Decimal("1500"),
+            date=timezone.now(),
+            finance_status="CONFIRMEE",
+        )
+
+    def test_publication_idempotente(self):
+        self._publier(1)
+        self._publier(1)
+
+        self.assertEqual(EvenementFinance.objects.count(), 1)
+
+    def test_worker_cree_les_transactions(self):
+        self._publier(1)
+        self._publier(2)
+
+        self.assertEqual(traiter_evenements(), 2)
+        self.assertEqual(TransactionStation.objects.count(), 2)
+        self.assertFalse(
+            EvenementFinance.objects
+            .exclude(statut=EvenementFinance.STATUT_TRAITE)
+            .exists()
+        )
+
+        # Rien à rejouer
+        self.assertEqual(traiter_evenements(), 0)
+
+    def test_transaction_existante_non_dupliquee(self):
+        TransactionStation.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            source_type="DEPOTAGE",
+            source_id=1,
+            type="DEPENSE",
+            montant=Decimal("1500"),
+            date=timezone.now(),
+            finance_status="CONFIRMEE",
+        )
+        self._publier(1)
+
+        traiter_evenements()
+
+        self.assertEqual(TransactionStation.objects.count(), 1)
+
+    def test_echec_relance_differee(self):
+        self._publier(1)
+
+        with mock.patch(
+            "finances_station.services.outbox.TransactionStation.objects.bulk_create",
+            side_effect=DatabaseError("partition absente"),
+        ), mock.patch(
+            "finances_station.services.outbox.TransactionStation.objects.get_or_create",
+            side_effect=DatabaseError("partition absente"),
+        ):
+            self.assertEqual(traiter_evenements(), 0)
+
+        evenement = EvenementFinance.objects.get()
+        self.assertEqual(evenement.statut, EvenementFinance.STATUT_EN_ATTENTE)
+        self.assertEqual(evenement.tentatives, 1)
+        self.assertGreater(evenement.prochaine_tentative, timezone.now())
+
+        # Pas de relance avant l'échéance
+        self.assertEqual(traiter_evenements(), 0)
+        self.assertEqual(EvenementFinance.objects.get().tentatives, 1)
+
+        EvenementFinance.objects.update(prochaine_tentative=timezone.now())
+        self.assertEqual(traiter_evenements(), 1)
+        self.assertEqual(TransactionStation.objects.count(), 1)
+
+    def test_une_transaction_par_source_en_base(self):
+        champs = dict(
+            tenant=self.tenant,
+            station=self.station,
+            source_type="DEPOTAGE",
+            source_id=1,
+            type="DEPENSE",
+            montant=Decimal("1500"),
+        )
+        TransactionStation.objects.create(date=timezone.now(), **champs)
+
+        # Autre date, même source : refusé hors outbox aussi
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TransactionStation.objects.create(
+                date=timezone.now() - timedelta(days=3), **champs
+            )
+
+        # Suppression : la source peut être recomptabilisée
+        TransactionStation.objects.all().delete()
+        TransactionStation.objects.create(date=timezone.now(), **champs)
@@ -0,0 +1,167 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from finances_station.models import TransactionStation
+from stations.models import Station
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import ProduitCarburant
+from stations.services.partitions import (
+    PartitionError,
+    _creer_partition,
+    _mois,
+    _mois_suivant,
+    convertir,
+    creer_partitions,
+    detacher_annee,
+    nom_partition,
+)
+from tenants.models import Tenant
+
+TABLE = MouvementStock._meta.db_table
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitionnement PostgreSQL uniquement")
+class PartitionsLedgersTestCase(TestCase):
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        produit = ProduitCarburant.objects.create(
+            tenant=self.tenant,
+            nom="Gasoil",
+            code="GASOIL"
+        )
+        self.cuve = Cuve.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            produit=produit,
+            reference="CUV-GASOIL-01",
+            capacite_max=Decimal("20000"),
+            statut=CuveStatus.ACTIVE,
+        )
+
+        self.ce_mois = _mois(timezone.now())
+        self.mois_dernier = _mois(self.ce_mois - timedelta(days=1))
+
+        # Ligne existante avant conversion : recopiée dans sa partition
+        self._mouvement(timezone.now() - timedelta(days=40))
+
+        # Contrôles FK immédiats : pas d'ALTER TABLE avec événements en attente
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        self.copies = convertir()
+
+    def _mouvement(self, quand):
+        return MouvementStock.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            cuve=self.cuve,
+            type_mouvement=MouvementStock.MOUVEMENT_SORTIE,
+            quantite=Decimal("10"),
+            source_type="RelaisEquipe",
+            source_id=1,
+            date_mouvement=quand,
+        )
+
+    def test_conversion_conserve_les_donnees(self):
+        self.assertEqual(self.copies[TABLE], 1)
+        self.assertEqual(self.copies[TransactionStation._meta.db_table], 0)
+        self.assertEqual(MouvementStock.objects.count(), 1)
+
+        # Séquence reprise : les insertions continuent
+        self._mouvement(timezone.now())
+        self.assertEqual(MouvementStock.objects.count(), 2)
+
+        # Déjà partitionnée : rien à faire
+        self.assertIsNone(convertir()[TABLE])
+
+    def test_partition_pruning(self):
+        self._mouvement(timezone.now())
+
+        debut = datetime(self.ce_mois.year, self.ce_mois.month, 1, tzinfo=dt_timezone.utc)
+        plan = MouvementStock.objects.filter(
+            date_mouvement__gte=debut,
+            date_mouvement__lt=debut + timedelta(days=1),
+        ).explain()
+
+        self.assertIn(nom_partition(TABLE, self.ce_mois), plan)
+        self.assertNotIn(nom_partition(TABLE, self.mois_dernier), plan)
+        self.assertNotIn(f"{TABLE}_defaut", plan)
+
+    def test_partitions_futures(self):
+        self.assertEqual(creer_partitions(), [])
+
+        creees = creer_partitions(mois_avance=6)
+        loin = self.ce_mois
+        for _ in range(6):
+            loin = _mois_suivant(loin)
+        self.assertIn(nom_partition(TABLE, loin), creees)
+
+    def test_detacher_annee_close(self):
+        with self.assertRaises(PartitionError):
+            detacher_annee(timezone.now().year)
+
+        annee = self.mois_dernier.year - 1
+        juin = date(annee, 6, 1)
+        with connection.cursor() as cursor:
+            _creer_partition(connection, cursor, TABLE, juin)
+        self._mouvement(datetime(annee, 6, 15, tzinfo=dt_timezone.utc))
+        self.assertEqual(MouvementStock.objects.count(), 2)
+
+        # Un DETACH, pas de DELETE : la table reste pour archivage
+        self.assertEqual(detacher_annee(annee), [nom_partition(TABLE, juin)])
+        self.assertEqual(MouvementStock.objects.count(), 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {nom_partition(TABLE, juin)}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_lignes_du_defaut_deplacees_a_la_creation(self):
+        loin = self.ce_mois
+        for _ in range(8):
+            loin = _mois_suivant(loin)
+        quand = datetime(loin.year, loin.month, 15, tzinfo=dt_timezone.utc)
+
+        # Hors des partitions créées : ligne dans <table>_defaut
+        self._mouvement(quand)
+        TransactionStation.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            type="RECETTE",
+            source_type="RelaisEquipe",
+            source_id=1,
+            montant=Decimal("1000"),
+            date=quand,
+        )
+
+        creees = creer_partitions(mois_avance=8)
+
+        self.assertIn(nom_partition(TABLE, loin), creees)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {nom_partition(TABLE, loin)}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute(f"SELECT count(*) FROM {TABLE}_defaut")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+        # Clé par source conservée par le déplacement
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TransactionStation.objects.create(
+                tenant=self.tenant,
+                station=self.station,
+                type="RECETTE",
+                source_type="RelaisEquipe",
+                source_id=1,
+                montant=Decimal("1000"),
+                date=timezone.now(),
+            )
@@ -0,0 +1,117 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from stations.models import Station
+from stations.models_produit import PrixCarburant, ProduitCarburant
+from tenants.models import Tenant
+
+URL = "/api/v1/station/prix/bulk/"
+
+
+class PrixCarburantBulkTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.stations = [
+            Station.objects.create(
+                tenant=self.tenant,
+                nom=f"Station {i}",
+                adresse="Dakar"
+            )
+            for i in range(3)
+        ]
+        self.essence = ProduitCarburant.objects.create(
+            tenant=self.tenant, nom="Super", code="ESSENCE"
+        )
+        self.gasoil = ProduitCarburant.objects.create(
+            tenant=self.tenant, nom="Gasoil", code="GASOIL"
+        )
+
+        self.admin = Utilisateur.objects.create_user(
+            username="admin_station",
+            password="test1234",
+            tenant=self.tenant,
+            role=UserRole.ADMIN_TENANT_STATION,
+        )
+        self.client.force_authenticate(self.admin)
+
+    def _payload(self, prix_essence, prix_gasoil, **extra):
+        return {
+            "prix": [
+                {"produit": self.essence.id, "prix_unitaire": str(prix_essence)},
+                {"produit": self.gasoil.id, "prix_unitaire": str(prix_gasoil)},
+            ],
+            **extra,
+        }
+
+    def test_prix_appliques_a_toutes_les_stations(self):
+        response = self.client.post(URL, self._payload(990, 755), format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["prix_crees"], 6)
+        self.assertEqual(PrixCarburant.objects.filter(actif=True).count(), 6)
+
+    def test_ancien_prix_cloture(self):
+        self.client.post(URL, self._payload(990, 755), format="json")
+        self.client.post(URL, self._payload(1000, 760), format="json")
+
+        actifs = PrixCarburant.objects.filter(actif=True)
+        self.assertEqual(actifs.count(), 6)
+        self.assertTrue(
+            all(p.prix_unitaire in (Decimal("1000"), Decimal("760")) for p in actifs)
+        )
+        self.assertEqual(
+            PrixCarburant.objects.filter(actif=False, date_fin__isnull=False).count(),
+            6,
+        )
+
+    def test_stations_selectionnees_et_version_config(self):
+        cible = self.stations[0]
+        # Incrémentée en base (F()) à la création des produits du setUp
+        cible.refresh_from_db()
+        version = cible.config_version
+
+        self.client.post(
+            URL,
+            self._payload(990, 755, stations=[cible.id]),
+            format="json",
+        )
+
+        cible.refresh_from_db()
+        self.assertEqual(cible.config_version, version + 1)
+        self.assertEqual(
+            PrixCarburant.objects.filter(actif=True).exclude(station=cible).count(),
+            0,
+        )
+
+    def test_reserve_admin_tenant_station(self):
+        gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.stations[0],
+            role=UserRole.GERANT,
+        )
+        self.client.force_authenticate(gerant)
+
+        response = self.client.post(URL, self._payload(990, 755), format="json")
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_station_en_double_refusee(self):
+        cible = self.stations[0]
+
+        response = self.client.post(
+            URL,
+            self._payload(990, 755, stations=[cible.id, cible.id]),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PrixCarburant.objects.exists())
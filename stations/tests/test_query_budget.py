@@ -0,0 +1,253 @@
+from datetime import timedelta
+from decimal import Decimal
+from itertools import count
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from core.testing import BudgetRequetesMixin, RequetesCapturees
+from finances_station.models import TransactionStation
+from stations.constants import DepotageStatus
+from stations.models import IndexPompe, Pompe, RelaisEquipe, RelaisProduit, Station
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.depotage import Depotage
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import PrixCarburant, ProduitCarburant
+from tenants.models import Tenant
+
+API = "/api/v1/station/"
+
+
+class BudgetRequetesTestCase(BudgetRequetesMixin, TestCase):
+    """
+    Listes exercées avec 1 puis 50 objets : le nombre de requêtes
+    ne croît pas et reste dans le query_budget de la vue.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.numero = count(1)
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.produit = ProduitCarburant.objects.create(
+            tenant=self.tenant,
+            nom="Gasoil",
+            code="GASOIL"
+        )
+        self.cuve = Cuve.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            produit=self.produit,
+            reference="CUV-GASOIL-00",
+            capacite_max=Decimal("20000"),
+            stock_actuel=Decimal("10000"),
+            statut=CuveStatus.ACTIVE,
+        )
+
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.GERANT,
+        )
+        self.admin = Utilisateur.objects.create_user(
+            username="admin",
+            password="test1234",
+            tenant=self.tenant,
+            role=UserRole.ADMIN_TENANT_STATION,
+        )
+        self.admin.stations_administrees.add(self.station)
+
+        self.client.force_authenticate(self.gerant)
+
+    # ==========================================================
+    # FABRIQUES
+    # ==========================================================
+
+    def creer_cuves(self, n):
+        Cuve.objects.bulk_create([
+            Cuve(
+                tenant=self.tenant,
+                station=self.station,
+                produit=self.produit,
+                reference=f"CUV-GASOIL-{next(self.numero):02d}",
+                capacite_max=Decimal("20000"),
+                statut=CuveStatus.STANDBY,
+            )
+            for _ in range(n)
+        ])
+
+    def creer_pompes(self, n):
+        pompes = Pompe.objects.bulk_create([
+            Pompe(station=self.station, reference=f"P{next(self.numero)}")
+            for _ in range(n)
+        ])
+        IndexPompe.objects.bulk_create([
+            IndexPompe(
+                pompe=pompe,
+                produit=self.produit,
+                index_initial=Decimal("0"),
+                index_courant=Decimal("0"),
+            )
+            for pompe in pompes
+        ])
+
+    def creer_mouvements(self, n):
+        MouvementStock.objects.bulk_create([
+            MouvementStock(
+                tenant=self.tenant,
+                station=self.station,
+                cuve=self.cuve,
+                type_mouvement=MouvementStock.MOUVEMENT_SORTIE,
+                quantite=Decimal("10"),
+                source_type="RelaisEquipe",
+                source_id=next(self.numero),
+                date_mouvement=timezone.now(),
+            )
+            for _ in range(n)
+        ])
+
+    def creer_relais(self, n):
+        debut = timezone.now()
+        relais = RelaisEquipe.objects.bulk_create([
+            RelaisEquipe(
+                tenant=self.tenant,
+                station=self.station,
+                debut_relais=debut + timedelta(hours=2 * k),
+                fin_relais=debut + timedelta(hours=2 * k + 1),
+                equipe_sortante="A",
+                equipe_entrante="B",
+            )
+            for k in (next(self.numero) for _ in range(n))
+        ])
+        RelaisProduit.objects.bulk_create([
+            RelaisProduit(
+                relais=r,
+                produit=self.produit,
+                index_debut=Decimal("0"),
+                index_fin=Decimal("100"),
+            )
+            for r in relais
+        ])
+
+    def creer_depotages(self, n):
+        Depotage.objects.bulk_create([
+            Depotage(
+                tenant=self.tenant,
+                station=self.station,
+                cuve=self.cuve,
+                fournisseur="Fournisseur",
+                date_depotage=timezone.now(),
+                quantite_livree=Decimal("1000"),
+                quantite_acceptee=Decimal("1000"),
+                jauge_avant=Decimal("0"),
+                jauge_apres=Decimal("1000"),
+                variation_cuve=Decimal("1000"),
+                prix_unitaire=Decimal("650"),
+                montant_total=Decimal("650000"),
+                statut=DepotageStatus.BROUILLON,
+            )
+            for _ in range(n)
+        ])
+
+    def creer_transactions(self, n):
+        TransactionStation.objects.bulk_create([
+            TransactionStation(
+                tenant=self.tenant,
+                station=self.station,
+                type="RECETTE",
+                source_type="RelaisEquipe",
+                source_id=next(self.numero),
+                montant=1000,
+                date=timezone.now(),
+            )
+            for _ in range(n)
+        ])
+
+    def creer_prix(self, n):
+        PrixCarburant.objects.bulk_create([
+            PrixCarburant(
+                tenant=self.tenant,
+                station=self.station,
+                produit=self.produit,
+                prix_unitaire=Decimal("650"),
+                date_debut=timezone.now() - timedelta(days=next(self.numero)),
+                created_by=self.admin,
+            )
+            for _ in range(n)
+        ])
+
+    # ==========================================================
+    # LISTES
+    # ==========================================================
+
+    def test_cuves(self):
+        self.assertRequetesConstantes(API + "cuves/", self.creer_cuves)
+
+    def test_cuves_admin(self):
+        self.client.force_authenticate(self.admin)
+        self.assertRequetesConstantes(API + "cuves/", self.creer_cuves)
+
+    def test_pompes(self):
+        self.client.force_authenticate(self.admin)
+        self.assertRequetesConstantes(
+            API + f"pompes/?station_id={self.station.id}",
+            self.creer_pompes
+        )
+
+    def test_index_pompes(self):
+        self.assertRequetesConstantes(API + "index-pompes/", self.creer_pompes)
+
+    def test_mouvements_stock(self):
+        self.assertRequetesConstantes(API + "mouvements-stock/", self.creer_mouvements)
+
+    def test_relais(self):
+        self.assertRequetesConstantes(
+            API + "relais-equipes/?page_size=50",
+            self.creer_relais
+        )
+
+    def test_depotages(self):
+        self.assertRequetesConstantes(API + "depotages/", self.creer_depotages)
+
+    def test_transactions_station(self):
+        self.assertRequetesConstantes(
+            "/api/v1/finances/transactions/",
+            self.creer_transactions
+        )
+
+    def test_prix(self):
+        self.assertRequetesConstantes(API + "prix/", self.creer_prix)
+
+    # ==========================================================
+    # DÉTAIL
+    # ==========================================================
+
+    def test_detail_cuve(self):
+        self.assertBudgetRequetes(API + f"cuves/{self.cuve.id}/")
+
+    def test_detail_pompe(self):
+        self.creer_pompes(1)
+        self.client.force_authenticate(self.admin)
+        self.assertBudgetRequetes(API + f"pompes/{Pompe.objects.get().id}/")
+
+    # ==========================================================
+    # RAPPORT
+    # ==========================================================
+
+    def test_rapport_indique_origine(self):
+        with RequetesCapturees() as capture:
+            list(Cuve.objects.all())
+
+        self.assertEqual(len(capture), 1)
+        self.assertIn("stations_cuve", capture.rapport())
+        self.assertIn("test_query_budget.py", capture.rapport())
@@ -0,0 +1,131 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from stations.models import FaitStatus, RelaisEquipe, RelaisProduit, Station
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import ProduitCarburant
+from stations.services.stock import annoter_stock_global, get_stock_global_produit
+from stations.services.stock_ledger import compacter
+from tenants.models import Tenant
+
+URL = "/api/v1/station/relais-equipes/transitions/"
+
+
+@override_settings(STOCK_MODE="LEDGER")
+class StockLedgerTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.produit = ProduitCarburant.objects.create(
+            tenant=self.tenant, nom="Gasoil", code="GASOIL"
+        )
+        self.cuve = Cuve.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            produit=self.produit,
+            reference="CUV-GASOIL-01",
+            capacite_max=Decimal("20000"),
+            stock_actuel=Decimal("10000"),
+            statut=CuveStatus.ACTIVE,
+        )
+
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.GERANT,
+        )
+        self.client.force_authenticate(self.gerant)
+
+    def _relais(self, heures, volume):
+        debut = timezone.now() - timedelta(hours=heures + 1)
+        relais = RelaisEquipe.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            debut_relais=debut,
+            fin_relais=debut + timedelta(hours=1),
+            equipe_sortante="A",
+            equipe_entrante="B",
+            encaisse_liquide=Decimal("1000"),
+            status=FaitStatus.VALIDE,
+        )
+        RelaisProduit.objects.create(
+            relais=relais,
+            produit=self.produit,
+            index_debut=Decimal("0"),
+            index_fin=Decimal(volume),
+        )
+        return relais
+
+    def _transferer(self, *relais):
+        return self.client.post(
+            URL,
+            {"ids": [r.id for r in relais], "statut": FaitStatus.TRANSFERE},
+            format="json",
+        )
+
+    def test_transfert_sans_toucher_la_cuve(self):
+        response = self._transferer(self._relais(5, 1000), self._relais(3, 1000))
+
+        self.assertEqual(response.data["succes"], 2)
+
+        self.cuve.refresh_from_db()
+        self.assertEqual(self.cuve.stock_actuel, Decimal("10000"))
+        self.assertEqual(
+            MouvementStock.objects.filter(integre=False).count(), 2
+        )
+        self.assertEqual(
+            get_stock_global_produit(self.station, self.produit),
+            Decimal("8000"),
+        )
+
+    def test_lectures_tiennent_compte_des_deltas(self):
+        Cuve.objects.filter(pk=self.cuve.pk).update(seuil_alerte=Decimal("8500"))
+        self._transferer(self._relais(5, 2000))
+
+        produit = annoter_stock_global(ProduitCarburant.objects.all()).get()
+        self.assertEqual(produit.stock_global, Decimal("8000"))
+
+        # Checkpoint à 10000, stock réel à 8000 : sous le seuil
+        self.assertTrue(Cuve.objects.get(pk=self.cuve.pk).en_alerte)
+
+    def test_controle_stock_tient_compte_des_deltas(self):
+        self._transferer(self._relais(5, 7000))
+
+        # 3000 restants : sous le seuil critique / stock insuffisant
+        response = self._transferer(self._relais(3, 3500))
+
+        self.assertEqual(response.data["echecs"], 1)
+        self.assertEqual(MouvementStock.objects.count(), 1)
+
+    def test_compaction(self):
+        self._transferer(self._relais(5, 1000), self._relais(3, 500))
+
+        rapport = compacter()
+
+        self.assertEqual(rapport, {self.cuve.id: 2})
+        self.cuve.refresh_from_db()
+        self.assertEqual(self.cuve.stock_actuel, Decimal("8500"))
+        self.assertFalse(MouvementStock.objects.filter(integre=False).exists())
+        self.assertEqual(
+            get_stock_global_produit(self.station, self.produit),
+            Decimal("8500"),
+        )
+
+        # Rien à compacter au second passage
+        self.assertEqual(compacter(), {})
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from finances_station.models import EvenementFinance, TransactionStation
+from finances_station.services.outbox import traiter_evenements
+from stations.models import FaitStatus, RelaisAudit, RelaisEquipe, RelaisProduit, Station
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.mouvement_stock import MouvementStock
+from stations.models_produit import ProduitCarburant
+from tenants.models import Tenant
+
+URL = "/api/v1/station/relais-equipes/transitions/"
+
+
+class RelaisTransitionsMasseTestCase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+        self.station = Station.objects.create(
+            tenant=self.tenant,
+            nom="Station A",
+            adresse="Dakar"
+        )
+        self.produit = ProduitCarburant.objects.create(
+            tenant=self.tenant, nom="Gasoil", code="GASOIL"
+        )
+        self.cuve = Cuve.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            produit=self.produit,
+            reference="CUV-GASOIL-01",
+            capacite_max=Decimal("20000"),
+            stock_actuel=Decimal("10000"),
+            statut=CuveStatus.ACTIVE,
+        )
+
+        self.gerant = Utilisateur.objects.create_user(
+            username="gerant",
+            password="test1234",
+            tenant=self.tenant,
+            station=self.station,
+            role=UserRole.GERANT,
+        )
+        self.client.force_authenticate(self.gerant)
+
+    def _relais(self, heures, volume, status=FaitStatus.VALIDE):
+        debut = timezone.now() - timedelta(hours=heures + 1)
+        relais = RelaisEquipe.objects.create(
+            tenant=self.tenant,
+            station=self.station,
+            debut_relais=debut,
+            fin_relais=debut + timedelta(hours=1),
+            equipe_sortante="A",
+            equipe_entrante="B",
+            encaisse_liquide=Decimal("1000"),
+            status=status,
+        )
+        RelaisProduit.objects.create(
+            relais=relais,
+            produit=self.produit,
+            index_debut=Decimal("0"),
+            index_fin=Decimal(volume),
+        )
+        return relais
+
+    def test_transfert_groupe_par_cuve(self):
+        r1 = self._relais(5, 1000)
+        r2 = self._relais(3, 1000)
+
+        response = self.client.post(
+            URL,
+            {"ids": [r1.id, r2.id], "statut": FaitStatus.TRANSFERE},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["succes"], 2)
+
+        self.cuve.refresh_from_db()
+        self.assertEqual(self.cuve.stock_actuel, Decimal("8000"))
+        self.assertEqual(MouvementStock.objects.count(), 2)
+        self.assertEqual(EvenementFinance.objects.count(), 2)
+        self.assertEqual(TransactionStation.objects.count(), 0)
+        self.assertEqual(RelaisAudit.objects.count(), 2)
+
+        self.assertEqual(traiter_evenements(), 2)
+        self.assertEqual(TransactionStation.objects.count(), 2)
+
+    def test_resultat_par_id(self):
+        ok = self._relais(5, 1000)
+        critique = self._relais(3, 7500)
+        brouillon = self._relais(1, 10, status=FaitStatus.BROUILLON)
+
+        response = self.client.post(
+            URL,
+            {"ids": [ok.id, critique.id, brouillon.id, 999999], "statut": FaitStatus.TRANSFERE},
+            format="json",
+        )
+
+        resultats = {r["id"]: r for r in response.data["resultats"]}
+        self.assertTrue(resultats[ok.id]["ok"])
+        self.assertFalse(resultats[critique.id]["ok"])
+        self.assertFalse(resultats[brouillon.id]["ok"])
+        self.assertFalse(resultats[999999]["ok"])
+
+        critique.refresh_from_db()
+        self.assertEqual(critique.status, FaitStatus.VALIDE)
+        self.assertFalse(critique.stock_applique)
+
+    def test_stock_deja_applique(self):
+        deja = self._relais(5, 1000)
+        RelaisEquipe.objects.filter(pk=deja.pk).update(stock_applique=True)
+        ok = self._relais(3, 1000)
+
+        response = self.client.post(
+            URL,
+            {"ids": [deja.id, ok.id], "statut": FaitStatus.TRANSFERE},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        resultats = {r["id"]: r for r in response.data["resultats"]}
+        self.assertFalse(resultats[deja.id]["ok"])
+        self.assertEqual(resultats[deja.id]["detail"], "Stock déjà appliqué.")
+        self.assertTrue(resultats[ok.id]["ok"])
+
+    def test_role_verifie_par_statut(self):
+        r1 = self._relais(5, 1000, status=FaitStatus.BROUILLON)
+
+        response = self.client.post(
+            URL,
+            {"ids": [r1.id], "statut": FaitStatus.SOUMIS},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 403)
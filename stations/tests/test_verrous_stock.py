@@ -0,0 +1,151 @@
+import threading
+from contextlib import nullcontext
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.db import OperationalError, connection, connections
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+
+from core import metrics
+from stations.models import Station
+from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_produit import ProduitCarburant
+from stations.services.verrous import executer_avec_reprise, verrouiller_cuves
+from tenants.models import Tenant
+
+
+class _Conflit(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+def _erreur_db(sqlstate):
+    try:
+        raise _Conflit(sqlstate)
+    except _Conflit as cause:
+        try:
+            raise OperationalError(sqlstate) from cause
+        except OperationalError as exc:
+            return exc
+
+
+def _creer_station(nb_produits=2, stock=Decimal("100000")):
+    tenant = Tenant.objects.create(nom="Tenant Test", type_structure="SA")
+    station = Station.objects.create(tenant=tenant, nom="Station A", adresse="Dakar")
+
+    cuves = []
+    for code in ["GASOIL", "SUPER", "PETROLE"][:nb_produits]:
+        produit = ProduitCarburant.objects.create(tenant=tenant, nom=code, code=code)
+        cuves.append(Cuve.objects.create(
+            tenant=tenant,
+            station=station,
+            produit=produit,
+            reference=f"CUV-{code}-01",
+            capacite_max=Decimal("200000"),
+            stock_actuel=stock,
+            statut=CuveStatus.ACTIVE,
+        ))
+
+    return station, cuves
+
+
+class VerrouillageCuvesTestCase(TestCase):
+
+    def setUp(self):
+        metrics.reinitialiser()
+        self.station, self.cuves = _creer_station()
+
+    def test_ordre_global(self):
+        paires = [(c.station_id, c.produit_id) for c in reversed(self.cuves)]
+
+        cuves = verrouiller_cuves(paires=paires)
+
+        self.assertEqual(
+            [c.id for c in cuves],
+            [c.id for c in sorted(self.cuves, key=lambda c: (c.produit_id, c.id))],
+        )
+        self.assertEqual(metrics.valeur("stock_lock_acquisitions_total", mode="row"), 1)
+
+    def test_reprise_sur_interblocage(self):
+        appels = []
+
+        def operation():
+            appels.append(1)
+            if len(appels) < 3:
+                raise _erreur_db("40P01")
+            return "ok"
+
+        with mock.patch.object(connection, "in_atomic_block", False), \
+                mock.patch("stations.services.verrous.atomic_tenant", nullcontext), \
+                mock.patch("stations.services.verrous.time.sleep"):
+            self.assertEqual(executer_avec_reprise(operation), "ok")
+
+        self.assertEqual(len(appels), 3)
+        self.assertEqual(metrics.valeur("stock_lock_retries_total", sqlstate="40P01"), 2)
+
+    def test_pas_de_reprise_hors_conflit(self):
+        def operation():
+            raise _erreur_db("23505")
+
+        with mock.patch.object(connection, "in_atomic_block", False), \
+                mock.patch("stations.services.verrous.atomic_tenant", nullcontext), \
+                mock.patch("stations.services.verrous.time.sleep"):
+            with self.assertRaises(OperationalError):
+                executer_avec_reprise(operation)
+
+
+@skipUnless(connection.vendor == "postgresql", "Stress test PostgreSQL uniquement")
+class ConcurrenceStockTestCase(TransactionTestCase):
+    """
+    Plusieurs threads prennent les mêmes cuves en ordre inverse :
+    sans protocole ordonné, PostgreSQL détecte des interblocages.
+    """
+
+    NB_THREADS = 8
+    ITERATIONS = 25
+
+    def setUp(self):
+        metrics.reinitialiser()
+        self.station, self.cuves = _creer_station(nb_produits=3)
+
+    def _travailleur(self, index, erreurs):
+        paires = [(c.station_id, c.produit_id) for c in self.cuves]
+        if index % 2:
+            paires.reverse()
+
+        def sortie():
+            for cuve in verrouiller_cuves(paires=paires):
+                Cuve.objects.filter(pk=cuve.pk).update(
+                    stock_actuel=F("stock_actuel") - 1
+                )
+
+        try:
+            for _ in range(self.ITERATIONS):
+                executer_avec_reprise(sortie)
+        except Exception as exc:  # noqa: BLE001 - remonté au thread principal
+            erreurs.append(exc)
+        finally:
+            connections.close_all()
+
+    def test_aucun_interblocage_ni_perte(self):
+        erreurs = []
+        threads = [
+            threading.Thread(target=self._travailleur, args=(i, erreurs))
+            for i in range(self.NB_THREADS)
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erreurs, [])
+        # Ordre global : aucun interblocage à rejouer
+        self.assertEqual(metrics.valeur("stock_lock_retries_total", sqlstate="40P01"), 0)
+
+        attendu = Decimal("100000") - self.NB_THREADS * self.ITERATIONS
+        for cuve in self.cuves:
+            cuve.refresh_from_db()
+            self.assertEqual(cuve.stock_actuel, attendu)
@@ -9,12 +9,17 @@ from .views_depotage.depotage import DepotageViewSet
 
 from .dashboard_views import StationRelaisListView
 from .views_operations import StationLastOperationsAPIView
+from .views_analytique import AnalytiqueView
+from .views_archives import ArchiveLignesView, ArchivesView
+from .views_bilans import BilanMensuelViewSet
+from .views_cloture import ClotureJournaliereViewSet
 from accounts.views import PersonnelStationViewSet
 
 from .views import (
     CuveViewSet,
     IndexPompeActifListView,
     IndexPompeViewSet,
+    StationConfigurationAPIView,
     PompeViewSet,
     PrixCarburantViewSet,
     ProduitCarburantViewSet,
@@ -71,6 +76,18 @@ router.register(
     basename="mouvements-stock"
 )
 
+router.register(
+    r"clotures",
+    ClotureJournaliereViewSet,
+    basename="clotures"
+)
+
+router.register(
+    r"bilans",
+    BilanMensuelViewSet,
+    basename="bilans"
+)
+
 
 urlpatterns = [
     path("stock/global/", StockGlobalStationView.as_view()),
@@ -83,6 +100,11 @@ urlpatterns = [
         "index-pompes/actifs/",
         IndexPompeActifListView.as_view(),
     ),
+    path(
+        "configuration/",
+        StationConfigurationAPIView.as_view(),
+        name="station-configuration",
+    ),
     path(
         "station/relais-equipes/",
         StationRelaisListView.as_view(),
@@ -98,6 +120,13 @@ urlpatterns = [
         AdminTenantStationDashboardAPIView.as_view(),
         name="admin-tenant-station-dashboard",
     ),  
+    path("analytique/", AnalytiqueView.as_view(), name="station-analytique"),
+    path("archives/", ArchivesView.as_view(), name="station-archives"),
+    path(
+        "archives/<slug:archive>/",
+        ArchiveLignesView.as_view(),
+        name="station-archive-lignes",
+    ),
     path("dashboard/", StationDashboardView.as_view(), name="station-dashboard"),
     path("", include(router.urls)),
 ]
\ No newline at end of file
@@ -1,13 +1,11 @@
 # saas-backend/stations/views.py
 
-from django.db.models import DecimalField as ModelDecimalField
 from rest_framework import status
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.db.models import Count, Sum, Q
+from django.db.models import Count, Prefetch, Sum
 from django.db import transaction
 from django.utils import timezone
-from django.utils.timezone import now
-from django.db.models.functions import TruncDate
+from django.utils.cache import get_conditional_response
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework.viewsets import ModelViewSet
@@ -21,14 +19,29 @@ from rest_framework.generics import ListAPIView
 
 from accounts.constants import UserRole
 from accounts.models import Utilisateur
-from django.db.models.functions import Coalesce
 
+from core import profilage
+from core.conditional import ConditionalGetMixin
+from core.export import ExportMixin
+from core.db_router import atomic_tenant, lecture_replica
 from core.pagination import StandardResultsSetPagination
 from dashboard.permissions import IsAdminTenantStation
 from finances_station.models import TransactionStation
-from stations.models_depotage.cuve import Cuve, CuveStatus
+from stations.models_depotage.cuve import Cuve
 from stations.models_produit import PrixCarburant, ProduitCarburant
-from stations.services.stock import get_capacite_totale_produit, get_seuil_critique_reel, get_stock_global_produit
+from stations.services.stock import (
+    annoter_stock_global,
+    get_capacite_totale_produit,
+    get_seuil_critique_reel,
+    get_stock_global_produit,
+)
+from stations.services.configuration import etag_configuration, get_configuration_station
+from stations.services.prix import appliquer_prix_multi_stations
+from stations.services.cloture import historique
+from stations.services.cuve import changer_statut_cuve
+from stations.services.stock_ledger import annoter_stock_reel, mode_ledger
+from stations.services.verrous import executer_avec_reprise
+from stations.services.workflow import transitionner_relais_en_masse
 
 from .models import (
     IndexPompe,
@@ -43,10 +56,12 @@ from .serializers import (
     IndexPompeWriteSerializer,
     PompeActiveSerializer,
     PompeSerializer,
+    PrixCarburantBulkSerializer,
     PrixCarburantSerializer,
     ProduitCarburantSerializer,
     StationSerializer,
     RelaisEquipeSerializer,
+    TransitionMasseSerializer,
 )
 from .permissions import CanAccessStations, IsStationAdminOrActor
 
@@ -106,7 +121,8 @@ class StationViewSet(ModelViewSet):
                 {"gerant": "Un GERANT est obligatoire."}
             )
 
-        with transaction.atomic():
+        # Station (base du tenant) et gérant (base partagée) ensemble
+        with atomic_tenant(), transaction.atomic():
 
             # 1️⃣ Création station
             station = serializer.save(tenant=user.tenant)
@@ -146,7 +162,20 @@ class CuveViewSet(ModelViewSet):
     serializer_class = CuveSerializer
     permission_classes = [IsAuthenticated]
 
+    # Requêtes SQL max par action (cf. core.testing)
+    query_budget = {"list": 2, "retrieve": 1}
+
     def get_queryset(self):
+        # produit_code sérialisé : jointure plutôt qu'une requête par cuve
+        queryset = self._get_queryset_role().select_related("produit")
+
+        # Mode LEDGER : stock affiché = checkpoint + deltas non compactés
+        if mode_ledger():
+            queryset = annoter_stock_reel(queryset)
+
+        return queryset
+
+    def _get_queryset_role(self):
         user = self.request.user
 
         # 🔹 AdminTenantStation → toutes les stations administrées
@@ -206,7 +235,7 @@ class CuveViewSet(ModelViewSet):
             )
 
         try:
-            cuve.changer_statut(nouveau_statut)
+            executer_avec_reprise(changer_statut_cuve, cuve, nouveau_statut)
         except DjangoValidationError as e:
             return Response(
                 {"detail": e.message},
@@ -228,31 +257,9 @@ class ProduitCarburantViewSet(ModelViewSet):
     def get_queryset(self):
         user = self.request.user
 
-        return (
-            ProduitCarburant.objects
-            .filter(tenant=user.tenant)
-            .annotate(
-                stock_global=Coalesce(
-                    Sum(
-                        "cuves__stock_actuel",
-                        filter=Q(
-                            cuves__statut__in=[
-                                CuveStatus.ACTIVE,
-                                CuveStatus.STANDBY,
-                            ]
-                        ),
-                        output_field=ModelDecimalField(
-                            max_digits=12,
-                            decimal_places=2,
-                        ),
-                    ),
-                    0,
-                    output_field=ModelDecimalField(
-                        max_digits=12,
-                        decimal_places=2,
-                    ),
-                )
-            )
+        # Stock global : deltas non compactés inclus (mode LEDGER)
+        return annoter_stock_global(
+            ProduitCarburant.objects.filter(tenant=user.tenant)
         )
 
     def perform_create(self, serializer):
@@ -312,11 +319,19 @@ class PompeViewSet(ModelViewSet):
     serializer_class = PompeSerializer
     permission_classes = [IsAdminTenantStation]
 
+    query_budget = {"list": 3, "retrieve": 2}
+
     def get_queryset(self):
         user = self.request.user
         station_id = self.request.query_params.get("station_id")
 
-        qs = Pompe.objects.all()
+        # Index imbriqués (produit_code) : 1 requête pour toute la page
+        qs = Pompe.objects.prefetch_related(
+            Prefetch(
+                "index_pompes",
+                queryset=IndexPompe.objects.select_related("produit"),
+            )
+        )
 
         # 🔐 Sécurité multi-tenant
         qs = qs.filter(station__tenant=user.tenant)
@@ -371,9 +386,11 @@ class IndexPompeViewSet(ModelViewSet):
         IsStationAdminOrActor,
     ]
 
+    query_budget = {"list": 2, "retrieve": 1}
+
     queryset = (
         IndexPompe.objects
-        .select_related("pompe", "pompe__station")
+        .select_related("pompe", "pompe__station", "produit")
     )
 
     def get_queryset(self):
@@ -381,7 +398,7 @@ class IndexPompeViewSet(ModelViewSet):
 
         qs = (
             IndexPompe.objects
-            .select_related("pompe", "pompe__station")
+            .select_related("pompe", "pompe__station", "produit")
         )
 
         # 🔒 ADMIN TENANT
@@ -484,9 +501,61 @@ class IndexPompeActifListView(ListAPIView):
         return Response(data)
 
 
+class StationConfigurationAPIView(APIView):
+    """
+    Snapshot complet du paramétrage station pour les tablettes :
+    pompes, index actifs, produits, prix actifs et cuves.
+
+    ETag = version de configuration de la station.
+    If-None-Match (liste d'ETags, comparaison faible, *) → 304 sans
+    construire le payload.
+    """
+    permission_classes = [IsAuthenticated, IsStationAdminOrActor]
+
+    def get(self, request):
+        user = request.user
+
+        # 🎯 AdminTenantStation : station explicite
+        if user.role == UserRole.ADMIN_TENANT_STATION:
+            station_id = request.query_params.get("station_id")
+
+            if not station_id:
+                return Response(
+                    {"detail": "station_id requis pour AdminTenantStation"},
+                    status=400
+                )
+
+            station = Station.objects.filter(
+                id=station_id,
+                tenant=user.tenant
+            ).first()
+        else:
+            # Relue en base : user.station, mis en cache sur l'instance
+            # utilisateur, peut porter une config_version périmée
+            station = Station.objects.filter(pk=user.station_id).first()
+
+        if not station:
+            return Response(
+                {"detail": "Station invalide"},
+                status=404
+            )
+
+        etag = etag_configuration(station)
+
+        # En-tête analysé par Django (parse_etags, W/ ignoré, égalité exacte)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(get_configuration_station(station))
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
 class StationDashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @lecture_replica
     def get(self, request):
         user = request.user
 
@@ -498,76 +567,38 @@ class StationDashboardView(APIView):
             )
 
         station = user.station
-        today = now().date()
-
-        # =========================
-        # BASE TRANSACTIONS STATION
-        # =========================
-        qs = TransactionStation.objects.filter(
-            station=station
-        )
-
-        # =========================
-        # KPI JOUR
-        # =========================
-        qs_jour = qs.filter(date=today)
-
-        recettes_jour = (
-            qs_jour.filter(type="RECETTE")
-            .aggregate(total=Sum("montant"))["total"] or 0
-        )
-
-        depenses_jour = (
-            qs_jour.filter(type="DEPENSE")
-            .aggregate(total=Sum("montant"))["total"] or 0
-        )
+        today = timezone.localdate()
 
         # =========================
-        # KPI MOIS
+        # JOURS DU MOIS
+        # Clôtures figées, agrégats bruts pour le jour en cours
         # =========================
-        qs_mois = qs.filter(
-            date__year=today.year,
-            date__month=today.month
-        )
+        jours = historique([station.id], today.replace(day=1), today)
 
-        recettes_mois = (
-            qs_mois.filter(type="RECETTE")
-            .aggregate(total=Sum("montant"))["total"] or 0
-        )
+        vide = {"recettes": 0, "depenses": 0}
+        recettes_jour = jours.get(today, vide)["recettes"]
+        depenses_jour = jours.get(today, vide)["depenses"]
 
-        depenses_mois = (
-            qs_mois.filter(type="DEPENSE")
-            .aggregate(total=Sum("montant"))["total"] or 0
-        )
+        recettes_mois = sum(jour["recettes"] for jour in jours.values())
+        depenses_mois = sum(jour["depenses"] for jour in jours.values())
 
         # =========================
         # ÉVOLUTION TEMPORELLE
         # =========================
-        evolution_qs = (
-            qs_mois
-            .annotate(jour=TruncDate("date"))
-            .values("jour", "type")
-            .annotate(total=Sum("montant"))
-            .order_by("jour")
-        )
-
         evolution_map = {}
 
-        for item in evolution_qs:
-            jour = item["jour"].isoformat()
+        with profilage.segment("agregation"):
+            for jour in sorted(jours):
+                valeurs = jours[jour]
+                if not valeurs["transactions"]:
+                    continue
 
-            if jour not in evolution_map:
-                evolution_map[jour] = {
-                    "date": jour,
-                    "recettes": 0,
-                    "depenses": 0,
+                evolution_map[jour.isoformat()] = {
+                    "date": jour.isoformat(),
+                    "recettes": float(valeurs["recettes"]),
+                    "depenses": float(valeurs["depenses"]),
                 }
 
-            if item["type"] == "RECETTE":
-                evolution_map[jour]["recettes"] = float(item["total"])
-            elif item["type"] == "DEPENSE":
-                evolution_map[jour]["depenses"] = float(item["total"])
-
         # =========================
         # RESPONSE STRICTEMENT ALIGNÉE FRONT
         # =========================
@@ -585,12 +616,27 @@ class StationDashboardView(APIView):
             "evolution": list(evolution_map.values()),
         })
 
-class RelaisEquipeViewSet(ModelViewSet):
+class RelaisEquipeViewSet(ExportMixin, ConditionalGetMixin, ModelViewSet):
 
     serializer_class = RelaisEquipeSerializer
     permission_classes = [IsAuthenticated, CanAccessStations]
     pagination_class = StandardResultsSetPagination
 
+    query_budget = {"list": 4, "retrieve": 2}
+
+    export_champs = (
+        ("id", "id"),
+        ("station", "station__nom"),
+        ("debut", "debut_relais"),
+        ("fin", "fin_relais"),
+        ("equipe_sortante", "equipe_sortante"),
+        ("equipe_entrante", "equipe_entrante"),
+        ("encaisse_liquide", "encaisse_liquide"),
+        ("encaisse_carte", "encaisse_carte"),
+        ("encaisse_ticket", "encaisse_ticket"),
+        ("statut", "status"),
+    )
+
     def get_queryset(self):
         user = self.request.user
 
@@ -697,25 +743,65 @@ class RelaisEquipeViewSet(ModelViewSet):
     @action(detail=True, methods=["post"])
     def transferer(self, request, pk=None):
 
-        relais = self.get_object()
+        self.get_object()
 
         if request.user.role != UserRole.GERANT:
             return Response({"detail": "Non autorisé"}, status=403)
 
-        try:
-            relais.changer_statut(
-                FaitStatus.TRANSFERE,
-                request.user
+        def _transferer():
+            # Relu et verrouillé à chaque tentative : relais, puis cuves
+            relais = (
+                self.get_queryset()
+                .select_for_update(of=("self",))
+                .get(pk=pk)
             )
+            relais.changer_statut(FaitStatus.TRANSFERE, request.user)
+            return relais
+
+        try:
+            relais = executer_avec_reprise(_transferer)
         except ValidationError as e:
             return Response({"detail": str(e)}, status=400)
 
         return Response({"status": relais.status})
 
+    # ======================
+    # TRANSITIONS GROUPÉES
+    # ======================
+    ROLES_TRANSITION = {
+        FaitStatus.SOUMIS: (UserRole.POMPISTE, UserRole.SUPERVISEUR),
+        FaitStatus.VALIDE: (UserRole.SUPERVISEUR,),
+        FaitStatus.TRANSFERE: (UserRole.GERANT,),
+    }
+
+    @action(detail=False, methods=["post"])
+    def transitions(self, request):
+        serializer = TransitionMasseSerializer(
+            data=request.data,
+            context={"statuts": list(self.ROLES_TRANSITION)}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        statut = serializer.validated_data["statut"]
+
+        if request.user.role not in self.ROLES_TRANSITION[statut]:
+            return Response({"detail": "Non autorisé"}, status=403)
+
+        rapport = executer_avec_reprise(
+            transitionner_relais_en_masse,
+            self.get_queryset(),
+            serializer.validated_data["ids"],
+            statut,
+            request.user,
+        )
+
+        return Response(rapport)
+
 
 class AdminTenantStationDashboardAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @lecture_replica
     def get(self, request):
         user = request.user
 
@@ -750,6 +836,7 @@ class AdminTenantStationDashboardAPIView(APIView):
 class AdminTenantStationDashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @lecture_replica
     def get(self, request):
         user = request.user
 
@@ -847,6 +934,8 @@ class PrixCarburantViewSet(ModelViewSet):
     serializer_class = PrixCarburantSerializer
     permission_classes = [IsAuthenticated]
 
+    query_budget = {"list": 2, "retrieve": 1}
+
     def get_queryset(self):
         user = self.request.user
 
@@ -881,4 +970,46 @@ class PrixCarburantViewSet(ModelViewSet):
             actif=False
         )
 
-        instance.activer()
\ No newline at end of file
+        instance.activer()
+
+    # ======================
+    # CHANGEMENT DE PRIX MULTI-STATIONS
+    # ======================
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        user = request.user
+
+        if user.role != UserRole.ADMIN_TENANT_STATION:
+            raise PermissionDenied("Non autorisé.")
+
+        serializer = PrixCarburantBulkSerializer(
+            data=request.data,
+            context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        stations = serializer.validated_data.get("stations")
+
+        if stations:
+            station_ids = [s.id for s in stations]
+        else:
+            station_ids = list(
+                Station.objects.filter(
+                    tenant=user.tenant,
+                    active=True
+                ).values_list("id", flat=True)
+            )
+
+        if not station_ids:
+            raise ValidationError(
+                {"stations": "Aucune station cible."}
+            )
+
+        resultat = appliquer_prix_multi_stations(
+            tenant=user.tenant,
+            user=user,
+            lignes=serializer.validated_data["prix"],
+            station_ids=station_ids,
+        )
+
+        return Response(resultat, status=status.HTTP_201_CREATED)
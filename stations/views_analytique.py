@@ -0,0 +1,52 @@
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from stations.permissions import IsAdminTenantStation
+from stations.serializers import RequeteAnalytiqueSerializer
+from stations.services.analytique import FAITS, AnalytiqueError, dimensions, etat, requeter
+
+
+class AnalytiqueView(APIView):
+    """
+    Agrégats sur l'export Parquet du tenant (DuckDB), sans lecture OLTP.
+
+    GET : faits, mesures et dimensions disponibles, date du dernier export.
+    POST : {"fait": "relais", "mesures": ["volume"],
+            "dimensions": ["region", "mois"], "filtres": {"produit": "GASOIL"},
+            "debut": "2026-01", "fin": "2026-09"}
+    """
+
+    permission_classes = [IsAdminTenantStation]
+
+    def get(self, request):
+        return Response({
+            "export": etat(),
+            "faits": {
+                nom: {
+                    "mesures": sorted(fait.mesures),
+                    "dimensions": sorted(dimensions(fait)),
+                }
+                for nom, fait in FAITS.items()
+            },
+        })
+
+    def post(self, request):
+        serializer = RequeteAnalytiqueSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        donnees = serializer.validated_data
+
+        try:
+            resultat = requeter(
+                request.user.tenant_id,
+                donnees["fait"],
+                donnees["mesures"],
+                donnees["dimensions"],
+                donnees["filtres"],
+                donnees.get("debut"),
+                donnees.get("fin"),
+                donnees["limite"],
+            )
+        except AnalytiqueError as exc:
+            return Response({"detail": str(exc)}, status=400)
+
+        return Response(resultat)
@@ -0,0 +1,105 @@
+import re
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from stations.permissions import IsAdminTenantStation
+from stations.services.archives import ARCHIVES_PAR_NOM, ArchiveError, lire, parties
+
+_MOIS = re.compile(r"^\d{4}-\d{2}$")
+
+# Filtres d'égalité acceptés sur les lignes archivées
+FILTRES = ("station_id", "relais_id", "cuve_id", "type", "type_mouvement", "source_type")
+
+TAILLE_PAGE = 50
+TAILLE_PAGE_MAX = 500
+
+
+def _mois(request, nom):
+    valeur = request.query_params.get(nom)
+    if valeur and not _MOIS.match(valeur):
+        raise ValidationError({nom: "Format attendu : AAAA-MM."})
+    return valeur
+
+
+def _entier(request, nom, defaut, maximum=None):
+    try:
+        valeur = int(request.query_params.get(nom, defaut))
+    except ValueError:
+        raise ValidationError({nom: "Entier attendu."})
+    if valeur < 1:
+        raise ValidationError({nom: "Doit être positif."})
+    return min(valeur, maximum) if maximum else valeur
+
+
+class ArchivesView(APIView):
+    """
+    Périodes archivées du tenant (manifeste), sans lecture des fichiers.
+    """
+
+    permission_classes = [IsAdminTenantStation]
+
+    def get(self, request):
+        selection = parties(
+            request.user.tenant_id,
+            request.query_params.get("archive"),
+            _mois(request, "debut"),
+            _mois(request, "fin"),
+        )
+        return Response([
+            {
+                "archive": partie["archive"],
+                "mois": partie["mois"],
+                "lignes": partie["lignes"],
+                "archive_le": partie["archive_le"],
+            }
+            for partie in selection
+        ])
+
+
+class ArchiveLignesView(APIView):
+    """
+    Lignes archivées, lues à la demande dans les fichiers de la
+    période (debut / fin : AAAA-MM). Le comptage parcourt toute la
+    période : seule la page demandée est gardée en mémoire.
+    """
+
+    permission_classes = [IsAdminTenantStation]
+
+    def get(self, request, archive):
+        if archive not in ARCHIVES_PAR_NOM:
+            raise NotFound("Archive inconnue.")
+
+        page = _entier(request, "page", 1)
+        taille = _entier(request, "page_size", TAILLE_PAGE, TAILLE_PAGE_MAX)
+        filtres = {
+            champ: request.query_params[champ]
+            for champ in FILTRES
+            if champ in request.query_params
+        }
+
+        lignes = lire(
+            request.user.tenant_id,
+            archive,
+            _mois(request, "debut"),
+            _mois(request, "fin"),
+            filtres,
+        )
+
+        premiere = (page - 1) * taille
+        resultats = []
+        total = 0
+        try:
+            for ligne in lignes:
+                if premiere <= total < premiere + taille:
+                    resultats.append(ligne)
+                total += 1
+        except ArchiveError as exc:
+            return Response({"detail": str(exc)}, status=500)
+
+        return Response({
+            "count": total,
+            "page": page,
+            "results": resultats,
+        })
@@ -0,0 +1,63 @@
+from django.http import FileResponse
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from stations.models_bilan import BilanMensuel
+from stations.permissions import IsAdminTenantStation
+from stations.serializers import BilanMensuelSerializer, DemanderBilanSerializer
+from stations.services.bilans import BilanError, chemin, demander, mois_demande
+
+
+class BilanMensuelViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, GenericViewSet):
+    """
+    Dossiers de fin de mois du tenant.
+
+    POST {"mois": "AAAA-MM"} : génération en tâche de fond (202) ;
+    suivi par GET sur le bilan (progression) ou /api/v1/taches/<tache_id>/ ;
+    archive par GET .../telecharger/ une fois PRET.
+    """
+
+    serializer_class = BilanMensuelSerializer
+    permission_classes = [IsAdminTenantStation]
+
+    def get_queryset(self):
+        return BilanMensuel.objects.filter(tenant_id=self.request.user.tenant_id)
+
+    def create(self, request):
+        serializer = DemanderBilanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            bilan = demander(
+                request.user.tenant_id,
+                mois_demande(serializer.validated_data["mois"]),
+                request.user,
+            )
+        except BilanError as exc:
+            return Response({"detail": str(exc)}, status=400)
+
+        return Response(
+            BilanMensuelSerializer(bilan).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(detail=True, methods=["get"])
+    def telecharger(self, request, pk=None):
+        bilan = self.get_object()
+
+        if bilan.statut != BilanMensuel.STATUT_PRET:
+            return Response({"detail": "Bilan non disponible."}, status=409)
+
+        fichier = chemin(bilan)
+        if not fichier.exists():
+            raise NotFound("Archive introuvable.")
+
+        return FileResponse(
+            open(fichier, "rb"),
+            as_attachment=True,
+            filename=bilan.fichier,
+            content_type="application/gzip",
+        )
@@ -0,0 +1,75 @@
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.viewsets import ReadOnlyModelViewSet
+
+from accounts.constants import UserRole
+from core.db_router import LectureReplicaMixin
+from stations.models_cloture import ClotureJournaliere
+from stations.serializers import CloturerSerializer, ClotureJournaliereSerializer
+from stations.services.cloture import ClotureError, cloturer
+
+
+class ClotureJournaliereViewSet(LectureReplicaMixin, ReadOnlyModelViewSet):
+    """
+    Clôtures journalières figées (une ligne par station et par jour).
+    Filtres : station (AdminTenantStation), debut / fin (AAAA-MM-JJ).
+    """
+
+    serializer_class = ClotureJournaliereSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        params = self.request.query_params
+
+        qs = ClotureJournaliere.objects.filter(
+            tenant_id=user.tenant_id
+        ).select_related("station")
+
+        # Acteur station : uniquement sa station
+        if getattr(user, "station_id", None):
+            qs = qs.filter(station_id=user.station_id)
+        elif params.get("station"):
+            qs = qs.filter(station_id=params["station"])
+
+        if params.get("debut"):
+            qs = qs.filter(jour__gte=params["debut"])
+        if params.get("fin"):
+            qs = qs.filter(jour__lte=params["fin"])
+
+        return qs
+
+    @action(detail=False, methods=["post"])
+    def cloturer(self, request):
+        """
+        (Re)calcule la clôture d'un jour : gérant pour sa station,
+        AdminTenantStation pour toute station du tenant.
+        """
+        if request.user.role not in (UserRole.GERANT, UserRole.ADMIN_TENANT_STATION):
+            raise PermissionDenied(
+                "Seul le gérant ou l'administrateur peut clôturer une journée."
+            )
+
+        serializer = CloturerSerializer(
+            data=request.data,
+            context={"request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            cloture, creee = cloturer(
+                serializer.validated_data["station"],
+                serializer.validated_data.get("jour") or timezone.localdate(),
+                request.user,
+            )
+        except ClotureError as exc:
+            return Response({"detail": str(exc)}, status=400)
+
+        return Response(
+            ClotureJournaliereSerializer(cloture).data,
+            status=status.HTTP_201_CREATED if creee else status.HTTP_200_OK,
+        )
@@ -17,7 +17,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.db.models import F, ExpressionWrapper, DecimalField
 
-from stations.models_depotage import Cuve
+from stations.models_produit import ProduitCarburant
+from stations.services.stock import get_stock_global_produit
 
 
 class StationOperationalDashboardAPIView(APIView):
@@ -302,12 +303,16 @@ class StationOperationalDashboardAPIView(APIView):
             # =========================
             # 1️⃣ Stock actuel
             # =========================
-            cuve = Cuve.objects.filter(
-                station=station,
-                produit=produit
+            # Toutes cuves exploitables, deltas LEDGER inclus
+            produit_carburant = ProduitCarburant.objects.filter(
+                tenant_id=station.tenant_id,
+                code=produit
             ).first()
 
-            stock_actuel = cuve.stock_actuel if cuve else 0
+            stock_actuel = (
+                get_stock_global_produit(station, produit_carburant)
+                if produit_carburant else 0
+            )
 
             # =========================
             # 2️⃣ Consommation 30 jours
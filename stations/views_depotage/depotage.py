@@ -5,20 +5,28 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 
-from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
+from core import metrics
+from core.conditional import ConditionalGetMixin
+from core.export import ExportMixin
 from dashboard.permissions import IsAdminTenantStation
 from stations.models_depotage import Depotage, Cuve, MouvementStock
+from stations.serializers import TransitionMasseSerializer
 from stations.serializers_depotage.depotage import DepotageSerializer
+from stations.services.stock import compter_mouvements
+from stations.services.stock_ledger import ajouter_mouvements, mode_ledger
+from stations.services.verrous import executer_avec_reprise, verrouiller_cuves
+from stations.services.workflow import transitionner_depotages_en_masse
 from stations.constants import DepotageStatus
 from stations.permissions import IsGerantOrSuperviseur, IsStationAdminOrActor
 
-from finances_station.models import TransactionStation
+from finances_station.services.outbox import publier_evenement
 from accounts.constants import UserRole
 
 
-class DepotageViewSet(viewsets.ModelViewSet):
+class DepotageViewSet(ExportMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API Dépotage carburant (station)
 
@@ -29,6 +37,23 @@ class DepotageViewSet(viewsets.ModelViewSet):
     serializer_class = DepotageSerializer
     permission_classes = [IsGerantOrSuperviseur]
 
+    query_budget = {"list": 3, "retrieve": 1}
+
+    export_champs = (
+        ("id", "id"),
+        ("date", "date_depotage"),
+        ("station", "station__nom"),
+        ("cuve", "cuve__reference"),
+        ("fournisseur", "fournisseur"),
+        ("bon_livraison", "bon_livraison_numero"),
+        ("quantite_commandee", "quantite_commandee"),
+        ("quantite_livree", "quantite_livree"),
+        ("quantite_acceptee", "quantite_acceptee"),
+        ("prix_unitaire", "prix_unitaire"),
+        ("montant_total", "montant_total"),
+        ("statut", "statut"),
+    )
+
     # ==========================================================
     # QUERYSET
     # ==========================================================
@@ -64,7 +89,7 @@ class DepotageViewSet(viewsets.ModelViewSet):
             return [IsGerantOrSuperviseur()]
 
         # 🔹 Transitions métier
-        if self.action in ["soumettre", "confirmer", "transferer"]:
+        if self.action in ["soumettre", "confirmer", "transferer", "transitions"]:
             return [IsGerantOrSuperviseur()]
 
         # 🔹 Sécurité par défaut
@@ -111,7 +136,7 @@ class DepotageViewSet(viewsets.ModelViewSet):
             update_fields=[
                 "statut",
                 "validated_by",
-                "validated_by",
+                "validated_at",
                 "updated_at",
             ]
         )
@@ -122,7 +147,31 @@ class DepotageViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def transferer(self, request, pk=None):
-        depotage = self.get_object()
+        self.get_object()
+
+        cuve, stock_actuel = executer_avec_reprise(
+            self._transferer, request, pk
+        )
+
+        return Response(
+            {
+                "status": "transfere",
+                "cuve": cuve.id,
+                "stock_actuel": str(stock_actuel),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def _transferer(self, request, pk):
+        """
+        Une tentative (rejouée sur interblocage) : tout est relu.
+        Ordre des verrous : dépotage, puis cuve.
+        """
+        depotage = (
+            self.get_queryset()
+            .select_for_update(of=("self",))
+            .get(pk=pk)
+        )
 
         if depotage.statut != DepotageStatus.CONFIRME:
             raise ValidationError("Dépotage non confirmé.")
@@ -130,67 +179,99 @@ class DepotageViewSet(viewsets.ModelViewSet):
         if depotage.stock_applique:
             raise ValidationError("Stock déjà appliqué.")
 
-        if not depotage.cuve:
+        if not depotage.cuve_id:
             raise ValidationError(
                 "Aucune cuve associée à ce dépotage."
             )
 
-        with transaction.atomic():
+        # 🔐 Lock cuve (anti double écriture concurrente)
+        cuves = verrouiller_cuves(cuve_ids=[depotage.cuve_id])
+
+        if not cuves or cuves[0].tenant_id != request.user.tenant_id:
+            raise ValidationError("Cuve introuvable.")
+
+        cuve = cuves[0]
+
+        # ======================================================
+        # 1️⃣ MOUVEMENT STOCK (ENTRÉE)
+        # ======================================================
+        mouvement = MouvementStock(
+            tenant_id=cuve.tenant_id,
+            station_id=cuve.station_id,
+            cuve=cuve,
+            type_mouvement=MouvementStock.MOUVEMENT_ENTREE,
+            quantite=depotage.quantite_acceptee,
+            source_type="DEPOTAGE",
+            source_id=depotage.id,
+            date_mouvement=timezone.now(),
+        )
 
-            # 🔐 Lock cuve (anti double écriture concurrente)
-            cuve = Cuve.objects.select_for_update().get(
-                pk=depotage.cuve.pk,
-                tenant=request.user.tenant,
+        # ======================================================
+        # 2️⃣ MAJ STOCK CUVE (mode LEDGER : append-only)
+        # ======================================================
+        if mode_ledger():
+            ajouter_mouvements([mouvement])
+        else:
+            mouvement.save()
+            Cuve.objects.filter(pk=cuve.pk).update(
+                stock_actuel=F("stock_actuel") + depotage.quantite_acceptee,
+                updated_at=timezone.now(),
             )
 
-            # ======================================================
-            # 1️⃣ MOUVEMENT STOCK (ENTRÉE)
-            # ======================================================
-            MouvementStock.objects.create(
-                tenant=cuve.station.tenant,
-                station=cuve.station,
-                cuve=cuve,
-                type_mouvement=MouvementStock.MOUVEMENT_ENTREE,
-                quantite=depotage.quantite_acceptee,
-                source_type="DEPOTAGE",
-                source_id=depotage.id,
-                date_mouvement=timezone.now(),
-            )
+        # ======================================================
+        # 3️⃣ DÉPENSE FINANCIÈRE (outbox → worker finances)
+        # ======================================================
+        publier_evenement(
+            tenant_id=cuve.tenant_id,
+            station_id=cuve.station_id,
+            date=timezone.now(),
+            type="DEPENSE",
+            montant=depotage.montant_total,
+            source_type="DEPOTAGE",
+            source_id=depotage.id,
+            finance_status="CONFIRMEE",
+        )
 
-            # ======================================================
-            # 2️⃣ MAJ STOCK CUVE
-            # ======================================================
-            cuve.stock_actuel += depotage.quantite_acceptee
-            cuve.save(update_fields=["stock_actuel"])
-
-            # ======================================================
-            # 3️⃣ DÉPENSE FINANCIÈRE
-            # ======================================================
-            TransactionStation.objects.create(
-                tenant=cuve.station.tenant,
-                station=cuve.station,
-                date=timezone.now(),
-                type="DEPENSE",
-                montant=depotage.montant_total,
-                source_type="DEPOTAGE",
-                source_id=depotage.id,
-                finance_status="CONFIRMEE",
-            )
+        # ======================================================
+        # 4️⃣ FINALISATION
+        # ======================================================
+        depotage.stock_applique = True
+        depotage.statut = DepotageStatus.TRANSFERE
+        depotage.save(
+            update_fields=["stock_applique", "statut", "updated_at"]
+        )
 
-            # ======================================================
-            # 4️⃣ FINALISATION
-            # ======================================================
-            depotage.stock_applique = True
-            depotage.statut = DepotageStatus.TRANSFERE
-            depotage.save(
-                update_fields=["stock_applique", "statut", "updated_at"]
-            )
+        compter_mouvements([mouvement])
+        metrics.incrementer_au_commit("depotage_transferts_total")
 
-        return Response(
-            {
-                "status": "transfere",
-                "cuve": cuve.id,
-                "stock_actuel": str(cuve.stock_actuel),
-            },
-            status=status.HTTP_200_OK,
+        return cuve, cuve.stock_actuel + depotage.quantite_acceptee
+
+    # ----------------------------------------------------------
+
+    @action(detail=False, methods=["post"])
+    def transitions(self, request):
+        """
+        Transition groupée : {"ids": [...], "statut": "CONFIRME"}
+        Résultat détaillé par dépotage.
+        """
+        serializer = TransitionMasseSerializer(
+            data=request.data,
+            context={
+                "statuts": [
+                    DepotageStatus.SOUMIS,
+                    DepotageStatus.CONFIRME,
+                    DepotageStatus.TRANSFERE,
+                ]
+            }
         )
+        serializer.is_valid(raise_exception=True)
+
+        rapport = executer_avec_reprise(
+            transitionner_depotages_en_masse,
+            self.get_queryset(),
+            serializer.validated_data["ids"],
+            serializer.validated_data["statut"],
+            request.user,
+        )
+
+        return Response(rapport, status=status.HTTP_200_OK)
@@ -1,16 +1,36 @@
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework.permissions import IsAuthenticated
 
+from core.conditional import ConditionalGetMixin
+from core.export import ExportMixin
+from core.db_router import LectureReplicaMixin
 from stations.models_depotage.mouvement_stock import MouvementStock
 from stations.serializers_depotage.mouvement_stock import MouvementStockSerializer
 
 
-class MouvementStockViewSet(ReadOnlyModelViewSet):
+class MouvementStockViewSet(LectureReplicaMixin, ExportMixin, ConditionalGetMixin, ReadOnlyModelViewSet):
     """
     Lecture seule.
     Source de vérité du stock.
     """
 
+    # Journal append-only : MAX(id) + COUNT suffit
+    validator_field = "id"
+
+    query_budget = {"list": 3, "retrieve": 1}
+
+    export_champs = (
+        ("id", "id"),
+        ("date", "date_mouvement"),
+        ("station", "station__nom"),
+        ("cuve", "cuve__reference"),
+        ("produit", "cuve__produit__code"),
+        ("type", "type_mouvement"),
+        ("quantite", "quantite"),
+        ("source", "source_type"),
+        ("source_id", "source_id"),
+    )
+
     serializer_class = MouvementStockSerializer
     permission_classes = [IsAuthenticated]
 
@@ -0,0 +1,116 @@
+# taches/cron.py
+"""
+Expressions cron à 5 champs : minute heure jour mois jour_semaine
+(0 = dimanche, 7 accepté). Syntaxe : *, n, a-b, listes a,b et pas
+*/n ou a-b/n. Jour du mois et jour de semaine tous deux restreints :
+l'un OU l'autre suffit (comme cron).
+
+    Cron("30 0 * * *").suivante(maintenant)
+"""
+
+from datetime import datetime, timedelta
+
+CHAMPS = (
+    ("minute", 0, 59),
+    ("heure", 0, 23),
+    ("jour", 1, 31),
+    ("mois", 1, 12),
+    ("jour_semaine", 0, 7),
+)
+
+# Horizon de recherche (jours) : couvre un 29 février
+HORIZON = 366 * 5
+
+
+class CronError(ValueError):
+    pass
+
+
+def _champ(texte, nom, minimum, maximum):
+    valeurs = set()
+
+    for partie in texte.split(","):
+        plage, _, pas = partie.partition("/")
+        try:
+            pas = int(pas) if pas else 1
+            if plage == "*":
+                debut, fin = minimum, maximum
+            elif "-" in plage:
+                debut, fin = map(int, plage.split("-"))
+            else:
+                debut = fin = int(plage)
+        except ValueError:
+            raise CronError(f"{nom} : « {partie} » invalide.")
+
+        if pas < 1 or not minimum <= debut <= fin <= maximum:
+            raise CronError(f"{nom} : « {partie} » hors de {minimum}-{maximum}.")
+        valeurs.update(range(debut, fin + 1, pas))
+
+    return valeurs
+
+
+class Cron:
+
+    def __init__(self, expression):
+        morceaux = expression.split()
+        if len(morceaux) != len(CHAMPS):
+            raise CronError(f"« {expression} » : 5 champs attendus.")
+
+        self.expression = expression
+        (
+            self.minutes,
+            self.heures,
+            self.jours,
+            self.mois,
+            jours_semaine,
+        ) = (
+            _champ(texte, *champ)
+            for texte, champ in zip(morceaux, CHAMPS)
+        )
+        # cron : 0 et 7 = dimanche ; datetime.weekday() : 0 = lundi
+        self.jours_semaine = {(jour - 1) % 7 for jour in jours_semaine}
+        self.jour_libre = morceaux[2] == "*"
+        self.semaine_libre = morceaux[4] == "*"
+
+    def __repr__(self):
+        return f"Cron({self.expression!r})"
+
+    def _jour_valide(self, jour):
+        if jour.month not in self.mois:
+            return False
+        dans_mois = jour.day in self.jours
+        dans_semaine = jour.weekday() in self.jours_semaine
+        if self.jour_libre or self.semaine_libre:
+            return dans_mois and dans_semaine
+        return dans_mois or dans_semaine
+
+    def suivante(self, apres):
+        """Première échéance strictement postérieure à `apres` (même fuseau)."""
+        depart = apres.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+        for decalage in range(HORIZON):
+            jour = (depart + timedelta(days=decalage)).date()
+            if not self._jour_valide(jour):
+                continue
+
+            for heure in sorted(self.heures):
+                for minute in sorted(self.minutes):
+                    echeance = datetime(
+                        jour.year, jour.month, jour.day, heure, minute,
+                        tzinfo=apres.tzinfo,
+                    )
+                    if echeance >= depart:
+                        return echeance
+
+        raise CronError(f"« {self.expression} » : aucune échéance.")
+
+    def echeances(self, apres, jusqua, limite=None):
+        """Échéances dans ]apres, jusqua], au plus `limite` (les plus récentes)."""
+        resultat = []
+        echeance = self.suivante(apres)
+        while echeance <= jusqua:
+            resultat.append(echeance)
+            if limite and len(resultat) > limite:
+                resultat.pop(0)
+            echeance = self.suivante(echeance)
+        return resultat
@@ -0,0 +1,70 @@
+# taches/management/commands/run_scheduler.py
+"""
+Planificateur des tâches périodiques (taches/services/planificateur.py).
+Peut tourner sur plusieurs nœuds : chaque échéance n'est planifiée
+qu'une fois (verrous consultatifs PostgreSQL).
+
+    python manage.py run_scheduler
+    python manage.py run_scheduler --once
+    python manage.py run_scheduler --etat
+"""
+
+import signal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from taches.models import ExecutionPeriodique
+from taches.registre import PERIODIQUES
+from taches.services.planificateur import INTERVALLE, Planificateur, tick
+
+
+class Command(BaseCommand):
+    help = "Planifie les tâches périodiques dans la file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Un seul passage")
+        parser.add_argument("--intervalle", type=float, default=INTERVALLE)
+        parser.add_argument("--etat", action="store_true", help="Afficher l'état des entrées")
+
+    def handle(self, *args, **options):
+        if options["etat"]:
+            self._etat()
+            return
+
+        if options["once"]:
+            for nom, taches in tick().items():
+                if taches:
+                    self.stdout.write(f"  {nom} : {len(taches)} tâche(s) planifiée(s)")
+            return
+
+        self.stdout.write(
+            f"Planificateur : {len(PERIODIQUES)} entrées, passage toutes les "
+            f"{options['intervalle']:g} s"
+        )
+        planificateur = Planificateur(options["intervalle"])
+        signal.signal(signal.SIGTERM, planificateur.arreter)
+        signal.signal(signal.SIGINT, planificateur.arreter)
+        planificateur.lancer()
+
+    def _etat(self):
+        etats = {etat.nom: etat for etat in ExecutionPeriodique.objects.all()}
+        for nom, entree in sorted(PERIODIQUES.items()):
+            etat = etats.get(nom)
+            if etat is None:
+                self.stdout.write(f"  {nom} [{entree.cron.expression}] : jamais évaluée")
+                continue
+
+            derniere = (
+                timezone.localtime(etat.derniere_echeance).strftime("%Y-%m-%d %H:%M")
+                if etat.derniere_echeance else "-"
+            )
+            prochaine = (
+                timezone.localtime(etat.prochaine_echeance).strftime("%Y-%m-%d %H:%M")
+                if etat.prochaine_echeance else "-"
+            )
+            self.stdout.write(
+                f"  {nom} [{entree.cron.expression}] : dernière {derniere} "
+                f"({etat.dernier_statut or '-'}), prochaine {prochaine}, "
+                f"{etat.executions} exécutions"
+            )
@@ -0,0 +1,88 @@
+# taches/management/commands/run_worker.py
+"""
+Worker de la file de tâches (taches/services/worker.py).
+
+    python manage.py run_worker                          # 1 processus, 1 thread
+    python manage.py run_worker --processus 4 --threads 2
+    python manage.py run_worker --tache stations.archiver_periodes
+    python manage.py run_worker --planificateur          # + tâches périodiques
+"""
+
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from taches.registre import REGISTRE
+from taches.services.worker import Worker
+
+
+def _processus(threads, pause, noms, planificateur=False):
+    worker = Worker(threads, pause, noms, planificateur)
+    signal.signal(signal.SIGTERM, worker.arreter)
+    signal.signal(signal.SIGINT, worker.arreter)
+    worker.lancer()
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches de fond (file PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processus", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=1, help="Threads par processus")
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=1.0,
+            help="Attente (s) quand la file est vide",
+        )
+        parser.add_argument(
+            "--tache",
+            action="append",
+            dest="noms",
+            choices=sorted(REGISTRE),
+            help="Limiter aux tâches nommées (répétable)",
+        )
+        parser.add_argument(
+            "--planificateur",
+            action="store_true",
+            help="Planifier aussi les tâches périodiques (sûr sur plusieurs nœuds)",
+        )
+
+    def handle(self, *args, **options):
+        threads, pause, noms = options["threads"], options["pause"], options["noms"]
+        self.stdout.write(
+            f"Worker : {options['processus']} processus × {threads} threads, "
+            f"{len(noms or REGISTRE)} tâches"
+        )
+
+        if options["processus"] <= 1:
+            _processus(threads, pause, noms, options["planificateur"])
+            return
+
+        # Pas de connexion partagée entre processus
+        connections.close_all()
+        contexte = multiprocessing.get_context("fork")
+        # Un seul planificateur par nœud suffit : le premier processus
+        enfants = [
+            contexte.Process(
+                target=_processus,
+                args=(threads, pause, noms, options["planificateur"] and n == 0),
+                name=f"worker-{n}",
+            )
+            for n in range(options["processus"])
+        ]
+        for enfant in enfants:
+            enfant.start()
+
+        def arreter(*args):
+            for enfant in enfants:
+                if enfant.is_alive():
+                    enfant.terminate()
+
+        signal.signal(signal.SIGTERM, arreter)
+        signal.signal(signal.SIGINT, arreter)
+
+        for enfant in enfants:
+            enfant.join()
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExecutionPeriodique',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, unique=True)),
+                ('derniere_echeance', models.DateTimeField(blank=True, null=True)),
+                ('prochaine_echeance', models.DateTimeField(blank=True, null=True)),
+                ('declenchee_le', models.DateTimeField(blank=True, null=True)),
+                ('executions', models.PositiveIntegerField(default=0)),
+                ('dernier_statut', models.CharField(blank=True, default='', max_length=15)),
+                ('derniere_duree', models.FloatField(blank=True, null=True)),
+                ('derniere_erreur', models.TextField(blank=True, default='')),
+                ('tache', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='taches.tache')),
+            ],
+            options={
+                'ordering': ['nom'],
+            },
+        ),
+    ]
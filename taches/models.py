@@ -0,0 +1,148 @@
+# taches/models.py
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Tache(models.Model):
+    """
+    Tâche de fond (file PostgreSQL, base "default").
+
+    Planifiée par taches.services.file.planifier(), prise par
+    les workers (commande run_worker) via SELECT ... FOR UPDATE
+    SKIP LOCKED, relancée avec attente exponentielle en cas d'échec.
+    """
+
+    STATUT_EN_ATTENTE = "EN_ATTENTE"
+    STATUT_EN_COURS = "EN_COURS"
+    STATUT_REUSSIE = "REUSSIE"
+    STATUT_ECHOUEE = "ECHOUEE"
+    STATUT_ANNULEE = "ANNULEE"
+
+    STATUT_CHOICES = (
+        (STATUT_EN_ATTENTE, "En attente"),
+        (STATUT_EN_COURS, "En cours"),
+        (STATUT_REUSSIE, "Réussie"),
+        (STATUT_ECHOUEE, "Échouée"),
+        (STATUT_ANNULEE, "Annulée"),
+    )
+
+    STATUTS_TERMINES = (STATUT_REUSSIE, STATUT_ECHOUEE, STATUT_ANNULEE)
+
+    # Nom déclaré avec @tache (taches/registre.py)
+    nom = models.CharField(max_length=100)
+    arguments = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    # Exécutée dans le contexte (base) du tenant
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="taches"
+    )
+
+    cree_par = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="taches_creees"
+    )
+
+    # Plus petit = plus urgent
+    priorite = models.SmallIntegerField(default=100)
+
+    statut = models.CharField(
+        max_length=15,
+        choices=STATUT_CHOICES,
+        default=STATUT_EN_ATTENTE
+    )
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    max_tentatives = models.PositiveSmallIntegerField(default=3)
+    executer_apres = models.DateTimeField(default=timezone.now)
+
+    # Suivi (polling)
+    progression = models.PositiveSmallIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True, default="")
+    resultat = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    derniere_erreur = models.TextField(blank=True, default="")
+
+    # Worker propriétaire et dernier signe de vie
+    worker = models.CharField(max_length=100, blank=True, default="")
+    battement_le = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    debut_le = models.DateTimeField(null=True, blank=True)
+    fin_le = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            models.Index(
+                fields=["priorite", "executer_apres", "id"],
+                condition=Q(statut="EN_ATTENTE"),
+                name="idx_tache_a_prendre"
+            ),
+            models.Index(
+                fields=["tenant", "statut"],
+                name="idx_tache_tenant_statut"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.nom}#{self.id} ({self.statut})"
+
+    @property
+    def terminee(self):
+        return self.statut in self.STATUTS_TERMINES
+
+    def progresser(self, progression, message=""):
+        """
+        Avancement 0..100, vaut signe de vie. À appeler entre deux
+        transactions : visible des autres connexions une fois validé.
+        """
+        self.progression = max(0, min(100, int(progression)))
+        self.message = message[:255]
+        Tache.objects.filter(pk=self.pk).update(
+            progression=self.progression,
+            message=self.message,
+            battement_le=timezone.now(),
+        )
+
+
+class ExecutionPeriodique(models.Model):
+    """
+    État d'une tâche périodique (taches/registre.py, periodique) :
+    dernière échéance traitée, dernière tâche lancée et son issue.
+    Mis à jour sous verrou consultatif : une seule exécution par
+    échéance, quel que soit le nombre de nœuds.
+    """
+
+    nom = models.CharField(max_length=100, unique=True)
+
+    derniere_echeance = models.DateTimeField(null=True, blank=True)
+    prochaine_echeance = models.DateTimeField(null=True, blank=True)
+    declenchee_le = models.DateTimeField(null=True, blank=True)
+    executions = models.PositiveIntegerField(default=0)
+
+    # Dernière tâche lancée ; statut et durée recopiés à sa fin
+    tache = models.ForeignKey(
+        Tache,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    dernier_statut = models.CharField(max_length=15, blank=True, default="")
+    derniere_duree = models.FloatField(null=True, blank=True)
+    derniere_erreur = models.TextField(blank=True, default="")
+
+    class Meta:
+        ordering = ["nom"]
+
+    def __str__(self):
+        return f"{self.nom} ({self.dernier_statut or 'jamais'})"
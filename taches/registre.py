@@ -0,0 +1,54 @@
+# taches/registre.py
+"""
+Déclaration des tâches exécutables par les workers.
+
+Dans <app>/taches.py (chargé au démarrage par TachesConfig) :
+
+    @tache("stations.cloturer_journees", max_tentatives=5)
+    def cloturer_journees(tache, debut, fin):
+        ...
+        tache.progresser(50, "mi-parcours")
+        return {"clotures": 12}        # résultat JSON
+
+La fonction reçoit la Tache puis ses arguments (JSON) ; elle
+s'exécute dans la base du tenant de la tâche. Une exception
+déclenche une relance (attente exponentielle) jusqu'à
+max_tentatives.
+
+Tâches périodiques (taches/services/planificateur.py) :
+
+    periodique(
+        "cloture-nocturne", "30 0 * * *", "stations.cloturer_journees",
+        arguments=lambda echeance: {"debut": ...},
+        rattrapage=RATTRAPAGE_TOUTES,
+    )
+
+À chaque échéance, la tâche est planifiée dans la file ; après
+un arrêt, les échéances manquées sont rattrapées : la plus récente
+seulement (RATTRAPAGE_UNE) ou chacune (RATTRAPAGE_TOUTES).
+"""
+
+from collections import namedtuple
+
+from taches.cron import Cron
+
+Definition = namedtuple("Definition", "nom fonction max_tentatives priorite")
+Periodique = namedtuple("Periodique", "nom cron tache arguments rattrapage")
+
+RATTRAPAGE_UNE = "UNE"
+RATTRAPAGE_TOUTES = "TOUTES"
+
+REGISTRE = {}
+PERIODIQUES = {}
+
+
+def tache(nom, max_tentatives=3, priorite=100):
+    def decorer(fonction):
+        REGISTRE[nom] = Definition(nom, fonction, max_tentatives, priorite)
+        return fonction
+    return decorer
+
+
+def periodique(nom, cron, tache_nom, arguments=None, rattrapage=RATTRAPAGE_UNE):
+    """`arguments` : dict, ou fonction(echeance) -> dict."""
+    PERIODIQUES[nom] = Periodique(nom, Cron(cron), tache_nom, arguments, rattrapage)
@@ -0,0 +1,30 @@
+from rest_framework import serializers
+
+from taches.models import Tache
+
+
+class TacheSerializer(serializers.ModelSerializer):
+    # Dernière ligne seulement : la trace complète reste en base
+    erreur = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Tache
+        fields = [
+            "id",
+            "nom",
+            "statut",
+            "progression",
+            "message",
+            "resultat",
+            "erreur",
+            "tentatives",
+            "max_tentatives",
+            "executer_apres",
+            "created_at",
+            "debut_le",
+            "fin_le",
+        ]
+
+    def get_erreur(self, obj):
+        lignes = obj.derniere_erreur.strip().splitlines()
+        return lignes[-1] if lignes else None
@@ -0,0 +1,242 @@
+# taches/services/file.py
+"""
+File de tâches en base (table taches_tache, base "default").
+
+- planifier : inscrit une tâche déclarée (taches/registre.py) ;
+- prendre : réserve la prochaine tâche, priorité puis ancienneté,
+  SELECT ... FOR UPDATE SKIP LOCKED (workers concurrents), dans la
+  limite de TACHES_CONCURRENCE_TENANT tâches en cours par tenant
+  (verrou consultatif par tenant le temps du comptage) ;
+- executer : lance la fonction dans la base du tenant, puis
+  REUSSIE, ou relance après TACHES_BACKOFF_BASE * 2^(n-1) s
+  (plafond TACHES_BACKOFF_MAX), ou ECHOUEE ;
+- recuperer_orphelines : tâches EN_COURS sans signe de vie depuis
+  TACHES_DELAI_ORPHELINE s (worker tué) remises en file.
+"""
+
+import logging
+import time
+import traceback
+import zlib
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import metrics
+from core.db_router import utiliser_tenant
+from taches.models import ExecutionPeriodique, Tache
+from taches.registre import REGISTRE
+
+logger = logging.getLogger(__name__)
+
+# Candidats examinés par prise (tenants saturés ignorés)
+LOT_CANDIDATS = 20
+
+# Espace des verrous consultatifs (pg_advisory_xact_lock(int, int))
+CLE_VERROU_TENANT = 4601
+
+
+class TacheError(Exception):
+    pass
+
+
+# ============================================================
+# PLANIFICATION
+# ============================================================
+
+def planifier(nom, arguments=None, tenant_id=None, priorite=None,
+              delai=0, utilisateur=None):
+    """Inscrit une tâche ; exécutable après `delai` secondes."""
+    definition = REGISTRE.get(nom)
+    if definition is None:
+        raise TacheError(f"Tâche inconnue : {nom}.")
+
+    tache = Tache.objects.create(
+        nom=nom,
+        arguments=arguments or {},
+        tenant_id=tenant_id,
+        cree_par=utilisateur,
+        priorite=definition.priorite if priorite is None else priorite,
+        max_tentatives=definition.max_tentatives,
+        executer_apres=timezone.now() + timedelta(seconds=delai),
+    )
+    metrics.incrementer("taches_planifiees_total", tache=nom)
+    return tache
+
+
+def annuler(tache):
+    """Annule une tâche pas encore prise ; False sinon."""
+    return bool(
+        Tache.objects
+        .filter(pk=tache.pk, statut=Tache.STATUT_EN_ATTENTE)
+        .update(statut=Tache.STATUT_ANNULEE, fin_le=timezone.now())
+    )
+
+
+# ============================================================
+# PRISE
+# ============================================================
+
+def _tenant_sature(cursor, tenant_id, limite):
+    if cursor.db.vendor == "postgresql":
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, %s)",
+            # Clé int4 dérivée de l'UUID du tenant
+            [CLE_VERROU_TENANT, zlib.crc32(str(tenant_id).encode()) & 0x7FFFFFFF],
+        )
+    en_cours = Tache.objects.filter(
+        tenant_id=tenant_id,
+        statut=Tache.STATUT_EN_COURS,
+    ).count()
+    return en_cours >= limite
+
+
+def prendre(worker, noms=None):
+    """
+    Réserve la prochaine tâche exécutable (statut EN_COURS,
+    tentative comptée) ; None si la file est vide.
+    """
+    limite = settings.TACHES_CONCURRENCE_TENANT
+    maintenant = timezone.now()
+    connexion = connections[DEFAULT_DB_ALIAS]
+
+    with transaction.atomic(using=connexion.alias), connexion.cursor() as cursor:
+        candidats = (
+            Tache.objects
+            .select_for_update(skip_locked=True)
+            .filter(statut=Tache.STATUT_EN_ATTENTE, executer_apres__lte=maintenant)
+            .order_by("priorite", "executer_apres", "id")
+        )
+        if noms:
+            candidats = candidats.filter(nom__in=noms)
+
+        for tache in candidats[:LOT_CANDIDATS]:
+            if tache.tenant_id and limite and _tenant_sature(cursor, tache.tenant_id, limite):
+                continue
+
+            tache.statut = Tache.STATUT_EN_COURS
+            tache.tentatives += 1
+            tache.worker = worker[:100]
+            tache.debut_le = tache.battement_le = maintenant
+            tache.save(update_fields=[
+                "statut", "tentatives", "worker", "debut_le", "battement_le",
+            ])
+            return tache
+
+    return None
+
+
+# ============================================================
+# EXÉCUTION
+# ============================================================
+
+def attente_relance(tentatives):
+    """Secondes avant la tentative suivante."""
+    return min(
+        settings.TACHES_BACKOFF_BASE * 2 ** max(tentatives - 1, 0),
+        settings.TACHES_BACKOFF_MAX,
+    )
+
+
+def _echec(tache, erreur):
+    maintenant = timezone.now()
+    champs = {"derniere_erreur": erreur[-4000:], "worker": ""}
+
+    if tache.tentatives < tache.max_tentatives:
+        champs.update(
+            statut=Tache.STATUT_EN_ATTENTE,
+            executer_apres=maintenant + timedelta(seconds=attente_relance(tache.tentatives)),
+        )
+    else:
+        champs.update(statut=Tache.STATUT_ECHOUEE, fin_le=maintenant)
+
+    Tache.objects.filter(pk=tache.pk).update(**champs)
+    return champs["statut"]
+
+
+def executer(tache):
+    """Exécute une tâche prise par prendre() ; retourne son statut final."""
+    definition = REGISTRE.get(tache.nom)
+    debut = time.monotonic()
+
+    if definition is None:
+        # Code retiré depuis la planification : inutile d'insister
+        tache.tentatives = tache.max_tentatives
+        statut = _echec(tache, f"Tâche inconnue : {tache.nom}.")
+
+    else:
+        try:
+            with ExitStack() as pile:
+                if tache.tenant_id:
+                    pile.enter_context(utiliser_tenant(tache.tenant_id))
+                resultat = definition.fonction(tache, **tache.arguments)
+
+        except Exception:  # noqa: BLE001 - toute erreur de tâche est relancée
+            logger.exception("Tâche %s en échec (tentative %s).", tache, tache.tentatives)
+            statut = _echec(tache, traceback.format_exc())
+
+        else:
+            statut = Tache.STATUT_REUSSIE
+            Tache.objects.filter(pk=tache.pk).update(
+                statut=statut,
+                resultat=resultat,
+                progression=100,
+                worker="",
+                fin_le=timezone.now(),
+            )
+
+    duree = time.monotonic() - debut
+    metrics.incrementer("taches_executees_total", tache=tache.nom, statut=statut)
+    metrics.observer("tache_duree_secondes", duree, tache=tache.nom)
+    if statut in Tache.STATUTS_TERMINES:
+        ExecutionPeriodique.objects.filter(tache_id=tache.pk).update(
+            dernier_statut=statut,
+            derniere_duree=duree,
+        )
+    tache.statut = statut
+    return statut
+
+
+# ============================================================
+# SIGNES DE VIE
+# ============================================================
+
+def battre(ids):
+    """Signe de vie des tâches en cours d'un worker."""
+    if ids:
+        Tache.objects.filter(
+            pk__in=ids,
+            statut=Tache.STATUT_EN_COURS,
+        ).update(battement_le=timezone.now())
+
+
+def recuperer_orphelines():
+    """
+    Remet en file (ou clôt si tentatives épuisées) les tâches
+    EN_COURS dont le worker ne donne plus signe de vie.
+    Retourne le nombre de tâches récupérées.
+    """
+    limite = timezone.now() - timedelta(seconds=settings.TACHES_DELAI_ORPHELINE)
+    orphelines = Tache.objects.filter(
+        statut=Tache.STATUT_EN_COURS,
+        battement_le__lt=limite,
+    )
+
+    erreur = "Worker interrompu pendant l'exécution."
+    epuisees = orphelines.filter(tentatives__gte=F("max_tentatives")).update(
+        statut=Tache.STATUT_ECHOUEE,
+        derniere_erreur=erreur,
+        worker="",
+        fin_le=timezone.now(),
+    )
+    relancees = orphelines.update(
+        statut=Tache.STATUT_EN_ATTENTE,
+        derniere_erreur=erreur,
+        worker="",
+        executer_apres=timezone.now(),
+    )
+    return epuisees + relancees
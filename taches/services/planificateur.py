@@ -0,0 +1,162 @@
+# taches/services/planificateur.py
+"""
+Planificateur des tâches périodiques (taches/registre.py, periodique).
+
+Chaque nœud peut le faire tourner (commande run_scheduler ou
+run_worker --planificateur) : une entrée n'est évaluée que sous
+pg_try_advisory_lock (clé dérivée de son nom) et son état
+(ExecutionPeriodique) est validé avant libération du verrou ; un
+autre nœud voit donc l'échéance déjà traitée. Verrou pris par un
+autre nœud : entrée ignorée pour ce passage.
+
+Les échéances sont calculées dans le fuseau TIME_ZONE. Une entrée
+jamais vue démarre à maintenant (pas de rattrapage historique) ;
+au-delà, rattrapage sur RATTRAPAGE_MAX_JOURS au plus.
+"""
+
+import logging
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+from django.utils import timezone
+
+from taches.models import ExecutionPeriodique, Tache
+from taches.registre import PERIODIQUES, RATTRAPAGE_TOUTES
+from taches.services.file import planifier
+
+logger = logging.getLogger(__name__)
+
+# Espace des verrous consultatifs (pg_try_advisory_lock(int, int))
+CLE_VERROU_PERIODIQUE = 4602
+
+RATTRAPAGE_MAX_JOURS = 31
+
+# Secondes entre deux passages (granularité cron : la minute)
+INTERVALLE = 30
+
+
+@contextmanager
+def _verrou(nom):
+    """True si ce nœud détient l'entrée (verrou de session)."""
+    connexion = connections[DEFAULT_DB_ALIAS]
+    if connexion.vendor != "postgresql":
+        yield True
+        return
+
+    cle = zlib.crc32(nom.encode()) & 0x7FFFFFFF
+    with connexion.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_try_advisory_lock(%s, %s)",
+            [CLE_VERROU_PERIODIQUE, cle],
+        )
+        (obtenu,) = cursor.fetchone()
+
+    try:
+        yield obtenu
+    finally:
+        if obtenu:
+            with connexion.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_unlock(%s, %s)",
+                    [CLE_VERROU_PERIODIQUE, cle],
+                )
+
+
+def _arguments(entree, echeance):
+    if callable(entree.arguments):
+        return entree.arguments(echeance)
+    return entree.arguments or {}
+
+
+def _traiter(entree, maintenant):
+    """Planifie les échéances dues de l'entrée ; retourne les tâches créées."""
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        etat, cree = ExecutionPeriodique.objects.select_for_update().get_or_create(
+            nom=entree.nom
+        )
+
+        depart = etat.derniere_echeance
+        if cree or depart is None:
+            depart = maintenant
+        depart = max(
+            timezone.localtime(depart),
+            maintenant - timedelta(days=RATTRAPAGE_MAX_JOURS),
+        )
+
+        limite = None if entree.rattrapage == RATTRAPAGE_TOUTES else 1
+        echeances = entree.cron.echeances(depart, maintenant, limite)
+
+        taches = []
+        for echeance in echeances:
+            taches.append(planifier(entree.tache, _arguments(entree, echeance)))
+
+        if echeances:
+            etat.derniere_echeance = echeances[-1]
+            etat.declenchee_le = maintenant
+            etat.executions += len(echeances)
+            etat.tache = taches[-1]
+            etat.dernier_statut = Tache.STATUT_EN_ATTENTE
+            etat.derniere_duree = None
+            etat.derniere_erreur = ""
+        elif etat.derniere_echeance is None:
+            etat.derniere_echeance = maintenant
+
+        etat.prochaine_echeance = entree.cron.suivante(maintenant)
+        etat.save()
+
+    return taches
+
+
+def tick(maintenant=None):
+    """
+    Un passage sur toutes les entrées. Retourne {nom: tâches créées}
+    (entrées détenues par ce nœud seulement).
+    """
+    maintenant = timezone.localtime(maintenant or timezone.now())
+    resultat = {}
+
+    for nom, entree in sorted(PERIODIQUES.items()):
+        with _verrou(nom) as detenu:
+            if not detenu:
+                continue
+            try:
+                resultat[nom] = _traiter(entree, maintenant)
+            except Exception as exc:  # noqa: BLE001 - une entrée n'arrête pas les autres
+                logger.exception("Périodique %s en échec.", nom)
+                ExecutionPeriodique.objects.filter(nom=nom).update(
+                    dernier_statut=Tache.STATUT_ECHOUEE,
+                    derniere_erreur=str(exc)[:2000],
+                )
+
+    return resultat
+
+
+
+# ============================================================
+# BOUCLE
+# ============================================================
+
+class Planificateur:
+    """tick() toutes les `intervalle` secondes jusqu'à arreter()."""
+
+    def __init__(self, intervalle=INTERVALLE):
+        self.intervalle = intervalle
+        self.arret = threading.Event()
+
+    def arreter(self, *args):
+        self.arret.set()
+
+    def lancer(self):
+        try:
+            while not self.arret.is_set():
+                close_old_connections()
+                try:
+                    tick()
+                except Exception:  # noqa: BLE001 - base indisponible : on réessaie
+                    logger.exception("Planificateur : passage impossible.")
+                self.arret.wait(self.intervalle)
+        finally:
+            connections.close_all()
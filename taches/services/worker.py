@@ -0,0 +1,106 @@
+# taches/services/worker.py
+"""
+Worker de la file de tâches : N threads d'exécution par processus
+(connexion Django propre à chaque thread) et un thread de signes
+de vie ; en option, un thread planificateur (tâches périodiques).
+La commande run_worker lance un ou plusieurs processus.
+
+Arrêt (SIGTERM / SIGINT) : plus de nouvelle prise, les tâches en
+cours se terminent.
+"""
+
+import logging
+import os
+import socket
+import threading
+
+from django.db import close_old_connections, connections
+
+from taches.services.file import battre, executer, prendre, recuperer_orphelines
+from taches.services.planificateur import Planificateur
+
+logger = logging.getLogger(__name__)
+
+# Secondes entre deux signes de vie
+INTERVALLE_BATTEMENT = 30
+
+
+class Worker:
+
+    def __init__(self, threads=1, pause=1.0, noms=None, planificateur=False):
+        self.threads = max(1, threads)
+        self.pause = pause
+        self.noms = noms
+        self.arret = threading.Event()
+        self.en_cours = set()
+        self.verrou = threading.Lock()
+        self.identifiant = f"{socket.gethostname()}:{os.getpid()}"
+        self.planificateur = Planificateur() if planificateur else None
+
+    def arreter(self, *args):
+        self.arret.set()
+        if self.planificateur:
+            self.planificateur.arreter()
+
+    def _executer_une(self, nom_thread):
+        tache = prendre(f"{self.identifiant}:{nom_thread}", self.noms)
+        if tache is None:
+            return False
+
+        with self.verrou:
+            self.en_cours.add(tache.pk)
+        try:
+            executer(tache)
+        finally:
+            with self.verrou:
+                self.en_cours.discard(tache.pk)
+        return True
+
+    def _boucle(self):
+        nom_thread = threading.current_thread().name
+        try:
+            while not self.arret.is_set():
+                close_old_connections()
+                try:
+                    occupe = self._executer_une(nom_thread)
+                except Exception:  # noqa: BLE001 - base indisponible : on réessaie
+                    logger.exception("Worker %s : prise impossible.", nom_thread)
+                    occupe = False
+
+                if not occupe:
+                    self.arret.wait(self.pause)
+        finally:
+            connections.close_all()
+
+    def _battements(self):
+        try:
+            while not self.arret.wait(INTERVALLE_BATTEMENT):
+                close_old_connections()
+                try:
+                    with self.verrou:
+                        ids = list(self.en_cours)
+                    battre(ids)
+                    recuperer_orphelines()
+                except Exception:  # noqa: BLE001
+                    logger.exception("Worker : signe de vie impossible.")
+        finally:
+            connections.close_all()
+
+    def lancer(self):
+        """Bloquant jusqu'à arreter() puis fin des tâches en cours."""
+        executants = [
+            threading.Thread(target=self._boucle, name=f"t{n}")
+            for n in range(self.threads)
+        ]
+        battement = threading.Thread(target=self._battements, name="battement", daemon=True)
+
+        for thread in executants:
+            thread.start()
+        battement.start()
+        if self.planificateur:
+            threading.Thread(
+                target=self.planificateur.lancer, name="planificateur", daemon=True
+            ).start()
+
+        for thread in executants:
+            thread.join()
@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.constants import UserRole
+from accounts.models import Utilisateur
+from taches.models import Tache
+from taches.registre import tache
+from taches.services.file import (
+    TacheError,
+    executer,
+    planifier,
+    prendre,
+    recuperer_orphelines,
+)
+from tenants.models import Tenant
+
+
+@tache("tests.addition")
+def addition(tache_en_cours, a, b):
+    tache_en_cours.progresser(50, "calcul")
+    return {"somme": a + b}
+
+
+@tache("tests.echec", max_tentatives=2)
+def echec(tache_en_cours):
+    raise RuntimeError("boum")
+
+
+@override_settings(TACHES_CONCURRENCE_TENANT=1, TACHES_BACKOFF_BASE=30, TACHES_BACKOFF_MAX=3600)
+class FileTachesTestCase(TestCase):
+
+    def setUp(self):
+        self.tenant = Tenant.objects.create(nom="Tenant A", type_structure="SA")
+        self.autre = Tenant.objects.create(nom="Tenant B", type_structure="SA")
+
+    def test_execution_reussie(self):
+        planifiee = planifier("tests.addition", {"a": 2, "b": 3}, tenant_id=self.tenant.id)
+
+        prise = prendre("test")
+        self.assertEqual(prise.pk, planifiee.pk)
+        self.assertEqual(prise.statut, Tache.STATUT_EN_COURS)
+        self.assertIsNone(prendre("test"))
+
+        self.assertEqual(executer(prise), Tache.STATUT_REUSSIE)
+        prise.refresh_from_db()
+        self.assertEqual(prise.resultat, {"somme": 5})
+        self.assertEqual(prise.progression, 100)
+
+    def test_tache_inconnue(self):
+        with self.assertRaises(TacheError):
+            planifier("tests.inexistante")
+
+    def test_relance_puis_echec(self):
+        planifier("tests.echec")
+
+        self.assertEqual(executer(prendre("test")), Tache.STATUT_EN_ATTENTE)
+        relancee = Tache.objects.get()
+        self.assertGreater(relancee.executer_apres, timezone.now())
+        self.assertIn("boum", relancee.derniere_erreur)
+
+        # Attente de relance non écoulée
+        self.assertIsNone(prendre("test"))
+
+        Tache.objects.update(executer_apres=timezone.now())
+        self.assertEqual(executer(prendre("test")), Tache.STATUT_ECHOUEE)
+
+    def test_priorite_et_concurrence_par_tenant(self):
+        planifier("tests.addition", {"a": 1, "b": 1}, tenant_id=self.tenant.id, priorite=10)
+        planifier("tests.addition", {"a": 1, "b": 1}, tenant_id=self.tenant.id, priorite=10)
+        lente = planifier("tests.addition", {"a": 1, "b": 1}, tenant_id=self.autre.id, priorite=50)
+
+        premiere = prendre("test")
+        self.assertEqual(premiere.tenant_id, self.tenant.id)
+
+        # Tenant A saturé (limite 1) : la tâche moins prioritaire de B passe
+        self.assertEqual(prendre("test").pk, lente.pk)
+        self.assertIsNone(prendre("test"))
+
+    def test_orpheline_remise_en_file(self):
+        planifier("tests.addition", {"a": 1, "b": 1})
+        prise = prendre("test")
+        Tache.objects.filter(pk=prise.pk).update(
+            battement_le=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(recuperer_orphelines(), 1)
+        self.assertEqual(Tache.objects.get().statut, Tache.STATUT_EN_ATTENTE)
+
+    def test_suivi_api(self):
+        admin = Utilisateur.objects.create_user(
+            username="admin",
+            password="test1234",
+            tenant=self.tenant,
+            role=UserRole.ADMIN_TENANT_STATION,
+        )
+        mienne = planifier("tests.addition", {"a": 1, "b": 1}, tenant_id=self.tenant.id)
+        planifier("tests.addition", {"a": 1, "b": 1}, tenant_id=self.autre.id)
+
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        response = client.get("/api/v1/taches/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+
+        response = client.get(f"/api/v1/taches/{mienne.pk}/")
+        self.assertEqual(response.data["statut"], Tache.STATUT_EN_ATTENTE)
+
+        response = client.post(f"/api/v1/taches/{mienne.pk}/annuler/")
+        self.assertEqual(response.data["statut"], Tache.STATUT_ANNULEE)
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from taches.cron import Cron, CronError
+from taches.models import ExecutionPeriodique, Tache
+from taches.registre import PERIODIQUES, RATTRAPAGE_TOUTES, periodique, tache
+from taches.services.file import executer, prendre
+from taches.services.planificateur import tick
+
+
+@tache("tests.periodique")
+def tache_periodique(tache_en_cours, jour=None):
+    return {"jour": jour}
+
+
+class CronTestCase(SimpleTestCase):
+
+    def test_suivante(self):
+        depart = datetime(2026, 3, 14, 10, 7)
+
+        self.assertEqual(Cron("*/15 * * * *").suivante(depart), datetime(2026, 3, 14, 10, 15))
+        self.assertEqual(Cron("30 0 * * *").suivante(depart), datetime(2026, 3, 15, 0, 30))
+        # Lundi suivant (le 14 mars 2026 est un samedi)
+        self.assertEqual(Cron("0 8 * * 1").suivante(depart), datetime(2026, 3, 16, 8, 0))
+        # Dimanche : 0 et 7
+        self.assertEqual(Cron("0 8 * * 7").suivante(depart), datetime(2026, 3, 15, 8, 0))
+        self.assertEqual(Cron("0 3 2 * *").suivante(depart), datetime(2026, 4, 2, 3, 0))
+
+    def test_jour_ou_semaine(self):
+        # Le 1er du mois OU un vendredi
+        cron = Cron("0 0 1 * 5")
+        self.assertEqual(cron.suivante(datetime(2026, 3, 14)), datetime(2026, 3, 20))
+        self.assertEqual(cron.suivante(datetime(2026, 3, 28)), datetime(2026, 4, 1))
+
+    def test_echeances_limitees(self):
+        cron = Cron("0 * * * *")
+        debut, fin = datetime(2026, 3, 14, 0, 0), datetime(2026, 3, 14, 5, 30)
+
+        self.assertEqual(len(cron.echeances(debut, fin)), 5)
+        self.assertEqual(cron.echeances(debut, fin, 1), [datetime(2026, 3, 14, 5, 0)])
+
+    def test_expressions_invalides(self):
+        for expression in ("* * * *", "60 * * * *", "*/0 * * * *", "a * * * *", "0 0 31 2 *"):
+            with self.assertRaises(CronError, msg=expression):
+                Cron(expression).suivante(datetime(2026, 1, 1))
+
+
+class PlanificateurTestCase(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(PERIODIQUES, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.maintenant = timezone.localtime().replace(
+            hour=12, minute=0, second=0, microsecond=0
+        )
+
+    def _etat(self, nom):
+        return ExecutionPeriodique.objects.get(nom=nom)
+
+    def test_premier_passage_sans_declenchement(self):
+        periodique("horaire", "0 * * * *", "tests.periodique")
+
+        self.assertEqual(tick(self.maintenant), {"horaire": []})
+        etat = self._etat("horaire")
+        self.assertEqual(etat.derniere_echeance, self.maintenant)
+        self.assertEqual(etat.prochaine_echeance, self.maintenant + timedelta(hours=1))
+        self.assertFalse(Tache.objects.exists())
+
+    def test_une_seule_execution_par_echeance(self):
+        periodique("horaire", "0 * * * *", "tests.periodique")
+        tick(self.maintenant)
+
+        plus_tard = self.maintenant + timedelta(hours=1, minutes=1)
+        self.assertEqual(len(tick(plus_tard)["horaire"]), 1)
+        # Second nœud / second passage sur la même échéance
+        self.assertEqual(tick(plus_tard)["horaire"], [])
+        self.assertEqual(Tache.objects.count(), 1)
+        self.assertEqual(self._etat("horaire").executions, 1)
+
+    def test_rattrapage(self):
+        periodique("derniere", "0 * * * *", "tests.periodique")
+        periodique(
+            "toutes", "0 * * * *", "tests.periodique",
+            arguments=lambda echeance: {"jour": echeance.isoformat()},
+            rattrapage=RATTRAPAGE_TOUTES,
+        )
+        tick(self.maintenant)
+
+        # Arrêt de 4 h
+        resultat = tick(self.maintenant + timedelta(hours=4, minutes=30))
+        self.assertEqual(len(resultat["derniere"]), 1)
+        self.assertEqual(len(resultat["toutes"]), 4)
+        self.assertEqual(
+            resultat["toutes"][0].arguments,
+            {"jour": (self.maintenant + timedelta(hours=1)).isoformat()},
+        )
+        self.assertEqual(
+            self._etat("derniere").derniere_echeance,
+            self.maintenant + timedelta(hours=4),
+        )
+
+    def test_issue_recopiee(self):
+        periodique("horaire", "0 * * * *", "tests.periodique")
+        tick(self.maintenant)
+        tick(self.maintenant + timedelta(hours=1))
+
+        etat = self._etat("horaire")
+        self.assertEqual(etat.dernier_statut, Tache.STATUT_EN_ATTENTE)
+
+        self.assertEqual(executer(prendre("test")), Tache.STATUT_REUSSIE)
+        etat.refresh_from_db()
+        self.assertEqual(etat.dernier_statut, Tache.STATUT_REUSSIE)
+        self.assertIsNotNone(etat.derniere_duree)
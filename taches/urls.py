@@ -0,0 +1,11 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from .views import TacheViewSet
+
+router = DefaultRouter()
+router.register("", TacheViewSet, basename="taches")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
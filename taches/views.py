@@ -0,0 +1,52 @@
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.viewsets import ReadOnlyModelViewSet
+
+from accounts.constants import UserRole
+from taches.models import Tache
+from taches.serializers import TacheSerializer
+from taches.services.file import annuler
+
+ROLES_ADMIN = (UserRole.ADMIN_TENANT_STATION, UserRole.ADMIN_TENANT_FINANCE)
+
+
+class TacheViewSet(ReadOnlyModelViewSet):
+    """
+    Suivi des tâches de fond (polling de la progression).
+    SuperAdmin : toutes ; admin tenant : celles du tenant ;
+    autres : celles qu'ils ont lancées.
+    """
+
+    serializer_class = TacheSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        qs = Tache.objects.all()
+
+        if user.is_superuser or user.role == UserRole.SUPERADMIN:
+            pass
+        elif user.role in ROLES_ADMIN:
+            qs = qs.filter(tenant_id=user.tenant_id)
+        else:
+            qs = qs.filter(tenant_id=user.tenant_id, cree_par=user)
+
+        statut = self.request.query_params.get("statut")
+        if statut:
+            qs = qs.filter(statut=statut)
+
+        return qs
+
+    @action(detail=True, methods=["post"])
+    def annuler(self, request, pk=None):
+        tache = self.get_object()
+
+        if not annuler(tache):
+            return Response(
+                {"detail": "Tâche déjà prise ou terminée."},
+                status=409
+            )
+
+        tache.refresh_from_db()
+        return Response(TacheSerializer(tache).data)